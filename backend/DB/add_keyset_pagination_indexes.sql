@@ -0,0 +1,26 @@
+-- ============================================================================
+-- SQL Script: Indexes for Keyset (Cursor) Pagination
+-- ============================================================================
+-- Purpose: Listing pasien, rekam medis dan riwayat kalkulator/metrik memakai
+--          cursor (auth/core/pagination.py) dengan urutan DESC pada
+--          (timestamp, id). Index berikut membuat setiap halaman menjadi satu
+--          range scan, sehingga halaman ke-N sama murahnya dengan halaman 1.
+-- ============================================================================
+
+USE healthkon;
+
+-- GET /patients, /patients/search: ORDER BY created_at DESC, id DESC
+ALTER TABLE users
+ADD INDEX idx_users_created_id (created_at, id);
+
+-- GET /medical-records/patient/{id}/records, /medical-records/my-records
+ALTER TABLE medical_records
+ADD INDEX idx_records_patient_visit_id (patient_id, visit_date, record_id);
+
+-- GET /calculator/history
+ALTER TABLE health_calculations
+ADD INDEX idx_calc_user_calculated_id (user_id, calculated_at, id);
+
+-- GET /metrics
+ALTER TABLE health_metrics
+ADD INDEX idx_metrics_user_recorded_id (user_id, recorded_at, id);
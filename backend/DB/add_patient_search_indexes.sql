@@ -0,0 +1,29 @@
+-- ============================================================================
+-- SQL Script: Indexes for Patient Search (staff search box)
+-- ============================================================================
+-- Purpose: rm_service/services/patient_search.py mengganti LOWER(...) LIKE
+--          '%q%' (full table scan) dengan lookup yang dilayani index:
+--          - prefix LIKE 'q%' untuk KTP, KK, telepon dan email (B-tree)
+--          - ngram FULLTEXT untuk nama (substring + toleran typo)
+--
+-- ngram_token_size default = 2 (bigram), cocok untuk nama Indonesia yang
+-- pendek. Tanpa script ini search otomatis kembali ke LIKE scan lama.
+-- ============================================================================
+
+USE healthkon;
+
+-- Nama: phrase match (BOOLEAN MODE) dan typo-tolerant (NATURAL LANGUAGE MODE)
+ALTER TABLE users
+ADD FULLTEXT INDEX idx_ft_users_name (name) WITH PARSER ngram
+COMMENT 'ngram full-text index for patient name search';
+
+-- Nama: prefix untuk query 1 karakter (lebih pendek dari ngram token)
+ALTER TABLE users
+ADD INDEX idx_users_name (name);
+
+-- Identitas: prefix lookup (ktpNumber sudah UNIQUE, email sudah UNIQUE)
+ALTER TABLE users
+ADD INDEX idx_users_kk_number (kkNumber);
+
+ALTER TABLE users
+ADD INDEX idx_users_phone_number (phoneNumber);
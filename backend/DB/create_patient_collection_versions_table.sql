@@ -0,0 +1,33 @@
+-- ============================================================================
+-- SQL Script: Patient Collection Versions (ETag / 304 for mobile list endpoints)
+-- ============================================================================
+-- Purpose: Versi per pasien per koleksi (records, diagnoses, prescriptions,
+--          lab_results, allergies, documents). rm_service_mobile memakai versi
+--          ini sebagai ETag /medical-records/my-records, /allergies/my-allergies,
+--          /prescriptions/my-medications dan /medical-documents/my-documents;
+--          request dengan If-None-Match yang masih cocok dijawab 304 tanpa
+--          menjalankan query list.
+--
+-- Dinaikkan oleh auth/core/data_versions.py:bump_patient_data_version
+-- (parameter collections) di transaksi yang sama dengan penulisan data.
+-- Data yang ditulis langsung lewat SQL (misalnya insert_dummy_*.sql) tidak
+-- menaikkan versi: jalankan UPDATE di bagian bawah setelahnya.
+-- ============================================================================
+
+USE healthkon;
+
+CREATE TABLE IF NOT EXISTS patient_collection_versions (
+    patient_id INT NOT NULL,                        -- FK to users.id
+    collection VARCHAR(32) NOT NULL,                -- records, diagnoses, prescriptions, lab_results, allergies, documents
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,  -- Last-Modified
+    PRIMARY KEY (patient_id, collection),
+    INDEX idx_collection_updated (collection, updated_at),  -- Change feed (rag_service document index)
+    FOREIGN KEY (patient_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Invalidate every cached copy after bulk SQL changes (clients re-download once)
+-- UPDATE patient_collection_versions SET version = version + 1;
+
+-- Tabel yang dibuat sebelum index change feed ditambahkan:
+-- ALTER TABLE patient_collection_versions ADD INDEX idx_collection_updated (collection, updated_at);
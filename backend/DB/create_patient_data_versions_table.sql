@@ -0,0 +1,26 @@
+-- ============================================================================
+-- SQL Script: Patient Data Versions (cache invalidation across services)
+-- ============================================================================
+-- Purpose: Satu counter per pasien yang dinaikkan setiap kali data pasien
+--          ditulis (rekam medis, diagnosis, resep, lab, alergi, dokumen,
+--          perhitungan dan metrik kesehatan). Cache di service lain (misalnya
+--          negative-result cache RAG mobile) membandingkan versi ini untuk
+--          mengetahui apakah data pasien sudah berubah.
+--
+-- Dinaikkan oleh auth/core/data_versions.py:bump_patient_data_version di
+-- transaksi yang sama dengan penulisan data.
+-- ============================================================================
+
+USE healthkon;
+
+CREATE TABLE IF NOT EXISTS patient_data_versions (
+    patient_id INT NOT NULL,                        -- FK to users.id
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (patient_id),
+    INDEX idx_updated_at (updated_at),  -- Change feed (history summary poller)
+    FOREIGN KEY (patient_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tabel yang sudah ada sebelum change feed:
+-- ALTER TABLE patient_data_versions ADD INDEX idx_updated_at (updated_at);
@@ -0,0 +1,27 @@
+-- ============================================================================
+-- SQL Script: Patient History Summaries (RAG long-range history tiers)
+-- ============================================================================
+-- Purpose: Menyimpan ringkasan riwayat rekam medis per pasien per periode
+--          (tahun untuk tahun-tahun sebelumnya, kuartal untuk tahun berjalan)
+--          sehingga RAG bisa menyertakan riwayat jangka panjang dengan biaya
+--          token yang tetap.
+--
+-- Diisi dan di-refresh secara incremental oleh background summarizer di
+-- rag_service/services/history_summary.py (hanya periode yang berubah).
+-- ============================================================================
+
+USE healthkon;
+
+CREATE TABLE IF NOT EXISTS patient_history_summaries (
+    patient_id INT NOT NULL,                        -- FK to users.id
+    period_key VARCHAR(10) NOT NULL,                -- Contoh: 2023, 2025-Q2
+    period_type ENUM('year', 'quarter') NOT NULL,
+    period_start DATE NOT NULL,
+    record_count INT NOT NULL DEFAULT 0,
+    source_signature VARCHAR(64) NOT NULL,          -- record_count:fact_count:checksum isi, untuk deteksi perubahan
+    summary_text TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (patient_id, period_key),
+    FOREIGN KEY (patient_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_patient_period_start (patient_id, period_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
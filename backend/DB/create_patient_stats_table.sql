@@ -0,0 +1,28 @@
+-- ============================================================================
+-- SQL Script: Patient Stats (per-patient counters for relations summaries)
+-- ============================================================================
+-- Purpose: /relations/patient/{id}/summary dan /relations/my-data-summary
+--          sebelumnya LEFT JOIN enam tabel (row explosion records x diagnoses
+--          x prescriptions x labs x allergies x docs sebelum COUNT DISTINCT).
+--          Counter disimpan di sini bersama versi patient_data_versions saat
+--          dihitung; selama versinya sama, summary cukup satu lookup PK.
+--
+-- Dihitung ulang oleh rm_service/services/crud.py:get_patient_data_summary
+-- setelah penulisan data pasien. Butuh create_patient_data_versions_table.sql.
+-- ============================================================================
+
+USE healthkon;
+
+CREATE TABLE IF NOT EXISTS patient_stats (
+    patient_id INT NOT NULL,                        -- FK to users.id
+    data_version BIGINT UNSIGNED NOT NULL,          -- patient_data_versions.version at recount
+    total_medical_records INT UNSIGNED NOT NULL DEFAULT 0,
+    total_diagnoses INT UNSIGNED NOT NULL DEFAULT 0,
+    total_prescriptions INT UNSIGNED NOT NULL DEFAULT 0,
+    total_lab_results INT UNSIGNED NOT NULL DEFAULT 0,
+    total_allergies INT UNSIGNED NOT NULL DEFAULT 0,
+    total_documents INT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (patient_id),
+    FOREIGN KEY (patient_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,60 @@
+-- ============================================================================
+-- SQL Script: Local Read Replica (primary + replica MySQL 8 instances)
+-- ============================================================================
+-- Purpose: rm_service_mobile, rag_service, rag_service_mobile dan GET route
+--          service lain membaca dari replica jika DB_REPLICA_HOST di-set
+--          (lihat auth/core/read_routing.py). Script ini menyiapkan replikasi
+--          GTID antara dua instance lokal untuk mencoba routing tersebut.
+--
+-- Contoh dua instance dengan Docker (primary :3306, replica :3307):
+--   docker run -d --name healthkon-primary -p 3306:3306 -e MYSQL_ROOT_PASSWORD=root \
+--     mysql:8.0 --server-id=1 --log-bin=mysql-bin --gtid-mode=ON --enforce-gtid-consistency=ON
+--   docker run -d --name healthkon-replica -p 3307:3306 -e MYSQL_ROOT_PASSWORD=root \
+--     mysql:8.0 --server-id=2 --gtid-mode=ON --enforce-gtid-consistency=ON \
+--     --read-only=ON --super-read-only=ON
+--
+-- Jalankan BAGIAN 1 di primary, BAGIAN 2 di replica, lalu isi primary seperti
+-- biasa (create_*.sql). Semua perubahan ikut tereplikasi.
+--
+-- .env backend:
+--   DB_HOST=127.0.0.1  DB_PORT=3306
+--   DB_REPLICA_HOST=127.0.0.1  DB_REPLICA_PORT=3307
+--   DB_REPLICA_MAX_LAG=2  DB_READ_YOUR_WRITES_SECONDS=10
+-- Dua instance tanpa replikasi (misalnya hasil restore dump yang sama) juga bisa
+-- dipakai dengan DB_REPLICA_LAG_CHECK=false; data replica tidak ikut berubah.
+--
+-- Cek routing: python benchmarks/check_read_replica.py
+-- Status per service: GET /health/db/pool -> "replica"
+-- ============================================================================
+
+-- ----------------------------------------------------------------------------
+-- BAGIAN 1: di primary (mysql -h 127.0.0.1 -P 3306 -u root -p)
+-- ----------------------------------------------------------------------------
+CREATE USER IF NOT EXISTS 'repl'@'%' IDENTIFIED WITH mysql_native_password BY 'repl_password';
+GRANT REPLICATION SLAVE ON *.* TO 'repl'@'%';
+
+-- User aplikasi membaca status replikasi di replica (Seconds_Behind_Source)
+GRANT REPLICATION CLIENT ON *.* TO 'root'@'%';
+FLUSH PRIVILEGES;
+
+-- ----------------------------------------------------------------------------
+-- BAGIAN 2: di replica (mysql -h 127.0.0.1 -P 3307 -u root -p)
+-- ----------------------------------------------------------------------------
+-- Dengan Docker, host primary dari dalam container replica: host.docker.internal
+-- (Linux: tambahkan --add-host=host.docker.internal:host-gateway saat docker run)
+-- CHANGE REPLICATION SOURCE TO
+--     SOURCE_HOST = 'host.docker.internal',
+--     SOURCE_PORT = 3306,
+--     SOURCE_USER = 'repl',
+--     SOURCE_PASSWORD = 'repl_password',
+--     SOURCE_AUTO_POSITION = 1,
+--     GET_SOURCE_PUBLIC_KEY = 1;
+-- START REPLICA;
+
+-- Verifikasi: Replica_IO_Running = Yes, Replica_SQL_Running = Yes,
+-- Seconds_Behind_Source = 0
+-- SHOW REPLICA STATUS\G
+
+-- Simulasi replica bermasalah (Seconds_Behind_Source NULL -> reads ke primary
+-- paling lambat setelah DB_REPLICA_CHECK_INTERVAL detik):
+-- STOP REPLICA SQL_THREAD;   ... lalu START REPLICA SQL_THREAD;
@@ -3,23 +3,23 @@ Authentication routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from ...core.database import get_db
+from ...core.async_database import get_async_db
 from ...models.user import User
 from ...schemas.user import UserCreate, UserResponse, Token
 from ...core.dependencies import get_current_active_user
-from ...services.crud import authenticate_user, create_user, check_user_exists
+from ...services.crud_async import authenticate_user, create_user, check_user_exists
 from ...services.security import create_access_token
 from ...core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 
 router = APIRouter(prefix="", tags=["Authentication"])
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    exists, message = check_user_exists(db, user.email, user.ktpNumber)
+    exists, message = await check_user_exists(db, user.email, user.ktpNumber)
     if exists:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -35,17 +35,17 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         "ktpNumber": user.ktpNumber,
         "kkNumber": user.kkNumber
     }
-    db_user = create_user(db, user_data)
+    db_user = await create_user(db, user_data)
     return db_user
 
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login and get JWT token"""
     # form_data.username is used for email in this case (OAuth2 standard)
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -4,7 +4,7 @@ Health check and database connection status endpoints
 import asyncio
 from fastapi import APIRouter, HTTPException, status
 from sqlalchemy import text
-from ...core.database import engine
+from ...core.database import engine, get_pool_stats
 
 router = APIRouter(prefix="/health", tags=["Health Check"])
 
@@ -53,6 +53,11 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@router.get("/db/pool")
+async def db_pool_stats():
+    """Connection pool statistics of this process (checked out, overflow, wait time)"""
+    return get_pool_stats()
+
 @router.get("/db")
 async def check_database_connection():
     """
@@ -2,10 +2,10 @@
 Petugas (Staff/Officer) routes for backoffice
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from typing import List
-from ...core.database import get_db
+from ...core.async_database import get_async_db
 from ...models.petugas import Petugas
 from ...schemas.petugas import (
     PetugasCreate, 
@@ -14,7 +14,7 @@ from ...schemas.petugas import (
     PetugasLoginRequest
 )
 from ...core.dependencies import get_current_active_user, get_current_active_petugas
-from ...services.crud import (
+from ...services.crud_async import (
     authenticate_petugas,
     create_petugas,
     get_petugas_by_id,
@@ -31,7 +31,7 @@ router = APIRouter(prefix="/petugas", tags=["Petugas (Backoffice)"])
 @router.post("/register", response_model=PetugasResponse, status_code=status.HTTP_201_CREATED)
 async def register_petugas(
     petugas: PetugasCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new petugas (Staff/Officer)
@@ -43,7 +43,7 @@ async def register_petugas(
     # For now, allow public registration for initial setup
     
     # Check if petugas already exists
-    exists, message = check_petugas_exists(db, petugas.email, petugas.nip)
+    exists, message = await check_petugas_exists(db, petugas.email, petugas.nip)
     if exists:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -62,20 +62,20 @@ async def register_petugas(
         "role": role_value,  # Will be converted to enum in create_petugas
         "specialization": petugas.specialization
     }
-    db_petugas = create_petugas(db, petugas_data)
+    db_petugas = await create_petugas(db, petugas_data)
     return PetugasResponse.model_validate(db_petugas)
 
 @router.post("/login", response_model=dict)
 async def login_petugas(
     login_data: PetugasLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login petugas and get JWT token
     
     **Note:** This is separate from user login - petugas use different credentials
     """
-    petugas = authenticate_petugas(db, login_data.email, login_data.password)
+    petugas = await authenticate_petugas(db, login_data.email, login_data.password)
     if not petugas:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -111,7 +111,7 @@ async def get_all_petugas_list(
     skip: int = 0,
     limit: int = 100,
     current_petugas: Petugas = Depends(get_current_active_petugas),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all petugas - Only admin can access"""
     # Check if current petugas is admin
@@ -121,19 +121,19 @@ async def get_all_petugas_list(
             detail="Only admin can view all petugas"
         )
     
-    petugas_list = get_all_petugas(db, skip, limit)
+    petugas_list = await get_all_petugas(db, skip, limit)
     return [PetugasResponse.model_validate(p) for p in petugas_list]
 
 @router.get("/{petugas_id}", response_model=PetugasResponse)
 async def get_petugas(
     petugas_id: int,
     current_petugas: Petugas = Depends(get_current_active_petugas),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get petugas by ID"""
     # Admin can view any petugas, others can only view themselves
     if hasattr(current_petugas, 'role') and current_petugas.role.value == "ADMIN":
-        petugas = get_petugas_by_id(db, petugas_id)
+        petugas = await get_petugas_by_id(db, petugas_id)
     else:
         # Non-admin can only view themselves
         if current_petugas.id != petugas_id:
@@ -153,7 +153,7 @@ async def update_petugas_route(
     petugas_id: int,
     petugas_update: PetugasUpdate,
     current_petugas: Petugas = Depends(get_current_active_petugas),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update petugas"""
     # Admin can update any petugas, others can only update themselves
@@ -177,7 +177,7 @@ async def update_petugas_route(
     petugas_data = petugas_update.model_dump(exclude_unset=True)
     # Role will be converted to enum in update_petugas function
     
-    updated_petugas = update_petugas(db, petugas_id, petugas_data)
+    updated_petugas = await update_petugas(db, petugas_id, petugas_data)
     if not updated_petugas:
         raise HTTPException(status_code=404, detail="Petugas not found")
     
@@ -187,7 +187,7 @@ async def update_petugas_route(
 async def delete_petugas_route(
     petugas_id: int,
     current_petugas: Petugas = Depends(get_current_active_petugas),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete petugas - Only admin can delete"""
     # Only admin can delete
@@ -204,7 +204,7 @@ async def delete_petugas_route(
             detail="Cannot delete yourself"
         )
     
-    success = delete_petugas(db, petugas_id)
+    success = await delete_petugas(db, petugas_id)
     if not success:
         raise HTTPException(status_code=404, detail="Petugas not found")
     return None
@@ -0,0 +1,144 @@
+"""
+Async database sessions for FastAPI routes
+
+Semua route adalah `async def`, tetapi CRUD memakai Session sinkron (PyMySQL), sehingga
+setiap round trip DB memblokir event loop dan satu worker hanya melayani satu request.
+
+Modul ini menyediakan dependency get_async_db yang selalu memberi session dengan API
+asyncio SQLAlchemy (await db.execute(...), await db.run_sync(...), await db.commit()):
+- DB_ASYNC_DRIVER=asyncmy / aiomysql: AsyncSession di atas async engine; CRUD sinkron
+  yang ada dijalankan lewat run_sync (I/O lewat driver async, event loop tidak terblokir)
+- Tanpa driver async: ThreadedSession, Session sinkron yang setiap operasinya
+  dijalankan di threadpool
+
+Dengan DB_REPLICA_HOST, get_async_db membaca GET/HEAD dari replica dan
+get_async_read_db (service read-only) membaca semua route dari replica; lihat read_routing.py.
+
+async_crud membungkus fungsi CRUD `fn(db, ...)` menjadi versi async dengan signature
+yang sama, dipakai oleh modul services/crud_async.py di setiap service.
+"""
+from typing import Any, Callable
+import functools
+
+from fastapi import Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .config import DB_ASYNC_DRIVER, DB_REPLICA_HOST, DB_REPLICA_PORT, DB_REPLICA_USER, DB_REPLICA_PASSWORD
+from .database import SessionLocal, open_replica_session, replica_engine
+from .db_pool import create_async_engine_for_driver
+from .read_routing import replica_health, routes_to_replica, watch_replica_errors
+
+_ASYNC_DRIVERS = ("asyncmy", "aiomysql")
+
+
+def _create_async_session_factory(replica: bool = False):
+    if not DB_ASYNC_DRIVER:
+        return None, None
+    if DB_ASYNC_DRIVER not in _ASYNC_DRIVERS:
+        if not replica:
+            print(f"[Async DB] Unknown DB_ASYNC_DRIVER '{DB_ASYNC_DRIVER}', must be one of {_ASYNC_DRIVERS}; using threadpool sessions")
+        return None, None
+    try:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        if replica:
+            engine = create_async_engine_for_driver(
+                DB_ASYNC_DRIVER, DB_REPLICA_HOST, DB_REPLICA_PORT, DB_REPLICA_USER, DB_REPLICA_PASSWORD,
+                name="replica_async"
+            )
+            watch_replica_errors(engine.sync_engine)
+            return engine, async_sessionmaker(engine, expire_on_commit=False, autoflush=False, info={"replica": True})
+        engine = create_async_engine_for_driver(DB_ASYNC_DRIVER)
+        # expire_on_commit=False: returned ORM objects stay readable without lazy reloads
+        return engine, async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    except ImportError as e:
+        if not replica:
+            print(f"[Async DB] Driver {DB_ASYNC_DRIVER} not available ({str(e)}); using threadpool sessions")
+        return None, None
+
+
+async_engine, AsyncSessionLocal = _create_async_session_factory()
+async_replica_engine, AsyncReplicaSessionLocal = (
+    _create_async_session_factory(replica=True) if DB_REPLICA_HOST else (None, None)
+)
+
+
+class ThreadedSession:
+    """AsyncSession-compatible facade over a sync Session, every call runs in the threadpool"""
+    __slots__ = ("sync_session",)
+
+    def __init__(self, sync_session: Session):
+        self.sync_session = sync_session
+
+    async def execute(self, statement, params=None):
+        # PyMySQL buffers result rows, fetching them afterwards does not block
+        return await run_in_threadpool(self.sync_session.execute, statement, params)
+
+    async def run_sync(self, fn: Callable, *args, **kwargs) -> Any:
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+async def _open_async_replica_session():
+    """AsyncSession with a checked-out replica connection, None if the replica should not be used"""
+    if AsyncReplicaSessionLocal is None:
+        return None
+    if replica_health.due():
+        # The lag check runs on the sync replica engine
+        await run_in_threadpool(replica_health.refresh, replica_engine)
+    if not replica_health.healthy:
+        return None
+    db = AsyncReplicaSessionLocal()
+    try:
+        await db.connection()
+        return db
+    except Exception as e:
+        await db.close()
+        replica_health.mark_failed(e)
+        return None
+
+
+async def _open_async_session(request: Request, read_only_service: bool):
+    use_replica = routes_to_replica(request, read_only_service)
+    if AsyncSessionLocal is not None:
+        db = None
+        if use_replica and AsyncReplicaSessionLocal is not None:
+            db = await _open_async_replica_session()
+        return db or AsyncSessionLocal()
+    sync_db = await run_in_threadpool(open_replica_session) if use_replica else None
+    return ThreadedSession(sync_db or SessionLocal())
+
+
+async def get_async_db(request: Request):
+    """Dependency: AsyncSession (async driver configured) or ThreadedSession, GET/HEAD from the replica"""
+    db = await _open_async_session(request, read_only_service=False)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def get_async_read_db(request: Request):
+    """Dependency for read-only services: every route reads from the replica when configured"""
+    db = await _open_async_session(request, read_only_service=True)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def async_crud(fn: Callable) -> Callable:
+    """Async version of a sync CRUD function `fn(db, ...)` for get_async_db sessions"""
+    @functools.wraps(fn)
+    async def wrapper(db, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+    return wrapper
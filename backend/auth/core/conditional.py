@@ -0,0 +1,94 @@
+"""
+HTTP conditional requests (ETag / Last-Modified -> 304) for per-patient collections
+
+Aplikasi mobile mengunduh ulang daftar rekam medis, alergi, resep dan dokumen setiap
+kali layar dibuka, padahal data tersebut jarang berubah. Route list membaca versi
+koleksi (patient_collection_versions, lihat data_versions.py) lebih dulu:
+
+- If-None-Match cocok dengan ETag versi sekarang -> 304 tanpa query list maupun serialisasi
+- Tanpa If-None-Match, If-Modified-Since >= Last-Modified -> 304
+- Selain itu response normal dengan ETag, Last-Modified dan Cache-Control: private, no-cache
+  (client selalu revalidasi, cache bersama tidak menyimpan data pasien)
+
+ETag weak (W/"...") karena byte response bisa berbeda (orjson vs json) untuk versi yang sama.
+Versi dibaca sebelum list: penulisan di antaranya hanya membuat client mengunduh ulang
+sekali (ETag lama dengan data baru), tidak pernah 304 untuk data yang sudah berubah.
+Tanpa tabel versi koleksi, stamp None dan route melayani seperti sebelumnya.
+"""
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from .data_versions import get_patient_collection_version
+
+
+class CollectionStamp:
+    """Validators of one collection of one patient"""
+    __slots__ = ("etag", "last_modified")
+
+    def __init__(self, patient_id: int, collection: str, version: int, last_modified: Optional[int]):
+        self.etag = f'W/"{collection}-{patient_id}-{version}"'
+        self.last_modified = last_modified
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": "private, no-cache",
+            "Vary": "Authorization"
+        }
+        if self.last_modified is not None:
+            headers["Last-Modified"] = formatdate(self.last_modified, usegmt=True)
+        return headers
+
+    def matches(self, request: Request) -> bool:
+        """True if the client's cached copy is current (RFC 9110: If-None-Match wins over If-Modified-Since)"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_listed(if_none_match, self.etag)
+        if_modified_since = request.headers.get("if-modified-since")
+        if not if_modified_since or self.last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError, IndexError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return self.last_modified <= since.timestamp()
+
+
+def _etag_listed(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: W/"x" and "x" are the same entity tag
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def load_collection_stamp(db: Session, patient_id: int, collection: str) -> Optional[CollectionStamp]:
+    """Stamp for a collection (sync; await db.run_sync(load_collection_stamp, ...) in async routes)"""
+    version = get_patient_collection_version(db, patient_id, collection)
+    if version is None:
+        return None
+    return CollectionStamp(patient_id, collection, *version)
+
+
+def not_modified_response(request: Request, stamp: Optional[CollectionStamp]) -> Optional[Response]:
+    """304 response if the client already has this version, None to serve the collection"""
+    if stamp is None or not stamp.matches(request):
+        return None
+    return Response(status_code=304, headers=stamp.headers())
+
+
+def stamp_headers(stamp: Optional[CollectionStamp]) -> Dict[str, str]:
+    """Validator headers for a full response (empty without a stamp)"""
+    return stamp.headers() if stamp is not None else {}
@@ -63,6 +63,38 @@ def detect_mysql_port():
 
 DB_PORT = detect_mysql_port()
 
+# Connection pool sizing (one pool per process, see auth/core/db_pool.py)
+# Sizes are derived from the MySQL connection budget shared by all service processes
+# unless DB_POOL_SIZE / DB_MAX_OVERFLOW are set explicitly
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "120"))  # Budget below MySQL max_connections (default 151)
+DB_SERVICE_COUNT = int(os.getenv("DB_SERVICE_COUNT", "6"))  # Services started by running.py
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))  # Worker processes per service
+DB_POOL_SIZE = os.getenv("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = os.getenv("DB_MAX_OVERFLOW")
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # Seconds to wait for a free connection
+
+# Async database layer for FastAPI routes (SQLAlchemy asyncio)
+# asyncmy or aiomysql; empty = routes run the sync CRUD in the threadpool instead
+# With an async driver the process budget is split between the sync and async pools
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "").strip().lower()
+DB_ASYNC_POOL_SIZE = os.getenv("DB_ASYNC_POOL_SIZE")
+DB_ASYNC_MAX_OVERFLOW = os.getenv("DB_ASYNC_MAX_OVERFLOW")
+
+# Read replica (see auth/core/read_routing.py); empty host = every query goes to the primary
+# Read-only services (rm_service_mobile, rag_service, rag_service_mobile) and GET routes of the
+# other services read from the replica while it is reachable and within DB_REPLICA_MAX_LAG
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST", "").strip()
+DB_REPLICA_PORT = os.getenv("DB_REPLICA_PORT", "3306")
+DB_REPLICA_USER = os.getenv("DB_REPLICA_USER", DB_USER)
+DB_REPLICA_PASSWORD = os.getenv("DB_REPLICA_PASSWORD", DB_PASSWORD)
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "2"))  # Seconds behind the primary
+# false for replicas without SHOW REPLICA STATUS (managed services, two unlinked local instances)
+DB_REPLICA_LAG_CHECK = os.getenv("DB_REPLICA_LAG_CHECK", "true").lower() == "true"
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))  # Seconds between lag checks
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))  # Primary-only after a replica failure
+# Read-your-writes: reads of a client stay on the primary this long after its own write
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "10"))
+
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256") 
@@ -0,0 +1,193 @@
+"""
+Per-patient data version counter (shared by all services)
+
+Setiap penulisan data pasien (rekam medis, diagnosis, resep, lab, alergi, dokumen,
+perhitungan/metrik kesehatan) menaikkan patient_data_versions.version di transaksi
+yang sama. Cache lintas service (misalnya negative-result cache di rag_service_mobile)
+cukup membandingkan satu angka untuk tahu apakah data pasien sudah berubah.
+
+Selain itu setiap koleksi yang ditampilkan aplikasi mobile (rekam medis, diagnosis, resep,
+lab, alergi, dokumen) punya versi sendiri di patient_collection_versions, sehingga
+ETag /allergies/my-allergies tidak berubah ketika yang ditulis hanya resep
+(lihat auth/core/conditional.py).
+
+Tabel dibuat oleh DB/create_patient_data_versions_table.sql dan
+DB/create_patient_collection_versions_table.sql. Jika tabel belum ada, bump dilewati
+(tidak menggagalkan penulisan) dan pembaca mendapat None.
+"""
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+
+# patient_collection_versions.collection values
+RECORDS = "records"
+DIAGNOSES = "diagnoses"
+PRESCRIPTIONS = "prescriptions"
+LAB_RESULTS = "lab_results"
+ALLERGIES = "allergies"
+DOCUMENTS = "documents"
+# Deleting a medical record or moving it to another patient changes everything attached to it
+RECORD_COLLECTIONS = (RECORDS, DIAGNOSES, PRESCRIPTIONS, LAB_RESULTS, DOCUMENTS)
+
+_collection_versions_available = True
+
+
+def bump_patient_data_version(db: Session, patient_id: Any = None, record_id: Any = None,
+                              collections: Iterable[str] = ()) -> None:
+    """
+    Increment the data version of a patient (call before db.commit())
+    Ids may be read straight from ORM objects (Column-typed attributes), hence Any.
+    With only record_id, the patient is resolved from medical_records.
+    `collections` are the per-collection versions bumped alongside (RECORDS, ALLERGIES, ...).
+    """
+    if patient_id is None and record_id is None:
+        return
+    try:
+        # SAVEPOINT so a missing table never rolls back the caller's write
+        with db.begin_nested():
+            if patient_id is not None:
+                db.execute(text("""
+                    INSERT INTO patient_data_versions (patient_id, version)
+                    VALUES (:patient_id, 1)
+                    ON DUPLICATE KEY UPDATE version = version + 1
+                """), {"patient_id": patient_id})
+            else:
+                db.execute(text("""
+                    INSERT INTO patient_data_versions (patient_id, version)
+                    SELECT patient_id, 1 FROM medical_records WHERE record_id = :record_id
+                    ON DUPLICATE KEY UPDATE version = version + 1
+                """), {"record_id": record_id})
+    except Exception as e:
+        print(f"[Data Version] Error bumping version (patient={patient_id}, record={record_id}): {str(e)}")
+    if collections:
+        _bump_collection_versions(db, patient_id, record_id, collections)
+
+
+def _bump_collection_versions(db: Session, patient_id: Any, record_id: Any,
+                              collections: Iterable[str]) -> None:
+    if not _collection_versions_available:
+        return
+    try:
+        # Own SAVEPOINT: a missing collections table must not undo the patient version bump
+        with db.begin_nested():
+            if patient_id is not None:
+                db.execute(text("""
+                    INSERT INTO patient_collection_versions (patient_id, collection, version)
+                    VALUES (:patient_id, :collection, 1)
+                    ON DUPLICATE KEY UPDATE version = version + 1
+                """), [{"patient_id": patient_id, "collection": collection} for collection in collections])
+            else:
+                db.execute(text("""
+                    INSERT INTO patient_collection_versions (patient_id, collection, version)
+                    SELECT patient_id, :collection, 1 FROM medical_records WHERE record_id = :record_id
+                    ON DUPLICATE KEY UPDATE version = version + 1
+                """), [{"record_id": record_id, "collection": collection} for collection in collections])
+    except Exception as e:
+        _collection_versions_error(e)
+        print(f"[Data Version] Error bumping collections {tuple(collections)} (patient={patient_id}, record={record_id}): {str(e)}")
+
+
+def bump_patient_data_versions(db: Session, patient_ids: Iterable[Any], collections: Iterable[str] = ()) -> None:
+    """Bump several patients once each (e.g. a row moved from one patient to another)"""
+    collections = tuple(collections)
+    for patient_id in {patient_id for patient_id in patient_ids if patient_id is not None}:
+        bump_patient_data_version(db, patient_id=patient_id, collections=collections)
+
+
+def get_patient_data_version(db: Session, patient_id: int) -> Optional[int]:
+    """Current data version (0 if never written), None if the table is unavailable"""
+    try:
+        row = db.execute(
+            text("SELECT version FROM patient_data_versions WHERE patient_id = :patient_id"),
+            {"patient_id": patient_id}
+        ).first()
+        return int(row.version) if row else 0
+    except Exception as e:
+        print(f"[Data Version] Error reading version for patient {patient_id}: {str(e)}")
+        db.rollback()
+        return None
+
+
+def changed_patient_versions(db: Session, since: datetime) -> Optional[List[Tuple[int, int, datetime]]]:
+    """
+    (patient_id, version, updated_at) of every patient written at or after `since`
+    (database time, one-second resolution: callers skip versions they already
+    processed). None if the table is unavailable.
+    """
+    try:
+        rows = db.execute(text("""
+            SELECT patient_id, version, updated_at
+            FROM patient_data_versions
+            WHERE updated_at >= :since
+            ORDER BY updated_at
+        """), {"since": since}).fetchall()
+    except Exception as e:
+        print(f"[Data Version] Error reading changed patient versions: {str(e)}")
+        db.rollback()
+        return None
+    return [(int(row.patient_id), int(row.version), row.updated_at) for row in rows]
+
+
+def get_patient_collection_version(db: Session, patient_id: int, collection: str) -> Optional[Tuple[int, Optional[int]]]:
+    """
+    (version, last modified as unix seconds) of one collection of a patient
+    Version 0 if never written. Last modified is None until the second of the last
+    write has passed (HTTP dates have one-second resolution, a second write within
+    the same second would otherwise keep the same Last-Modified). None if the table
+    is unavailable.
+    """
+    if not _collection_versions_available:
+        return None
+    try:
+        row = db.execute(text("""
+            SELECT version, UNIX_TIMESTAMP(updated_at) AS modified, UNIX_TIMESTAMP() AS db_now
+            FROM patient_collection_versions
+            WHERE patient_id = :patient_id AND collection = :collection
+        """), {"patient_id": patient_id, "collection": collection}).first()
+    except Exception as e:
+        _collection_versions_error(e)
+        print(f"[Data Version] Error reading {collection} version for patient {patient_id}: {str(e)}")
+        db.rollback()
+        return None
+    if row is None:
+        return 0, None
+    modified = int(row.modified) if row.modified is not None else None
+    if modified is not None and modified >= int(row.db_now):
+        modified = None
+    return int(row.version), modified
+
+
+def _collection_versions_error(error: Exception) -> None:
+    """Stop using patient_collection_versions in this process if the table does not exist"""
+    global _collection_versions_available
+    if _collection_versions_available and "patient_collection_versions" in str(error) and "exist" in str(error):
+        _collection_versions_available = False
+        print("[Data Version] patient_collection_versions table missing "
+              "(run DB/create_patient_collection_versions_table.sql); ETags disabled")
+
+
+def changed_collection_versions(db: Session, collection: str,
+                                since: datetime) -> Optional[List[Tuple[int, int, datetime]]]:
+    """
+    (patient_id, version, updated_at) of one collection for every patient written at or
+    after `since` (database time, one-second resolution: callers skip versions they
+    already processed). None if the table is unavailable.
+    """
+    if not _collection_versions_available:
+        return None
+    try:
+        rows = db.execute(text("""
+            SELECT patient_id, version, updated_at
+            FROM patient_collection_versions
+            WHERE collection = :collection AND updated_at >= :since
+            ORDER BY updated_at
+        """), {"collection": collection, "since": since}).fetchall()
+    except Exception as e:
+        _collection_versions_error(e)
+        print(f"[Data Version] Error reading changed {collection} versions: {str(e)}")
+        db.rollback()
+        return None
+    return [(int(row.patient_id), int(row.version), row.updated_at) for row in rows]
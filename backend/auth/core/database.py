@@ -1,42 +1,100 @@
 """
 Database connection and session management
 """
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from typing import Optional
+
+from fastapi import Request
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
-from .config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
-
-# Database URL
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-
-# Create engine with connection timeout settings
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=QueuePool,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    pool_size=5,
-    max_overflow=10,
-    connect_args={
-        "connect_timeout": 10,  # Connection timeout in seconds
-        "read_timeout": 10,     # Read timeout in seconds
-        "write_timeout": 10,    # Write timeout in seconds
-        "charset": "utf8mb4",
-    }
+from sqlalchemy.orm import Session, sessionmaker
+from .config import DB_REPLICA_HOST, DB_REPLICA_PORT, DB_REPLICA_USER, DB_REPLICA_PASSWORD
+from .db_pool import create_sync_engine, get_pool_stats as get_engine_pool_stats
+from .read_routing import (
+    ReadYourWritesMiddleware,
+    replica_health,
+    routes_to_replica,
+    watch_replica_errors
 )
 
+# One engine (and pool) per process, sized from the connection budget (see db_pool.py)
+engine = create_sync_engine()
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replica (see read_routing.py); sessions carry info["replica"] = True
+replica_engine = None
+ReplicaSessionLocal = None
+if DB_REPLICA_HOST:
+    replica_engine = create_sync_engine(
+        DB_REPLICA_HOST, DB_REPLICA_PORT, DB_REPLICA_USER, DB_REPLICA_PASSWORD, name="replica"
+    )
+    watch_replica_errors(replica_engine)
+    ReplicaSessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=replica_engine, info={"replica": True}
+    )
+
 # Base class for models
 Base = declarative_base()
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
+
+def open_replica_session() -> Optional[Session]:
+    """Session with a checked-out replica connection, None if the replica should not be used"""
+    if ReplicaSessionLocal is None:
+        return None
+    if replica_health.due():
+        replica_health.refresh(replica_engine)
+    if not replica_health.healthy:
+        return None
+    db = ReplicaSessionLocal()
+    try:
+        # Check out now so an unreachable replica falls back to the primary for this request
+        db.connection()
+        return db
+    except Exception as e:
+        db.close()
+        replica_health.mark_failed(e)
+        return None
+
+
+def _open_session(request: Request, read_only_service: bool) -> Session:
+    db = open_replica_session() if routes_to_replica(request, read_only_service) else None
+    return db or SessionLocal()
+
+
+# Dependency to get DB session (GET routes read from the replica when configured)
+def get_db(request: Request):
+    db = _open_session(request, read_only_service=False)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency for read-only services: every route reads from the replica when configured
+def get_read_db(request: Request):
+    db = _open_session(request, read_only_service=True)
     try:
         yield db
     finally:
         db.close()
 
+
+@contextmanager
+def primary_session(db: Session):
+    """Session for a write made while serving a read: `db` itself unless it is a replica session"""
+    if not db.info.get("replica"):
+        yield db
+        return
+    primary = SessionLocal()
+    try:
+        yield primary
+    finally:
+        primary.close()
+
+
+def get_pool_stats():
+    """Pool usage of this process per engine plus the replica routing state"""
+    stats = get_engine_pool_stats()
+    stats["replica"] = replica_health.snapshot()
+    return stats
@@ -0,0 +1,198 @@
+"""
+Shared connection pool for every service process
+
+Sebelumnya setiap service (rm, rm mobile, rag, rag mobile, health calculator) membuat
+engine kedua (_auth_engine) hanya untuk lookup user dari token, di samping engine
+utama. Satu proses memegang dua QueuePool (masing-masing 5 + 10 overflow) ke database
+yang sama, dan seluruh fleet bisa menghabiskan max_connections MySQL.
+
+Modul ini adalah satu-satunya tempat engine dibuat:
+- Ukuran pool diturunkan dari budget koneksi: DB_MAX_CONNECTIONS dibagi jumlah service
+  (DB_SERVICE_COUNT) dan worker per service (WEB_CONCURRENCY); 2/3 pool tetap, sisanya
+  overflow. DB_POOL_SIZE / DB_MAX_OVERFLOW menimpa nilai turunan.
+- Dengan driver async (DB_ASYNC_DRIVER) budget proses dibagi dua untuk pool sync dan async
+- Statistik pool (checked out, overflow, waktu tunggu koneksi, timeout) tersedia lewat
+  get_pool_stats()
+"""
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+import threading
+import time
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import (
+    DB_USER,
+    DB_PASSWORD,
+    DB_HOST,
+    DB_PORT,
+    DB_NAME,
+    DB_MAX_CONNECTIONS,
+    DB_SERVICE_COUNT,
+    WEB_CONCURRENCY,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_ASYNC_DRIVER,
+    DB_ASYNC_POOL_SIZE,
+    DB_ASYNC_MAX_OVERFLOW
+)
+
+
+def _process_budget() -> int:
+    """Connections one service worker process may hold"""
+    processes = max(1, DB_SERVICE_COUNT) * max(1, WEB_CONCURRENCY)
+    budget = max(2, DB_MAX_CONNECTIONS // processes)
+    # Sync and async pools share the process budget
+    return max(2, budget // 2) if DB_ASYNC_DRIVER else budget
+
+
+def derive_pool_sizes(pool_size: Optional[str] = None, max_overflow: Optional[str] = None) -> Tuple[int, int]:
+    """(pool_size, max_overflow) from the connection budget, explicit settings win"""
+    budget = _process_budget()
+    derived_size = max(1, (budget * 2) // 3)
+    size = int(pool_size) if pool_size else derived_size
+    overflow = int(max_overflow) if max_overflow else max(0, budget - derived_size)
+    return size, overflow
+
+
+class PoolWaitStats:
+    """Time spent waiting for a connection from the pool"""
+    __slots__ = ("checkouts", "wait_seconds", "max_wait_seconds", "timeouts", "_lock")
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            if seconds > self.max_wait_seconds:
+                self.max_wait_seconds = seconds
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": round(self.wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "timeouts": self.timeouts
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that measures how long checkouts wait for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.observe(time.perf_counter() - started, timed_out=False)
+        return connection
+
+
+_engines: Dict[str, Union[Engine, "AsyncEngine"]] = {}
+_engines_lock = threading.Lock()
+
+
+def _register(name: str, engine: Union[Engine, "AsyncEngine"]) -> None:
+    with _engines_lock:
+        _engines[name] = engine
+
+
+def create_sync_engine(host: str = DB_HOST, port: str = DB_PORT, user: str = DB_USER,
+                       password: str = DB_PASSWORD, name: str = "sync"):
+    """The process-wide PyMySQL engine (primary by default, registered as `name`)"""
+    from sqlalchemy import create_engine
+
+    pool_size, max_overflow = derive_pool_sizes(DB_POOL_SIZE, DB_MAX_OVERFLOW)
+    engine = create_engine(
+        f"mysql+pymysql://{user}:{password}@{host}:{port}/{DB_NAME}",
+        poolclass=TimedQueuePool,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT,
+        connect_args={
+            "connect_timeout": 10,  # Connection timeout in seconds
+            "read_timeout": 10,     # Read timeout in seconds
+            "write_timeout": 10,    # Write timeout in seconds
+            "charset": "utf8mb4",
+        }
+    )
+    _register(name, engine)
+    return engine
+
+
+def create_async_engine_for_driver(driver: str, host: str = DB_HOST, port: str = DB_PORT, user: str = DB_USER,
+                                   password: str = DB_PASSWORD, name: str = "async"):
+    """The process-wide async engine (asyncmy / aiomysql), ImportError if the driver is missing"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+        """TimedQueuePool timing over the asyncio queue (MRO: AsyncAdaptedQueuePool before QueuePool)"""
+
+    pool_size, max_overflow = derive_pool_sizes(DB_ASYNC_POOL_SIZE, DB_ASYNC_MAX_OVERFLOW)
+    engine = create_async_engine(
+        f"mysql+{driver}://{user}:{password}@{host}:{port}/{DB_NAME}?charset=utf8mb4",
+        poolclass=TimedAsyncQueuePool,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT,
+        connect_args={"connect_timeout": 10}
+    )
+    _register(name, engine)
+    return engine
+
+
+def get_pool_stats() -> Dict:
+    """Pool usage of this process per engine (sync, async, replica, replica_async)"""
+    stats = {
+        "connection_budget": {
+            "max_connections": DB_MAX_CONNECTIONS,
+            "service_count": DB_SERVICE_COUNT,
+            "workers_per_service": WEB_CONCURRENCY,
+            "per_pool_budget": _process_budget()
+        },
+        "pools": {}
+    }
+    with _engines_lock:
+        engines = dict(_engines)
+    for name, engine in engines.items():
+        pool = engine.pool  # AsyncEngine proxies the pool of its sync engine
+        if not isinstance(pool, QueuePool):
+            stats["pools"][name] = {"status": pool.status()}
+            continue
+        entry = {
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow())
+        }
+        if isinstance(pool, TimedQueuePool):
+            entry.update(pool.wait_stats.snapshot())
+        stats["pools"][name] = entry
+    return stats
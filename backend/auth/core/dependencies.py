@@ -3,8 +3,8 @@ FastAPI dependencies for authentication
 """
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from .database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from .async_database import get_async_db
 from ..models.user import User
 from ..services.security import verify_token
 
@@ -13,7 +13,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current authenticated user from JWT token"""
     credentials_exception = HTTPException(
@@ -23,7 +23,7 @@ async def get_current_user(
     )
     
     token_data = verify_token(token)
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = await db.run_sync(lambda session: session.query(User).filter(User.email == token_data.email).first())
     
     if user is None:
         raise credentials_exception
@@ -41,7 +41,7 @@ async def get_current_active_user(
 # Petugas authentication dependencies
 async def get_current_petugas(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current authenticated petugas from JWT token"""
     from ..models.petugas import Petugas
@@ -56,7 +56,7 @@ async def get_current_petugas(
         token_data = verify_token(token)
         # Check if token is for petugas (has type field)
         # For now, we'll check if user exists in petugas table
-        petugas = db.query(Petugas).filter(Petugas.email == token_data.email).first()
+        petugas = await db.run_sync(lambda session: session.query(Petugas).filter(Petugas.email == token_data.email).first())
         
         if petugas is None:
             raise credentials_exception
@@ -76,7 +76,7 @@ async def get_current_active_petugas(
 # Universal dependency that works for both User and Petugas
 async def get_current_active_user_or_petugas(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current active user or petugas - tries user first, then petugas"""
     from ..models.petugas import Petugas
@@ -92,14 +92,14 @@ async def get_current_active_user_or_petugas(
         email = token_data.email
         
         # Try user first
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.run_sync(lambda session: session.query(User).filter(User.email == email).first())
         if user:
             if not user.is_active:
                 raise HTTPException(status_code=400, detail="Inactive user")
             return user
         
         # Try petugas
-        petugas = db.query(Petugas).filter(Petugas.email == email).first()
+        petugas = await db.run_sync(lambda session: session.query(Petugas).filter(Petugas.email == email).first())
         if petugas:
             if not petugas.is_active:
                 raise HTTPException(status_code=400, detail="Inactive petugas")
@@ -0,0 +1,57 @@
+"""
+Opaque keyset (cursor) pagination tokens (shared by all services)
+
+Listing diurutkan DESC pada (timestamp, id). Cursor menyimpan sort key baris
+terakhir halaman sebelumnya, sehingga halaman berikutnya cukup
+WHERE (ts, id) < (:ts, :id) ... LIMIT n lewat index, tanpa OFFSET scan.
+Token berupa base64url JSON; client harus memperlakukannya sebagai string opaque.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import ColumnElement, and_, or_
+
+
+def encode_cursor(sort_value: Any, row_id: Any) -> Optional[str]:
+    """Encode the sort key of the last row of a page (None if the row has no sort value)"""
+    if sort_value is None:
+        return None
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any]:
+    """
+    Decode a cursor produced by encode_cursor
+    Raises ValueError for malformed or tampered tokens (routes map this to 400).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(sort_value), row_id
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}") from e
+
+
+def keyset_before(sort_column, id_column, cursor: str) -> ColumnElement[bool]:
+    """Filter for rows after the cursor in (sort_column DESC, id_column DESC) order"""
+    sort_value, row_id = decode_cursor(cursor)
+    return or_(
+        sort_column < sort_value,
+        and_(sort_column == sort_value, id_column < row_id),
+    )
+
+
+def next_cursor(rows: list, limit: int, sort_attr: str, id_attr: str = "id") -> Optional[str]:
+    """Cursor for the page after `rows` (ORM objects or mapper dicts; None on the last page)"""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    if isinstance(last, dict):
+        return encode_cursor(last[sort_attr], last[id_attr])
+    return encode_cursor(getattr(last, sort_attr), getattr(last, id_attr))
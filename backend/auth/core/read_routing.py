@@ -0,0 +1,235 @@
+"""
+Read-replica routing (shared by all services)
+
+rm_service_mobile dan kedua RAG service hanya membaca, tetapi selama ini memakai primary
+MySQL yang sama dengan rm_service dan health_calculator_service yang banyak menulis.
+Dengan DB_REPLICA_HOST, session dependency di auth/core/database.py dan
+auth/core/async_database.py memilih engine per request:
+
+- Service read-only (get_read_db / get_async_read_db): semua route membaca dari replica
+- Service lain (get_db / get_async_db): hanya GET/HEAD ke replica, penulisan tetap ke primary
+- Fallback ke primary jika replica tidak bisa dihubungi, SQL thread replikasi berhenti,
+  atau lag (Seconds_Behind_Source) melebihi DB_REPLICA_MAX_LAG. Status dicek paling
+  sering setiap DB_REPLICA_CHECK_INTERVAL detik; setelah gagal, replica dilewati selama
+  DB_REPLICA_RETRY_SECONDS
+- Read-your-writes: setelah request tulis yang berhasil, ReadYourWritesMiddleware mem-pin
+  client ke primary selama DB_READ_YOUR_WRITES_SECONDS. Pin disimpan in-process per
+  Authorization header (hash) dan dikirim ke client sebagai cookie dan header
+  X-Read-Primary-Until; client yang mengirim balik salah satunya (juga ke service lain)
+  tetap membaca dari primary sampai waktu tersebut
+
+Tanpa DB_REPLICA_HOST semua fungsi di sini tidak aktif dan semua query ke primary.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, text
+from starlette.datastructures import Headers, MutableHeaders
+
+from .config import (
+    DB_REPLICA_HOST,
+    DB_REPLICA_MAX_LAG,
+    DB_REPLICA_LAG_CHECK,
+    DB_REPLICA_CHECK_INTERVAL,
+    DB_REPLICA_RETRY_SECONDS,
+    DB_READ_YOUR_WRITES_SECONDS
+)
+
+REPLICA_CONFIGURED = bool(DB_REPLICA_HOST)
+
+PIN_HEADER = "X-Read-Primary-Until"
+PIN_COOKIE = "db_read_primary_until"
+
+_READ_METHODS = ("GET", "HEAD", "OPTIONS")
+# MySQL 8.0.22+ first, then the pre-8.0.22 / MariaDB spelling
+_STATUS_QUERIES = (
+    ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+    ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+)
+_MAX_PINS = 10000
+
+
+class ReplicaHealth:
+    """Cached replica state: reachable and within DB_REPLICA_MAX_LAG"""
+    __slots__ = ("healthy", "lag_seconds", "last_error", "next_check", "checks", "fallbacks", "_lock")
+
+    def __init__(self):
+        self.healthy = False  # Unknown until the first check
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.next_check = 0.0
+        self.checks = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def due(self) -> bool:
+        return time.monotonic() >= self.next_check
+
+    def refresh(self, engine) -> None:
+        """Re-check the replica if the interval elapsed (one thread checks, the others use the cached state)"""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if not self.due():
+                return
+            self.checks += 1
+            try:
+                lag = _replication_lag(engine)
+            except Exception as e:
+                self._set(False, None, f"replica unreachable: {str(e)}")
+                return
+            if DB_REPLICA_LAG_CHECK and lag is None:
+                self._set(False, None, "replication is not running on the replica")
+            elif lag is not None and lag > DB_REPLICA_MAX_LAG:
+                self._set(False, lag, f"replica lag {lag:.0f}s > {DB_REPLICA_MAX_LAG:.0f}s")
+            else:
+                self._set(True, lag, None)
+        finally:
+            self._lock.release()
+
+    def mark_failed(self, error: Exception) -> None:
+        """A replica connection failed mid-request: primary only until the retry delay passed"""
+        self.fallbacks += 1
+        self._set(False, self.lag_seconds, f"replica error: {str(error)}")
+
+    def _set(self, healthy: bool, lag: Optional[float], error: Optional[str]) -> None:
+        if healthy != self.healthy or (error and error != self.last_error):
+            if healthy:
+                print(f"[Read Replica] Routing reads to replica {DB_REPLICA_HOST} (lag: {lag}s)")
+            else:
+                print(f"[Read Replica] Falling back to primary: {error}")
+        self.healthy = healthy
+        self.lag_seconds = lag
+        self.last_error = error
+        self.next_check = time.monotonic() + (DB_REPLICA_CHECK_INTERVAL if healthy else DB_REPLICA_RETRY_SECONDS)
+
+    def snapshot(self) -> Dict:
+        return {
+            "configured": REPLICA_CONFIGURED,
+            "host": DB_REPLICA_HOST or None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": DB_REPLICA_MAX_LAG,
+            "last_error": self.last_error,
+            "checks": self.checks,
+            "fallbacks": self.fallbacks,
+            "pinned_clients": len(_pins)
+        }
+
+
+replica_health = ReplicaHealth()
+
+
+def _replication_lag(engine) -> Optional[float]:
+    """Seconds behind the primary (None if replication is stopped or not configured)"""
+    with engine.connect() as conn:
+        if not DB_REPLICA_LAG_CHECK:
+            conn.execute(text("SELECT 1"))
+            return None
+        error: Exception = RuntimeError("no replication status statement succeeded")
+        for statement, column in _STATUS_QUERIES:
+            try:
+                status = conn.execute(text(statement)).mappings().first()
+            except Exception as e:
+                # Syntax error on older servers, or missing REPLICATION CLIENT privilege
+                error = e
+                continue
+            if status is None or status.get(column) is None:
+                return None
+            return float(status[column])
+        raise error
+
+
+def watch_replica_errors(engine) -> None:
+    """Lost replica connections (engine or AsyncEngine.sync_engine) switch reads to the primary"""
+    def _on_error(context):
+        if context.is_disconnect:
+            replica_health.mark_failed(context.original_exception)
+
+    event.listen(engine, "handle_error", _on_error)
+
+
+# ============================================================================
+# Read-your-writes pins
+# ============================================================================
+
+_pins: Dict[str, float] = {}
+_pins_lock = threading.Lock()
+
+
+def _pin_key(authorization: Optional[str]) -> Optional[str]:
+    # Hash so bearer tokens are never kept in memory
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+
+
+def _remember_pin(authorization: Optional[str], until: float) -> None:
+    key = _pin_key(authorization)
+    if key is None:
+        return
+    with _pins_lock:
+        if len(_pins) >= _MAX_PINS:
+            now = time.time()
+            for stale in [k for k, deadline in _pins.items() if deadline <= now]:
+                del _pins[stale]
+        _pins[key] = until
+
+
+def pinned_to_primary(request) -> bool:
+    """True while the client is inside its read-your-writes window"""
+    now = time.time()
+    key = _pin_key(request.headers.get("authorization"))
+    if key is not None and _pins.get(key, 0.0) > now:
+        return True
+    for value in (request.headers.get(PIN_HEADER), request.cookies.get(PIN_COOKIE)):
+        if not value:
+            continue
+        try:
+            if float(value) > now:
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def routes_to_replica(request, read_only_service: bool) -> bool:
+    """Whether this request may read from the replica (health is checked by the caller)"""
+    if not REPLICA_CONFIGURED:
+        return False
+    if not read_only_service and request.method not in _READ_METHODS:
+        return False
+    return not pinned_to_primary(request)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pins the client to the primary after a successful write request
+    Pure ASGI middleware (no BaseHTTPMiddleware), a no-op without DB_REPLICA_HOST.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not REPLICA_CONFIGURED or scope["type"] != "http" or scope["method"] in _READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + DB_READ_YOUR_WRITES_SECONDS
+                _remember_pin(Headers(scope=scope).get("authorization"), until)
+                headers = MutableHeaders(scope=message)
+                headers.append(PIN_HEADER, f"{until:.3f}")
+                headers.append(
+                    "set-cookie",
+                    f"{PIN_COOKIE}={until:.3f}; Max-Age={math.ceil(DB_READ_YOUR_WRITES_SECONDS)}; "
+                    "Path=/; HttpOnly; SameSite=lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
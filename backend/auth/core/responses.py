@@ -0,0 +1,45 @@
+"""
+Fast JSON responses for read-heavy list endpoints (shared by all services)
+
+Route yang mengembalikan list dict hasil mapper (lihat rm_service/services/mappers.py)
+membungkusnya dengan FastJSONResponse: FastAPI tidak memvalidasi ulang response
+lewat response_model, dan body di-encode dengan orjson jika terpasang
+(fallback json stdlib). Format tanggal sama dengan pydantic (ISO 8601).
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json is ~3-5x slower on large lists
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode response content (dicts, lists, datetimes, enums) to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered by dumps() - return it directly to skip response_model validation"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
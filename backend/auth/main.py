@@ -3,8 +3,11 @@ Main FastAPI application
 """
 from fastapi import FastAPI
 from .api.routes import auth, health, petugas
+from .core.read_routing import ReadYourWritesMiddleware
 
 app = FastAPI(title="Authentication Service", version="1.0.0")
+# Reads after a client's own write stay on the primary (no-op without a read replica)
+app.add_middleware(ReadYourWritesMiddleware)
 
 # Include routers
 app.include_router(auth.router)
@@ -4,7 +4,7 @@ Database CRUD operations
 from sqlalchemy.orm import Session
 from typing import Optional, Tuple, List
 from ..models.user import User
-from ..models.petugas import Petugas
+from ..models.petugas import Petugas, PetugasRole
 from ..services.security import verify_password, get_password_hash
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
@@ -50,49 +50,34 @@ def check_user_exists(db: Session, email: str, ktp_number: Optional[str] = None)
     return False, ""
 
 # Petugas CRUD Operations
+_PETUGAS_COLUMNS = (
+    "id, name, email, password, phoneNumber, nip, role, "
+    "specialization, is_active, created_at, updated_at"
+)
+
+# Database stores UPPERCASE role values, same as the enum values
+_PETUGAS_ROLES = {role.value: role for role in PetugasRole}
+
+def _petugas_from_row(row) -> Petugas:
+    """Petugas from a _PETUGAS_COLUMNS row mapping (unknown role -> STAFF)"""
+    return Petugas(**{
+        **row,
+        "role": _PETUGAS_ROLES.get(row["role"], PetugasRole.STAFF),
+        "is_active": bool(row["is_active"]),
+    })
+
 def get_petugas_by_email(db: Session, email: str) -> Optional[Petugas]:
     """Get petugas by email - menggunakan raw SQL untuk handle enum"""
     from sqlalchemy import text
-    from ..models.petugas import PetugasRole
     
     # Query with raw SQL to handle enum properly
-    query = text("""
-        SELECT id, name, email, password, phoneNumber, nip, role, 
-               specialization, is_active, created_at, updated_at
+    row = db.execute(text(f"""
+        SELECT {_PETUGAS_COLUMNS}
         FROM petugas
         WHERE email = :email
-    """)
-    
-    result = db.execute(query, {"email": email}).first()
+    """), {"email": email}).mappings().first()
     
-    if not result:
-        return None
-    
-    # Convert role string to enum
-    role_str = result.role
-    role_enum = None
-    if role_str:
-        for r in PetugasRole:
-            if r.value == role_str:
-                role_enum = r
-                break
-    
-    if not role_enum:
-        role_enum = PetugasRole.STAFF
-    
-    return Petugas(
-        id=result.id,
-        name=result.name,
-        email=result.email,
-        password=result.password,
-        phoneNumber=result.phoneNumber,
-        nip=result.nip,
-        role=role_enum,
-        specialization=result.specialization,
-        is_active=bool(result.is_active),
-        created_at=result.created_at,
-        updated_at=result.updated_at
-    )
+    return _petugas_from_row(row) if row else None
 
 def authenticate_petugas(db: Session, email: str, password: str) -> Optional[Petugas]:
     """Authenticate petugas with email and password"""
@@ -155,94 +140,28 @@ def create_petugas(db: Session, petugas_data: dict) -> Petugas:
 def get_petugas_by_id(db: Session, petugas_id: int) -> Optional[Petugas]:
     """Get petugas by ID - menggunakan raw SQL untuk handle enum"""
     from sqlalchemy import text
-    from ..models.petugas import PetugasRole
     
     # Query with raw SQL to handle enum properly
-    query = text("""
-        SELECT id, name, email, password, phoneNumber, nip, role, 
-               specialization, is_active, created_at, updated_at
+    row = db.execute(text(f"""
+        SELECT {_PETUGAS_COLUMNS}
         FROM petugas
         WHERE id = :petugas_id
-    """)
-    
-    result = db.execute(query, {"petugas_id": petugas_id}).first()
-    
-    if not result:
-        return None
+    """), {"petugas_id": petugas_id}).mappings().first()
     
-    # Convert role string to enum
-    # Database stores UPPERCASE (ADMIN, STAFF, etc.)
-    role_str = result.role
-    role_enum = None
-    if role_str:
-        # Database already returns UPPERCASE, match with enum values
-        for r in PetugasRole:
-            if r.value == role_str:
-                role_enum = r
-                break
-    
-    if not role_enum:
-        role_enum = PetugasRole.STAFF  # default
-    
-    return Petugas(
-        id=result.id,
-        name=result.name,
-        email=result.email,
-        password=result.password,
-        phoneNumber=result.phoneNumber,
-        nip=result.nip,
-        role=role_enum,
-        specialization=result.specialization,
-        is_active=bool(result.is_active),
-        created_at=result.created_at,
-        updated_at=result.updated_at
-    )
+    return _petugas_from_row(row) if row else None
 
 def get_all_petugas(db: Session, skip: int = 0, limit: int = 100) -> List[Petugas]:
     """Get all petugas - menggunakan raw SQL untuk handle enum"""
     from sqlalchemy import text
-    from ..models.petugas import PetugasRole
     
-    query = text("""
-        SELECT id, name, email, password, phoneNumber, nip, role, 
-               specialization, is_active, created_at, updated_at
+    result = db.execute(text(f"""
+        SELECT {_PETUGAS_COLUMNS}
         FROM petugas
         ORDER BY created_at DESC
         LIMIT :limit OFFSET :skip
-    """)
-    
-    result = db.execute(query, {"limit": limit, "skip": skip})
-    petugas_list = []
-    
-    for row in result:
-        # Convert role string to enum
-        role_str = row.role
-        role_enum = None
-        if role_str:
-            for r in PetugasRole:
-                if r.value == role_str:
-                    role_enum = r
-                    break
-        
-        if not role_enum:
-            role_enum = PetugasRole.STAFF
-        
-        petugas = Petugas(
-            id=row.id,
-            name=row.name,
-            email=row.email,
-            password=row.password,
-            phoneNumber=row.phoneNumber,
-            nip=row.nip,
-            role=role_enum,
-            specialization=row.specialization,
-            is_active=bool(row.is_active),
-            created_at=row.created_at,
-            updated_at=row.updated_at
-        )
-        petugas_list.append(petugas)
+    """), {"limit": limit, "skip": skip})
     
-    return petugas_list
+    return [_petugas_from_row(row) for row in result.mappings()]
 
 def update_petugas(db: Session, petugas_id: int, petugas_data: dict) -> Optional[Petugas]:
     """Update petugas - menggunakan raw SQL untuk handle enum UPPERCASE"""
@@ -0,0 +1,21 @@
+"""
+Async database CRUD operations for routes
+
+Same functions and signatures as crud, awaited with a get_async_db session
+(AsyncSession.run_sync or the threadpool), so DB round trips do not block the event loop.
+"""
+from . import crud
+from ..core.async_database import async_crud
+
+get_user_by_email = async_crud(crud.get_user_by_email)
+authenticate_user = async_crud(crud.authenticate_user)
+create_user = async_crud(crud.create_user)
+check_user_exists = async_crud(crud.check_user_exists)
+get_petugas_by_email = async_crud(crud.get_petugas_by_email)
+authenticate_petugas = async_crud(crud.authenticate_petugas)
+create_petugas = async_crud(crud.create_petugas)
+get_petugas_by_id = async_crud(crud.get_petugas_by_id)
+get_all_petugas = async_crud(crud.get_all_petugas)
+update_petugas = async_crud(crud.update_petugas)
+delete_petugas = async_crud(crud.delete_petugas)
+check_petugas_exists = async_crud(crud.check_petugas_exists)
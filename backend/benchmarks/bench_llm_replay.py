@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Reproducible RAG LLM benchmark through record/replay cassettes
+Jalankan dari folder backend:
+
+    # 1. Rekam sekali (butuh API key provider)
+    python benchmarks/bench_llm_replay.py --mode record
+    # 2. Putar ulang offline, berulang kali, hasil identik
+    python benchmarks/bench_llm_replay.py --mode replay --iterations 20
+    python benchmarks/bench_llm_replay.py --mode replay --simulate-latency
+
+Default memakai prompt fixture (FIXTURES) langsung ke call_llm_with_gemini_mobile /
+call_llm_with_openrouter. Dengan --patient-id, seluruh pipeline query_with_rag_mobile
+dijalankan terhadap database yang dikonfigurasi (retrieval nyata, LLM dari cassette).
+
+Cassette miss saat replay berarti prompt yang dibangun berubah; script keluar dengan
+kode 1 agar regresi konstruksi prompt terlihat.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_service.services.llm_cassette import CassetteMiss, cassette_stats, configure_cassettes
+from rag_service.services.metrics import RequestTrace
+
+SYSTEM_PROMPT = (
+    "Anda adalah Nova, asisten kesehatan AI yang ramah untuk aplikasi mobile. "
+    "Jawab hanya berdasarkan data kesehatan pasien yang diberikan, dalam PLAIN TEXT."
+)
+
+# (query, context) pairs with realistic record/calculator context
+FIXTURES = [
+    (
+        "Bagaimana hasil HbA1c terakhir saya?",
+        "=== Rekam Medis - 12 Mei 2025 (outpatient) ===\n"
+        "Diagnosis: Diabetes mellitus tipe 2 (ICD: E11)\n"
+        "Resep Obat: Metformin (500 mg, 2x sehari)\n"
+        "Hasil Lab: HbA1c: 7.8 % [Normal: < 5.7]; Gula darah puasa: 142 mg/dL [Normal: 70-100]",
+    ),
+    (
+        "Apa saja alergi saya?",
+        "=== Riwayat Alergi ===\n- Amoxicillin (Tingkat: severe) (ruam dan sesak)\n- Udang (Tingkat: mild)",
+    ),
+    (
+        "Berapa BMI saya saat ini?",
+        "=== Data Perhitungan Kesehatan ===\n"
+        "[01 Juni 2025] BMI: BMI 27.4 (Overweight)\n"
+        "[01 Juni 2025] TDEE: TDEE 2350 kcal/hari (Aktivitas: moderate)",
+    ),
+    (
+        "Kapan saya harus minum obat amlodipin?",
+        "=== Rekam Medis - 03 Maret 2025 (outpatient) ===\n"
+        "Diagnosis: Hipertensi esensial (ICD: I10)\n"
+        "Resep Obat: Amlodipine (5 mg, 1x sehari)\n"
+        "Catatan: Kontrol tekanan darah 1 bulan lagi",
+    ),
+]
+
+
+def run_fixture_calls(provider: str, iterations: int):
+    if provider == "gemini":
+        from rag_service_mobile.services.rag import call_llm_with_gemini_mobile
+
+        def call(query, context, trace):
+            return call_llm_with_gemini_mobile(query=query, context=context, system_prompt=SYSTEM_PROMPT, trace=trace)
+    else:
+        from rag_service.services.rag import call_llm_with_openrouter
+
+        def call(query, context, trace):
+            return call_llm_with_openrouter(query=query, context=context, system_prompt=SYSTEM_PROMPT, trace=trace)
+
+    timings = []
+    answers = {}
+    for _ in range(iterations):
+        for query, context in FIXTURES:
+            trace = RequestTrace(f"bench_{provider}")
+            started = time.perf_counter()
+            answer = call(query, context, trace)
+            timings.append(time.perf_counter() - started)
+            previous = answers.setdefault(query, answer)
+            if previous != answer:
+                print(f"NON-DETERMINISTIC answer for: {query}")
+    return timings, answers
+
+
+def run_pipeline_calls(patient_id: int, iterations: int):
+    from rag_service_mobile.core.database import SessionLocal
+    from rag_service_mobile.services.rag import query_with_rag_mobile
+
+    timings = []
+    answers = {}
+    db = SessionLocal()
+    try:
+        for _ in range(iterations):
+            for query, _ in FIXTURES:
+                trace = RequestTrace("bench_pipeline")
+                started = time.perf_counter()
+                result = query_with_rag_mobile(query=query, patient_id=patient_id, db=db, trace=trace)
+                timings.append(time.perf_counter() - started)
+                answers.setdefault(query, result.get("answer"))
+    finally:
+        db.close()
+    return timings, answers
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["record", "replay", "replay_or_record"], default="replay")
+    parser.add_argument("--provider", choices=["gemini", "openrouter"], default="gemini")
+    parser.add_argument("--cassettes", default=None, help="Cassette directory (default LLM_CASSETTE_DIR)")
+    parser.add_argument("--simulate-latency", action="store_true", help="Replay with recorded provider timings")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--patient-id", type=int, default=None, help="Run the full mobile RAG pipeline for this patient")
+    args = parser.parse_args()
+
+    configure_cassettes(mode=args.mode, directory=args.cassettes, simulate_latency=args.simulate_latency)
+    iterations = 1 if args.mode == "record" else args.iterations
+
+    started = time.perf_counter()
+    try:
+        if args.patient_id is not None:
+            timings, answers = run_pipeline_calls(args.patient_id, iterations)
+        else:
+            timings, answers = run_fixture_calls(args.provider, iterations)
+    except CassetteMiss as e:
+        print(f"FAIL: {e} (prompt construction changed? re-record with --mode record)")
+        return 1
+    except Exception as e:
+        # Provider wrappers re-raise misses as generic exceptions
+        if "cassette miss" in str(e):
+            print(f"FAIL: {e} (prompt construction changed? re-record with --mode record)")
+            return 1
+        raise
+    elapsed = time.perf_counter() - started
+
+    stats = cassette_stats.snapshot()
+    print(f"mode={args.mode} provider={args.provider} calls={len(timings)} distinct_prompts={len(answers)}")
+    print(f"cassettes: {stats}")
+    if timings:
+        ordered = sorted(timings)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        print(f"latency per call: mean {statistics.mean(timings) * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms")
+        print(f"throughput: {len(timings) / elapsed:.1f} calls/s")
+    if args.mode == "replay" and stats.get("miss"):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Query-count regression check for get_complete_patient_data (/patients/{id}/detail)
+Jalankan dari folder backend terhadap database yang dikonfigurasi:
+
+    python benchmarks/bench_patient_detail_queries.py --patient-id 12 --patient-id 34
+    python benchmarks/bench_patient_detail_queries.py --top 5 --iterations 10
+
+Setiap statement SQL dari session benchmark dihitung lewat event before_cursor_execute
+pada connection session tersebut (query thread/session lain di proses yang sama tidak
+ikut terhitung). Jumlah query per request tidak boleh melebihi EXPECTED_QUERIES,
+berapa pun jumlah rekam medis pasien; jika melebihi, script keluar dengan kode 1
+(regresi N+1).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, text
+
+from auth.core.database import SessionLocal
+from rm_service.services.crud import get_complete_patient_data
+
+# patient, records, diagnoses, prescriptions, lab results, allergies, documents
+EXPECTED_QUERIES = 7
+
+
+class SessionStatementCounter:
+    """Counts statements executed on the connections of one session"""
+
+    def __init__(self, db):
+        self.count = 0
+        self._connections = []
+        event.listen(db, "after_begin", self._on_begin)
+
+    def _on_begin(self, session, transaction, connection):
+        # A new transaction may check out another connection: listen on each one once
+        if any(known is connection for known in self._connections):
+            return
+        event.listen(connection, "before_cursor_execute", self._on_execute)
+        self._connections.append(connection)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def assert_at_most(self, expected: int, label: str) -> None:
+        # Explicit raise: the check must also hold under python -O
+        if self.count > expected:
+            raise AssertionError(f"{label}: {self.count} statements, expected at most {expected} (N+1 regression)")
+
+    def close(self) -> None:
+        for connection in self._connections:
+            if not connection.closed:
+                event.remove(connection, "before_cursor_execute", self._on_execute)
+        self._connections.clear()
+
+
+def patients_with_most_records(db, top: int):
+    rows = db.execute(text("""
+        SELECT patient_id, COUNT(*) AS total
+        FROM medical_records
+        GROUP BY patient_id
+        ORDER BY total DESC
+        LIMIT :top
+    """), {"top": top}).fetchall()
+    return [row.patient_id for row in rows]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patient-id", type=int, action="append", default=[])
+    parser.add_argument("--top", type=int, default=3, help="Patients with the most records (if no --patient-id)")
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    failed = False
+    try:
+        patient_ids = args.patient_id or patients_with_most_records(db, args.top)
+        db.rollback()  # Counting starts with the next transaction
+        counter = SessionStatementCounter(db)
+        try:
+            for patient_id in patient_ids:
+                timings = []
+                counts = set()
+                records = 0
+                error = None
+                for _ in range(args.iterations):
+                    counter.count = 0
+                    started = time.perf_counter()
+                    data = get_complete_patient_data(db, patient_id)
+                    timings.append(time.perf_counter() - started)
+                    counts.add(counter.count)
+                    records = len(data["medical_records"]) if data else 0
+                    # A patient without records skips the three child queries
+                    expected = EXPECTED_QUERIES if records else EXPECTED_QUERIES - 3
+                    try:
+                        counter.assert_at_most(expected, f"patient {patient_id}")
+                    except AssertionError as e:
+                        error = e
+                failed = failed or error is not None
+                print(
+                    f"{'FAIL' if error else 'OK'} patient={patient_id} records={records} queries={sorted(counts)} "
+                    f"(at most {expected}) mean {statistics.mean(timings) * 1000:.1f} ms"
+                )
+                if error:
+                    print(f"     {error}")
+        finally:
+            counter.close()
+    finally:
+        db.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Per-row CPU of list endpoints: ORM + model_validate path vs mapper + fast JSON path
+Jalankan dari folder backend (tidak butuh koneksi database):
+
+    python benchmarks/bench_row_mapping.py
+    python benchmarks/bench_row_mapping.py --rows 5000 --iterations 20 --min-speedup 3
+
+Baris sintetis berbentuk hasil SELECT medical_records diproses dengan:
+- legacy: loop enum per baris -> MedicalRecord ORM -> MedicalRecordResponse.model_validate
+  -> jsonable_encoder + json.dumps (yang dilakukan FastAPI untuk response_model)
+- mapper: rm_service.services.mappers.medical_record_rows -> auth.core.responses.dumps
+
+Kedua output JSON dibandingkan agar bentuk response tidak berubah; script keluar
+dengan kode 1 jika berbeda atau speedup di bawah --min-speedup.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from auth.core.responses import dumps, orjson
+from rm_service.models.medical_record import MedicalRecord, VisitType
+from rm_service.schemas.medical_record import MedicalRecordResponse
+from rm_service.services.mappers import medical_record_rows
+
+RecordRow = namedtuple(
+    "RecordRow",
+    "record_id patient_id visit_date visit_type diagnosis_summary notes doctor_name facility_name created_at",
+)
+
+
+def make_rows(count: int):
+    base = datetime(2025, 6, 1, 9, 30)
+    visit_types = ["OUTPATIENT", "INPATIENT", "EMERGENCY"]
+    return [
+        RecordRow(
+            record_id=f"00000000-0000-4000-8000-{i:012d}",
+            patient_id=42,
+            visit_date=base - timedelta(days=i),
+            visit_type=visit_types[i % 3],
+            diagnosis_summary="Kontrol diabetes mellitus tipe 2, gula darah puasa 142 mg/dL",
+            notes="Lanjutkan metformin, kontrol 1 bulan lagi",
+            doctor_name="dr. Sari Wulandari",
+            facility_name="Puskesmas Kecamatan Cempaka Putih",
+            created_at=base - timedelta(days=i, hours=-1),
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_path(rows) -> bytes:
+    """What get_patient_records + the response_model did before the mapper layer"""
+    records = []
+    for row in rows:
+        visit_type_str = row.visit_type.lower() if row.visit_type else None
+        visit_type_enum = None
+        for vt in VisitType:
+            if vt.value == visit_type_str:
+                visit_type_enum = vt
+                break
+        if not visit_type_enum:
+            visit_type_enum = VisitType.OUTPATIENT
+        records.append(MedicalRecord(
+            record_id=row.record_id,
+            patient_id=row.patient_id,
+            visit_date=row.visit_date,
+            visit_type=visit_type_enum.value,
+            diagnosis_summary=row.diagnosis_summary,
+            notes=row.notes,
+            doctor_name=row.doctor_name,
+            facility_name=row.facility_name,
+            created_at=row.created_at,
+        ))
+    validated = [MedicalRecordResponse.model_validate(record) for record in records]
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def mapper_path(rows) -> bytes:
+    return dumps(medical_record_rows(rows))
+
+
+def time_path(path, rows, iterations: int):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        path(rows)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--min-speedup", type=float, default=2.0)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    if json.loads(legacy_path(rows)) != json.loads(mapper_path(rows)):
+        print("FAIL: mapper output differs from MedicalRecordResponse serialization")
+        return 1
+
+    legacy = time_path(legacy_path, rows, args.iterations)
+    mapper = time_path(mapper_path, rows, args.iterations)
+    speedup = legacy / mapper if mapper else float("inf")
+    encoder = "orjson" if orjson is not None else "json (orjson not installed)"
+    print(f"rows={args.rows} encoder={encoder}")
+    print(f"legacy : {legacy * 1000:8.2f} ms  ({legacy / args.rows * 1e6:6.2f} us/row)")
+    print(f"mapper : {mapper * 1000:8.2f} ms  ({mapper / args.rows * 1e6:6.2f} us/row)")
+    print(f"speedup: {speedup:.1f}x")
+    if speedup < args.min_speedup:
+        print(f"FAIL: speedup below {args.min_speedup}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
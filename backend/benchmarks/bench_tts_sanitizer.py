@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: streaming TTS sanitizer vs the old 30-regex remove_markdown_formatting
+Jalankan dari folder backend: python benchmarks/bench_tts_sanitizer.py
+
+1. Cek golden output (GOLDEN_CASES) untuk sanitize_for_tts
+2. Cek output streaming (potongan acak) sama dengan output satu kali jalan
+3. Bandingkan waktu per jawaban dengan regex chain lama
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_service_mobile.services.tts import TTSSanitizer, sanitize_for_tts
+
+
+def legacy_remove_markdown_formatting(text: str) -> str:
+    """Regex chain as it was in rag_service_mobile/services/rag.py (baseline)"""
+    if not text:
+        return text
+    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
+    text = re.sub(r'\*(.*?)\*', r'\1', text)
+    text = re.sub(r'__(.*?)__', r'\1', text)
+    text = re.sub(r'_(.*?)_', r'\1', text)
+    text = re.sub(r'^#{1,6}\s+(.+)$', r'\1', text, flags=re.MULTILINE)
+    text = re.sub(r'```[\s\S]*?```', '', text)
+    text = re.sub(r'`([^`]+)`', r'\1', text)
+    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
+    text = re.sub(r'~~(.*?)~~', r'\1', text)
+    text = re.sub(r'^[-*]{3,}$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'(\w+)/(\w+)', r'\1 \2', text)
+    text = re.sub(r'(\d+)/(\d+)', r'\1 per \2', text)
+    text = re.sub(r'/(\w+)', r' \1', text)
+    text = re.sub(r'(\w+)/', r'\1 ', text)
+    text = re.sub(r'\s+/', ' ', text)
+    text = re.sub(r'/\s+', ' ', text)
+    text = re.sub(r'/', ' ', text)
+    text = re.sub(r'\[([^\]]+)\]', r'\1', text)
+    text = re.sub(r'\(\s*\)', '', text)
+    text = re.sub(r'✅|❌|⚠️|➡️|⬅️|⬆️|⬇️|💡|🔍|📌|📍|➤|►|◄|▪|▫|•', '', text)
+    text = re.sub(r'/{2,}', '', text)
+    text = re.sub(r'[-*]{2,}', '', text)
+    text = re.sub(r'\n\n+', '. ', text)
+    text = re.sub(r'\n', ' ', text)
+    text = re.sub(r' +', ' ', text)
+    text = re.sub(r'\.{4,}', '...', text)
+    text = re.sub(r'\. +\.', '.', text)
+    text = re.sub(r' +\.', '.', text)
+    text = re.sub(r'\. +', '. ', text)
+    text = re.sub(r'[/\-*]+', ' ', text)
+    text = re.sub(r'\s+[/\-*]+\s+', ' ', text)
+    text = re.sub(r' +', ' ', text)
+    return text.strip()
+
+
+# (input, expected TTS output)
+GOLDEN_CASES = [
+    ("**Halo!** Saya Nova 😊", "Halo! Saya Nova 😊"),
+    ("## Hasil Lab\nHbA1c Anda *7,2%*.", "Hasil Lab HbA1c Anda 7,2%."),
+    ("Minum obat 3x/hari setelah makan.", "Minum obat 3x hari setelah makan."),
+    ("Tekanan darah 120/80 mmHg", "Tekanan darah 120 per 80 mmHg"),
+    ("Kunjungan 12/05/2025 di klinik", "Kunjungan 12 05 2025 di klinik"),
+    ("dan/atau", "dan atau"),
+    ("Lihat [panduan](https://example.com/a/b) ini [penting]", "Lihat panduan ini penting"),
+    ("✅ Metformin\n⚠️ Hindari alkohol ➡️ minum air", "Metformin Hindari alkohol minum air"),
+    ("• poin satu\n• poin dua 💊", "poin satu poin dua 💊"),
+    ("Obat Anda:\n\n1. Metformin\n2. Amlodipin", "Obat Anda: 1. Metformin 2. Amlodipin"),
+    ("Paragraf satu\n\nParagraf dua", "Paragraf satu. Paragraf dua"),
+    ("Selesai.\n\n\nBerikutnya", "Selesai. Berikutnya"),
+    ("Kode ```python\nprint(1)\n``` selesai", "Kode selesai"),
+    ("Gunakan `aspirin` saja", "Gunakan aspirin saja"),
+    ("Teks ~~lama~~ baru ~5 kg", "Teks lama baru ~5 kg"),
+    ("Garis\n---\nberikutnya", "Garis. berikutnya"),
+    ("Kalimat ini . Dan itu..... selesai", "Kalimat ini. Dan itu... selesai"),
+    ("Obat ( ) kosong ()", "Obat kosong"),
+    ("Tetap (500mg) ya", "Tetap (500mg) ya"),
+    ("COVID-19 dan flu", "COVID 19 dan flu"),
+    ("__penting__ dan _miring_", "penting dan miring"),
+    ("# Judul\n#hashtag", "Judul #hashtag"),
+    ("   \n\nHalo   dunia  \n\n", "Halo dunia"),
+    ("Semoga sehat selalu! 💙🙏", "Semoga sehat selalu! 💙🙏"),
+]
+
+SAMPLE_ANSWER = """### Halo! Saya Nova 😊
+
+Berdasarkan **rekam medis** Anda, berikut ringkasannya:
+
+1. **Diagnosis**: Hipertensi Esensial (ICD: I10) - tercatat sejak 12/01/2025
+2. **Obat**: *Amlodipin* 5mg 1x/hari dan Metformin 500mg 2x/hari
+3. **Tekanan darah** terakhir: 135/85 mmHg [Normal: <120/80]
+
+✅ Minum obat teratur
+⚠️ Kurangi garam dan/atau makanan berlemak
+---
+Lihat juga [panduan hipertensi](https://example.com/hipertensi) untuk tips lainnya....
+
+Semoga sehat selalu! 💙"""
+
+
+# Typical Nova answer: plain text as instructed by the system prompt
+PLAIN_ANSWER = (
+    "Halo! Saya Nova 😊 Berdasarkan rekam medis Anda, diagnosis terakhir adalah hipertensi esensial "
+    "yang tercatat pada kunjungan tanggal 12 Januari 2025. Dokter meresepkan Amlodipin 5 mg satu kali "
+    "sehari dan Metformin 500 mg dua kali sehari setelah makan. Hasil HbA1c terakhir Anda 7.2 persen, "
+    "sedikit di atas target. Tips dari saya: minum obat secara teratur, kurangi garam, dan rutin "
+    "berolahraga ringan 30 menit setiap hari. Semoga sehat selalu! 💙 "
+) * 4
+
+
+def check_golden() -> int:
+    failures = 0
+    for source, expected in GOLDEN_CASES:
+        actual = sanitize_for_tts(source)
+        if actual != expected:
+            failures += 1
+            print(f"GOLDEN FAIL: {source!r}\n  expected: {expected!r}\n  actual:   {actual!r}")
+        legacy = legacy_remove_markdown_formatting(source)
+        if legacy != expected:
+            print(f"  (differs from regex chain: {source!r} -> {legacy!r})")
+    return failures
+
+
+def check_streaming(rounds: int = 200) -> int:
+    document = "\n\n".join(source for source, _ in GOLDEN_CASES) + "\n\n" + SAMPLE_ANSWER
+    expected = sanitize_for_tts(document)
+    failures = 0
+    for seed in range(rounds):
+        rng = random.Random(seed)
+        sanitizer = TTSSanitizer()
+        pieces = []
+        position = 0
+        while position < len(document):
+            size = rng.randint(1, 12)
+            pieces.append(sanitizer.feed(document[position:position + size]))
+            position += size
+        pieces.append(sanitizer.finish())
+        if "".join(pieces) != expected:
+            failures += 1
+            print(f"STREAM FAIL (seed {seed})")
+    return failures
+
+
+def bench(func, text: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(text)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TTS SANITIZER BENCHMARK")
+    print("=" * 60)
+
+    golden_failures = check_golden()
+    stream_failures = check_streaming()
+    print(f"Golden cases : {len(GOLDEN_CASES) - golden_failures}/{len(GOLDEN_CASES)} OK")
+    print(f"Streaming    : {'OK' if not stream_failures else f'{stream_failures} FAIL'}")
+
+    iterations = 2000
+    for label, text in [("plain answer", PLAIN_ANSWER), ("markdown", SAMPLE_ANSWER), ("long markdown", SAMPLE_ANSWER * 10)]:
+        legacy_us = bench(legacy_remove_markdown_formatting, text, iterations)
+        new_us = bench(sanitize_for_tts, text, iterations)
+        print(f"{label:13}: regex chain {legacy_us:8.1f} us | state machine {new_us:8.1f} us ({len(text)} chars)")
+
+    print("=" * 60)
+    sys.exit(1 if golden_failures or stream_failures else 0)
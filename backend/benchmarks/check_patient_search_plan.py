@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN check for the staff patient search (rm_service/services/patient_search.py)
+Jalankan dari folder backend setelah DB/add_patient_search_indexes.sql:
+
+    python benchmarks/check_patient_search_plan.py
+    python benchmarks/check_patient_search_plan.py --name "siti aminah" --email raihan
+
+Untuk query nama, halaman hasil dan COUNT(*) (keduanya lewat patient_search_query)
+harus memakai FULLTEXT index idx_ft_users_name. MATCH di dalam OR membuat MySQL
+memindai seluruh tabel users, karena itu setiap kondisi adalah lookup terpisah
+yang digabung dengan UNION id.
+
+Script keluar dengan kode 1 jika index FULLTEXT tidak dipakai.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, text
+
+from auth.core.database import SessionLocal
+from auth.models.user import User
+from rm_service.services.patient_search import patient_search_query
+
+FULLTEXT_INDEX = "idx_ft_users_name"
+
+
+def explain(db, statement) -> list:
+    compiled = statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    return db.execute(text(f"EXPLAIN {compiled}")).mappings().all()
+
+
+def print_plan(label: str, rows: list) -> None:
+    print(label)
+    for row in rows:
+        print(f"  {row['select_type']:<14} {str(row['table']):<22} type={str(row['type']):<10} "
+              f"key={row['key']} rows={row['rows']} extra={row['Extra']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--name", default="raihan", help="name query (>= 2 characters per term)")
+    parser.add_argument("--email", default="raihan@", help="email query (contains @)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    failures = 0
+    try:
+        for label, search_query, needs_fulltext in (
+            ("name", args.name, True),
+            ("email", args.email, False),
+        ):
+            query = patient_search_query(db, User, search_query)
+            statement = query.statement
+            count_statement = select(func.count()).select_from(query.subquery())
+            for kind, plan in (("page", explain(db, statement)), ("count", explain(db, count_statement))):
+                print_plan(f"{label} {kind}: {search_query!r}", plan)
+                if needs_fulltext and not any(row["key"] == FULLTEXT_INDEX for row in plan):
+                    failures += 1
+                    print(f"FAIL: {label} {kind} does not use {FULLTEXT_INDEX}")
+    finally:
+        db.close()
+
+    if failures:
+        print(f"FAIL: {failures} plan(s) without the FULLTEXT index (DB/add_patient_search_indexes.sql installed?)")
+        return 1
+    print(f"ok: name search uses {FULLTEXT_INDEX}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
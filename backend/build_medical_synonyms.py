@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Script untuk build tabel sinonim medis (istilah awam, ICD-10, nama obat) dari CSV
+Jalankan: python build_medical_synonyms.py
+
+Sumber: rag_service/data/synonyms/*.csv
+Output: rag_service/data/medical_synonyms.json (di-load oleh RAG Service dan RAG Service Mobile)
+"""
+from rag_service.core.config import SYNONYM_SOURCE_DIR, SYNONYM_TABLE_PATH
+from rag_service.services.synonyms import build_synonym_table
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("BUILD MEDICAL SYNONYM TABLE")
+    print("=" * 60)
+    print(f"Sumber : {SYNONYM_SOURCE_DIR}")
+    print(f"Output : {SYNONYM_TABLE_PATH}")
+
+    table = build_synonym_table(SYNONYM_SOURCE_DIR, SYNONYM_TABLE_PATH)
+    term_count = sum(len(group) for group in table["groups"])
+
+    print(f"Grup   : {len(table['groups'])}")
+    print(f"Istilah: {term_count}")
+    print("=" * 60)
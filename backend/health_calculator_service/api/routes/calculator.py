@@ -1,20 +1,21 @@
 """
 Health Calculator API Routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_user_for_calculator
 from ...services.calculator import HealthCalculator
-from ...services.crud import (
+from ...services.crud_async import (
     save_health_calculation,
     get_user_calculations,
     get_calculation_by_id,
     get_latest_calculation,
     save_health_metric
 )
+from ...services.crud import next_cursor
 from ...schemas.health_calculator import (
     BMIRequest, BMIResponse,
     BMRRequest, BMRResponse,
@@ -50,7 +51,7 @@ calc = HealthCalculator()
 async def calculate_bmi(
     request: BMIRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Body Mass Index (BMI)"""
     result = calc.calculate_bmi(request.weight_kg, request.height_cm)
@@ -60,7 +61,7 @@ async def calculate_bmi(
         "weight_kg": request.weight_kg,
         "height_cm": request.height_cm
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="BMI",
@@ -69,7 +70,7 @@ async def calculate_bmi(
     )
     
     # Also save as metric for statistics
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="BMI",
@@ -83,7 +84,7 @@ async def calculate_bmi(
 async def calculate_bmr(
     request: BMRRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Basal Metabolic Rate (BMR)"""
     result = calc.calculate_bmr(request.weight_kg, request.height_cm, request.age, request.gender)
@@ -95,7 +96,7 @@ async def calculate_bmr(
         "age": request.age,
         "gender": request.gender
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="BMR",
@@ -104,7 +105,7 @@ async def calculate_bmr(
     )
     
     # Also save as metric
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="BMR",
@@ -118,7 +119,7 @@ async def calculate_bmr(
 async def calculate_tdee(
     request: TDEERequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Total Daily Energy Expenditure (TDEE)"""
     result = calc.calculate_tdee(request.bmr, request.activity_level)
@@ -128,7 +129,7 @@ async def calculate_tdee(
         "bmr": request.bmr,
         "activity_level": request.activity_level
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="TDEE",
@@ -137,7 +138,7 @@ async def calculate_tdee(
     )
     
     # Also save as metric
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="TDEE",
@@ -151,7 +152,7 @@ async def calculate_tdee(
 async def calculate_body_fat(
     request: BodyFatRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Body Fat Percentage"""
     result = calc.calculate_body_fat_percentage(
@@ -172,7 +173,7 @@ async def calculate_body_fat(
         "neck_cm": request.neck_cm,
         "hip_cm": request.hip_cm
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="BodyFat",
@@ -181,7 +182,7 @@ async def calculate_body_fat(
     )
     
     # Also save as metric
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="BodyFat",
@@ -195,7 +196,7 @@ async def calculate_body_fat(
 async def calculate_waist_to_hip(
     request: WaistToHipRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Waist-to-Hip Ratio (WHR)"""
     result = calc.calculate_waist_to_hip_ratio(request.waist_cm, request.hip_cm)
@@ -205,7 +206,7 @@ async def calculate_waist_to_hip(
         "waist_cm": request.waist_cm,
         "hip_cm": request.hip_cm
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="WaistToHip",
@@ -219,7 +220,7 @@ async def calculate_waist_to_hip(
 async def calculate_waist_to_height(
     request: WaistToHeightRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Waist-to-Height Ratio (WtHR)"""
     result = calc.calculate_waist_to_height_ratio(request.waist_cm, request.height_cm)
@@ -229,7 +230,7 @@ async def calculate_waist_to_height(
         "waist_cm": request.waist_cm,
         "height_cm": request.height_cm
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="WaistToHeight",
@@ -243,7 +244,7 @@ async def calculate_waist_to_height(
 async def calculate_ideal_body_weight(
     request: IdealBodyWeightRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Ideal Body Weight"""
     result = calc.calculate_ideal_body_weight(request.height_cm, request.gender)
@@ -253,7 +254,7 @@ async def calculate_ideal_body_weight(
         "height_cm": request.height_cm,
         "gender": request.gender
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="IdealBodyWeight",
@@ -267,7 +268,7 @@ async def calculate_ideal_body_weight(
 async def calculate_body_surface_area(
     request: BodySurfaceAreaRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Body Surface Area (BSA)"""
     result = calc.calculate_body_surface_area(request.weight_kg, request.height_cm)
@@ -277,7 +278,7 @@ async def calculate_body_surface_area(
         "weight_kg": request.weight_kg,
         "height_cm": request.height_cm
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="BodySurfaceArea",
@@ -295,14 +296,14 @@ async def calculate_body_surface_area(
 async def calculate_max_heart_rate(
     request: MaxHeartRateRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Maximum Heart Rate"""
     result = calc.calculate_max_heart_rate(request.age)
     
     # Save to database
     input_data = {"age": request.age}
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="MaxHeartRate",
@@ -311,7 +312,7 @@ async def calculate_max_heart_rate(
     )
     
     # Also save as metric
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="MaxHeartRate",
@@ -325,7 +326,7 @@ async def calculate_max_heart_rate(
 async def calculate_target_heart_rate(
     request: TargetHeartRateRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Target Heart Rate Zone"""
     result = calc.calculate_target_heart_rate_zone(request.age, request.intensity)
@@ -335,7 +336,7 @@ async def calculate_target_heart_rate(
         "age": request.age,
         "intensity": request.intensity
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="TargetHeartRate",
@@ -349,7 +350,7 @@ async def calculate_target_heart_rate(
 async def calculate_map(
     request: MAPRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Mean Arterial Pressure (MAP)"""
     result = calc.calculate_mean_arterial_pressure(request.systolic, request.diastolic)
@@ -359,7 +360,7 @@ async def calculate_map(
         "systolic": request.systolic,
         "diastolic": request.diastolic
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="MAP",
@@ -368,7 +369,7 @@ async def calculate_map(
     )
     
     # Also save as metric
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="MAP",
@@ -382,7 +383,7 @@ async def calculate_map(
 async def calculate_metabolic_age(
     request: MetabolicAgeRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Metabolic Age"""
     result = calc.calculate_metabolic_age(request.bmr, request.age, request.gender)
@@ -393,7 +394,7 @@ async def calculate_metabolic_age(
         "age": request.age,
         "gender": request.gender
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="MetabolicAge",
@@ -411,7 +412,7 @@ async def calculate_metabolic_age(
 async def calculate_daily_calories(
     request: DailyCalorieRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Daily Calorie Needs"""
     result = calc.calculate_daily_calorie_needs(request.tdee, request.goal)
@@ -421,7 +422,7 @@ async def calculate_daily_calories(
         "tdee": request.tdee,
         "goal": request.goal
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="DailyCalories",
@@ -430,7 +431,7 @@ async def calculate_daily_calories(
     )
     
     # Also save as metric
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="DailyCalories",
@@ -444,7 +445,7 @@ async def calculate_daily_calories(
 async def calculate_macronutrients(
     request: MacronutrientsRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Macronutrients (Protein, Carbs, Fat)"""
     result = calc.calculate_macronutrients(
@@ -458,7 +459,7 @@ async def calculate_macronutrients(
         "carb_percent": request.carb_percent,
         "fat_percent": request.fat_percent
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="Macronutrients",
@@ -476,7 +477,7 @@ async def calculate_macronutrients(
 async def calculate_one_rep_max(
     request: OneRepMaxRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate One Rep Max (1RM)"""
     result = calc.calculate_one_rep_max(request.weight, request.reps)
@@ -486,7 +487,7 @@ async def calculate_one_rep_max(
         "weight": request.weight,
         "reps": request.reps
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="OneRepMax",
@@ -500,7 +501,7 @@ async def calculate_one_rep_max(
 async def calculate_calories_burned(
     request: CaloriesBurnedRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Calories Burned During Exercise"""
     result = calc.calculate_calories_burned(
@@ -513,7 +514,7 @@ async def calculate_calories_burned(
         "duration_minutes": request.duration_minutes,
         "activity_met": request.activity_met
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="CaloriesBurned",
@@ -522,7 +523,7 @@ async def calculate_calories_burned(
     )
     
     # Also save as metric
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="CaloriesBurned",
@@ -536,7 +537,7 @@ async def calculate_calories_burned(
 async def calculate_vo2_max(
     request: VO2MaxRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate VO₂ Max (Maximum Oxygen Consumption)"""
     result = calc.estimate_vo2_max(request.age, request.resting_hr, request.max_hr)
@@ -547,7 +548,7 @@ async def calculate_vo2_max(
         "resting_hr": request.resting_hr,
         "max_hr": request.max_hr
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="VO2Max",
@@ -556,7 +557,7 @@ async def calculate_vo2_max(
     )
     
     # Also save as metric
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="VO2Max",
@@ -570,7 +571,7 @@ async def calculate_vo2_max(
 async def calculate_recovery_time(
     request: RecoveryTimeRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Estimate Recovery Time After Exercise"""
     result = calc.estimate_recovery_time(request.intensity, request.duration_minutes)
@@ -580,7 +581,7 @@ async def calculate_recovery_time(
         "intensity": request.intensity,
         "duration_minutes": request.duration_minutes
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="RecoveryTime",
@@ -598,7 +599,7 @@ async def calculate_recovery_time(
 async def calculate_water_needs(
     request: WaterNeedsRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Daily Water Needs"""
     result = calc.calculate_daily_water_needs(request.weight_kg, request.activity_level)
@@ -608,7 +609,7 @@ async def calculate_water_needs(
         "weight_kg": request.weight_kg,
         "activity_level": request.activity_level
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="WaterNeeds",
@@ -617,7 +618,7 @@ async def calculate_water_needs(
     )
     
     # Also save as metric
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="WaterNeeds",
@@ -631,7 +632,7 @@ async def calculate_water_needs(
 async def calculate_body_water(
     request: BodyWaterRequest,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate Body Water Percentage"""
     result = calc.calculate_body_water_percentage(request.weight_kg, request.body_fat_percent)
@@ -641,7 +642,7 @@ async def calculate_body_water(
         "weight_kg": request.weight_kg,
         "body_fat_percent": request.body_fat_percent
     }
-    save_health_calculation(
+    await save_health_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type="BodyWater",
@@ -650,7 +651,7 @@ async def calculate_body_water(
     )
     
     # Also save as metric
-    save_health_metric(
+    await save_health_metric(
         db=db,
         user_id=current_user.id,
         metric_type="BodyWater",
@@ -666,30 +667,45 @@ async def calculate_body_water(
 
 @router.get("/history", response_model=List[HealthCalculationResponse])
 async def get_calculation_history(
+    response: Response,
     calculation_type: str = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get user's calculation history"""
-    calculations = get_user_calculations(
-        db=db,
-        user_id=current_user.id,
-        calculation_type=calculation_type,
-        limit=limit,
-        offset=offset
-    )
+    """
+    Get user's calculation history
+    
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page
+    (keyset pagination, same cost for every page); `offset` is kept for old clients.
+    """
+    try:
+        calculations = await get_user_calculations(
+            db=db,
+            user_id=current_user.id,
+            calculation_type=calculation_type,
+            limit=limit,
+            offset=offset,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    page_cursor = next_cursor(calculations, limit, "calculated_at")
+    if page_cursor:
+        response.headers["X-Next-Cursor"] = page_cursor
     return calculations
 
 @router.get("/latest/{calculation_type}")
 async def get_latest_calculation_result(
     calculation_type: str,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get latest calculation result of specific type"""
-    calculation = get_latest_calculation(
+    calculation = await get_latest_calculation(
         db=db,
         user_id=current_user.id,
         calculation_type=calculation_type
@@ -1,48 +1,64 @@
 """
 Health Metrics API Routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_user_for_calculator
-from ...services.crud import (
+from ...services.crud_async import (
     get_user_metrics,
     get_metric_by_id,
     get_latest_metric,
     get_metrics_statistics
 )
+from ...services.crud import next_cursor
 from ...schemas.health_calculator import HealthMetricResponse
 
 router = APIRouter(prefix="/metrics", tags=["Health Metrics"])
 
 @router.get("/", response_model=List[HealthMetricResponse])
 async def get_metrics(
+    response: Response,
     metric_type: Optional[str] = None,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get user's health metrics history"""
-    metrics = get_user_metrics(
-        db=db,
-        user_id=current_user.id,
-        metric_type=metric_type,
-        limit=limit,
-        offset=offset
-    )
+    """
+    Get user's health metrics history
+    
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page
+    (keyset pagination, same cost for every page); `offset` is kept for old clients.
+    """
+    try:
+        metrics = await get_user_metrics(
+            db=db,
+            user_id=current_user.id,
+            metric_type=metric_type,
+            limit=limit,
+            offset=offset,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    page_cursor = next_cursor(metrics, limit, "recorded_at")
+    if page_cursor:
+        response.headers["X-Next-Cursor"] = page_cursor
     return metrics
 
 @router.get("/{metric_id}", response_model=HealthMetricResponse)
 async def get_metric(
     metric_id: int,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get specific metric by ID"""
-    metric = get_metric_by_id(db=db, metric_id=metric_id, user_id=current_user.id)
+    metric = await get_metric_by_id(db=db, metric_id=metric_id, user_id=current_user.id)
     if not metric:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,10 +70,10 @@ async def get_metric(
 async def get_latest_metric_value(
     metric_type: str,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get latest metric value of specific type"""
-    metric = get_latest_metric(
+    metric = await get_latest_metric(
         db=db,
         user_id=current_user.id,
         metric_type=metric_type
@@ -74,10 +90,10 @@ async def get_metric_statistics(
     metric_type: str,
     days: int = 30,
     current_user = Depends(get_current_active_user_for_calculator),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get statistics for a metric type over a period"""
-    stats = get_metrics_statistics(
+    stats = await get_metrics_statistics(
         db=db,
         user_id=current_user.id,
         metric_type=metric_type,
@@ -10,9 +10,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 # Reuse database from auth service
 try:
-    from auth.core.database import engine, Base, get_db
+    from auth.core.database import engine, Base, get_db, get_pool_stats, ReadYourWritesMiddleware
+    from auth.core.async_database import get_async_db
 except ImportError:
     # Fallback: create own database connection
+    from fastapi import Request
     from sqlalchemy import create_engine
     from sqlalchemy.ext.declarative import declarative_base
     from sqlalchemy.orm import sessionmaker
@@ -35,11 +37,30 @@ except ImportError:
     # Base class for models
     Base = declarative_base()
     
-    def get_db():
-        """Dependency for getting database session"""
+    def get_db(request: Request):
+        """Dependency for getting database session (same signature as auth.core.database.get_db)"""
         db = SessionLocal()
         try:
             yield db
         finally:
             db.close()
+    
+    # No async layer without auth: routes get the sync session, crud_async uses the threadpool
+    get_async_db = get_db
+    
+    def get_pool_stats():
+        """Pool usage of this process (standalone fallback engine)"""
+        return {"pools": {"sync": {"status": engine.pool.status()}}}
+    
+    class _PassThroughMiddleware:
+        """No read replica without auth: nothing to pin, requests pass through"""
+        
+        def __init__(self, app):
+            self.app = app
+        
+        async def __call__(self, scope, receive, send):
+            await self.app(scope, receive, send)
+    
+    # Alias, not a class of the same name (a second class would shadow auth's type)
+    ReadYourWritesMiddleware = _PassThroughMiddleware
 
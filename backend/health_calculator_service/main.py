@@ -4,6 +4,7 @@ Main FastAPI application for Health Calculator Service
 from fastapi import FastAPI
 from .api.routes import calculator_router, metrics_router
 from .core.config import SERVICE_NAME, SERVICE_VERSION
+from .core.database import get_pool_stats, ReadYourWritesMiddleware
 
 app = FastAPI(
     title=SERVICE_NAME,
@@ -11,6 +12,9 @@ app = FastAPI(
     description="Health Calculator Service - Provides various health calculation tools and metrics tracking"
 )
 
+# Reads after a client's own write stay on the primary (no-op without a read replica)
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Include routers
 app.include_router(calculator_router)
 app.include_router(metrics_router)
@@ -35,3 +39,7 @@ async def health_check():
         "service": SERVICE_NAME
     }
 
+@app.get("/health/db/pool")
+async def db_pool_stats():
+    """Connection pool statistics of this process (checked out, overflow, wait time)"""
+    return get_pool_stats()
@@ -2,13 +2,31 @@
 CRUD operations for Health Calculator Service
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List, Optional, Dict, Any
+from sqlalchemy import ColumnElement, desc
+from typing import Iterable, List, Optional, Dict, Any
 from datetime import datetime
 import json
 
 from ..models.health_calculation import HealthCalculation
 from ..models.health_metric import HealthMetric
+# sys.path to backend/ is set up by ..core.database (imported by the models)
+try:
+    from auth.core.data_versions import bump_patient_data_version
+except ImportError:
+    # Standalone deployment without the auth package: no cross-service version tracking
+    def bump_patient_data_version(db: Session, patient_id: Any = None, record_id: Any = None,
+                                  collections: Iterable[str] = ()) -> None:
+        return None
+
+try:
+    from auth.core.pagination import keyset_before, next_cursor
+except ImportError:
+    # Standalone deployment without the auth package: offset pagination only
+    def keyset_before(sort_column, id_column, cursor: str) -> ColumnElement[bool]:
+        raise ValueError("Cursor pagination is not available in this deployment")
+
+    def next_cursor(rows: list, limit: int, sort_attr: str, id_attr: str = "id") -> Optional[str]:
+        return None
 
 # ============================================
 # Health Calculations CRUD
@@ -29,6 +47,7 @@ def save_health_calculation(
         result_data=result_data
     )
     db.add(calculation)
+    bump_patient_data_version(db, patient_id=user_id)
     db.commit()
     db.refresh(calculation)
     return calculation
@@ -38,16 +57,23 @@ def get_user_calculations(
     user_id: int,
     calculation_type: Optional[str] = None,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ) -> List[HealthCalculation]:
-    """Get user's health calculations"""
+    """
+    Get user's health calculations (newest first)
+    With a cursor the page starts after the cursor's (calculated_at, id) and offset is ignored.
+    """
     query = db.query(HealthCalculation).filter(HealthCalculation.user_id == user_id)
     
     if calculation_type:
         query = query.filter(HealthCalculation.calculation_type == calculation_type)
     
-    query = query.order_by(desc(HealthCalculation.calculated_at))
-    query = query.offset(offset).limit(limit)
+    query = query.order_by(desc(HealthCalculation.calculated_at), desc(HealthCalculation.id))
+    if cursor:
+        query = query.filter(keyset_before(HealthCalculation.calculated_at, HealthCalculation.id, cursor)).limit(limit)
+    else:
+        query = query.offset(offset).limit(limit)
     
     return query.all()
 
@@ -90,6 +116,7 @@ def save_health_metric(
         notes=notes
     )
     db.add(metric)
+    bump_patient_data_version(db, patient_id=user_id)
     db.commit()
     db.refresh(metric)
     return metric
@@ -99,16 +126,23 @@ def get_user_metrics(
     user_id: int,
     metric_type: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ) -> List[HealthMetric]:
-    """Get user's health metrics"""
+    """
+    Get user's health metrics (newest first)
+    With a cursor the page starts after the cursor's (recorded_at, id) and offset is ignored.
+    """
     query = db.query(HealthMetric).filter(HealthMetric.user_id == user_id)
     
     if metric_type:
         query = query.filter(HealthMetric.metric_type == metric_type)
     
-    query = query.order_by(desc(HealthMetric.recorded_at))
-    query = query.offset(offset).limit(limit)
+    query = query.order_by(desc(HealthMetric.recorded_at), desc(HealthMetric.id))
+    if cursor:
+        query = query.filter(keyset_before(HealthMetric.recorded_at, HealthMetric.id, cursor)).limit(limit)
+    else:
+        query = query.offset(offset).limit(limit)
     
     return query.all()
 
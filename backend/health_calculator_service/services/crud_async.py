@@ -0,0 +1,31 @@
+"""
+Async CRUD operations for Health Calculator Service routes
+
+Same functions and signatures as crud, awaited with a get_async_db session
+(AsyncSession.run_sync or the threadpool), so DB round trips do not block the event loop.
+"""
+from . import crud
+# sys.path to backend/ is set up by ..core.database (imported by the models)
+try:
+    from auth.core.async_database import async_crud
+except ImportError:
+    # Standalone deployment without the auth package: sync session, CRUD runs in the threadpool
+    import functools
+    from typing import Callable
+    from starlette.concurrency import run_in_threadpool
+
+    def async_crud(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(db, *args, **kwargs):
+            return await run_in_threadpool(fn, db, *args, **kwargs)
+        return wrapper
+
+save_health_calculation = async_crud(crud.save_health_calculation)
+get_user_calculations = async_crud(crud.get_user_calculations)
+get_calculation_by_id = async_crud(crud.get_calculation_by_id)
+get_latest_calculation = async_crud(crud.get_latest_calculation)
+save_health_metric = async_crud(crud.save_health_metric)
+get_user_metrics = async_crud(crud.get_user_metrics)
+get_metric_by_id = async_crud(crud.get_metric_by_id)
+get_latest_metric = async_crud(crud.get_latest_metric)
+get_metrics_statistics = async_crud(crud.get_metrics_statistics)
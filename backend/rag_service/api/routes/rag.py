@@ -5,6 +5,7 @@ import time
 import sys
 import os
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import List, TYPE_CHECKING
@@ -12,47 +13,10 @@ from typing import List, TYPE_CHECKING
 # HTTPBearer untuk Swagger UI - bisa langsung paste token
 security = HTTPBearer(auto_error=False)
 
-# Lazy-initialized database engine and session (singleton pattern)
-_auth_engine = None
-_auth_session_local = None
-
 def _get_auth_db_session():
-    """Get auth database session - lazy initialization to avoid circular import"""
-    global _auth_engine, _auth_session_local
-    
-    if _auth_engine is None:
-        import os
-        from dotenv import load_dotenv
-        load_dotenv()
-        
-        DB_USER = os.getenv("DB_USER", "root")
-        DB_PASSWORD = os.getenv("DB_PASSWORD", "")
-        DB_HOST = os.getenv("DB_HOST", "localhost")
-        DB_PORT = int(os.getenv("DB_PORT", "3306"))
-        DB_NAME = os.getenv("DB_NAME", "healthkon")
-        
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        from sqlalchemy.pool import QueuePool
-        
-        DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-        _auth_engine = create_engine(
-            DATABASE_URL,
-            poolclass=QueuePool,
-            pool_pre_ping=True,
-            pool_recycle=300,
-            pool_size=5,
-            max_overflow=10,
-            connect_args={
-                "connect_timeout": 10,
-                "read_timeout": 10,
-                "write_timeout": 10,
-                "charset": "utf8mb4",
-            }
-        )
-        _auth_session_local = sessionmaker(autocommit=False, autoflush=False, bind=_auth_engine)
-    
-    return _auth_session_local()
+    """Session from the process-wide pool (auth.core.database) - lazy import to avoid circular import"""
+    from auth.core.database import SessionLocal
+    return SessionLocal()
 
 async def get_current_petugas_from_token(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -93,6 +57,8 @@ async def get_current_petugas_from_token(
                 detail="Access denied. This service is only accessible by petugas (admin, dokter, staff). Please login as petugas."
             )
         
+        # Loaded columns stay readable; return the connection to the shared pool now
+        db.close()
         return petugas
         
     except HTTPException:
@@ -143,6 +109,8 @@ from ...services.rag import (
     query_with_rag,
     embed_document
 )
+from ...services.document_index import DocumentAccessScope
+from ...services.metrics import RequestTrace, rag_metrics, require_metrics_access
 
 router = APIRouter(prefix="/rag", tags=["RAG"])
 
@@ -189,16 +157,21 @@ async def rag_query(
                 detail="Query must be at least 3 characters long"
             )
         
+        trace = RequestTrace("rag_service")
         result = query_with_rag(
             query=request.query.strip(),
             patient_id=request.patient_id,
             max_documents=request.max_documents or 5,
             similarity_threshold=request.similarity_threshold or 0.7,
-            db=db
+            db=db,
+            trace=trace
         )
         
         processing_time = time.time() - start_time
         result["processing_time"] = processing_time
+        trace.finish()
+        if request.debug:
+            result["debug"] = trace.as_debug()
         
         return QueryResponse(**result)
     
@@ -225,8 +198,9 @@ async def rag_query(
             detail=f"Error processing RAG query: {error_detail}"
         )
 
+# Plain def: the DB queries and the parallel shard search run in the threadpool
 @router.post("/search", response_model=SearchResponse)
-async def search_medical_documents(
+def search_medical_documents(
     request: SearchRequest,
     current_petugas = Depends(get_current_active_petugas_for_rag),
     db: Session = Depends(get_db)
@@ -243,6 +217,9 @@ async def search_medical_documents(
     - Find documents related to specific condition
     - Search for specific medical terms
     - Find relevant medical records for a query
+    
+    Without patient_id the search covers all patients through the global
+    document index (petugas roles in GLOBAL_SEARCH_ROLES only).
     """
     try:
         results = search_documents(
@@ -250,7 +227,8 @@ async def search_medical_documents(
             patient_id=request.patient_id,
             limit=request.limit or 10,
             threshold=request.threshold or 0.7,
-            db=db
+            db=db,
+            scope=DocumentAccessScope.for_petugas(current_petugas, request.patient_id)
         )
         
         return SearchResponse(
@@ -298,6 +276,11 @@ async def embed_medical_document(
 
 # Note: /chat endpoint telah dipindah ke rag_service_mobile untuk user
 
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_access)])
+async def rag_metrics_endpoint():
+    """Per-stage latency and token histograms (Prometheus text format, internal only)"""
+    return PlainTextResponse(rag_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @router.get("/health")
 async def rag_health():
     """Health check for RAG service"""
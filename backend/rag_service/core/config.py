@@ -34,3 +34,45 @@ VECTOR_STORE_TYPE = os.getenv("VECTOR_STORE_TYPE", "pinecone")  # pinecone, qdra
 MAX_CONTEXT_DOCUMENTS = int(os.getenv("MAX_CONTEXT_DOCUMENTS", "5"))
 SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
 
+# Spelling correction (SymSpell) Configuration
+SPELLING_MAX_EDIT_DISTANCE = int(os.getenv("SPELLING_MAX_EDIT_DISTANCE", "2"))
+SPELLING_PREFIX_LENGTH = int(os.getenv("SPELLING_PREFIX_LENGTH", "7"))
+SPELLING_VOCAB_REFRESH_SECONDS = int(os.getenv("SPELLING_VOCAB_REFRESH_SECONDS", "30"))  # Throttle the data-version check per patient
+SPELLING_MAX_PATIENTS = int(os.getenv("SPELLING_MAX_PATIENTS", "1000"))  # LRU bound for per-patient indexes
+
+# Medical synonym / ICD-10 / drug name expansion table
+SYNONYM_SOURCE_DIR = os.getenv("SYNONYM_SOURCE_DIR", os.path.join(root_dir, "rag_service", "data", "synonyms"))  # CSV sources
+SYNONYM_TABLE_PATH = os.getenv("SYNONYM_TABLE_PATH", os.path.join(root_dir, "rag_service", "data", "medical_synonyms.json"))  # Prebuilt table
+
+# Long-range history summaries (per year / per quarter for current year)
+HISTORY_SUMMARY_ENABLED = os.getenv("HISTORY_SUMMARY_ENABLED", "true").lower() == "true"
+HISTORY_SUMMARY_MAX_CHARS = int(os.getenv("HISTORY_SUMMARY_MAX_CHARS", "1500"))  # Fixed prompt budget (~375 tokens)
+HISTORY_SUMMARY_REFRESH_SECONDS = int(os.getenv("HISTORY_SUMMARY_REFRESH_SECONDS", "300"))  # Min interval between read-path refreshes per patient
+HISTORY_SUMMARY_POLL_SECONDS = int(os.getenv("HISTORY_SUMMARY_POLL_SECONDS", "60"))  # patient_data_versions change feed poll interval (0 = off)
+HISTORY_SUMMARY_TOP_ITEMS = int(os.getenv("HISTORY_SUMMARY_TOP_ITEMS", "5"))  # Diagnoses/drugs/labs listed per period
+
+# Global (cross-patient) document index for staff /rag/search
+DOCUMENT_INDEX_SHARD_SIZE = int(os.getenv("DOCUMENT_INDEX_SHARD_SIZE", "1000"))  # patient_id range per shard
+DOCUMENT_INDEX_SEARCH_WORKERS = int(os.getenv("DOCUMENT_INDEX_SEARCH_WORKERS", "4"))  # Parallel shard searches
+DOCUMENT_INDEX_REFRESH_SECONDS = int(os.getenv("DOCUMENT_INDEX_REFRESH_SECONDS", "30"))  # Background reload of patients whose documents changed
+DOCUMENT_INDEX_REBUILD_SECONDS = int(os.getenv("DOCUMENT_INDEX_REBUILD_SECONDS", "900"))  # Full rebuild (only way to see edits without the collection version table)
+DOCUMENT_INDEX_STARTUP_WAIT_SECONDS = float(os.getenv("DOCUMENT_INDEX_STARTUP_WAIT_SECONDS", "5"))  # Max wait of a search for the first build
+GLOBAL_SEARCH_ROLES = {
+    role.strip().upper()
+    for role in os.getenv("GLOBAL_SEARCH_ROLES", "ADMIN,DOKTER,PERAWAT,ADMINISTRATOR,STAFF").split(",")
+    if role.strip()
+}  # Petugas roles allowed to search across all patients
+
+# LLM call record/replay cassettes (deterministic benchmarks and regression runs)
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()  # off, record, replay, replay_or_record
+LLM_CASSETTE_DIR = os.getenv("LLM_CASSETTE_DIR", os.path.join(root_dir, "benchmarks", "cassettes"))
+LLM_CASSETTE_SIMULATE_LATENCY = os.getenv("LLM_CASSETTE_SIMULATE_LATENCY", "false").lower() == "true"  # Replay with recorded timings
+
+# Diversity re-ranking (MMR) of retrieved chunks
+MMR_ENABLED = os.getenv("MMR_ENABLED", "true").lower() == "true"
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))  # 1.0 = relevance only, lower = more diverse
+MMR_CANDIDATE_FACTOR = int(os.getenv("MMR_CANDIDATE_FACTOR", "2"))  # Candidates retrieved per context slot
+MMR_LATENCY_BUDGET_MS = float(os.getenv("MMR_LATENCY_BUDGET_MS", "20"))  # Remaining slots filled by score when exceeded
+
+# GET /rag/metrics (both RAG services): bearer token for scrapers; unset = loopback clients only
+RAG_METRICS_TOKEN = os.getenv("RAG_METRICS_TOKEN", "")
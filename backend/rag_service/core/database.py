@@ -6,7 +6,9 @@ import os
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from auth.core.database import engine, Base, get_db
+# Read-only service: routes read from the replica pool when DB_REPLICA_HOST is set,
+# SessionLocal (background writers) stays on the primary
+from auth.core.database import engine, Base, get_read_db as get_db, SessionLocal, get_pool_stats
 
-__all__ = ["engine", "Base", "get_db"]
+__all__ = ["engine", "Base", "get_db", "SessionLocal", "get_pool_stats"]
 
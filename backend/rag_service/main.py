@@ -4,6 +4,9 @@ Main FastAPI application for RAG Service
 from fastapi import FastAPI
 from .api.routes import rag
 from .core.config import SERVICE_NAME, SERVICE_VERSION
+from .core.database import get_pool_stats
+from .services.document_index import global_document_index
+from .services.history_summary import start_summary_poller
 
 app = FastAPI(
     title=SERVICE_NAME,
@@ -14,6 +17,12 @@ app = FastAPI(
 # Include routers
 app.include_router(rag.router)
 
+@app.on_event("startup")
+async def start_background_workers():
+    """Document index build and history summary poller run in background threads (never inside a request)"""
+    global_document_index.start()
+    start_summary_poller()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -23,3 +32,7 @@ async def root():
         "status": "ready"
     }
 
+@app.get("/health/db/pool")
+async def db_pool_stats():
+    """Connection pool statistics of this process (checked out, overflow, wait time)"""
+    return get_pool_stats()
@@ -11,6 +11,7 @@ class QueryRequest(BaseModel):
     patient_id: Optional[int] = None  # Filter by patient if provided
     max_documents: Optional[int] = 5
     similarity_threshold: Optional[float] = 0.7
+    debug: Optional[bool] = False  # Include per-stage timings and token counts in response
 
 class DocumentChunk(BaseModel):
     """Schema for document chunk in search results"""
@@ -30,6 +31,7 @@ class QueryResponse(BaseModel):
     model_used: str
     processing_time: Optional[float] = None
     warning: Optional[str] = None  # Optional warning message (e.g., "No relevant documents found")
+    debug: Optional[dict] = None  # Per-stage timings (ms), token counts and compaction provenance, only if request.debug
 
 class SearchRequest(BaseModel):
     """Schema for document search request"""
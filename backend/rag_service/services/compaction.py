@@ -0,0 +1,208 @@
+"""
+Context compaction - deduplicate and compress retrieved chunks before prompt assembly
+
+Pasien kronis memiliki baris "Resep Obat:" dan "Diagnosis:" yang sama di banyak
+kunjungan. Tahap ini:
+1. Menggabungkan fakta berulang menjadi satu baris dengan rentang tanggal
+   ("Metformin (500mg, 2x sehari): Jan–Jun 2025, 6 kunjungan")
+2. Membuang chunk yang hampir identik (MinHash atas word shingles)
+3. Menyimpan provenance: doc_id asal setiap fakta dan chunk yang digabung
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+import hashlib
+
+# Line prefixes in medical record chunks whose facts can be collapsed across visits
+_COLLAPSIBLE_PREFIXES = {
+    "Resep Obat: ": "; ",  # multiple drugs per line
+    "Diagnosis: ": None,   # whole diagnosis line (names + ICD codes) is one fact
+}
+
+_MONTHS_ID = ["Jan", "Feb", "Mar", "Apr", "Mei", "Jun", "Jul", "Agu", "Sep", "Okt", "Nov", "Des"]
+
+MINHASH_PERMUTATIONS = 64
+SHINGLE_SIZE = 3
+NEAR_DUPLICATE_THRESHOLD = 0.85
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutation_params(count: int) -> List[Tuple[int, int]]:
+    """Deterministic (a, b) pairs for the MinHash permutations"""
+    params = []
+    for i in range(count):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "little") % _MERSENNE_PRIME or 1
+        b = int.from_bytes(digest[8:], "little") % _MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+
+_PERMUTATIONS = _permutation_params(MINHASH_PERMUTATIONS)
+
+
+class CompactedContext:
+    """Result of compaction: prompt parts plus provenance for every fact and merged chunk"""
+    __slots__ = ("parts", "fact_sources", "merged_chunks", "original_chars", "compacted_chars")
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.fact_sources: Dict[str, List[str]] = {}    # fact line -> doc_ids
+        self.merged_chunks: Dict[str, List[str]] = {}   # kept doc_id -> dropped near-duplicate doc_ids
+        self.original_chars = 0
+        self.compacted_chars = 0
+
+
+def _parse_visit_date(metadata: Optional[dict]) -> Optional[datetime]:
+    if not metadata or not metadata.get("visit_date"):
+        return None
+    try:
+        return datetime.fromisoformat(str(metadata["visit_date"])[:10])
+    except ValueError:
+        return None
+
+
+def format_date_range(dates: Sequence[datetime]) -> str:
+    """Format dates as a compact range: "Jan 2025", "Jan–Jun 2025", "Nov 2024–Feb 2025" """
+    if not dates:
+        return "tanggal tidak diketahui"
+    first, last = min(dates), max(dates)
+    first_month = _MONTHS_ID[first.month - 1]
+    last_month = _MONTHS_ID[last.month - 1]
+    if (first.year, first.month) == (last.year, last.month):
+        return f"{first_month} {first.year}"
+    if first.year == last.year:
+        return f"{first_month}–{last_month} {last.year}"
+    return f"{first_month} {first.year}–{last_month} {last.year}"
+
+
+def _shingles(value: str) -> set:
+    words = value.lower().split()
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(value: str) -> Optional[Tuple[int, ...]]:
+    """MinHash signature over word shingles (None for empty text)"""
+    shingles = _shingles(value)
+    if not shingles:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingles]
+    signature = []
+    for a, b in _PERMUTATIONS:
+        signature.append(min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes))
+    return tuple(signature)
+
+
+def estimate_similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+    return same / len(sig_a)
+
+
+def _metadata_info(metadata: Optional[dict]) -> str:
+    """Same metadata suffix the prompt builders used before compaction"""
+    metadata_info = ""
+    if metadata:
+        if metadata.get("visit_date"):
+            metadata_info = f"\n[Tanggal: {metadata.get('visit_date')}]"
+        if metadata.get("doctor_name"):
+            metadata_info += f" [Dokter: {metadata.get('doctor_name')}]"
+        if metadata.get("facility_name"):
+            metadata_info += f" [Fasilitas: {metadata.get('facility_name')}]"
+    return metadata_info
+
+
+def compact_context(docs: Sequence) -> CompactedContext:
+    """
+    Compact retrieved DocumentChunks into prompt context parts
+
+    Docs keep their order (already sorted by similarity). Facts that appear in
+    two or more medical record chunks are moved into one "Fakta Berulang" block
+    with a date range; near-duplicate chunks are dropped and their visit dates
+    noted on the chunk that was kept.
+    """
+    result = CompactedContext()
+
+    # Pass 1: collect collapsible facts per record chunk
+    fact_occurrences: Dict[Tuple[str, str], List[int]] = {}
+    parsed: List[List[Tuple[str, Optional[str], List[str]]]] = []
+    for index, doc in enumerate(docs):
+        result.original_chars += len(doc.chunk_text) + len(_metadata_info(doc.metadata))
+        lines = []
+        is_record = bool(doc.metadata and doc.metadata.get("source") == "medical_record")
+        for line in doc.chunk_text.split("\n"):
+            prefix = next((p for p in _COLLAPSIBLE_PREFIXES if is_record and line.startswith(p)), None)
+            if prefix is None:
+                lines.append((line, None, []))
+                continue
+            separator = _COLLAPSIBLE_PREFIXES[prefix]
+            value = line[len(prefix):]
+            items = [item.strip() for item in value.split(separator)] if separator else [value.strip()]
+            items = [item for item in items if item]
+            for item in items:
+                occurrences = fact_occurrences.setdefault((prefix, item), [])
+                if not occurrences or occurrences[-1] != index:
+                    occurrences.append(index)
+            lines.append((line, prefix, items))
+        parsed.append(lines)
+
+    repeated = {key for key, indexes in fact_occurrences.items() if len(indexes) >= 2}
+
+    # Pass 2: repeated facts block (ordered by first appearance)
+    if repeated:
+        fact_lines = []
+        for key, indexes in fact_occurrences.items():
+            if key not in repeated:
+                continue
+            prefix, item = key
+            dates = [d for d in (_parse_visit_date(docs[i].metadata) for i in indexes) if d]
+            fact = f"- {prefix.strip()} {item}: {format_date_range(dates)}, {len(indexes)} kunjungan"
+            fact_lines.append(fact)
+            result.fact_sources[fact] = [docs[i].doc_id for i in indexes]
+        result.parts.append("=== Ringkasan Fakta Berulang ===\n" + "\n".join(fact_lines))
+
+    # Pass 3: rebuild chunks without repeated facts
+    chunk_texts: List[str] = []
+    for lines in parsed:
+        kept_lines = []
+        for line, prefix, items in lines:
+            if prefix is None:
+                kept_lines.append(line)
+                continue
+            remaining = [item for item in items if (prefix, item) not in repeated]
+            if remaining:
+                separator = _COLLAPSIBLE_PREFIXES[prefix] or ", "
+                kept_lines.append(prefix + separator.join(remaining))
+        chunk_texts.append("\n".join(kept_lines))
+
+    # Pass 4: drop near-duplicate chunks, keep provenance on the first occurrence
+    kept: List[Tuple[int, Optional[Tuple[int, ...]]]] = []
+    extra_dates: Dict[int, List[str]] = {}
+    for index, chunk_text in enumerate(chunk_texts):
+        # Header line carries the visit date, compare the body only
+        body = chunk_text.split("\n", 1)[1] if chunk_text.startswith("=== ") and "\n" in chunk_text else chunk_text
+        signature = minhash_signature(body)
+        duplicate_of = None
+        if signature is not None:
+            for kept_index, kept_signature in kept:
+                if kept_signature is not None and estimate_similarity(signature, kept_signature) >= NEAR_DUPLICATE_THRESHOLD:
+                    duplicate_of = kept_index
+                    break
+        if duplicate_of is None:
+            kept.append((index, signature))
+            continue
+        result.merged_chunks.setdefault(docs[duplicate_of].doc_id, []).append(docs[index].doc_id)
+        visit_date = (docs[index].metadata or {}).get("visit_date")
+        if visit_date:
+            extra_dates.setdefault(duplicate_of, []).append(str(visit_date))
+
+    for index, _ in kept:
+        part = f"{chunk_texts[index]}{_metadata_info(docs[index].metadata)}"
+        if extra_dates.get(index):
+            part += f"\n[Catatan serupa juga pada: {', '.join(extra_dates[index])}]"
+        result.parts.append(part)
+
+    result.compacted_chars = sum(len(part) for part in result.parts)
+    return result
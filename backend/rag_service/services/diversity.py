@@ -0,0 +1,108 @@
+"""
+Diversity re-ranking (maximal marginal relevance) for retrieved context
+
+Kunjungan kontrol rutin menghasilkan chunk yang hampir sama ("Diagnosis: Hipertensi,
+Resep Obat: Amlodipine 5 mg"), sehingga top `max_documents` sering berisi isi yang
+sama berulang. Re-ranker ini memilih chunk satu per satu dengan skor MMR:
+
+    mmr = lambda * relevance - (1 - lambda) * max_similarity_ke_chunk_terpilih
+
+Similarity dihitung dari word shingle (unigram + bigram) yang di-hash ke vektor
+berdimensi tetap, dinormalisasi L2, lalu cosine similarity semua kandidat dihitung
+sekaligus dengan NumPy (satu perkalian matriks; numpy ada di requirements.txt).
+Re-rank dibatasi latency budget: jika habis, slot yang tersisa diisi menurut skor
+relevansi seperti sebelumnya.
+"""
+from typing import Callable, List, Optional, Sequence, Set, TypeVar
+import re
+import time
+import zlib
+
+import numpy as np
+
+from ..core.config import MMR_ENABLED, MMR_LAMBDA, MMR_LATENCY_BUDGET_MS
+from .ranking import top_k_by_score
+
+T = TypeVar("T")
+
+FEATURE_DIMENSION = 512
+_WORD_RE = re.compile(r"\w+")
+
+
+def _body(value: str) -> str:
+    # Record chunk header carries the visit date, compare the body only (same as compaction)
+    if value.startswith("=== ") and "\n" in value:
+        return value.split("\n", 1)[1]
+    return value
+
+
+def _shingles(value: str) -> Set[str]:
+    words = _WORD_RE.findall(_body(value).lower())
+    shingles = set(words)
+    shingles.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return shingles
+
+
+def _similarity_matrix_numpy(shingle_sets: List[Set[str]]):
+    """Cosine similarity of hashed shingle vectors, all pairs at once"""
+    vectors = np.zeros((len(shingle_sets), FEATURE_DIMENSION), dtype=np.float32)
+    for row, shingles in enumerate(shingle_sets):
+        if shingles:
+            columns = [zlib.crc32(s.encode()) % FEATURE_DIMENSION for s in shingles]
+            np.add.at(vectors[row], columns, 1.0)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms > 0, norms, 1.0)
+    return vectors @ vectors.T
+
+
+def _mmr_numpy(relevance: Sequence[float], shingle_sets: List[Set[str]], k: int, lambda_: float, deadline: float) -> List[int]:
+    similarity = _similarity_matrix_numpy(shingle_sets)
+    relevance_vector = np.asarray(relevance, dtype=np.float32)
+    max_similarity = np.zeros(len(relevance), dtype=np.float32)
+    available = np.ones(len(relevance), dtype=bool)
+    selected: List[int] = []
+    while len(selected) < k and available.any():
+        if selected and time.perf_counter() > deadline:
+            break
+        scores = lambda_ * relevance_vector - (1.0 - lambda_) * max_similarity
+        scores[~available] = -np.inf
+        index = int(np.argmax(scores))  # first maximum: ties keep relevance order
+        selected.append(index)
+        available[index] = False
+        np.maximum(max_similarity, similarity[index], out=max_similarity)
+    return selected
+
+
+def mmr_rerank(
+    items: Sequence[T],
+    k: int,
+    lambda_: float = MMR_LAMBDA,
+    budget_ms: float = MMR_LATENCY_BUDGET_MS,
+    text: Optional[Callable[[T], str]] = None,
+    score: Optional[Callable[[T], float]] = None
+) -> List[T]:
+    """
+    Pick k diverse items, most relevant first (defaults to .chunk_text / .similarity_score)
+
+    Candidates are taken in relevance order. lambda_=1 is plain top-k by score.
+    When the latency budget runs out, the remaining slots are filled by score.
+    """
+    ranked = top_k_by_score(items, len(items), score)
+    if not MMR_ENABLED or k <= 0 or len(ranked) <= 1 or lambda_ >= 1.0:
+        return ranked[:k]
+
+    started = time.perf_counter()
+    deadline = started + budget_ms / 1000.0
+    get_text = text or (lambda item: item.chunk_text)
+    get_score = score or (lambda item: item.similarity_score)
+    relevance = [get_score(item) for item in ranked]
+    shingle_sets = [_shingles(get_text(item) or "") for item in ranked]
+
+    selected = _mmr_numpy(relevance, shingle_sets, k, lambda_, deadline)
+    if len(selected) < min(k, len(ranked)):
+        # Budget exhausted: fall back to relevance order for the remaining slots
+        chosen = set(selected)
+        selected.extend(i for i in range(len(ranked)) if i not in chosen)
+        selected = selected[:k]
+        print(f"[MMR] Latency budget of {budget_ms} ms exhausted, filled remaining slots by score")
+    return [ranked[i] for i in selected]
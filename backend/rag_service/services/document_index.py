@@ -0,0 +1,366 @@
+"""
+Global document index for cross-patient staff search (/rag/search tanpa patient_id)
+
+Sebelumnya search tanpa patient_id hanya memindai `limit*2` dokumen terbaru di
+seluruh tabel, sehingga pencarian populasi ("semua resume pulang yang menyebut
+dengue") tidak berguna. Modul ini menyimpan inverted index (kata -> doc_id) atas
+extract_text semua medical_documents, dipecah per rentang patient_id (shard).
+
+- Shard dicari paralel, hasil per shard digabung menjadi top-k global
+- Access scope diterapkan di dalam index: shard di luar scope dilewati dan
+  dokumen pasien di luar scope tidak pernah menjadi kandidat
+- Index hanya menyimpan postings dan metadata ringan; teks terbaru diambil ulang
+  dari DB untuk kandidat teratas (dokumen yang sudah dihapus otomatis terbuang)
+- Index dibangun dan dirawat oleh satu background thread (start() saat startup):
+  build awal, lalu setiap DOCUMENT_INDEX_REFRESH_SECONDS dokumen pasien yang versi
+  koleksi "documents"-nya berubah (patient_collection_versions) dimuat ulang, sehingga
+  dokumen baru, diedit dan dihapus ikut terlihat. Tanpa tabel versi koleksi hanya
+  dokumen baru (created_at watermark) yang masuk; edit/hapus menunggu rebuild penuh
+  berkala (DOCUMENT_INDEX_REBUILD_SECONDS). Request search tidak pernah memuat index.
+
+Batasan: index ada di memori setiap worker process (WEB_CONCURRENCY worker = salinan
+corpus sebanyak itu, masing-masing dengan thread perawatan sendiri); jalankan
+rag_service dengan sedikit worker jika corpus besar.
+"""
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import heapq
+import threading
+import time
+import sys
+import os
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+from ..core.config import (
+    DOCUMENT_INDEX_SHARD_SIZE,
+    DOCUMENT_INDEX_SEARCH_WORKERS,
+    DOCUMENT_INDEX_REFRESH_SECONDS,
+    DOCUMENT_INDEX_REBUILD_SECONDS,
+    DOCUMENT_INDEX_STARTUP_WAIT_SECONDS,
+    GLOBAL_SEARCH_ROLES
+)
+from .synonyms import Concept, text_word_set
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from auth.core.data_versions import DOCUMENTS, changed_collection_versions
+
+_BUILD_BATCH_SIZE = 500
+
+
+class DocumentAccessScope:
+    """Which patients' documents a caller may see (patient_ids None = all patients)"""
+    __slots__ = ("patient_ids",)
+
+    def __init__(self, patient_ids: Optional[Iterable[int]] = None):
+        self.patient_ids: Optional[FrozenSet[int]] = frozenset(patient_ids) if patient_ids is not None else None
+
+    @classmethod
+    def for_petugas(cls, petugas, patient_id: Optional[int] = None) -> "DocumentAccessScope":
+        """Scope for an authenticated petugas; roles outside GLOBAL_SEARCH_ROLES see nothing cross-patient"""
+        role = getattr(petugas, "role", None)
+        role = str(getattr(role, "value", role) or "").upper()
+        if patient_id is not None:
+            return cls([patient_id])
+        if role in GLOBAL_SEARCH_ROLES:
+            return cls()
+        return cls([])
+
+    def allows(self, patient_id: int) -> bool:
+        return self.patient_ids is None or patient_id in self.patient_ids
+
+    def allows_shard(self, shard_key: int) -> bool:
+        if self.patient_ids is None:
+            return True
+        return any(_shard_key(patient_id) == shard_key for patient_id in self.patient_ids)
+
+    def is_empty(self) -> bool:
+        return self.patient_ids is not None and not self.patient_ids
+
+
+class _IndexedDocument:
+    __slots__ = ("patient_id", "created_ts", "words")
+
+    def __init__(self, patient_id: int, created_ts: float, words: Tuple[str, ...]):
+        self.patient_id = patient_id
+        self.created_ts = created_ts
+        self.words = words
+
+
+def _shard_key(patient_id: int) -> int:
+    return patient_id // max(1, DOCUMENT_INDEX_SHARD_SIZE)
+
+
+def _timestamp(value) -> float:
+    return value.timestamp() if isinstance(value, datetime) else 0.0
+
+
+class DocumentShard:
+    """Inverted index for one patient_id range"""
+
+    def __init__(self, shard_key: int):
+        self.shard_key = shard_key
+        self._postings: Dict[str, Set[str]] = {}
+        self._documents: Dict[str, _IndexedDocument] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._documents
+
+    def add(self, doc_id: str, patient_id: int, created_at, extract_text: str) -> None:
+        words = tuple(text_word_set(extract_text))
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._documents[doc_id] = _IndexedDocument(patient_id, _timestamp(created_at), words)
+            for word in words:
+                self._postings.setdefault(word, set()).add(doc_id)
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def replace_patient(self, patient_id: int, rows) -> None:
+        """Swap one patient's documents for the current rows (edits and deletes included)"""
+        indexed = [(row.doc_id, _IndexedDocument(patient_id, _timestamp(row.created_at), tuple(text_word_set(row.extract_text))))
+                   for row in rows]
+        with self._lock:
+            for doc_id in [doc_id for doc_id, document in self._documents.items() if document.patient_id == patient_id]:
+                self._remove_locked(doc_id)
+            for doc_id, document in indexed:
+                self._remove_locked(doc_id)  # Moved from another patient of this shard
+                self._documents[doc_id] = document
+                for word in document.words:
+                    self._postings.setdefault(word, set()).add(doc_id)
+
+    def _remove_locked(self, doc_id: str) -> None:
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        for word in document.words:
+            postings = self._postings.get(word)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[word]
+
+    def _matching(self, words: Tuple[str, ...]) -> Set[str]:
+        """Docs containing every word of one alternative (smallest postings list first)"""
+        postings: List[Set[str]] = []
+        for word in words:
+            docs = self._postings.get(word)
+            if not docs:
+                return set()
+            postings.append(docs)
+        postings.sort(key=len)
+        matched = set(postings[0])
+        for other in postings[1:]:
+            matched &= other
+            if not matched:
+                break
+        return matched
+
+    def search(
+        self,
+        concepts: List[Concept],
+        min_matches: int,
+        limit: int,
+        scope: DocumentAccessScope
+    ) -> List[Tuple[int, float, str]]:
+        """Top (matches, created_ts, doc_id) in this shard, scope applied before ranking"""
+        matches: Dict[str, int] = {}
+        with self._lock:
+            for alternatives in concepts:
+                concept_docs: Set[str] = set()
+                for words in alternatives:
+                    concept_docs |= self._matching(words)
+                for doc_id in concept_docs:
+                    matches[doc_id] = matches.get(doc_id, 0) + 1
+
+            candidates = []
+            for doc_id, count in matches.items():
+                if count < min_matches:
+                    continue
+                document = self._documents[doc_id]
+                if not scope.allows(document.patient_id):
+                    continue
+                candidates.append((count, document.created_ts, doc_id))
+        return heapq.nlargest(limit, candidates)
+
+
+class GlobalDocumentIndex:
+    """Sharded inverted index over all medical_documents.extract_text"""
+
+    def __init__(self):
+        self._shards: Dict[int, DocumentShard] = {}
+        self._watermark: Optional[datetime] = None  # created_at fallback without version table
+        self._versions_since: Optional[datetime] = None  # change feed position (database time)
+        self._document_versions: Dict[int, int] = {}  # patient_id -> documents version indexed
+        self._built_at: Optional[float] = None
+        self._refreshed_at: Optional[float] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in list(self._shards.values()))
+
+    def _shard_for(self, shards: Dict[int, DocumentShard], patient_id: int) -> DocumentShard:
+        key = _shard_key(patient_id)
+        shard = shards.get(key)
+        if shard is None:
+            shard = shards[key] = DocumentShard(key)
+        return shard
+
+    def _load(self, db: Session, shards: Dict[int, DocumentShard], since: Optional[datetime]) -> Optional[datetime]:
+        """Load documents (all, or created since watermark) in doc_id keyset batches"""
+        watermark = since
+        after = ""
+        since_filter = "AND created_at >= :since" if since is not None else ""
+        while True:
+            rows = db.execute(text(f"""
+                SELECT doc_id, patient_id, extract_text, created_at
+                FROM medical_documents
+                WHERE extract_text IS NOT NULL
+                AND extract_text != ''
+                AND doc_id > :after
+                {since_filter}
+                ORDER BY doc_id
+                LIMIT :batch
+            """), {"after": after, "since": since, "batch": _BUILD_BATCH_SIZE}).fetchall()
+            for row in rows:
+                shard = self._shard_for(shards, row.patient_id)
+                if since is not None and row.doc_id in shard:
+                    continue  # Same-second watermark overlap, already indexed
+                shard.add(row.doc_id, row.patient_id, row.created_at, row.extract_text)
+                if row.created_at and (watermark is None or row.created_at > watermark):
+                    watermark = row.created_at
+            if len(rows) < _BUILD_BATCH_SIZE:
+                return watermark
+            after = rows[-1].doc_id
+
+    def rebuild(self, db: Session) -> int:
+        """Build a fresh set of shards and swap it in (searches keep using the old one meanwhile)"""
+        # Change feed position read before loading: writes during the build are replayed
+        versions_since = db.execute(text("SELECT NOW()")).scalar()
+        shards: Dict[int, DocumentShard] = {}
+        watermark = self._load(db, shards, None)
+        self._shards = shards
+        self._watermark = watermark
+        self._versions_since = versions_since
+        self._document_versions = {}
+        self._built_at = self._refreshed_at = time.monotonic()
+        self._ready.set()
+        return sum(len(shard) for shard in shards.values())
+
+    def refresh(self, db: Session) -> int:
+        """Reload patients whose documents changed (created_at watermark without version table)"""
+        changes = changed_collection_versions(db, DOCUMENTS, self._versions_since) if self._versions_since else None
+        if changes is None:
+            self._watermark = self._load(db, self._shards, self._watermark)
+            self._refreshed_at = time.monotonic()
+            return 0
+
+        reloaded = 0
+        for patient_id, version, updated_at in changes:
+            if updated_at and (self._versions_since is None or updated_at > self._versions_since):
+                self._versions_since = updated_at
+            if self._document_versions.get(patient_id) == version:
+                continue  # Same-second overlap, already reloaded
+            rows = db.execute(text("""
+                SELECT doc_id, patient_id, extract_text, created_at
+                FROM medical_documents
+                WHERE patient_id = :patient_id
+                AND extract_text IS NOT NULL
+                AND extract_text != ''
+            """), {"patient_id": patient_id}).fetchall()
+            self._shard_for(self._shards, patient_id).replace_patient(patient_id, rows)
+            self._document_versions[patient_id] = version
+            reloaded += 1
+        self._refreshed_at = time.monotonic()
+        return reloaded
+
+    def _maintain(self) -> None:
+        """Background thread: initial build, incremental refreshes, periodic full rebuilds"""
+        from ..core.database import SessionLocal
+
+        while True:
+            db = SessionLocal()
+            try:
+                now = time.monotonic()
+                if self._built_at is None or now - self._built_at >= DOCUMENT_INDEX_REBUILD_SECONDS:
+                    total = self.rebuild(db)
+                    print(f"[Document Index] Rebuilt: {total} documents in {len(self._shards)} shard(s)")
+                else:
+                    reloaded = self.refresh(db)
+                    if reloaded:
+                        print(f"[Document Index] Reloaded documents of {reloaded} patient(s)")
+            except Exception as e:
+                print(f"[Document Index] Error maintaining index: {str(e)}")
+                db.rollback()
+            finally:
+                db.close()
+            time.sleep(max(1, DOCUMENT_INDEX_REFRESH_SECONDS))
+
+    def start(self) -> None:
+        """Start the maintenance thread once per process (app startup; idempotent)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._maintain, name="document-index", daemon=True)
+                self._thread.start()
+
+    def wait_ready(self, timeout: float = DOCUMENT_INDEX_STARTUP_WAIT_SECONDS) -> bool:
+        """True once the first build finished (blocks up to timeout: call from a threadpool route)"""
+        self.start()
+        return self._ready.wait(timeout)
+
+    def discard(self, doc_ids: Iterable[str]) -> None:
+        """Drop documents that no longer exist in the database"""
+        shards = list(self._shards.values())
+        for doc_id in doc_ids:
+            for shard in shards:
+                if doc_id in shard:
+                    shard.remove(doc_id)
+                    break
+
+    def search(
+        self,
+        concepts: List[Concept],
+        limit: int,
+        scope: DocumentAccessScope,
+        min_matches: int = 1
+    ) -> List[str]:
+        """
+        Doc ids of the best matches across all shards in scope
+        Ranked by matched concepts, newest document first on ties.
+        """
+        if not concepts or limit <= 0 or scope.is_empty():
+            return []
+        shards = [shard for key, shard in list(self._shards.items()) if scope.allows_shard(key)]
+        if not shards:
+            return []
+
+        def search_shard(shard: DocumentShard) -> List[Tuple[int, float, str]]:
+            return shard.search(concepts, min_matches, limit, scope)
+
+        if len(shards) == 1 or DOCUMENT_INDEX_SEARCH_WORKERS <= 1:
+            per_shard = [search_shard(shard) for shard in shards]
+        else:
+            if self._executor is None:
+                with self._lock:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=DOCUMENT_INDEX_SEARCH_WORKERS, thread_name_prefix="document-index"
+                        )
+            per_shard = list(self._executor.map(search_shard, shards))
+
+        merged = heapq.nlargest(limit, (hit for hits in per_shard for hit in hits))
+        return [doc_id for _, _, doc_id in merged]
+
+
+global_document_index = GlobalDocumentIndex()
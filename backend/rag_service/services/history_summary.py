@@ -0,0 +1,372 @@
+"""
+Pre-summarized record history tiers for long-tenured patients
+
+search_medical_records hanya mengambil limit*3 kunjungan terbaru, sehingga riwayat
+lama tidak terlihat oleh RAG. Modul ini membangun ringkasan per pasien per periode
+(per tahun untuk tahun-tahun sebelumnya, per kuartal untuk tahun berjalan) dari
+digest rekam medis, menyimpannya di tabel patient_history_summaries, dan
+me-refresh secara incremental hanya periode yang datanya berubah.
+
+Perubahan per periode dideteksi dari jumlah dan checksum isi (CRC32 diagnosis, obat,
+hasil lab, tanggal kunjungan), sehingga edit data tanpa kolom updated_at juga terlihat.
+Refresh dilewati sepenuhnya selama patient_data_versions pasien belum berubah sejak
+refresh terakhir.
+
+Refresh digerakkan oleh sinyal versi data: poller (start_summary_poller, dijalankan
+saat startup rag_service) membaca pasien yang patient_data_versions-nya berubah setiap
+HISTORY_SUMMARY_POLL_SECONDS dan mengantrekan refresh mereka, sehingga ringkasan sudah
+diperbarui sebelum pertanyaan berikutnya. Jalur query hanya memicu refresh pertama
+untuk pasien yang belum pernah dicek proses ini (misalnya data sebelum deploy).
+
+Refresh berjalan di background thread dengan session DB sendiri; prompt cukup
+membaca ringkasan yang sudah tersimpan dengan batas karakter tetap.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import date, datetime
+import threading
+import queue
+import time
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+from ..core.config import (
+    HISTORY_SUMMARY_ENABLED,
+    HISTORY_SUMMARY_MAX_CHARS,
+    HISTORY_SUMMARY_REFRESH_SECONDS,
+    HISTORY_SUMMARY_POLL_SECONDS,
+    HISTORY_SUMMARY_TOP_ITEMS
+)
+from .compaction import format_date_range
+from .ttl_cache import LRUTTLCache
+
+# Period key: quarter for the current year, year for older history
+_PERIOD_KEY_SQL = """
+    CASE WHEN YEAR(mr.visit_date) = :current_year
+         THEN CONCAT(YEAR(mr.visit_date), '-Q', QUARTER(mr.visit_date))
+         ELSE CAST(YEAR(mr.visit_date) AS CHAR)
+    END
+"""
+
+
+def period_bounds(period_key: str) -> Tuple[str, date, date]:
+    """Return (period_type, start, end_exclusive) for "2023" or "2025-Q2" """
+    if "-Q" in period_key:
+        year_str, quarter_str = period_key.split("-Q")
+        year, quarter = int(year_str), int(quarter_str)
+        start = date(year, 3 * (quarter - 1) + 1, 1)
+        end = date(year + 1, 1, 1) if quarter == 4 else date(year, 3 * quarter + 1, 1)
+        return "quarter", start, end
+    year = int(period_key)
+    return "year", date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def _load_period_signatures(patient_id: int, db: Session, current_year: int) -> Dict[str, Tuple[int, str]]:
+    """
+    Cheap change detection per period: record count, fact count and a content checksum
+    The checksum covers every field the summary is built from, so edits are detected
+    too (the fact tables have no updated_at). Returns {period_key: (record_count, signature)}
+    """
+    query_sql = text(f"""
+        SELECT
+            period_key,
+            COUNT(*) AS record_count,
+            SUM(fact_count) AS fact_count,
+            SUM(CRC32(CONCAT_WS('|', record_id, visit_date, fact_checksum))) AS checksum
+        FROM (
+            SELECT
+                {_PERIOD_KEY_SQL} AS period_key,
+                mr.record_id,
+                mr.visit_date,
+                COUNT(c.record_id) AS fact_count,
+                COALESCE(SUM(c.checksum), 0) AS fact_checksum
+            FROM medical_records mr
+            LEFT JOIN (
+                SELECT d.record_id, CRC32(CONCAT_WS('|', 'diagnosis', d.diagnosis_name, d.icd_code)) AS checksum
+                FROM diagnoses d
+                WHERE d.record_id IN (SELECT record_id FROM medical_records WHERE patient_id = :patient_id)
+                UNION ALL
+                SELECT p.record_id, CRC32(CONCAT_WS('|', 'drug', p.drug_name)) AS checksum
+                FROM prescriptions p
+                WHERE p.record_id IN (SELECT record_id FROM medical_records WHERE patient_id = :patient_id)
+                UNION ALL
+                SELECT lr.record_id, CRC32(CONCAT_WS('|', 'lab', lr.test_name, lr.result_value, lr.result_unit)) AS checksum
+                FROM lab_results lr
+                WHERE lr.record_id IN (SELECT record_id FROM medical_records WHERE patient_id = :patient_id)
+            ) c ON c.record_id = mr.record_id
+            WHERE mr.patient_id = :patient_id
+            GROUP BY mr.record_id, mr.visit_date
+        ) visits
+        GROUP BY period_key
+    """)
+
+    signatures = {}
+    for row in db.execute(query_sql, {"patient_id": patient_id, "current_year": current_year}):
+        signature = f"{row.record_count}:{row.fact_count}:{row.checksum}"
+        signatures[row.period_key] = (int(row.record_count), signature[:64])
+    return signatures
+
+
+def build_period_summary(patient_id: int, period_key: str, db: Session) -> str:
+    """Build digest text for one period from visits, diagnoses, prescriptions and labs"""
+    _, start, end = period_bounds(period_key)
+    params = {"patient_id": patient_id, "start": start, "end": end}
+    period_filter = "mr.patient_id = :patient_id AND mr.visit_date >= :start AND mr.visit_date < :end"
+
+    visits = db.execute(text(f"""
+        SELECT visit_date FROM medical_records mr
+        WHERE {period_filter}
+        ORDER BY visit_date
+    """), params).fetchall()
+    visit_dates = [row.visit_date for row in visits if row.visit_date]
+
+    diagnoses = db.execute(text(f"""
+        SELECT d.diagnosis_name, MAX(d.icd_code) AS icd_code, COUNT(*) AS total
+        FROM diagnoses d
+        INNER JOIN medical_records mr ON d.record_id = mr.record_id
+        WHERE {period_filter}
+        GROUP BY d.diagnosis_name
+        ORDER BY total DESC, d.diagnosis_name
+        LIMIT :top_items
+    """), {**params, "top_items": HISTORY_SUMMARY_TOP_ITEMS}).fetchall()
+
+    drugs = db.execute(text(f"""
+        SELECT p.drug_name, COUNT(*) AS total
+        FROM prescriptions p
+        INNER JOIN medical_records mr ON p.record_id = mr.record_id
+        WHERE {period_filter}
+        GROUP BY p.drug_name
+        ORDER BY total DESC, p.drug_name
+        LIMIT :top_items
+    """), {**params, "top_items": HISTORY_SUMMARY_TOP_ITEMS}).fetchall()
+
+    labs = db.execute(text(f"""
+        SELECT lr.test_name, lr.result_value, lr.result_unit
+        FROM lab_results lr
+        INNER JOIN medical_records mr ON lr.record_id = mr.record_id
+        WHERE {period_filter}
+        ORDER BY mr.visit_date DESC
+    """), params).fetchall()
+
+    parts = [f"{period_key} ({len(visits)} kunjungan, {format_date_range(visit_dates)})"]
+    if diagnoses:
+        items = []
+        for row in diagnoses:
+            icd_part = f" [{row.icd_code}]" if row.icd_code else ""
+            items.append(f"{row.diagnosis_name}{icd_part} {row.total}x")
+        parts.append("Diagnosis: " + ", ".join(items))
+    if drugs:
+        parts.append("Obat: " + ", ".join(f"{row.drug_name} {row.total}x" for row in drugs))
+    if labs:
+        latest: Dict[str, str] = {}
+        for row in labs:
+            if row.test_name not in latest and len(latest) < HISTORY_SUMMARY_TOP_ITEMS:
+                unit = f" {row.result_unit}" if row.result_unit else ""
+                latest[row.test_name] = f"{row.test_name} {row.result_value}{unit}"
+        parts.append("Lab terakhir: " + ", ".join(latest.values()))
+
+    return ". ".join(parts)
+
+
+def refresh_patient_summaries(patient_id: int, db: Session) -> int:
+    """
+    Incrementally refresh stored summaries for a patient
+    Only periods whose signature changed are rebuilt; obsolete periods (e.g. last
+    year's quarters after year rollover) are removed. Returns number of periods rebuilt.
+    """
+    current_year = datetime.now().year
+    signatures = _load_period_signatures(patient_id, db, current_year)
+
+    stored = {
+        row.period_key: row.source_signature
+        for row in db.execute(text("""
+            SELECT period_key, source_signature
+            FROM patient_history_summaries
+            WHERE patient_id = :patient_id
+        """), {"patient_id": patient_id})
+    }
+
+    rebuilt = 0
+    for period_key, (record_count, signature) in signatures.items():
+        if stored.get(period_key) == signature:
+            continue
+        period_type, start, _ = period_bounds(period_key)
+        summary_text = build_period_summary(patient_id, period_key, db)
+        db.execute(text("""
+            INSERT INTO patient_history_summaries
+                (patient_id, period_key, period_type, period_start, record_count, source_signature, summary_text)
+            VALUES
+                (:patient_id, :period_key, :period_type, :period_start, :record_count, :source_signature, :summary_text)
+            ON DUPLICATE KEY UPDATE
+                record_count = VALUES(record_count),
+                source_signature = VALUES(source_signature),
+                summary_text = VALUES(summary_text)
+        """), {
+            "patient_id": patient_id,
+            "period_key": period_key,
+            "period_type": period_type,
+            "period_start": start,
+            "record_count": record_count,
+            "source_signature": signature,
+            "summary_text": summary_text
+        })
+        rebuilt += 1
+
+    obsolete = [key for key in stored if key not in signatures]
+    for period_key in obsolete:
+        db.execute(text("""
+            DELETE FROM patient_history_summaries
+            WHERE patient_id = :patient_id AND period_key = :period_key
+        """), {"patient_id": patient_id, "period_key": period_key})
+
+    if rebuilt or obsolete:
+        db.commit()
+    return rebuilt
+
+
+def get_history_summary_context(patient_id: int, db: Session, max_chars: int = HISTORY_SUMMARY_MAX_CHARS) -> Optional[str]:
+    """
+    Long-range history from stored summaries with a fixed size budget
+    Newest periods are kept first when the budget is exceeded, output is chronological.
+    """
+    if not HISTORY_SUMMARY_ENABLED:
+        return None
+
+    result = db.execute(text("""
+        SELECT period_key, summary_text
+        FROM patient_history_summaries
+        WHERE patient_id = :patient_id
+        ORDER BY period_start DESC
+    """), {"patient_id": patient_id})
+
+    header = "=== Ringkasan Riwayat Jangka Panjang ==="
+    used = len(header)
+    lines: List[str] = []
+    for row in result:
+        line = f"- {row.summary_text}"
+        if used + len(line) + 1 > max_chars:
+            break
+        lines.append(line)
+        used += len(line) + 1
+
+    if not lines:
+        return None
+    lines.reverse()
+    return header + "\n" + "\n".join(lines)
+
+
+# ============================================================================
+# Background summarizer
+# ============================================================================
+
+_MAX_TRACKED_PATIENTS = 10000
+_VERSION_MEMORY_SECONDS = 24 * 3600
+
+_refresh_queue: "queue.Queue[int]" = queue.Queue()
+_pending_patients: Set[int] = set()
+# Patients refreshed within HISTORY_SUMMARY_REFRESH_SECONDS (fixed window, not extended on read)
+_last_scheduled: LRUTTLCache[int, bool] = LRUTTLCache(_MAX_TRACKED_PATIENTS, HISTORY_SUMMARY_REFRESH_SECONDS)
+# patient_data_versions.version at the last completed refresh
+_refreshed_versions: LRUTTLCache[int, int] = LRUTTLCache(_MAX_TRACKED_PATIENTS, _VERSION_MEMORY_SECONDS)
+_scheduler_lock = threading.Lock()
+_worker_thread: Optional[threading.Thread] = None
+_poller_thread: Optional[threading.Thread] = None
+
+
+def _summary_worker() -> None:
+    """Process refresh requests one patient at a time with a dedicated session"""
+    from ..core.database import SessionLocal
+    from auth.core.data_versions import get_patient_data_version
+
+    while True:
+        patient_id = _refresh_queue.get()
+        db = SessionLocal()
+        try:
+            # Read before the refresh: a write during it is picked up by the next one
+            version = get_patient_data_version(db, patient_id)
+            if version is None or _refreshed_versions.peek(patient_id) != version:
+                rebuilt = refresh_patient_summaries(patient_id, db)
+                if version is not None:
+                    _refreshed_versions.put(patient_id, version)
+                if rebuilt:
+                    print(f"[History Summary] Patient {patient_id}: {rebuilt} period(s) refreshed")
+        except Exception as e:
+            db.rollback()
+            print(f"[History Summary] Error refreshing patient {patient_id}: {str(e)}")
+        finally:
+            db.close()
+            with _scheduler_lock:
+                _pending_patients.discard(patient_id)
+            _refresh_queue.task_done()
+
+
+def _enqueue_locked(patient_id: int) -> bool:
+    """Queue patient unless already pending (caller holds _scheduler_lock)"""
+    global _worker_thread
+
+    if patient_id in _pending_patients:
+        return False
+    _pending_patients.add(patient_id)
+    if _worker_thread is None or not _worker_thread.is_alive():
+        _worker_thread = threading.Thread(target=_summary_worker, name="history-summary-worker", daemon=True)
+        _worker_thread.start()
+    _refresh_queue.put(patient_id)
+    return True
+
+
+def schedule_summary_refresh(patient_id: int) -> bool:
+    """
+    Read path: queue a refresh for a patient not refreshed by this process yet
+    (throttled, deduplicated). Later changes arrive through the poller.
+    Returns True if a refresh was queued.
+    """
+    if not HISTORY_SUMMARY_ENABLED:
+        return False
+
+    with _scheduler_lock:
+        if _refreshed_versions.peek(patient_id) is not None or _last_scheduled.peek(patient_id):
+            return False
+        _last_scheduled.put(patient_id, True)
+        return _enqueue_locked(patient_id)
+
+
+def _summary_poller() -> None:
+    """Queue refreshes for patients whose data version changed since the last poll"""
+    from ..core.database import SessionLocal
+    from auth.core.data_versions import changed_patient_versions
+
+    since = None
+    while True:
+        db = SessionLocal()
+        try:
+            if since is None:
+                # Change feed position in database time (updated_at is set by MySQL)
+                since = db.execute(text("SELECT NOW()")).scalar()
+            else:
+                changes = changed_patient_versions(db, since)
+                for patient_id, version, updated_at in changes or []:
+                    if updated_at and updated_at > since:
+                        since = updated_at
+                    if _refreshed_versions.peek(patient_id) == version:
+                        continue  # Same-second overlap, already refreshed
+                    with _scheduler_lock:
+                        _enqueue_locked(patient_id)
+        except Exception as e:
+            db.rollback()
+            print(f"[History Summary] Error polling data versions: {str(e)}")
+        finally:
+            db.close()
+        time.sleep(HISTORY_SUMMARY_POLL_SECONDS)
+
+
+def start_summary_poller() -> bool:
+    """Start the data-version poller once per process (app startup); False if disabled"""
+    global _poller_thread
+
+    if not HISTORY_SUMMARY_ENABLED or HISTORY_SUMMARY_POLL_SECONDS <= 0:
+        return False
+    with _scheduler_lock:
+        if _poller_thread is None or not _poller_thread.is_alive():
+            _poller_thread = threading.Thread(target=_summary_poller, name="history-summary-poller", daemon=True)
+            _poller_thread.start()
+    return True
@@ -0,0 +1,225 @@
+"""
+Record/replay cassettes for LLM calls
+
+Jawaban dan latency provider LLM (OpenRouter, Gemini) berubah-ubah, sehingga benchmark
+dan regression test RAG tidak bisa diulang. Lapisan cassette ini:
+1. record: setiap request provider (model, prompt, parameter generation) beserta
+   potongan stream jawaban, waktu tiap potongan, dan usage token disimpan ke disk,
+   satu file JSON per hash request
+2. replay: request yang sama diputar ulang dari disk tanpa jaringan, opsional dengan
+   latency asli (time-to-first-token dan jeda antar potongan)
+3. Request yang tidak ada di cassette saat replay menjadi CassetteMiss, jadi
+   perubahan konstruksi prompt langsung terlihat
+
+Mode diatur lewat LLM_CASSETTE_MODE: off (default), record, replay, replay_or_record.
+"""
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+from ..core.config import (
+    LLM_CASSETTE_MODE,
+    LLM_CASSETTE_DIR,
+    LLM_CASSETTE_SIMULATE_LATENCY
+)
+
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODE_REPLAY_OR_RECORD = "replay_or_record"
+_MODES = (MODE_OFF, MODE_RECORD, MODE_REPLAY, MODE_REPLAY_OR_RECORD)
+
+CASSETTE_FORMAT_VERSION = 1
+
+
+class CassetteMiss(Exception):
+    """Replay-only mode and no cassette for this request (prompt construction changed?)"""
+
+    def __init__(self, provider: str, key: str):
+        super().__init__(f"LLM cassette miss for {provider} request {key}")
+        self.provider = provider
+        self.key = key
+
+
+class TokenUsage:
+    """Prompt/completion token counts reported by the provider"""
+    __slots__ = ("prompt_tokens", "completion_tokens")
+
+    def __init__(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+class LLMStream:
+    """
+    Answer text pieces of one LLM call
+    usage is filled in by the producer once the stream is exhausted (None if not reported).
+    """
+
+    def __init__(self, pieces: Optional[Iterable[str]] = None):
+        self.pieces: Iterable[str] = pieces if pieces is not None else ()
+        self.usage: Optional[TokenUsage] = None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.pieces)
+
+
+class _ReplayStream(LLMStream):
+    """Plays back recorded pieces, optionally waiting for the recorded offsets"""
+
+    def __init__(self, cassette: Dict, simulate_latency: bool):
+        super().__init__()
+        self._chunks = cassette.get("chunks", [])
+        self._simulate_latency = simulate_latency
+        usage = cassette.get("usage")
+        self._usage = TokenUsage(usage.get("prompt_tokens"), usage.get("completion_tokens")) if usage else None
+
+    def __iter__(self) -> Iterator[str]:
+        started = time.perf_counter()
+        for chunk in self._chunks:
+            if self._simulate_latency:
+                delay = chunk["t"] - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield chunk["text"]
+        self.usage = self._usage
+
+
+class _RecordingStream(LLMStream):
+    """Passes a live stream through and writes the cassette once it is exhausted"""
+
+    def __init__(self, live: LLMStream, path: str, provider: str, key: str, request: Dict):
+        super().__init__()
+        self._live = live
+        self._path = path
+        self._provider = provider
+        self._key = key
+        self._request = request
+
+    def __iter__(self) -> Iterator[str]:
+        started = time.perf_counter()
+        chunks: List[Dict] = []
+        for piece in self._live:
+            chunks.append({"t": round(time.perf_counter() - started, 4), "text": piece})
+            yield piece
+        self.usage = self._live.usage
+        usage = None
+        if self.usage is not None:
+            usage = {"prompt_tokens": self.usage.prompt_tokens, "completion_tokens": self.usage.completion_tokens}
+        _write_cassette(self._path, {
+            "version": CASSETTE_FORMAT_VERSION,
+            "key": self._key,
+            "provider": self._provider,
+            "request": self._request,
+            "chunks": chunks,
+            "usage": usage,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        })
+        cassette_stats.count("recorded")
+
+
+class CassetteStats:
+    """Hit/miss/record counters (benchmarks report them)"""
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+cassette_stats = CassetteStats()
+
+_settings = {
+    "mode": LLM_CASSETTE_MODE if LLM_CASSETTE_MODE in _MODES else MODE_OFF,
+    "directory": LLM_CASSETTE_DIR,
+    "simulate_latency": LLM_CASSETTE_SIMULATE_LATENCY
+}
+
+
+def configure_cassettes(
+    mode: Optional[str] = None,
+    directory: Optional[str] = None,
+    simulate_latency: Optional[bool] = None
+) -> None:
+    """Override the env configuration (benchmarks, tests)"""
+    if mode is not None:
+        if mode not in _MODES:
+            raise ValueError(f"Unknown LLM cassette mode: {mode}. Must be one of {_MODES}")
+        _settings["mode"] = mode
+    if directory is not None:
+        _settings["directory"] = directory
+    if simulate_latency is not None:
+        _settings["simulate_latency"] = simulate_latency
+
+
+def cassette_key(provider: str, request: Dict) -> str:
+    """Stable hash of the provider request (model, prompt, generation parameters)"""
+    canonical = json.dumps({"provider": provider, "request": request}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _cassette_path(provider: str, key: str) -> str:
+    return os.path.join(_settings["directory"], provider, f"{key}.json")
+
+
+def _write_cassette(path: str, cassette: Dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp{threading.get_ident()}"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(cassette, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, path)
+    except Exception as e:
+        print(f"[LLM Cassette] Error writing {path}: {str(e)}")
+
+
+def _read_cassette(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cassette = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[LLM Cassette] Error reading {path}: {str(e)}")
+        return None
+    if cassette.get("version") != CASSETTE_FORMAT_VERSION:
+        return None
+    return cassette
+
+
+def open_llm_stream(provider: str, request: Dict, live: Callable[[], LLMStream]) -> LLMStream:
+    """
+    Stream for one provider call, live or through the cassette layer
+    `request` must contain everything that shapes the answer (it is the cassette key);
+    `live` performs the real provider call and is only invoked when needed.
+    """
+    mode = _settings["mode"]
+    if mode == MODE_OFF:
+        return live()
+
+    key = cassette_key(provider, request)
+    path = _cassette_path(provider, key)
+    if mode in (MODE_REPLAY, MODE_REPLAY_OR_RECORD):
+        cassette = _read_cassette(path)
+        if cassette is not None:
+            cassette_stats.count("hit")
+            return _ReplayStream(cassette, _settings["simulate_latency"])
+        cassette_stats.count("miss")
+        if mode == MODE_REPLAY:
+            raise CassetteMiss(provider, key)
+
+    return _RecordingStream(live(), path, provider, key, request)
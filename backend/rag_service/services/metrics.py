@@ -0,0 +1,208 @@
+"""
+Per-stage latency and token accounting for RAG requests
+
+Setiap request RAG membawa RequestTrace yang mencatat durasi per tahap (retrieval
+per sumber, context build, LLM queue wait, time-to-first-token, generation,
+post-processing), jumlah token prompt/completion serta karakter context sebelum/sesudah
+compaction (dengan doc_id asal fakta yang digabung). Hasilnya:
+1. Dikembalikan sebagai field debug opsional di response (request.debug = true)
+2. Diakumulasi ke histogram in-process yang bisa di-scrape di GET /rag/metrics
+   (format teks Prometheus). Endpoint ini internal: dengan RAG_METRICS_TOKEN scraper
+   mengirim "Authorization: Bearer <token>", tanpa token hanya client loopback
+"""
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import hmac
+import threading
+import time
+
+from fastapi import HTTPException, Request, status
+
+from ..core.config import RAG_METRICS_TOKEN
+
+# Bucket upper bounds (seconds / tokens), Prometheus style
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+CHAR_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (thread-safe)"""
+    __slots__ = ("buckets", "counts", "total", "count", "_lock")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Cumulative bucket counts, sum and count"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.total, self.count
+        cumulative = []
+        running = 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class MetricsRegistry:
+    """Named histograms keyed by label values"""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float], **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(buckets)
+                    self._help.setdefault(name, help_text)
+        return histogram
+
+    def render_prometheus(self) -> str:
+        """Text exposition format (version 0.0.4)"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        lines: List[str] = []
+        current_name = None
+        for (name, labels), histogram in items:
+            if name != current_name:
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                current_name = name
+            label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+            prefix = f"{label_text}," if label_text else ""
+            cumulative, total, count = histogram.snapshot()
+            for bound, value in zip(histogram.buckets, cumulative):
+                lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {value}')
+            lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {cumulative[-1]}')
+            lines.append(f"{name}_sum{{{label_text}}} {total:.6f}")
+            lines.append(f"{name}_count{{{label_text}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+rag_metrics = MetricsRegistry()
+
+
+class RequestTrace:
+    """Stage timings and token counts for one RAG request"""
+    __slots__ = ("service", "stages", "prompt_tokens", "completion_tokens", "tokens_estimated",
+                 "context_chars", "compaction", "_started", "_finished")
+
+    def __init__(self, service: str):
+        self.service = service
+        self.stages: Dict[str, float] = {}  # stage -> seconds (repeated stages accumulate)
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.tokens_estimated = False
+        self.context_chars: Optional[Tuple[int, int]] = None  # retrieved chunks before/after compaction
+        self.compaction: Optional[Dict] = None  # provenance of collapsed facts and merged chunks
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + max(0.0, seconds)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - started)
+
+    def set_tokens(self, prompt_tokens: Optional[int], completion_tokens: Optional[int], estimated: bool = False) -> None:
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.tokens_estimated = estimated
+
+    def set_compaction(self, original_chars: int, compacted_chars: int,
+                       fact_sources: Dict[str, List[str]], merged_chunks: Dict[str, List[str]]) -> None:
+        self.context_chars = (original_chars, compacted_chars)
+        self.compaction = {"fact_sources": fact_sources, "merged_chunks": merged_chunks}
+
+    def total_seconds(self) -> float:
+        end = self._finished if self._finished is not None else time.perf_counter()
+        return end - self._started
+
+    def finish(self) -> None:
+        """Record stages and tokens into the histograms (once)"""
+        if self._finished is not None:
+            return
+        self._finished = time.perf_counter()
+        for name, seconds in self.stages.items():
+            rag_metrics.histogram(
+                "rag_stage_duration_seconds", "Duration of each RAG request stage",
+                LATENCY_BUCKETS, service=self.service, stage=name
+            ).observe(seconds)
+        rag_metrics.histogram(
+            "rag_request_duration_seconds", "Total RAG request duration",
+            LATENCY_BUCKETS, service=self.service
+        ).observe(self.total_seconds())
+        for kind, value in (("prompt", self.prompt_tokens), ("completion", self.completion_tokens)):
+            if value is not None:
+                rag_metrics.histogram(
+                    "rag_llm_tokens", "LLM tokens per request",
+                    TOKEN_BUCKETS, service=self.service, kind=kind
+                ).observe(value)
+        if self.context_chars is not None:
+            for kind, value in zip(("original", "compacted"), self.context_chars):
+                rag_metrics.histogram(
+                    "rag_context_chars", "Retrieved chunk characters before and after compaction",
+                    CHAR_BUCKETS, service=self.service, kind=kind
+                ).observe(value)
+
+    def as_debug(self) -> Dict:
+        """Optional debug payload for API responses"""
+        return {
+            "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+            "total_ms": round(self.total_seconds() * 1000, 2),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "context_chars": (
+                {"original": self.context_chars[0], "compacted": self.context_chars[1]}
+                if self.context_chars is not None else None
+            ),
+            "compaction": self.compaction
+        }
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token estimate (1 token ≈ 4 characters) when the provider reports no usage"""
+    return sum(len(value) for value in texts if value) // 4
+
+
+_LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+def require_metrics_access(request: Request) -> None:
+    """Dependency for GET /rag/metrics: scraper token if configured, otherwise loopback only"""
+    if RAG_METRICS_TOKEN:
+        authorization = request.headers.get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.strip(), RAG_METRICS_TOKEN):
+            return
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    if request.client is None or request.client.host not in _LOOPBACK_HOSTS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Metrics are only available internally")
@@ -3,8 +3,10 @@ RAG Service - Enhanced Core RAG functionality for Medical Records
 """
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from datetime import datetime
+import math
+import time
 
 from ..core.config import (
     LLM_PROVIDER,
@@ -14,34 +16,84 @@ from ..core.config import (
     LLM_SITE_URL,
     LLM_SITE_NAME,
     MAX_CONTEXT_DOCUMENTS,
+    MMR_CANDIDATE_FACTOR,
     SIMILARITY_THRESHOLD
 )
+from .spelling import correct_query
+from .synonyms import expand_query_concepts, count_concept_matches, text_word_set
+from .compaction import compact_context
+from .history_summary import get_history_summary_context, schedule_summary_refresh
+from .ranking import TopK, ScoredCandidate
+from .diversity import mmr_rerank
+from .record_units import (
+    RecordSelection,
+    RecordUnit,
+    detect_record_intent,
+    load_record_units,
+    select_record_units
+)
+from .document_index import DocumentAccessScope, global_document_index
+from .metrics import RequestTrace, estimate_tokens
+from .llm_cassette import LLMStream, TokenUsage, open_llm_stream
 # Note: Import schemas from parent
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-# For now, define DocumentChunk locally to avoid circular import
-from pydantic import BaseModel
+# Response schema directly: top-k chunks go into QueryResponse/SearchResponse without re-validation
+from ..schemas.rag import DocumentChunk
 
-class DocumentChunk(BaseModel):
-    doc_id: str
-    patient_id: int
-    record_id: Optional[str]
-    chunk_text: str
-    similarity_score: float
-    metadata: Optional[dict] = None
+def _document_chunk_from_candidate(candidate: ScoredCandidate) -> DocumentChunk:
+    """Build response model for a medical_documents row that made the top k"""
+    row = candidate.row
+    # Use full extract_text (model tidak bisa OCR, cukup chunk text saja)
+    # Limit to 3000 chars untuk menghindari token limit yang terlalu besar
+    return DocumentChunk(
+        doc_id=row.doc_id,
+        patient_id=row.patient_id,
+        record_id=row.record_id,
+        chunk_text=candidate.text[:3000],
+        similarity_score=candidate.score,
+        metadata={
+            "file_url": row.file_url,
+            "created_at": str(row.created_at),
+            "source": "medical_document"
+        }
+    )
+
+def _record_chunk_from_selection(selection: RecordSelection) -> DocumentChunk:
+    """Build response model for a visit with the record units selected for this query"""
+    visit = selection.visit
+    return DocumentChunk(
+        doc_id=f"record_{visit.record_id}",
+        patient_id=visit.patient_id,
+        record_id=visit.record_id,
+        chunk_text=selection.render(max_chars=3000),
+        similarity_score=selection.score,
+        metadata={
+            "visit_date": str(visit.visit_date),
+            "visit_type": visit.visit_type,
+            "doctor_name": visit.doctor_name,
+            "facility_name": visit.facility_name,
+            "unit_types": selection.unit_types(),
+            "source": "medical_record"
+        }
+    )
 
 def search_documents(
     query: str,
     patient_id: Optional[int] = None,
     limit: int = 10,
     threshold: float = 0.7,
-    db: Session = None
+    db: Session = None,
+    scope: Optional[DocumentAccessScope] = None
 ) -> List[DocumentChunk]:
     """
     Search medical documents by semantic similarity
     
+    Without patient_id the search runs over the global document index, limited
+    to the patients in `scope` (default: all patients).
+    
     TODO: Implement actual vector search using:
     - OpenAI embeddings
     - Vector store (Pinecone, Qdrant, FAISS, etc.)
@@ -49,6 +101,12 @@ def search_documents(
     
     For now, returns keyword-based search
     """
+    # Simple keyword matching (replace with actual semantic search)
+    # Remove common stop words for better matching
+    stop_words = {'yang', 'dan', 'atau', 'dari', 'di', 'ke', 'pada', 'untuk', 'dengan', 'bagaimana', 'apa', 'apakah'}
+    # Expand query terms through medical synonym graph (lay terms, ICD-10, drug names)
+    query_concepts = expand_query_concepts(query, stop_words)
+    
     # Get documents with extract_text
     if patient_id:
         query_sql = text("""
@@ -62,65 +120,56 @@ def search_documents(
         """)
         result = db.execute(query_sql, {"patient_id": patient_id, "limit": limit * 2})
     else:
+        # Cross-patient search: candidates come from the global sharded index (access scope
+        # applied inside the index), current text is re-read and re-scored below
+        if not query_concepts:
+            return []
+        # Built and refreshed by the background thread; only the very first searches wait
+        if not global_document_index.wait_ready():
+            print("[Document Index] Index still building, cross-patient search returns no results")
+            return []
+        min_matches = max(1, math.ceil(threshold * len(query_concepts) - 1e-9))
+        candidate_ids = global_document_index.search(
+            query_concepts, limit * 2, scope or DocumentAccessScope(), min_matches=min_matches
+        )
+        if not candidate_ids:
+            return []
         query_sql = text("""
             SELECT doc_id, patient_id, record_id, extract_text, file_url, created_at
             FROM medical_documents
-            WHERE extract_text IS NOT NULL
+            WHERE doc_id IN :doc_ids
+            AND extract_text IS NOT NULL
             AND extract_text != ''
             ORDER BY created_at DESC
-            LIMIT :limit
-        """)
-        result = db.execute(query_sql, {"limit": limit * 2})
-    
-    # Simple keyword matching (replace with actual semantic search)
-    query_lower = query.lower()
-    query_words = set(query_lower.split())
-    # Remove common stop words for better matching
-    stop_words = {'yang', 'dan', 'atau', 'dari', 'di', 'ke', 'pada', 'untuk', 'dengan', 'bagaimana', 'apa', 'apakah'}
-    query_words = {w for w in query_words if w not in stop_words and len(w) > 2}
+        """).bindparams(bindparam("doc_ids", expanding=True))
+        result = db.execute(query_sql, {"doc_ids": candidate_ids}).fetchall()
+        found_ids = {row.doc_id for row in result}
+        global_document_index.discard(doc_id for doc_id in candidate_ids if doc_id not in found_ids)
     
-    documents = []
+    # Bounded heap of lean candidates; DocumentChunk is built for the top `limit` only
+    top_documents: TopK[ScoredCandidate] = TopK(limit)
     
     for row in result:
         if not row.extract_text:
             continue
         
         # Simple similarity: count matching words
-        text_lower = row.extract_text.lower()
-        text_words = set(text_lower.split())
+        text_words = text_word_set(row.extract_text)
         
-        if not query_words:
+        if not query_concepts:
             continue
         
-        matches = len(query_words.intersection(text_words))
-        similarity = matches / len(query_words) if query_words else 0
+        matches = count_concept_matches(query_concepts, text_words)
+        similarity = matches / len(query_concepts) if query_concepts else 0
         
         # Lower threshold if no exact matches (allow partial matches)
         effective_threshold = threshold if matches > 0 else threshold * 0.3
         
         if similarity >= effective_threshold:
-            # Use full extract_text (model tidak bisa OCR, cukup chunk text saja)
-            # Limit to 3000 chars untuk menghindari token limit yang terlalu besar
-            full_text = row.extract_text
-            chunk_text = full_text[:3000] if len(full_text) > 3000 else full_text
-            
-            chunk = DocumentChunk(
-                doc_id=row.doc_id,
-                patient_id=row.patient_id,
-                record_id=row.record_id,
-                chunk_text=chunk_text,
-                similarity_score=similarity,
-                metadata={
-                    "file_url": row.file_url,
-                    "created_at": str(row.created_at),
-                    "source": "medical_document"
-                }
-            )
-            documents.append(chunk)
+            top_documents.push(similarity, ScoredCandidate(similarity, row, row.extract_text))
     
-    # Sort by similarity and limit
-    documents.sort(key=lambda x: x.similarity_score, reverse=True)
-    return documents[:limit]
+    # Sorted by similarity, best first
+    return top_documents.materialize(_document_chunk_from_candidate)
 
 def search_medical_records(
     query: str,
@@ -130,132 +179,17 @@ def search_medical_records(
 ) -> List[DocumentChunk]:
     """
     Search medical records (diagnoses, prescriptions, notes, lab results) for context
-    Enhanced with structured data retrieval including lab results
+    Facts are scored as typed units (lab, prescription, diagnosis, note); only the types
+    implied by the question are loaded and scored, and each visit chunk lists only the
+    selected facts.
     """
-    query_lower = query.lower()
-    query_words = set(query_lower.split())
     stop_words = {'yang', 'dan', 'atau', 'dari', 'di', 'ke', 'pada', 'untuk', 'dengan', 'bagaimana', 'apa', 'apakah', 'saya', 'ini', 'itu'}
-    query_words = {w for w in query_words if w not in stop_words and len(w) > 2}
+    intent = detect_record_intent(query)
     
-    # Enhanced query with lab results, doctor info, and facility
-    query_sql = text("""
-        SELECT 
-            mr.record_id,
-            mr.patient_id,
-            mr.diagnosis_summary,
-            mr.notes,
-            mr.visit_date,
-            mr.visit_type,
-            mr.doctor_name,
-            mr.facility_name,
-            GROUP_CONCAT(DISTINCT d.diagnosis_name SEPARATOR ', ') as diagnoses,
-            GROUP_CONCAT(DISTINCT d.icd_code SEPARATOR ', ') as icd_codes,
-            GROUP_CONCAT(DISTINCT CONCAT(p.drug_name, ' (', COALESCE(p.dosage, ''), ', ', COALESCE(p.frequency, ''), ')') SEPARATOR '; ') as prescriptions,
-            GROUP_CONCAT(DISTINCT CONCAT(lr.test_name, ': ', lr.result_value, ' ', COALESCE(lr.result_unit, ''), 
-                         CASE WHEN lr.normal_range IS NOT NULL THEN CONCAT(' [Normal: ', lr.normal_range, ']') ELSE '' END) 
-                         SEPARATOR '; ') as lab_results
-        FROM medical_records mr
-        LEFT JOIN diagnoses d ON mr.record_id = d.record_id
-        LEFT JOIN prescriptions p ON mr.record_id = p.record_id
-        LEFT JOIN lab_results lr ON mr.record_id = lr.record_id
-        WHERE mr.patient_id = :patient_id
-        GROUP BY mr.record_id, mr.patient_id, mr.diagnosis_summary, mr.notes, 
-                 mr.visit_date, mr.visit_type, mr.doctor_name, mr.facility_name
-        ORDER BY mr.visit_date DESC
-        LIMIT :limit
-    """)
-    
-    result = db.execute(query_sql, {"patient_id": patient_id, "limit": limit * 3})
-    chunks = []
-    
-    for row in result:
-        # Build structured text representation
-        visit_date_str = row.visit_date.strftime("%d %B %Y") if row.visit_date else "Tanggal tidak diketahui"
-        visit_type_str = row.visit_type or "kunjungan"
-        doctor_str = f"Dokter: {row.doctor_name}" if row.doctor_name else ""
-        facility_str = f"Fasilitas: {row.facility_name}" if row.facility_name else ""
-        
-        # Build comprehensive text with structure
-        text_parts = []
-        
-        # Header
-        text_parts.append(f"=== Rekam Medis - {visit_date_str} ({visit_type_str}) ===")
-        if doctor_str:
-            text_parts.append(doctor_str)
-        if facility_str:
-            text_parts.append(facility_str)
-        
-        # Diagnoses
-        if row.diagnoses:
-            icd_part = f" (ICD: {row.icd_codes})" if row.icd_codes else ""
-            text_parts.append(f"Diagnosis: {row.diagnoses}{icd_part}")
-        
-        # Summary
-        if row.diagnosis_summary:
-            text_parts.append(f"Ringkasan: {row.diagnosis_summary}")
-        
-        # Notes
-        if row.notes:
-            text_parts.append(f"Catatan: {row.notes}")
-        
-        # Prescriptions
-        if row.prescriptions:
-            text_parts.append(f"Resep Obat: {row.prescriptions}")
-        
-        # Lab Results
-        if row.lab_results:
-            text_parts.append(f"Hasil Lab: {row.lab_results}")
-        
-        combined_text = "\n".join(text_parts)
-        combined_text_lower = combined_text.lower()
-        text_words = set(combined_text_lower.split())
-        
-        # Calculate similarity
-        if query_words:
-            matches = len(query_words.intersection(text_words))
-            similarity = matches / len(query_words) if query_words else 0.5
-            
-            # Boost similarity for medical terms
-            medical_keywords = ['diagnosis', 'diagnosa', 'obat', 'resep', 'lab', 'alergi', 'allergy', 
-                              'diabetes', 'hipertensi', 'tekanan', 'darah', 'gula', 'kolesterol']
-            query_medical_match = any(kw in query_lower for kw in medical_keywords)
-            text_medical_match = any(kw in combined_text_lower for kw in medical_keywords)
-            if query_medical_match and text_medical_match:
-                similarity = min(1.0, similarity + 0.2)
-        else:
-            # If no query words, give default similarity for recent records
-            similarity = 0.3
-        
-        # Limit chunk size but preserve structure
-        if len(combined_text) > 3000:
-            # Try to preserve important parts
-            important_parts = []
-            if row.diagnoses:
-                important_parts.append(f"Diagnosis: {row.diagnoses}")
-            if row.diagnosis_summary:
-                important_parts.append(f"Ringkasan: {row.diagnosis_summary[:500]}")
-            if row.prescriptions:
-                important_parts.append(f"Resep: {row.prescriptions}")
-            combined_text = "\n".join(important_parts)
-        
-        chunk = DocumentChunk(
-            doc_id=f"record_{row.record_id}",
-            patient_id=row.patient_id,
-            record_id=row.record_id,
-            chunk_text=combined_text,
-            similarity_score=similarity,
-            metadata={
-                "visit_date": str(row.visit_date),
-                "visit_type": row.visit_type,
-                "doctor_name": row.doctor_name,
-                "facility_name": row.facility_name,
-                "source": "medical_record"
-            }
-        )
-        chunks.append(chunk)
+    units, _ = load_record_units(patient_id, limit, db, intent)
     
-    chunks.sort(key=lambda x: x.similarity_score, reverse=True)
-    return chunks[:limit]
+    selections = select_record_units(query, units, limit, stop_words, intent)
+    return [_record_chunk_from_selection(selection) for selection in selections]
 
 def get_patient_allergies_context(patient_id: int, db: Session) -> Optional[str]:
     """
@@ -285,7 +219,8 @@ def query_with_rag(
     patient_id: Optional[int] = None,
     max_documents: int = 5,
     similarity_threshold: float = 0.7,
-    db: Session = None
+    db: Session = None,
+    trace: Optional[RequestTrace] = None
 ) -> Dict:
     """
     Enhanced Query with RAG - Search documents and generate answer using LLM
@@ -305,47 +240,74 @@ def query_with_rag(
     if patient_id is None:
         raise ValueError("patient_id is required for RAG queries")
     
+    # Per-stage timings and token counts (debug fields + /rag/metrics histograms)
+    trace = trace or RequestTrace("rag_service")
+    
+    # Step 0: Typo-tolerant query rewrite (SymSpell) for retrieval only
+    with trace.stage("spelling"):
+        retrieval_query = query
+        try:
+            retrieval_query = correct_query(query, patient_id=patient_id, db=db) or query
+        except Exception as e:
+            print(f"Error correcting query spelling: {str(e)}")
+    
+    # Retrieve more candidates than context slots, the MMR re-rank picks diverse ones
+    candidate_limit = max_documents * max(1, MMR_CANDIDATE_FACTOR)
+    
     # Step 1: Search relevant documents from medical_documents
-    relevant_docs = []
-    try:
-        relevant_docs = search_documents(
-            query=query,
-            patient_id=patient_id,
-            limit=max_documents,
-            threshold=similarity_threshold,
-            db=db
-        )
-    except Exception as e:
-        # Log error but continue with medical records search
-        print(f"Error searching documents: {str(e)}")
+    with trace.stage("search_documents"):
+        relevant_docs = []
+        try:
+            relevant_docs = search_documents(
+                query=retrieval_query,
+                patient_id=patient_id,
+                limit=candidate_limit,
+                threshold=similarity_threshold,
+                db=db
+            )
+        except Exception as e:
+            # Log error but continue with medical records search
+            print(f"Error searching documents: {str(e)}")
     
     # Step 2: Search in medical records (always include for patient context)
-    medical_records_context = []
-    try:
-        medical_records_context = search_medical_records(
-            query=query,
-            patient_id=patient_id,
-            limit=max_documents,
-            db=db
-        )
-        # Combine and deduplicate
-        existing_record_ids = {doc.record_id for doc in relevant_docs if doc.record_id}
-        for record in medical_records_context:
-            if record.record_id not in existing_record_ids:
-                relevant_docs.append(record)
-    except Exception as e:
-        print(f"Error searching medical records: {str(e)}")
+    with trace.stage("search_medical_records"):
+        medical_records_context = []
+        try:
+            medical_records_context = search_medical_records(
+                query=retrieval_query,
+                patient_id=patient_id,
+                limit=candidate_limit,
+                db=db
+            )
+            # Combine and deduplicate
+            existing_record_ids = {doc.record_id for doc in relevant_docs if doc.record_id}
+            for record in medical_records_context:
+                if record.record_id not in existing_record_ids:
+                    relevant_docs.append(record)
+        except Exception as e:
+            print(f"Error searching medical records: {str(e)}")
     
     # Step 3: Get patient allergies (always include for context)
-    allergies_context = None
-    try:
-        allergies_context = get_patient_allergies_context(patient_id, db)
-    except Exception as e:
-        print(f"Error retrieving allergies: {str(e)}")
-    
-    # Step 4: Sort and limit documents by similarity
-    relevant_docs.sort(key=lambda x: x.similarity_score, reverse=True)
-    relevant_docs = relevant_docs[:max_documents]
+    with trace.stage("allergies"):
+        allergies_context = None
+        try:
+            allergies_context = get_patient_allergies_context(patient_id, db)
+        except Exception as e:
+            print(f"Error retrieving allergies: {str(e)}")
+    
+    # Step 3.5: Long-range history summaries (fixed budget), refreshed in background
+    with trace.stage("history_summary"):
+        history_context = None
+        try:
+            history_context = get_history_summary_context(patient_id, db)
+            schedule_summary_refresh(patient_id)
+        except Exception as e:
+            print(f"Error retrieving history summaries: {str(e)}")
+    
+    # Step 4: Pick max_documents relevant but diverse chunks (MMR re-rank)
+    with trace.stage("diversity_rerank"):
+        relevant_docs = mmr_rerank(relevant_docs, max_documents)
+    context_started = time.perf_counter()
     
     # Step 5: Build structured context
     context_parts = []
@@ -356,23 +318,23 @@ def query_with_rag(
         context_parts.append(allergies_context)
         sources.append("patient_allergies")
     
+    # Add long-range history before the (recent) retrieved records
+    if history_context:
+        context_parts.append(history_context)
+        sources.append("patient_history_summary")
+    
     # Add medical records and documents
-    for doc in relevant_docs:
-        # Include metadata in context for better understanding
-        metadata_info = ""
-        if doc.metadata:
-            if doc.metadata.get("visit_date"):
-                metadata_info = f"\n[Tanggal: {doc.metadata.get('visit_date')}]"
-            if doc.metadata.get("doctor_name"):
-                metadata_info += f" [Dokter: {doc.metadata.get('doctor_name')}]"
-            if doc.metadata.get("facility_name"):
-                metadata_info += f" [Fasilitas: {doc.metadata.get('facility_name')}]"
-        
-        context_parts.append(f"{doc.chunk_text}{metadata_info}")
-        sources.append(doc.doc_id)
+    # Compaction: repeated prescription/diagnosis facts collapse into date ranges,
+    # near-duplicate chunks are dropped (every doc_id stays listed in sources)
+    compacted = compact_context(relevant_docs)
+    context_parts.extend(compacted.parts)
+    trace.set_compaction(compacted.original_chars, compacted.compacted_chars,
+                         compacted.fact_sources, compacted.merged_chunks)
+    sources.extend(doc.doc_id for doc in relevant_docs)
     
     # Handle empty context
     if not context_parts:
+        trace.add_stage("context_build", time.perf_counter() - context_started)
         return {
             "query": query,
             "answer": "Maaf, tidak ditemukan informasi rekam medis yang relevan untuk menjawab pertanyaan Anda. "
@@ -412,13 +374,15 @@ Pertanyaan pasien: {query}
 
 Jawablah pertanyaan tersebut dengan jelas dan mudah dipahami berdasarkan informasi rekam medis di atas. 
 Jika informasi tidak tersedia, beri tahu pasien dengan sopan."""
+    trace.add_stage("context_build", time.perf_counter() - context_started)
     
     # Step 7: Call LLM using OpenRouter
     try:
         answer = call_llm_with_openrouter(
             query=query,
             context=context,
-            system_prompt=system_prompt
+            system_prompt=system_prompt,
+            trace=trace
         )
         model_used = LLM_MODEL_NAME or "openrouter/unknown"
     except Exception as e:
@@ -438,7 +402,7 @@ Jika informasi tidak tersedia, beri tahu pasien dengan sopan."""
     return {
         "query": query,
         "answer": answer,
-        "relevant_documents": [doc.model_dump() for doc in relevant_docs],
+        "relevant_documents": relevant_docs,
         "sources": sources,
         "model_used": model_used
     }
@@ -446,7 +410,8 @@ Jika informasi tidak tersedia, beri tahu pasien dengan sopan."""
 def call_llm_with_openrouter(
     query: str,
     context: str,
-    system_prompt: str
+    system_prompt: str,
+    trace: Optional[RequestTrace] = None
 ) -> str:
     """
     Enhanced Call LLM using OpenRouter API
@@ -459,17 +424,14 @@ def call_llm_with_openrouter(
     - Better error handling
     - Token limit management
     - Retry logic for transient errors
+    - Streaming, so time-to-first-token and generation time can be measured
+    - Record/replay through LLM cassettes (LLM_CASSETTE_MODE) for reproducible benchmarks
     """
     try:
         from openai import OpenAI
-        import time
         
-        # Configure OpenAI client to use OpenRouter
-        client = OpenAI(
-            base_url=LLM_BASE_URL or "https://openrouter.ai/api/v1",
-            api_key=LLM_API_KEY,
-            timeout=60.0  # 60 second timeout
-        )
+        llm_started = time.perf_counter()
+        client = None
         
         # Estimate token usage (rough: 1 token ≈ 4 characters)
         context_chars = len(context)
@@ -507,40 +469,91 @@ Pertanyaan pasien: {query}
 
 Jawablah pertanyaan tersebut dengan jelas dan mudah dipahami berdasarkan informasi rekam medis di atas."""
         
+        # Everything that shapes the answer (also the LLM cassette key)
+        completion_request = {
+            "model": LLM_MODEL_NAME or "deepseek/deepseek-r1-0528-qwen3-8b:free",
+            "messages": [
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": user_content
+                }
+            ],
+            "temperature": 0.7,  # Balanced creativity and consistency
+            "max_tokens": 2500,  # Increased for detailed medical explanations
+            "top_p": 0.9,
+            "frequency_penalty": 0.1,  # Slight penalty to avoid repetition
+            "presence_penalty": 0.1
+        }
+        
+        def live_stream() -> LLMStream:
+            nonlocal client
+            if client is None:
+                # Configure OpenAI client to use OpenRouter
+                client = OpenAI(
+                    base_url=LLM_BASE_URL or "https://openrouter.ai/api/v1",
+                    api_key=LLM_API_KEY,
+                    timeout=60.0  # 60 second timeout
+                )
+            completion = client.chat.completions.create(
+                extra_headers={
+                    "HTTP-Referer": LLM_SITE_URL or "https://github.com/healthkon",
+                    "X-Title": LLM_SITE_NAME or "Healthkon BPJS RAG Service"
+                },
+                stream=True,
+                extra_body={"stream_options": {"include_usage": True}},  # usage in the final chunk
+                **completion_request
+            )
+            llm_stream = LLMStream()
+            
+            def pieces():
+                for chunk in completion:
+                    usage = getattr(chunk, "usage", None)
+                    if usage:
+                        llm_stream.usage = TokenUsage(usage.prompt_tokens, usage.completion_tokens)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            
+            llm_stream.pieces = pieces()
+            return llm_stream
+        
         # Call chat completion with OpenRouter format
         # Retry logic for transient errors
         max_retries = 2
         for attempt in range(max_retries):
             try:
-                completion = client.chat.completions.create(
-                    extra_headers={
-                        "HTTP-Referer": LLM_SITE_URL or "https://github.com/healthkon",
-                        "X-Title": LLM_SITE_NAME or "Healthkon BPJS RAG Service"
-                    },
-                    model=LLM_MODEL_NAME or "deepseek/deepseek-r1-0528-qwen3-8b:free",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": system_prompt
-                        },
-                        {
-                            "role": "user",
-                            "content": user_content
-                        }
-                    ],
-                    temperature=0.7,  # Balanced creativity and consistency
-                    max_tokens=2500,  # Increased for detailed medical explanations
-                    top_p=0.9,
-                    frequency_penalty=0.1,  # Slight penalty to avoid repetition
-                    presence_penalty=0.1
-                )
+                request_sent = time.perf_counter()
+                stream = open_llm_stream("openrouter", completion_request, live_stream)
+                
+                answer_parts = []
+                first_token_at = None
+                for piece in stream:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    answer_parts.append(piece)
+                finished_at = time.perf_counter()
+                usage = stream.usage
                 
-                answer = completion.choices[0].message.content.strip()
+                answer = "".join(answer_parts).strip()
                 
                 # Validate answer
                 if not answer or len(answer) < 10:
                     raise Exception("LLM returned empty or too short answer")
                 
+                if trace is not None:
+                    # Queue wait: client setup, failed attempts and retry backoff before the final request
+                    first_token_at = first_token_at or finished_at
+                    trace.add_stage("llm_queue_wait", request_sent - llm_started)
+                    trace.add_stage("llm_first_token", first_token_at - request_sent)
+                    trace.add_stage("llm_generation", finished_at - first_token_at)
+                    if usage is not None:
+                        trace.set_tokens(usage.prompt_tokens, usage.completion_tokens)
+                    else:
+                        trace.set_tokens(estimate_tokens(system_prompt, user_content), estimate_tokens(answer), estimated=True)
+                
                 return answer
                 
             except Exception as e:
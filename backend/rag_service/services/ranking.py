@@ -0,0 +1,80 @@
+"""
+Bounded top-k selection for retrieval scoring
+
+search_documents dan search_medical_records menilai banyak kandidat tetapi hanya
+mengembalikan `limit` teratas. Kandidat disimpan sebagai record ringan (__slots__)
+di min-heap berukuran k; DocumentChunk (pydantic) hanya dibuat untuk hasil akhir.
+
+Urutan hasil sama dengan list.sort(reverse=True)[:k] yang stabil: skor tertinggi
+dulu, skor sama mengikuti urutan kandidat masuk.
+"""
+from typing import Any, Callable, Generic, Iterable, List, Optional, Tuple, TypeVar
+import heapq
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class ScoredCandidate:
+    """Lean retrieval candidate: score plus the raw row and the text it was scored on"""
+    __slots__ = ("score", "row", "text")
+
+    def __init__(self, score: float, row: Any, text: str):
+        self.score = score
+        self.row = row
+        self.text = text
+
+
+class TopK(Generic[T]):
+    """Keep the k best (score, item) pairs seen so far in a min-heap"""
+    __slots__ = ("k", "_heap", "_seen")
+
+    def __init__(self, k: int):
+        self.k = max(0, k)
+        self._heap: List[Tuple[float, int, T]] = []
+        self._seen = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def would_accept(self, score: float) -> bool:
+        """False if score cannot enter the heap (lets callers skip building the item)"""
+        if self.k == 0:
+            return False
+        if len(self._heap) < self.k:
+            return True
+        # Ties lose against earlier candidates, same as a stable descending sort
+        return score > self._heap[0][0]
+
+    def push(self, score: float, item: T) -> bool:
+        """Offer an item; returns True if it is currently in the top k"""
+        if not self.would_accept(score):
+            self._seen += 1
+            return False
+        # -seq: among equal scores the later candidate is "smaller" and evicted first
+        entry = (score, -self._seen, item)
+        self._seen += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heapreplace(self._heap, entry)
+        return True
+
+    def scored_items(self) -> List[Tuple[float, T]]:
+        """(score, item) pairs best first"""
+        ordered = sorted(self._heap, key=lambda entry: (entry[0], entry[1]), reverse=True)
+        return [(score, item) for score, _, item in ordered]
+
+    def items(self) -> List[T]:
+        """Items best first"""
+        return [item for _, item in self.scored_items()]
+
+    def materialize(self, build: Callable[[T], R]) -> List[R]:
+        """Build response objects for the final top k only"""
+        return [build(item) for item in self.items()]
+
+
+def top_k_by_score(items: Iterable[T], k: int, score: Optional[Callable[[T], float]] = None) -> List[T]:
+    """Stable top-k of already built objects (defaults to .similarity_score)"""
+    key = score or (lambda item: item.similarity_score)
+    return heapq.nlargest(k, items, key=key)
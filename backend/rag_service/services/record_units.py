@@ -0,0 +1,293 @@
+"""
+Field-aware retrieval over medical record facts
+
+Sebelumnya search_medical_records meratakan satu kunjungan menjadi satu blob teks
+(diagnosis, ringkasan, catatan, resep, lab), sehingga pertanyaan tentang lab ikut
+membawa seluruh kunjungan ke prompt dan scoring memindai teks yang tidak relevan.
+
+Modul ini memecah rekam medis menjadi unit bertipe dengan field masing-masing:
+- diagnosis: diagnosis_name, icd_code
+- prescription: drug_name, dosage, frequency
+- lab: test_name, result_value, result_unit, normal_range
+- note: diagnosis_summary, notes (plus dokter/fasilitas kunjungan)
+
+Intent pertanyaan ("hasil lab", "obat", "diagnosis", "catatan dokter") menentukan tipe
+unit yang dimuat dan dinilai. Unit terpilih dikelompokkan kembali per kunjungan dengan
+format baris yang sama seperti sebelumnya (compaction tetap bekerja), tetapi hanya
+berisi fakta yang relevan.
+"""
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+import re
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text, bindparam
+
+from .synonyms import Concept, count_concept_matches, expand_query_concepts, text_word_set
+from .ranking import TopK
+
+UNIT_DIAGNOSIS = "diagnosis"
+UNIT_PRESCRIPTION = "prescription"
+UNIT_LAB = "lab"
+UNIT_NOTE = "note"
+ALL_UNIT_TYPES: FrozenSet[str] = frozenset((UNIT_DIAGNOSIS, UNIT_PRESCRIPTION, UNIT_LAB, UNIT_NOTE))
+
+# Visits scanned per requested record chunk (same window as the old blob query)
+VISITS_PER_RESULT = 3
+# Units kept before regrouping into visits
+UNITS_PER_RESULT = 4
+# Score bonus for units of the type implied by the question
+INTENT_BOOST = 0.2
+
+# Query intent -> unit types; single words match whole words, phrases match as substrings
+_INTENT_KEYWORDS: Dict[str, Sequence[str]] = {
+    UNIT_LAB: (
+        'lab', 'laboratorium', 'tes', 'test', 'pemeriksaan', 'nilai', 'kadar', 'hba1c',
+        'kolesterol', 'gula darah', 'hemoglobin', 'trigliserida', 'asam urat', 'kreatinin',
+        'cek darah', 'hasil tes', 'hasil lab'
+    ),
+    UNIT_PRESCRIPTION: (
+        'obat', 'resep', 'dosis', 'minum', 'diminum', 'tablet', 'kapsul', 'sirup',
+        'prescription', 'medication', 'drug', 'medicine'
+    ),
+    UNIT_DIAGNOSIS: (
+        'diagnosis', 'diagnosa', 'didiagnosis', 'penyakit', 'kondisi', 'icd', 'sakit apa'
+    ),
+    UNIT_NOTE: (
+        'catatan', 'ringkasan', 'saran dokter', 'kata dokter', 'anjuran', 'kontrol', 'notes'
+    ),
+}
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class RecordVisit:
+    """Visit header shared by the units of one medical record"""
+    __slots__ = ("record_id", "patient_id", "visit_date", "visit_type", "doctor_name", "facility_name")
+
+    def __init__(self, row):
+        self.record_id = row.record_id
+        self.patient_id = row.patient_id
+        self.visit_date = row.visit_date
+        self.visit_type = row.visit_type
+        self.doctor_name = row.doctor_name
+        self.facility_name = row.facility_name
+
+    def header_lines(self) -> List[str]:
+        visit_date_str = self.visit_date.strftime("%d %B %Y") if self.visit_date else "Tanggal tidak diketahui"
+        lines = [f"=== Rekam Medis - {visit_date_str} ({self.visit_type or 'kunjungan'}) ==="]
+        if self.doctor_name:
+            lines.append(f"Dokter: {self.doctor_name}")
+        if self.facility_name:
+            lines.append(f"Fasilitas: {self.facility_name}")
+        return lines
+
+
+class RecordUnit:
+    """One typed fact of a visit with its own fields and word set"""
+    __slots__ = ("unit_type", "visit", "fields", "words")
+
+    def __init__(self, unit_type: str, visit: RecordVisit, fields: Dict[str, Optional[str]]):
+        self.unit_type = unit_type
+        self.visit = visit
+        self.fields = fields
+        searchable = " ".join(str(value) for value in fields.values() if value)
+        if unit_type == UNIT_NOTE:
+            searchable += f" {visit.doctor_name or ''} {visit.facility_name or ''}"
+        self.words: Set[str] = text_word_set(searchable)
+
+    def render(self) -> str:
+        """Fact text in the same format as the old record blob lines"""
+        f = self.fields
+        if self.unit_type == UNIT_DIAGNOSIS:
+            icd_part = f" (ICD: {f['icd_code']})" if f.get("icd_code") else ""
+            return f"{f['diagnosis_name']}{icd_part}"
+        if self.unit_type == UNIT_PRESCRIPTION:
+            return f"{f['drug_name']} ({f.get('dosage') or ''}, {f.get('frequency') or ''})"
+        if self.unit_type == UNIT_LAB:
+            normal = f" [Normal: {f['normal_range']}]" if f.get("normal_range") else ""
+            return f"{f['test_name']}: {f.get('result_value') or ''} {f.get('result_unit') or ''}{normal}"
+        lines = []
+        if f.get("diagnosis_summary"):
+            lines.append(f"Ringkasan: {f['diagnosis_summary']}")
+        if f.get("notes"):
+            lines.append(f"Catatan: {f['notes']}")
+        return "\n".join(lines)
+
+
+class RecordSelection:
+    """Selected units of one visit, rendered as a record chunk"""
+    __slots__ = ("visit", "score", "units")
+
+    def __init__(self, visit: RecordVisit, score: float):
+        self.visit = visit
+        self.score = score
+        self.units: List[RecordUnit] = []
+
+    def unit_types(self) -> List[str]:
+        return sorted({unit.unit_type for unit in self.units})
+
+    def render(self, max_chars: int = 3000) -> str:
+        by_type: Dict[str, List[str]] = {}
+        for unit in self.units:
+            by_type.setdefault(unit.unit_type, []).append(unit.render())
+        lines = self.visit.header_lines()
+        if UNIT_DIAGNOSIS in by_type:
+            # Old format: names first, then the ICD codes of the visit
+            diagnoses = [u.fields for u in self.units if u.unit_type == UNIT_DIAGNOSIS]
+            names = ", ".join(fields["diagnosis_name"] or "" for fields in diagnoses)
+            codes = ", ".join(code for code in (fields.get("icd_code") for fields in diagnoses) if code)
+            lines.append(f"Diagnosis: {names}" + (f" (ICD: {codes})" if codes else ""))
+        for note in by_type.get(UNIT_NOTE, []):
+            if note:
+                lines.append(note)
+        if UNIT_PRESCRIPTION in by_type:
+            lines.append("Resep Obat: " + "; ".join(by_type[UNIT_PRESCRIPTION]))
+        if UNIT_LAB in by_type:
+            lines.append("Hasil Lab: " + "; ".join(by_type[UNIT_LAB]))
+        return "\n".join(lines)[:max_chars]
+
+
+def detect_record_intent(query: str) -> FrozenSet[str]:
+    """Unit types implied by the question (all types if none is implied)"""
+    query_lower = query.lower()
+    query_words = set(_WORD_RE.findall(query_lower))
+    intent = set()
+    for unit_type, keywords in _INTENT_KEYWORDS.items():
+        for keyword in keywords:
+            if (keyword in query_lower) if " " in keyword else (keyword in query_words):
+                intent.add(unit_type)
+                break
+    return frozenset(intent) if intent else ALL_UNIT_TYPES
+
+
+def fetch_record_units(
+    patient_id: int,
+    limit: int,
+    db: Session,
+    unit_types: Iterable[str] = ALL_UNIT_TYPES
+) -> List[RecordUnit]:
+    """
+    Typed units of the patient's latest visits (newest visit first)
+    Only the requested unit types are loaded.
+    """
+    unit_types = frozenset(unit_types)
+    visit_rows = db.execute(text("""
+        SELECT record_id, patient_id, visit_date, visit_type, doctor_name, facility_name,
+               diagnosis_summary, notes
+        FROM medical_records
+        WHERE patient_id = :patient_id
+        ORDER BY visit_date DESC
+        LIMIT :limit
+    """), {"patient_id": patient_id, "limit": limit * VISITS_PER_RESULT}).fetchall()
+    if not visit_rows:
+        return []
+
+    visits: Dict[str, RecordVisit] = {}
+    order: List[str] = []
+    notes: Dict[str, RecordUnit] = {}
+    for row in visit_rows:
+        visit = RecordVisit(row)
+        visits[row.record_id] = visit
+        order.append(row.record_id)
+        if UNIT_NOTE in unit_types and (row.diagnosis_summary or row.notes):
+            notes[row.record_id] = RecordUnit(UNIT_NOTE, visit, {
+                "diagnosis_summary": row.diagnosis_summary,
+                "notes": row.notes
+            })
+
+    record_ids = list(visits)
+    child_units: Dict[str, List[RecordUnit]] = {record_id: [] for record_id in record_ids}
+    child_queries = (
+        (UNIT_DIAGNOSIS, """
+            SELECT record_id, diagnosis_name, icd_code
+            FROM diagnoses
+            WHERE record_id IN :record_ids
+            ORDER BY primary_flag DESC, diagnosis_name
+        """, ("diagnosis_name", "icd_code")),
+        (UNIT_PRESCRIPTION, """
+            SELECT record_id, drug_name, dosage, frequency
+            FROM prescriptions
+            WHERE record_id IN :record_ids
+            ORDER BY created_at
+        """, ("drug_name", "dosage", "frequency")),
+        (UNIT_LAB, """
+            SELECT record_id, test_name, result_value, result_unit, normal_range
+            FROM lab_results
+            WHERE record_id IN :record_ids
+            ORDER BY created_at
+        """, ("test_name", "result_value", "result_unit", "normal_range")),
+    )
+    for unit_type, query_sql, columns in child_queries:
+        if unit_type not in unit_types:
+            continue
+        statement = text(query_sql).bindparams(bindparam("record_ids", expanding=True))
+        for row in db.execute(statement, {"record_ids": record_ids}):
+            fields = {column: getattr(row, column) for column in columns}
+            child_units[row.record_id].append(RecordUnit(unit_type, visits[row.record_id], fields))
+
+    units: List[RecordUnit] = []
+    for record_id in order:
+        units.extend(child_units[record_id])
+        if record_id in notes:
+            units.append(notes[record_id])
+    return units
+
+
+def load_record_units(
+    patient_id: int,
+    limit: int,
+    db: Session,
+    intent: FrozenSet[str]
+) -> Tuple[List[RecordUnit], FrozenSet[str]]:
+    """
+    Units of the intended types plus the unit types now loaded
+    If the patient has nothing of the implied types, every type is loaded instead
+    (other facts of the visits still help the answer).
+    """
+    units = fetch_record_units(patient_id, limit, db, intent)
+    if not units and intent != ALL_UNIT_TYPES:
+        return fetch_record_units(patient_id, limit, db), ALL_UNIT_TYPES
+    return units, frozenset(intent)
+
+
+def select_record_units(
+    query: str,
+    units: Sequence[RecordUnit],
+    limit: int,
+    stop_words: Set[str],
+    intent: Optional[FrozenSet[str]] = None
+) -> List[RecordSelection]:
+    """
+    Score units of the intended types, keep the best, regroup them per visit
+    Returns at most `limit` visits, best first (newer visit first on ties).
+    """
+    intent = intent if intent is not None else detect_record_intent(query)
+    candidates = [unit for unit in units if unit.unit_type in intent]
+    if not candidates and intent != ALL_UNIT_TYPES:
+        # Patient has nothing of the implied type: fall back to all facts
+        candidates = list(units)
+    if not candidates:
+        return []
+
+    query_concepts: List[Concept] = expand_query_concepts(query, stop_words)
+    top_units: TopK[RecordUnit] = TopK(limit * UNITS_PER_RESULT)
+    for unit in candidates:  # newest visit first, so ties keep recency order
+        if query_concepts:
+            score = count_concept_matches(query_concepts, unit.words) / len(query_concepts)
+        else:
+            score = 0.3
+        if unit.unit_type in intent and intent != ALL_UNIT_TYPES:
+            # Fact of the type the question asks about (was the medical keyword boost)
+            score = min(1.0, score + INTENT_BOOST)
+        top_units.push(score, unit)
+
+    selections: Dict[str, RecordSelection] = {}
+    for score, unit in top_units.scored_items():
+        record_id = unit.visit.record_id
+        selection = selections.get(record_id)
+        if selection is None:
+            selection = selections[record_id] = RecordSelection(unit.visit, score)
+        selection.units.append(unit)
+
+    # Visits keep the rank of their best unit (dicts keep insertion order)
+    return list(selections.values())[:limit]
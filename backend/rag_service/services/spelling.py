@@ -0,0 +1,369 @@
+"""
+Typo-tolerant query matching - SymSpell (symmetric delete) spelling index
+
+Dipakai oleh RAG Service dan RAG Service Mobile untuk memperbaiki salah ketik
+pada query ("amoksilin", "hipertensy") sebelum retrieval, sehingga word
+intersection di search_medical_records tetap menemukan rekam medis yang relevan.
+
+Dictionary terdiri dari:
+1. Global medical lexicon (istilah medis umum, Indonesia + Inggris)
+2. Per-patient vocabulary (nama obat, diagnosis, nama tes lab, alergi pasien)
+   yang dibangun ulang hanya jika versi data pasien (patient_data_versions) berubah,
+   sehingga edit dan hapus data juga ikut terlihat
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from collections import OrderedDict
+import threading
+import time
+import re
+import sys
+import os
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+from ..core.config import (
+    SPELLING_MAX_EDIT_DISTANCE,
+    SPELLING_PREFIX_LENGTH,
+    SPELLING_VOCAB_REFRESH_SECONDS,
+    SPELLING_MAX_PATIENTS
+)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from auth.core.data_versions import get_patient_data_version
+
+# Istilah medis umum yang sering ditanyakan pasien (lowercase)
+GLOBAL_MEDICAL_LEXICON = (
+    # Diagnosis / kondisi
+    "hipertensi", "hypertension", "diabetes", "melitus", "mellitus", "kolesterol",
+    "cholesterol", "dislipidemia", "asma", "asthma", "gastritis", "dispepsia",
+    "demam", "dengue", "tifoid", "tipes", "tuberkulosis", "pneumonia", "bronkitis",
+    "influenza", "faringitis", "tonsilitis", "sinusitis", "anemia", "obesitas",
+    "stroke", "jantung", "koroner", "aritmia", "migrain", "vertigo", "epilepsi",
+    "artritis", "rematik", "osteoporosis", "hepatitis", "ginjal", "kronis",
+    "infeksi", "saluran", "pernapasan", "kemih", "dermatitis", "eksim", "alergi",
+    "diare", "konstipasi", "hemoroid", "hipotensi", "hipoglikemia", "hiperglikemia",
+    "hiperurisemia", "gout", "tiroid", "hipertiroid", "hipotiroid", "depresi",
+    "insomnia", "katarak", "glaukoma", "esensial",
+    # Obat (ejaan Indonesia dan internasional)
+    "amoksisilin", "amoxicillin", "parasetamol", "paracetamol", "metformin",
+    "amlodipin", "amlodipine", "kaptopril", "captopril", "ibuprofen", "omeprazol",
+    "omeprazole", "ranitidin", "ranitidine", "setirizin", "cetirizine", "salbutamol",
+    "insulin", "glibenklamid", "glibenclamide", "simvastatin", "atorvastatin",
+    "lisinopril", "losartan", "bisoprolol", "furosemid", "furosemide", "antasida",
+    "loratadin", "loratadine", "deksametason", "dexamethasone", "prednison",
+    "metilprednisolon", "asetosal", "aspirin", "klopidogrel", "clopidogrel",
+    "allopurinol", "alopurinol", "siprofloksasin", "ciprofloxacin", "azitromisin",
+    "azithromycin", "sefadroksil", "cefadroxil", "metronidazol", "metronidazole",
+    "antibiotik", "vitamin", "suplemen", "penisilin", "penicillin", "sulfa",
+    # Tes laboratorium
+    "hemoglobin", "hba1c", "glukosa", "gula", "trigliserida", "kreatinin", "ureum",
+    "leukosit", "trombosit", "hematokrit", "eritrosit", "bilirubin", "albumin",
+    "urinalisis", "kolesterol", "ldl", "hdl", "sgot", "sgpt", "elektrolit",
+    "natrium", "kalium", "asam", "urat",
+    # Kosakata pertanyaan yang umum
+    "diagnosis", "diagnosa", "obat", "resep", "laboratorium", "kunjungan",
+    "dokter", "tekanan", "darah", "riwayat", "pemeriksaan", "hasil", "dosis",
+    "terakhir", "pengobatan", "gejala",
+)
+
+# Kata umum yang tidak boleh "dikoreksi" menjadi istilah medis
+_NEVER_CORRECT = {
+    'yang', 'dan', 'atau', 'dari', 'di', 'ke', 'pada', 'untuk', 'dengan', 'bagaimana',
+    'apa', 'apakah', 'saya', 'ini', 'itu', 'kapan', 'berapa', 'mengapa', 'kenapa',
+    'siapa', 'dimana', 'sudah', 'belum', 'masih', 'harus', 'boleh', 'bisa', 'tolong',
+    'jelaskan', 'tentang', 'kalau', 'saja', 'sedang', 'pernah', 'minum', 'makan',
+    'sekarang', 'kemarin', 'tahun', 'bulan', 'minggu', 'hari', 'normal', 'tinggi',
+    'rendah', 'apakah', 'berapa', 'semua', 'lain', 'lagi', 'seperti', 'karena',
+}
+
+_TOKEN_RE = re.compile(r"[0-9a-zA-ZÀ-ɏ]+")
+
+
+def _edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment (Damerau-Levenshtein) distance dengan early exit.
+    Returns max_distance + 1 jika jarak melebihi max_distance.
+    """
+    if a == b:
+        return 0
+    len_a, len_b = len(a), len(b)
+    if abs(len_a - len_b) > max_distance:
+        return max_distance + 1
+
+    prev_prev: List[int] = []
+    prev = list(range(len_b + 1))
+    for i in range(1, len_a + 1):
+        cur = [i] + [0] * len_b
+        row_min = i
+        char_a = a[i - 1]
+        for j in range(1, len_b + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            value = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, prev_prev[j - 2] + 1)
+            cur[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, cur
+
+    return prev[len_b] if prev[len_b] <= max_distance else max_distance + 1
+
+
+def _generate_deletes(word: str, max_distance: int) -> Set[str]:
+    """Generate all strings reachable from word with up to max_distance deletions"""
+    deletes: Set[str] = set()
+    frontier = [word]
+    for _ in range(max_distance):
+        next_frontier = []
+        for candidate in frontier:
+            if len(candidate) <= 1:
+                continue
+            for i in range(len(candidate)):
+                deleted = candidate[:i] + candidate[i + 1:]
+                if deleted not in deletes:
+                    deletes.add(deleted)
+                    next_frontier.append(deleted)
+        frontier = next_frontier
+    return deletes
+
+
+def max_distance_for(word: str) -> int:
+    """Edit distance yang diizinkan berdasarkan panjang kata (kata pendek tidak dikoreksi)"""
+    length = len(word)
+    if length < 5:
+        return 0
+    if length < 8:
+        return min(1, SPELLING_MAX_EDIT_DISTANCE)
+    return SPELLING_MAX_EDIT_DISTANCE
+
+
+class SymSpellIndex:
+    """
+    Symmetric delete spelling index
+
+    Setiap kata disimpan beserta semua hasil delete (hingga max_edit_distance)
+    dari prefix-nya. Lookup cukup menghasilkan delete dari query lalu memverifikasi
+    kandidat dengan edit distance, sehingga lookup tetap sub-millisecond.
+    """
+    __slots__ = ("max_edit_distance", "prefix_length", "_words", "_deletes")
+
+    def __init__(self, max_edit_distance: int = 2, prefix_length: int = 7):
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self._words: Dict[str, int] = {}
+        self._deletes: Dict[str, Set[str]] = {}
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._words
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def add_word(self, word: str, count: int = 1) -> bool:
+        """Add word to index. Returns True if word is new."""
+        word = word.lower()
+        if not word:
+            return False
+        if word in self._words:
+            self._words[word] += count
+            return False
+
+        self._words[word] = count
+        key = word[:self.prefix_length]
+        self._deletes.setdefault(key, set()).add(word)
+        for deleted in _generate_deletes(key, self.max_edit_distance):
+            self._deletes.setdefault(deleted, set()).add(word)
+        return True
+
+    def add_words(self, words: Iterable[str]) -> int:
+        """Add multiple words, returns number of new words"""
+        added = 0
+        for word in words:
+            if self.add_word(word):
+                added += 1
+        return added
+
+    def lookup(self, word: str, max_edit_distance: Optional[int] = None) -> Optional[Tuple[str, int, int]]:
+        """
+        Find closest term for word
+        Returns (term, distance, count) or None if no term within max_edit_distance
+        """
+        word = word.lower()
+        if word in self._words:
+            return word, 0, self._words[word]
+
+        max_distance = self.max_edit_distance if max_edit_distance is None else min(max_edit_distance, self.max_edit_distance)
+        if max_distance <= 0:
+            return None
+
+        key = word[:self.prefix_length]
+        candidates: Set[str] = set()
+        bucket = self._deletes.get(key)
+        if bucket:
+            candidates.update(bucket)
+        for deleted in _generate_deletes(key, max_distance):
+            bucket = self._deletes.get(deleted)
+            if bucket:
+                candidates.update(bucket)
+
+        best: Optional[Tuple[str, int, int]] = None
+        for candidate in candidates:
+            distance = _edit_distance(word, candidate, max_distance)
+            if distance > max_distance:
+                continue
+            count = self._words[candidate]
+            if best is None or distance < best[1] or (distance == best[1] and count > best[2]):
+                best = (candidate, distance, count)
+        return best
+
+
+class PatientVocabulary:
+    """Per-patient spelling index with the data version it was built at"""
+    __slots__ = ("index", "version", "refreshed_at")
+
+    def __init__(self):
+        self.index = SymSpellIndex(SPELLING_MAX_EDIT_DISTANCE, SPELLING_PREFIX_LENGTH)
+        self.version: Optional[int] = None  # None: never built, or version table unavailable
+        self.refreshed_at: float = 0.0
+
+
+# Global lexicon index (built once at import) + per-patient indexes (LRU)
+_global_index = SymSpellIndex(SPELLING_MAX_EDIT_DISTANCE, SPELLING_PREFIX_LENGTH)
+_global_index.add_words(GLOBAL_MEDICAL_LEXICON)
+
+_patient_vocabularies: "OrderedDict[int, PatientVocabulary]" = OrderedDict()
+_vocabulary_lock = threading.Lock()
+
+
+def extract_terms(value: Optional[str]) -> List[str]:
+    """Split a drug/diagnosis/test name into indexable lowercase words"""
+    if not value:
+        return []
+    return [token.lower() for token in _TOKEN_RE.findall(value) if len(token) >= 3 and not token.isdigit()]
+
+
+def add_global_terms(terms: Iterable[str]) -> int:
+    """Add terms to the global medical lexicon index"""
+    words = []
+    for term in terms:
+        words.extend(extract_terms(term))
+    with _vocabulary_lock:
+        return _global_index.add_words(words)
+
+
+def _get_patient_vocabulary(patient_id: int) -> PatientVocabulary:
+    """Get or create per-patient vocabulary (LRU bounded)"""
+    with _vocabulary_lock:
+        vocabulary = _patient_vocabularies.get(patient_id)
+        if vocabulary is None:
+            vocabulary = PatientVocabulary()
+            _patient_vocabularies[patient_id] = vocabulary
+            while len(_patient_vocabularies) > SPELLING_MAX_PATIENTS:
+                _patient_vocabularies.popitem(last=False)
+        else:
+            _patient_vocabularies.move_to_end(patient_id)
+        return vocabulary
+
+
+def refresh_patient_vocabulary(patient_id: int, db: Session, force: bool = False) -> PatientVocabulary:
+    """
+    Rebuild the patient's vocabulary if their data changed
+
+    The check is one primary-key lookup of patient_data_versions, throttled by
+    SPELLING_VOCAB_REFRESH_SECONDS; terms are only loaded when the version moved
+    (inserts, edits and deletes alike). Without the version table the vocabulary is
+    rebuilt on every refresh interval.
+    """
+    vocabulary = _get_patient_vocabulary(patient_id)
+    now = time.monotonic()
+    if not force and vocabulary.refreshed_at and now - vocabulary.refreshed_at < SPELLING_VOCAB_REFRESH_SECONDS:
+        return vocabulary
+
+    # Read before the terms: a write racing the rebuild moves the version again
+    version = get_patient_data_version(db, patient_id)
+    if not force and version is not None and version == vocabulary.version:
+        vocabulary.refreshed_at = now
+        return vocabulary
+
+    query_sql = text("""
+        SELECT d.diagnosis_name AS term
+        FROM diagnoses d
+        INNER JOIN medical_records mr ON d.record_id = mr.record_id
+        WHERE mr.patient_id = :patient_id
+        UNION
+        SELECT p.drug_name AS term
+        FROM prescriptions p
+        INNER JOIN medical_records mr ON p.record_id = mr.record_id
+        WHERE mr.patient_id = :patient_id
+        UNION
+        SELECT lr.test_name AS term
+        FROM lab_results lr
+        INNER JOIN medical_records mr ON lr.record_id = mr.record_id
+        WHERE mr.patient_id = :patient_id
+        UNION
+        SELECT a.allergy_name AS term
+        FROM allergies a
+        WHERE a.patient_id = :patient_id
+    """)
+
+    index = SymSpellIndex(SPELLING_MAX_EDIT_DISTANCE, SPELLING_PREFIX_LENGTH)
+    for row in db.execute(query_sql, {"patient_id": patient_id}):
+        for word in extract_terms(row.term):
+            if word not in index:
+                index.add_word(word)
+
+    with _vocabulary_lock:
+        vocabulary.index = index
+        vocabulary.version = version
+        vocabulary.refreshed_at = now
+
+    return vocabulary
+
+
+def correct_word(word: str, patient_index: Optional[SymSpellIndex] = None) -> str:
+    """Correct single lowercase word using patient vocabulary first, then global lexicon"""
+    if word in _NEVER_CORRECT or word.isdigit():
+        return word
+    if word in _global_index or (patient_index is not None and word in patient_index):
+        return word
+
+    max_distance = max_distance_for(word)
+    if max_distance == 0:
+        return word
+
+    best = None
+    if patient_index is not None:
+        best = patient_index.lookup(word, max_distance)
+    global_best = _global_index.lookup(word, max_distance)
+    if global_best and (best is None or global_best[1] < best[1]):
+        best = global_best
+
+    return best[0] if best else word
+
+
+def correct_query(query: str, patient_id: Optional[int] = None, db: Optional[Session] = None) -> str:
+    """
+    Rewrite query terms using the spelling index before retrieval
+
+    Example: "apa obat hipertensy saya?" -> "apa obat hipertensi saya"
+    Punctuation is dropped so the rewritten query matches record words directly.
+    Without db the patient's vocabulary is used as loaded (no refresh).
+    """
+    patient_index = None
+    if patient_id is not None:
+        try:
+            if db is not None:
+                patient_index = refresh_patient_vocabulary(patient_id, db).index
+            else:
+                patient_index = _get_patient_vocabulary(patient_id).index
+        except Exception as e:
+            # Spelling correction is best-effort, never block retrieval
+            print(f"Error refreshing spelling vocabulary: {str(e)}")
+
+    corrected = []
+    for token in _TOKEN_RE.findall(query.lower()):
+        corrected.append(correct_word(token, patient_index))
+    return " ".join(corrected)
@@ -0,0 +1,232 @@
+"""
+Medical synonym and ICD/drug code query expansion
+
+Menghubungkan istilah awam Indonesia ("darah tinggi"), istilah medis Inggris
+("hypertension"), kode ICD-10 ("I10") dan nama obat generik/merek ("panadol")
+sehingga retrieval di kedua RAG service bisa menemukan rekam medis walaupun
+query dan data menggunakan istilah yang berbeda.
+
+Sumber data berupa CSV di rag_service/data/synonyms/, di-build offline menjadi
+rag_service/data/medical_synonyms.json (lihat build_medical_synonyms.py) dan
+di-load sekali saat startup ke struktur in-memory yang ringkas.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import csv
+import json
+import os
+import re
+
+from ..core.config import SYNONYM_TABLE_PATH, SYNONYM_SOURCE_DIR
+
+SYNONYM_TABLE_VERSION = 1
+
+_TOKEN_RE = re.compile(r"[0-9a-zA-ZÀ-ɏ]+")
+
+# A query concept is a tuple of alternatives, each alternative is a tuple of words
+Concept = Tuple[Tuple[str, ...], ...]
+
+
+def normalize_term(term: str) -> str:
+    """Lowercase and collapse a term into space separated word tokens"""
+    return " ".join(_TOKEN_RE.findall(term.lower()))
+
+
+def tokenize(value: str) -> List[str]:
+    """Tokenize text into lowercase words without punctuation ("(ICD: I10)" -> ["icd", "i10"])"""
+    return _TOKEN_RE.findall(value.lower())
+
+
+def _read_csv_groups(path: str) -> List[List[str]]:
+    """Read one CSV source; every row is a group of equivalent terms (cells may contain '|' lists)"""
+    groups = []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for row in reader:
+            terms = []
+            for cell in row:
+                for term in cell.split("|"):
+                    term = normalize_term(term)
+                    if term:
+                        terms.append(term)
+            if len(terms) > 1:
+                groups.append(terms)
+    return groups
+
+
+def build_synonym_table(source_dir: str = SYNONYM_SOURCE_DIR, output_path: Optional[str] = SYNONYM_TABLE_PATH) -> Dict:
+    """
+    Offline build step: merge CSV sources into one synonym table
+
+    Rows that share a term are merged (union-find), so an ICD row and a lay
+    term row mentioning the same word end up in one group.
+    """
+    parent: Dict[str, str] = {}
+
+    def find(term: str) -> str:
+        while parent[term] != term:
+            parent[term] = parent[parent[term]]
+            term = parent[term]
+        return term
+
+    for filename in sorted(os.listdir(source_dir)):
+        if not filename.endswith(".csv"):
+            continue
+        for terms in _read_csv_groups(os.path.join(source_dir, filename)):
+            for term in terms:
+                parent.setdefault(term, term)
+            root = find(terms[0])
+            for term in terms[1:]:
+                other = find(term)
+                if other != root:
+                    parent[other] = root
+
+    grouped: Dict[str, List[str]] = {}
+    for term in parent:
+        grouped.setdefault(find(term), []).append(term)
+
+    table = {
+        "version": SYNONYM_TABLE_VERSION,
+        "groups": sorted(sorted(terms) for terms in grouped.values())
+    }
+
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+            f.write("\n")
+
+    return table
+
+
+class SynonymGraph:
+    """
+    Compact in-memory synonym table
+
+    Every term maps to a group id; groups are stored once as tuples of word tuples.
+    """
+    __slots__ = ("_term_to_group", "_groups", "max_phrase_words")
+
+    def __init__(self, groups: Iterable[Iterable[str]]):
+        self._term_to_group: Dict[str, int] = {}
+        group_list = []
+        max_words = 1
+        for terms in groups:
+            group_id = len(group_list)
+            alternatives = []
+            for term in terms:
+                words = tuple(term.split())
+                if not words:
+                    continue
+                alternatives.append(words)
+                self._term_to_group[" ".join(words)] = group_id
+                max_words = max(max_words, len(words))
+            group_list.append(tuple(alternatives))
+        self._groups: Tuple[Tuple[Tuple[str, ...], ...], ...] = tuple(group_list)
+        self.max_phrase_words = max_words
+
+    def __len__(self) -> int:
+        return len(self._term_to_group)
+
+    def terms(self) -> List[str]:
+        return list(self._term_to_group)
+
+    def lookup(self, term: str) -> Optional[Tuple[Tuple[str, ...], ...]]:
+        """Return all alternatives (as word tuples) for a normalized term"""
+        group_id = self._term_to_group.get(term)
+        if group_id is None:
+            return None
+        return self._groups[group_id]
+
+    def expand_query(self, query: str, stop_words: Set[str], min_word_length: int = 3) -> List[Concept]:
+        """
+        Turn a query into concepts for matching
+
+        Longest phrases are matched first ("tekanan darah tinggi" before "darah"),
+        each matched phrase becomes one concept whose alternatives are its synonyms.
+        Other words become single-alternative concepts after stop word filtering.
+        """
+        words = tokenize(query)
+        concepts: List[Concept] = []
+        seen: Set[Concept] = set()
+        i = 0
+        while i < len(words):
+            matched = False
+            for size in range(min(self.max_phrase_words, len(words) - i), 0, -1):
+                phrase = " ".join(words[i:i + size])
+                alternatives = self.lookup(phrase)
+                if alternatives is not None:
+                    if alternatives not in seen:
+                        seen.add(alternatives)
+                        concepts.append(alternatives)
+                    i += size
+                    matched = True
+                    break
+            if matched:
+                continue
+
+            word = words[i]
+            i += 1
+            if word in stop_words or len(word) < min_word_length:
+                continue
+            concept = ((word,),)
+            if concept not in seen:
+                seen.add(concept)
+                concepts.append(concept)
+        return concepts
+
+
+def count_concept_matches(concepts: List[Concept], text_words: Set[str]) -> int:
+    """Count concepts that have at least one alternative fully present in text_words"""
+    matches = 0
+    for alternatives in concepts:
+        for words in alternatives:
+            if all(word in text_words for word in words):
+                matches += 1
+                break
+    return matches
+
+
+def text_word_set(value: str) -> Set[str]:
+    """Word set of a chunk: raw whitespace tokens plus punctuation-free tokens"""
+    lowered = value.lower()
+    words = set(lowered.split())
+    words.update(_TOKEN_RE.findall(lowered))
+    return words
+
+
+def load_synonym_graph(path: str = SYNONYM_TABLE_PATH) -> SynonymGraph:
+    """Load the prebuilt table, falling back to building it from CSV sources"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            table = json.load(f)
+        if table.get("version") != SYNONYM_TABLE_VERSION:
+            raise ValueError(f"Unsupported synonym table version {table.get('version')}")
+    except Exception as e:
+        print(f"Synonym table not loaded from {path} ({str(e)}), building from CSV sources")
+        try:
+            table = build_synonym_table(SYNONYM_SOURCE_DIR, output_path=None)
+        except Exception as build_error:
+            print(f"Error building synonym table: {str(build_error)}")
+            table = {"groups": []}
+    return SynonymGraph(table["groups"])
+
+
+# Loaded once per process at import (service startup)
+synonym_graph = load_synonym_graph()
+
+
+def expand_query_concepts(query: str, stop_words: Set[str]) -> List[Concept]:
+    """Expand query through the shared synonym graph"""
+    return synonym_graph.expand_query(query, stop_words)
+
+
+def _register_spelling_terms() -> None:
+    """Synonym terms are also valid spellings for typo correction"""
+    try:
+        from .spelling import add_global_terms
+        add_global_terms(synonym_graph.terms())
+    except Exception as e:
+        print(f"Error registering synonym terms for spelling: {str(e)}")
+
+
+_register_spelling_terms()
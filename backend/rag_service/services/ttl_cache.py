@@ -0,0 +1,71 @@
+"""
+Bounded in-memory cache: LRU with a per-entry TTL
+
+Dipakai untuk state per pasien/sesi yang harus terbatas di memori (chat session,
+dossier prefetch, negative-result cache, saran pertanyaan, jadwal refresh ringkasan
+riwayat). get() memperpanjang TTL (sliding), peek() tidak.
+"""
+from typing import Generic, Optional, Tuple, TypeVar
+from collections import OrderedDict
+import threading
+import time
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUTTLCache(Generic[K, V]):
+    """Thread-safe LRU cache with per-entry TTL and a size cap"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        """Get entry and refresh its TTL, None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < now:
+                del self._entries[key]
+                return None
+            self._entries[key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            return value
+
+    def peek(self, key: K) -> Optional[V]:
+        """Get entry without touching its TTL or LRU position (fixed lifetime from put)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                return None
+            return entry[1]
+
+    def put(self, key: K, value: V) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            self._evict(now)
+
+    def pop(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[1] if entry else None
+
+    def _evict(self, now: float) -> None:
+        # Expired entries first (oldest at the front), then LRU over the cap
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at >= now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
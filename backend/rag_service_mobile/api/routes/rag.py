@@ -5,53 +5,17 @@ import time
 import sys
 import os
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 # HTTPBearer untuk Swagger UI - bisa langsung paste token
 security = HTTPBearer(auto_error=False)
 
-# Lazy-initialized database engine and session (singleton pattern)
-_auth_engine = None
-_auth_session_local = None
-
 def _get_auth_db_session():
-    """Get auth database session - lazy initialization to avoid circular import"""
-    global _auth_engine, _auth_session_local
-    
-    if _auth_engine is None:
-        import os
-        from dotenv import load_dotenv
-        load_dotenv()
-        
-        DB_USER = os.getenv("DB_USER", "root")
-        DB_PASSWORD = os.getenv("DB_PASSWORD", "")
-        DB_HOST = os.getenv("DB_HOST", "localhost")
-        DB_PORT = int(os.getenv("DB_PORT", "3306"))
-        DB_NAME = os.getenv("DB_NAME", "healthkon")
-        
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        from sqlalchemy.pool import QueuePool
-        
-        DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-        _auth_engine = create_engine(
-            DATABASE_URL,
-            poolclass=QueuePool,
-            pool_pre_ping=True,
-            pool_recycle=300,
-            pool_size=5,
-            max_overflow=10,
-            connect_args={
-                "connect_timeout": 10,
-                "read_timeout": 10,
-                "write_timeout": 10,
-                "charset": "utf8mb4",
-            }
-        )
-        _auth_session_local = sessionmaker(autocommit=False, autoflush=False, bind=_auth_engine)
-    
-    return _auth_session_local()
+    """Session from the process-wide pool (auth.core.database) - lazy import to avoid circular import"""
+    from auth.core.database import SessionLocal
+    return SessionLocal()
 
 async def get_current_user_from_token(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -103,6 +67,8 @@ async def get_current_user_from_token(
                 detail="Access denied. User not found. Please login as a regular user."
             )
         
+        # Loaded columns stay readable; return the connection to the shared pool now
+        db.close()
         return user
         
     except HTTPException:
@@ -137,13 +103,19 @@ async def get_current_active_user_for_rag_mobile(
     return current_user
 
 from ...core.database import get_db
-from ...schemas.rag import ChatRequest, ChatResponse
+from ...schemas.rag import ChatRequest, ChatResponse, PrepareResponse
 from ...services.rag import query_with_rag_mobile
+from ...services.sessions import get_or_create_session, end_session
+from ...services.prefetch import prepare_patient, cancel_prepare, take_dossier
+from ...core.config import PREFETCH_DOSSIER_TTL_SECONDS
+from rag_service.services.metrics import RequestTrace, rag_metrics, require_metrics_access
 
 router = APIRouter(prefix="/rag", tags=["RAG Mobile"])
 
+# Plain def: FastAPI runs it in the threadpool, so the prefetch wait, DB queries and
+# the LLM call do not block the event loop
 @router.post("/chat", response_model=ChatResponse, status_code=status.HTTP_200_OK)
-async def chat_with_medical_records(
+def chat_with_medical_records(
     request: ChatRequest,
     current_user = Depends(get_current_active_user_for_rag_mobile),
     db: Session = Depends(get_db)
@@ -193,6 +165,10 @@ async def chat_with_medical_records(
     - `success`: Status berhasil/gagal
     - `processing_time`: Waktu pemrosesan dalam detik
     - `suggestions`: Saran pertanyaan follow-up (optional)
+    - `session_id`: ID sesi percakapan - kirim kembali di request berikutnya agar pertanyaan
+      lanjutan (contoh: "kalau obatnya?") memakai context sebelumnya
+    - `debug`: Rincian waktu per tahap (ms), jumlah token, karakter context sebelum/sesudah
+      compaction dan doc_id asal setiap fakta berulang, hanya jika request `debug: true`
     """
     start_time = time.time()
     
@@ -217,23 +193,37 @@ async def chat_with_medical_records(
         # Gunakan patient_id dari user yang login (security enforced)
         patient_id = current_user.id
         
+        # Sesi percakapan (server-side) - reuse retrieval context untuk follow-up
+        session = get_or_create_session(request.session_id, patient_id)
+        
+        # Context yang sudah disiapkan oleh /rag/chat/prepare (jika ada)
+        trace = RequestTrace("rag_service_mobile")
+        with trace.stage("prefetch_wait"):
+            dossier = take_dossier(patient_id, max_documents=5, db=db)
+        
         # Query dengan RAG Mobile - otomatis filter berdasarkan patient_id user
         result = query_with_rag_mobile(
             query=request.query.strip(),
             patient_id=patient_id,  # Otomatis dari current_user.id
             max_documents=5,  # Default untuk mobile
             similarity_threshold=0.6,  # More lenient threshold for mobile
-            db=db
+            db=db,
+            session=session,
+            trace=trace,
+            dossier=dossier
         )
         
         processing_time = time.time() - start_time
+        trace.finish()
         
         return ChatResponse(
             answer=result.get("answer", ""),
             query=request.query,
             success=result.get("success", True),
             processing_time=processing_time,
-            suggestions=result.get("suggestions", [])
+            suggestions=result.get("suggestions", []),
+            session_id=session.session_id,
+            debug=trace.as_debug() if request.debug else None
         )
     
     except ValueError as e:
@@ -276,6 +266,46 @@ async def chat_with_medical_records(
             ]
         )
 
+@router.post("/chat/prepare", response_model=PrepareResponse, status_code=status.HTTP_200_OK)
+async def prepare_chat(
+    current_user = Depends(get_current_active_user_for_rag_mobile)
+):
+    """
+    Siapkan context chat di background saat layar chat Nova dibuka
+    
+    Rekam medis, dokumen, alergi, data kalkulator, metrik, dan ringkasan riwayat
+    dimuat selagi user mengetik, sehingga /rag/chat pertama lebih cepat.
+    Dibatasi per user; panggil DELETE /rag/chat/prepare saat layar ditutup.
+    """
+    prepare_status = prepare_patient(current_user.id, max_documents=5)
+    return PrepareResponse(status=prepare_status, expires_in_seconds=PREFETCH_DOSSIER_TTL_SECONDS)
+
+@router.delete("/chat/prepare", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_prepare_chat(
+    current_user = Depends(get_current_active_user_for_rag_mobile)
+):
+    """Batalkan persiapan context yang masih berjalan (layar chat ditutup)"""
+    cancel_prepare(current_user.id)
+    return None
+
+@router.delete("/chat/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def end_chat_session(
+    session_id: str,
+    current_user = Depends(get_current_active_user_for_rag_mobile)
+):
+    """Akhiri sesi percakapan (hapus context yang tersimpan di server)"""
+    if not end_session(session_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found"
+        )
+    return None
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_access)])
+async def rag_metrics_endpoint():
+    """Per-stage latency and token histograms (Prometheus text format, internal only)"""
+    return PlainTextResponse(rag_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @router.get("/health")
 async def rag_health():
     """Health check for RAG Service Mobile"""
@@ -35,6 +35,7 @@ VECTOR_STORE_TYPE = os.getenv("VECTOR_STORE_TYPE", "pinecone")
 # RAG Configuration - Optimized for user-friendly responses
 MAX_CONTEXT_DOCUMENTS = int(os.getenv("MAX_CONTEXT_DOCUMENTS_MOBILE", "5"))
 SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD_MOBILE", "0.6"))  # Lower threshold for more lenient matching
+MMR_CANDIDATE_FACTOR = int(os.getenv("MMR_CANDIDATE_FACTOR_MOBILE", "2"))  # Candidates retrieved per context slot before MMR re-rank
 
 # Response Configuration
 # Adjusted for free tier limits - consider total tokens (input + output)
@@ -42,3 +43,27 @@ SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD_MOBILE", "0.6"))  #
 MAX_RESPONSE_TOKENS = int(os.getenv("MAX_RESPONSE_TOKENS_MOBILE", "2000"))  # Adjusted for credit limits (2000 output + context input)
 TEMPERATURE = float(os.getenv("TEMPERATURE_MOBILE", "0.8"))  # Higher temperature for more natural, friendly responses
 
+# Chat Session Configuration (server-side conversation context)
+CHAT_SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))  # Idle timeout per session
+CHAT_SESSION_MAX_SESSIONS = int(os.getenv("CHAT_SESSION_MAX_SESSIONS", "1000"))  # LRU size cap
+CHAT_SESSION_MAX_TURNS = int(os.getenv("CHAT_SESSION_MAX_TURNS", "6"))  # Turns kept for follow-up context
+CHAT_SESSION_SOURCE_TRUST_SECONDS = float(os.getenv("CHAT_SESSION_SOURCE_TRUST_SECONDS", "5"))  # Side sources used without version check within this window
+
+# Speculative prefetch when the chat screen opens (POST /rag/chat/prepare)
+PREFETCH_DOSSIER_TTL_SECONDS = int(os.getenv("PREFETCH_DOSSIER_TTL_SECONDS", "120"))  # How long warmed context stays valid
+PREFETCH_DOSSIER_TRUST_SECONDS = float(os.getenv("PREFETCH_DOSSIER_TRUST_SECONDS", "5"))  # Used without version check within this window of its build
+PREFETCH_MIN_INTERVAL_SECONDS = int(os.getenv("PREFETCH_MIN_INTERVAL_SECONDS", "30"))  # Rate limit per user
+PREFETCH_WAIT_SECONDS = float(os.getenv("PREFETCH_WAIT_SECONDS", "2.0"))  # /chat waits this long for an in-flight prefetch
+PREFETCH_MAX_WORKERS = int(os.getenv("PREFETCH_MAX_WORKERS", "4"))  # Background prefetch threads
+PREFETCH_MAX_DOSSIERS = int(os.getenv("PREFETCH_MAX_DOSSIERS", "1000"))  # LRU size cap
+
+# Data-driven follow-up suggestions (precomputed per patient)
+SUGGESTION_CACHE_TTL_SECONDS = int(os.getenv("SUGGESTION_CACHE_TTL_SECONDS", "600"))  # Max age of cached candidates
+SUGGESTION_TRUST_SECONDS = float(os.getenv("SUGGESTION_TRUST_SECONDS", "5"))  # Used without version check within this window
+SUGGESTION_MAX_PATIENTS = int(os.getenv("SUGGESTION_MAX_PATIENTS", "1000"))  # LRU size cap
+SUGGESTION_MAX_PER_SOURCE = int(os.getenv("SUGGESTION_MAX_PER_SOURCE", "3"))  # Latest labs/drugs/diagnoses turned into questions
+
+# Negative-result cache (patients known to have no data of a kind)
+NEGATIVE_CACHE_TTL_SECONDS = int(os.getenv("NEGATIVE_CACHE_TTL_SECONDS", "600"))  # Max age of a bitmap
+NEGATIVE_CACHE_TRUST_SECONDS = float(os.getenv("NEGATIVE_CACHE_TRUST_SECONDS", "5"))  # Used without version check within this window
+NEGATIVE_CACHE_MAX_PATIENTS = int(os.getenv("NEGATIVE_CACHE_MAX_PATIENTS", "5000"))  # LRU size cap
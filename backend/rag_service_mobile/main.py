@@ -4,6 +4,7 @@ Main FastAPI application for RAG Service Mobile
 from fastapi import FastAPI
 from .api.routes import rag
 from .core.config import SERVICE_NAME, SERVICE_VERSION
+from .core.database import get_pool_stats
 
 app = FastAPI(
     title=SERVICE_NAME,
@@ -23,3 +24,7 @@ async def root():
         "status": "ready"
     }
 
+@app.get("/health/db/pool")
+async def db_pool_stats():
+    """Connection pool statistics of this process (checked out, overflow, wait time)"""
+    return get_pool_stats()
@@ -7,6 +7,8 @@ from typing import Optional
 class ChatRequest(BaseModel):
     """Schema for mobile chat request - simple Q&A for users"""
     query: str  # User's question about their medical records
+    session_id: Optional[str] = None  # Chat session from previous response, for follow-up questions
+    debug: Optional[bool] = False  # Include per-stage timings and token counts in response
 
 class ChatResponse(BaseModel):
     """Schema for mobile chat response - friendly and engaging"""
@@ -15,4 +17,11 @@ class ChatResponse(BaseModel):
     success: bool
     processing_time: Optional[float] = None
     suggestions: Optional[list] = None  # Optional follow-up question suggestions
+    session_id: Optional[str] = None  # Send back in the next request to continue the conversation
+    debug: Optional[dict] = None  # Per-stage timings (ms), token counts and compaction provenance, only if request.debug
 
+
+class PrepareResponse(BaseModel):
+    """Schema for chat prepare (speculative prefetch) response"""
+    status: str  # scheduled, pending, ready, rate_limited
+    expires_in_seconds: Optional[int] = None  # How long warmed context stays valid
@@ -0,0 +1,116 @@
+"""
+Negative-result cache for patients without data
+
+Pengguna baru yang mencoba Nova sering belum punya dokumen, rekam medis, alergi,
+atau data kalkulator. Tanpa cache, setiap pertanyaan tetap menjalankan semua query
+retrieval sebelum mengembalikan jawaban "tidak menemukan informasi".
+
+Cache ini menyimpan bitmap per pasien: jenis data mana yang kosong, bersama versi
+data pasien (patient_data_versions) saat bitmap dihitung.
+- Dalam NEGATIVE_CACHE_TRUST_SECONDS setelah dicek, bitmap dipakai tanpa DB sama sekali
+- Setelah itu cukup satu lookup primary key versi; jika versi berubah (ada penulisan
+  data di service mana pun), entry dibuang
+- Jenis data yang kosong dilewati oleh retrieval; jika semuanya kosong, request
+  langsung dijawab tanpa query
+"""
+from typing import Optional
+import time
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+from ..core.config import (
+    NEGATIVE_CACHE_TTL_SECONDS,
+    NEGATIVE_CACHE_TRUST_SECONDS,
+    NEGATIVE_CACHE_MAX_PATIENTS
+)
+from .sessions import LRUTTLCache
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from auth.core.data_versions import get_patient_data_version
+
+# Data kinds (bit flags)
+NO_DOCUMENTS = 1
+NO_MEDICAL_RECORDS = 2
+NO_ALLERGIES = 4
+NO_HEALTH_CALCULATIONS = 8
+NO_HEALTH_METRICS = 16
+NO_DATA = NO_DOCUMENTS | NO_MEDICAL_RECORDS | NO_ALLERGIES | NO_HEALTH_CALCULATIONS | NO_HEALTH_METRICS
+
+
+class _EmptyKinds:
+    __slots__ = ("mask", "version", "checked_at")
+
+    def __init__(self, mask: int, version: int):
+        self.mask = mask
+        self.version = version
+        self.checked_at = time.monotonic()
+
+
+_empty_kinds: LRUTTLCache[int, _EmptyKinds] = LRUTTLCache(NEGATIVE_CACHE_MAX_PATIENTS, NEGATIVE_CACHE_TTL_SECONDS)
+
+
+def known_empty_kinds(patient_id: int, db: Session) -> int:
+    """
+    Bitmap of data kinds known to be empty for this patient (0 = nothing known)
+    Trusted without DB access for NEGATIVE_CACHE_TRUST_SECONDS, then revalidated
+    against the patient's data version.
+    """
+    entry = _empty_kinds.get(patient_id)
+    if entry is None:
+        return 0
+    if time.monotonic() - entry.checked_at < NEGATIVE_CACHE_TRUST_SECONDS:
+        return entry.mask
+    version = get_patient_data_version(db, patient_id)
+    if version is None or version != entry.version:
+        _empty_kinds.pop(patient_id)
+        return 0
+    entry.checked_at = time.monotonic()
+    return entry.mask
+
+
+def remember_empty_kinds(patient_id: int, db: Session) -> int:
+    """
+    Probe which data kinds exist (one query) and cache the empty ones
+    Called after a request found no context. The version is read before the probe,
+    so a write racing with the probe invalidates the entry on the next check.
+    """
+    version = get_patient_data_version(db, patient_id)
+    if version is None:
+        return 0  # No version table: cannot be invalidated, do not cache
+    try:
+        row = db.execute(text("""
+            SELECT
+                EXISTS(SELECT 1 FROM medical_documents
+                       WHERE patient_id = :patient_id AND extract_text IS NOT NULL AND extract_text != '') AS has_documents,
+                EXISTS(SELECT 1 FROM medical_records WHERE patient_id = :patient_id) AS has_records,
+                EXISTS(SELECT 1 FROM allergies WHERE patient_id = :patient_id) AS has_allergies,
+                EXISTS(SELECT 1 FROM health_calculations WHERE user_id = :patient_id) AS has_calculations,
+                EXISTS(SELECT 1 FROM health_metrics_history WHERE user_id = :patient_id) AS has_metrics
+        """), {"patient_id": patient_id}).first()
+    except Exception as e:
+        print(f"[Negative Cache] Patient {patient_id}: error probing data: {str(e)}")
+        db.rollback()
+        return 0
+    if row is None:
+        return 0
+
+    mask = 0
+    if not row.has_documents:
+        mask |= NO_DOCUMENTS
+    if not row.has_records:
+        mask |= NO_MEDICAL_RECORDS
+    if not row.has_allergies:
+        mask |= NO_ALLERGIES
+    if not row.has_calculations:
+        mask |= NO_HEALTH_CALCULATIONS
+    if not row.has_metrics:
+        mask |= NO_HEALTH_METRICS
+
+    if mask:
+        _empty_kinds.put(patient_id, _EmptyKinds(mask, version))
+    else:
+        _empty_kinds.pop(patient_id)
+    return mask
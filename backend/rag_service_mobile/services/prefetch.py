@@ -0,0 +1,209 @@
+"""
+Speculative context prefetch for the mobile chat screen
+
+Aplikasi memanggil POST /rag/chat/prepare saat layar chat Nova dibuka. Selama user
+masih berpikir/mengetik, background worker menyiapkan "dossier" pasien: kandidat
+rekam medis dan dokumen, alergi, data kalkulator, metrik, ringkasan riwayat, saran
+pertanyaan lanjutan, serta vocabulary spelling pasien. Request /chat pertama cukup melakukan scoring query
+dan memanggil LLM.
+
+- Prefetch bisa dibatalkan (layar ditutup) lewat DELETE /rag/chat/prepare;
+  worker memeriksa cancel flag di antara setiap langkah
+- Rate limit per user (PREFETCH_MIN_INTERVAL_SECONDS) dan dedup job yang berjalan
+- Dossier disimpan singkat (PREFETCH_DOSSIER_TTL_SECONDS, dihitung dari selesai dibangun,
+  tidak diperpanjang saat dibaca) dan dipakai sekali oleh /chat pertama; pertanyaan
+  berikutnya memakai context di chat session
+- Versi data pasien dibaca sebelum build; take_dossier membuang dossier jika versinya
+  sudah berubah (dicek setelah PREFETCH_DOSSIER_TRUST_SECONDS sejak built_at)
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import threading
+
+from ..core.config import (
+    PREFETCH_DOSSIER_TTL_SECONDS,
+    PREFETCH_MIN_INTERVAL_SECONDS,
+    PREFETCH_WAIT_SECONDS,
+    PREFETCH_MAX_WORKERS,
+    PREFETCH_MAX_DOSSIERS
+)
+from .sessions import LRUTTLCache, PatientDossier, candidate_limit
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from auth.core.data_versions import get_patient_data_version
+
+PREPARE_READY = "ready"
+PREPARE_SCHEDULED = "scheduled"
+PREPARE_PENDING = "pending"
+PREPARE_RATE_LIMITED = "rate_limited"
+
+
+class PrefetchJob:
+    """One in-flight dossier build with its cancel flag"""
+    __slots__ = ("patient_id", "limit", "cancel_event", "future")
+
+    def __init__(self, patient_id: int, limit: int):
+        self.patient_id = patient_id
+        self.limit = limit
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+
+_dossiers: LRUTTLCache[int, PatientDossier] = LRUTTLCache(PREFETCH_MAX_DOSSIERS, PREFETCH_DOSSIER_TTL_SECONDS)
+_recent_prepares: LRUTTLCache[int, bool] = LRUTTLCache(PREFETCH_MAX_DOSSIERS, PREFETCH_MIN_INTERVAL_SECONDS)
+_jobs: Dict[int, PrefetchJob] = {}
+_jobs_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PREFETCH_MAX_WORKERS, thread_name_prefix="chat-prefetch")
+    return _executor
+
+
+def _dossier_steps(dossier: PatientDossier, db) -> List[Tuple[str, Callable[[], object]]]:
+    """Prefetch steps in order of usefulness for the first question"""
+    from .rag import (
+        fetch_document_rows,
+        get_patient_allergies_context,
+        get_health_calculations_context,
+        get_health_metrics_context
+    )
+    from .suggestions import get_patient_suggestions
+    from rag_service.services.spelling import refresh_patient_vocabulary
+    from rag_service.services.record_units import fetch_record_units
+    from rag_service.services.history_summary import get_history_summary_context, schedule_summary_refresh
+
+    patient_id = dossier.patient_id
+
+    def record_units():
+        dossier.record_units = fetch_record_units(patient_id, dossier.limit, db)
+
+    def document_rows():
+        dossier.document_rows = fetch_document_rows(patient_id, dossier.limit, db)
+
+    def source(key: str, loader: Callable[[], Optional[str]]) -> Callable[[], None]:
+        def step():
+            dossier.sources[key] = loader()
+        return step
+
+    def history_summary():
+        dossier.sources["history_summary"] = get_history_summary_context(patient_id, db)
+        schedule_summary_refresh(patient_id)
+
+    return [
+        ("spelling", lambda: refresh_patient_vocabulary(patient_id, db)),
+        ("medical_records", record_units),
+        ("documents", document_rows),
+        ("allergies", source("allergies", lambda: get_patient_allergies_context(patient_id, db))),
+        ("health_calculations", source("health_calculations", lambda: get_health_calculations_context(patient_id, db, limit=10))),
+        ("health_metrics", source("health_metrics", lambda: get_health_metrics_context(patient_id, db, limit=20))),
+        ("history_summary", history_summary),
+        ("suggestions", lambda: get_patient_suggestions(patient_id, db)),  # Warms the suggestion cache
+    ]
+
+
+def _build_dossier(job: PrefetchJob) -> Optional[PatientDossier]:
+    """Worker: build the dossier step by step with a dedicated DB session, stop when cancelled"""
+    from ..core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        dossier = PatientDossier(job.patient_id, job.limit)
+        # Read before loading: a write racing with the build invalidates the sources
+        dossier.version = get_patient_data_version(db, job.patient_id)
+        for name, step in _dossier_steps(dossier, db):
+            if job.cancelled:
+                print(f"[Prefetch] Patient {job.patient_id}: cancelled before {name}")
+                return None
+            try:
+                step()
+            except Exception as e:
+                # A failed source is simply loaded again by /chat
+                print(f"[Prefetch] Patient {job.patient_id}: error in {name}: {str(e)}")
+                db.rollback()
+        if job.cancelled:
+            return None
+        _dossiers.put(job.patient_id, dossier)
+        return dossier
+    finally:
+        db.close()
+        with _jobs_lock:
+            if _jobs.get(job.patient_id) is job:
+                del _jobs[job.patient_id]
+
+
+def prepare_patient(patient_id: int, max_documents: int = 5) -> str:
+    """
+    Start warming the patient's dossier in the background
+    Candidate rows are fetched for the MMR candidate limit of max_documents, the same
+    limit /chat retrieves with. Returns ready (fresh dossier exists), pending (already
+    running), rate_limited (prepared too recently) or scheduled.
+    """
+    limit = candidate_limit(max_documents)
+    dossier = _dossiers.peek(patient_id)
+    if dossier is not None and dossier.limit == limit:
+        return PREPARE_READY
+
+    with _jobs_lock:
+        if patient_id in _jobs:
+            return PREPARE_PENDING
+        if _recent_prepares.peek(patient_id):
+            return PREPARE_RATE_LIMITED
+        _recent_prepares.put(patient_id, True)
+        job = PrefetchJob(patient_id, limit)
+        _jobs[patient_id] = job
+        job.future = _get_executor().submit(_build_dossier, job)
+    return PREPARE_SCHEDULED
+
+
+def cancel_prepare(patient_id: int) -> bool:
+    """Cancel an in-flight prefetch (e.g. chat screen closed); True if one was running"""
+    with _jobs_lock:
+        job = _jobs.get(patient_id)
+    if job is None:
+        return False
+    job.cancel()
+    return True
+
+
+def take_dossier(patient_id: int, max_documents: int, db=None,
+                 wait_seconds: float = PREFETCH_WAIT_SECONDS) -> Optional[PatientDossier]:
+    """
+    Dossier for the first /chat request (removed from the cache: used at most once)
+    Waits briefly for an in-flight prefetch; if it is still not done the job is
+    cancelled and /chat loads everything itself. With db, a dossier built before the
+    patient's data changed is dropped (PatientDossier.is_current). Blocks the calling
+    thread, so call it from a sync route (threadpool), never from the event loop.
+    """
+    with _jobs_lock:
+        job = _jobs.get(patient_id)
+    if job is not None and job.future is not None and wait_seconds > 0:
+        try:
+            job.future.result(timeout=wait_seconds)
+        except FutureTimeoutError:
+            job.cancel()
+        except Exception as e:
+            print(f"[Prefetch] Patient {patient_id}: prefetch failed: {str(e)}")
+
+    dossier = _dossiers.peek(patient_id)
+    if dossier is None:
+        return None
+    _dossiers.pop(patient_id)
+    if dossier.limit != candidate_limit(max_documents):
+        return None
+    if db is not None and not dossier.is_current(db):
+        print(f"[Prefetch] Patient {patient_id}: data changed since the dossier was built, not used")
+        return None
+    return dossier
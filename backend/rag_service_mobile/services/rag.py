@@ -1,11 +1,11 @@
 """
 RAG Service Mobile - User-friendly Medical Records Q&A with friendly, engaging responses
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, FrozenSet, Optional, Sequence
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from datetime import datetime
-import re
+import time
 
 from ..core.config import (
     LLM_PROVIDER,
@@ -20,6 +20,46 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+# Shared retrieval helpers from RAG Service
+from rag_service.services.spelling import correct_query
+from rag_service.services.synonyms import expand_query_concepts, count_concept_matches, text_word_set
+from rag_service.services.compaction import compact_context
+from rag_service.services.history_summary import get_history_summary_context, schedule_summary_refresh
+from rag_service.services.ranking import TopK, ScoredCandidate
+from rag_service.services.diversity import mmr_rerank
+from rag_service.services.record_units import (
+    ALL_UNIT_TYPES,
+    RecordSelection,
+    RecordUnit,
+    detect_record_intent,
+    fetch_record_units,
+    load_record_units,
+    select_record_units
+)
+from rag_service.services.metrics import RequestTrace, estimate_tokens
+from rag_service.services.llm_cassette import LLMStream, TokenUsage, open_llm_stream
+
+from .sessions import (
+    ChatSession,
+    PatientDossier,
+    candidate_limit as candidate_limit_for,
+    is_follow_up,
+    normalize_follow_up,
+    load_session_source
+)
+from .tts import TTSSanitizer, sanitize_for_tts
+from .suggestions import SuggestionCandidate, get_patient_suggestions, select_suggestions
+from .negative_cache import (
+    known_empty_kinds,
+    remember_empty_kinds,
+    NO_DATA,
+    NO_DOCUMENTS,
+    NO_MEDICAL_RECORDS,
+    NO_ALLERGIES,
+    NO_HEALTH_CALCULATIONS,
+    NO_HEALTH_METRICS
+)
+
 from pydantic import BaseModel
 
 class DocumentChunk(BaseModel):
@@ -30,14 +70,45 @@ class DocumentChunk(BaseModel):
     similarity_score: float
     metadata: Optional[dict] = None
 
-def search_documents(
-    query: str,
-    patient_id: Optional[int] = None,
-    limit: int = 10,
-    threshold: float = 0.6,
-    db: Session = None
-) -> List[DocumentChunk]:
-    """Search medical documents by semantic similarity"""
+def _document_chunk_from_candidate(candidate: ScoredCandidate) -> DocumentChunk:
+    """Build response model for a medical_documents row that made the top k"""
+    row = candidate.row
+    # Use full extract_text (model tidak bisa OCR, cukup chunk text saja)
+    # Limit to 3000 chars untuk menghindari token limit yang terlalu besar
+    return DocumentChunk(
+        doc_id=row.doc_id,
+        patient_id=row.patient_id,
+        record_id=row.record_id,
+        chunk_text=candidate.text[:3000],
+        similarity_score=candidate.score,
+        metadata={
+            "file_url": row.file_url,
+            "created_at": str(row.created_at),
+            "source": "medical_document"
+        }
+    )
+
+def _record_chunk_from_selection(selection: RecordSelection) -> DocumentChunk:
+    """Build response model for a visit with the record units selected for this query"""
+    visit = selection.visit
+    return DocumentChunk(
+        doc_id=f"record_{visit.record_id}",
+        patient_id=visit.patient_id,
+        record_id=visit.record_id,
+        chunk_text=selection.render(max_chars=3000),
+        similarity_score=selection.score,
+        metadata={
+            "visit_date": str(visit.visit_date),
+            "visit_type": visit.visit_type,
+            "doctor_name": visit.doctor_name,
+            "facility_name": visit.facility_name,
+            "unit_types": selection.unit_types(),
+            "source": "medical_record"
+        }
+    )
+
+def fetch_document_rows(patient_id: Optional[int], limit: int, db: Session) -> Sequence:
+    """Candidate rows for search_documents (newest documents with extracted text)"""
     if patient_id:
         query_sql = text("""
             SELECT doc_id, patient_id, record_id, extract_text, file_url, created_at
@@ -48,7 +119,7 @@ def search_documents(
             ORDER BY created_at DESC
             LIMIT :limit
         """)
-        result = db.execute(query_sql, {"patient_id": patient_id, "limit": limit * 2})
+        return db.execute(query_sql, {"patient_id": patient_id, "limit": limit * 2}).fetchall()
     else:
         query_sql = text("""
             SELECT doc_id, patient_id, record_id, extract_text, file_url, created_at
@@ -58,167 +129,71 @@ def search_documents(
             ORDER BY created_at DESC
             LIMIT :limit
         """)
-        result = db.execute(query_sql, {"limit": limit * 2})
+        return db.execute(query_sql, {"limit": limit * 2}).fetchall()
+
+def search_documents(
+    query: str,
+    patient_id: Optional[int] = None,
+    limit: int = 10,
+    threshold: float = 0.6,
+    db: Session = None,
+    rows: Optional[Sequence] = None
+) -> List[DocumentChunk]:
+    """
+    Search medical documents by semantic similarity
+    Candidate rows can be passed in (prefetched dossier) to skip the DB round trip.
+    """
+    result = rows if rows is not None else fetch_document_rows(patient_id, limit, db)
     
-    query_lower = query.lower()
-    query_words = set(query_lower.split())
     stop_words = {'yang', 'dan', 'atau', 'dari', 'di', 'ke', 'pada', 'untuk', 'dengan', 'bagaimana', 'apa', 'apakah', 'saya', 'saya', 'saya'}
-    query_words = {w for w in query_words if w not in stop_words and len(w) > 2}
+    # Expand query terms through medical synonym graph (lay terms, ICD-10, drug names)
+    query_concepts = expand_query_concepts(query, stop_words)
     
-    documents = []
+    top_documents: TopK[ScoredCandidate] = TopK(limit)
     
     for row in result:
         if not row.extract_text:
             continue
         
-        text_lower = row.extract_text.lower()
-        text_words = set(text_lower.split())
+        text_words = text_word_set(row.extract_text)
         
-        if not query_words:
+        if not query_concepts:
             continue
         
-        matches = len(query_words.intersection(text_words))
-        similarity = matches / len(query_words) if query_words else 0
+        matches = count_concept_matches(query_concepts, text_words)
+        similarity = matches / len(query_concepts) if query_concepts else 0
         
         effective_threshold = threshold if matches > 0 else threshold * 0.3
         
         if similarity >= effective_threshold:
-            full_text = row.extract_text
-            chunk_text = full_text[:3000] if len(full_text) > 3000 else full_text
-            
-            chunk = DocumentChunk(
-                doc_id=row.doc_id,
-                patient_id=row.patient_id,
-                record_id=row.record_id,
-                chunk_text=chunk_text,
-                similarity_score=similarity,
-                metadata={
-                    "file_url": row.file_url,
-                    "created_at": str(row.created_at),
-                    "source": "medical_document"
-                }
-            )
-            documents.append(chunk)
+            top_documents.push(similarity, ScoredCandidate(similarity, row, row.extract_text))
     
-    documents.sort(key=lambda x: x.similarity_score, reverse=True)
-    return documents[:limit]
+    return top_documents.materialize(_document_chunk_from_candidate)
 
 def search_medical_records(
     query: str,
     patient_id: int,
     limit: int = 5,
-    db: Session = None
+    db: Session = None,
+    units: Optional[List[RecordUnit]] = None,
+    intent: Optional[FrozenSet[str]] = None
 ) -> List[DocumentChunk]:
-    """Search medical records (diagnoses, prescriptions, notes, lab results) for context"""
-    query_lower = query.lower()
-    query_words = set(query_lower.split())
+    """
+    Search medical records (diagnoses, prescriptions, notes, lab results) for context
+    Facts are scored as typed units (lab, prescription, diagnosis, note); only the types
+    implied by the question are loaded and scored, and each visit chunk lists only the
+    selected facts. Units can be passed in (prefetched dossier, chat session) to skip the
+    DB round trip; intent overrides the unit types detected from the query.
+    """
     stop_words = {'yang', 'dan', 'atau', 'dari', 'di', 'ke', 'pada', 'untuk', 'dengan', 'bagaimana', 'apa', 'apakah', 'saya', 'ini', 'itu'}
-    query_words = {w for w in query_words if w not in stop_words and len(w) > 2}
+    if intent is None:
+        intent = detect_record_intent(query)
     
-    query_sql = text("""
-        SELECT 
-            mr.record_id,
-            mr.patient_id,
-            mr.diagnosis_summary,
-            mr.notes,
-            mr.visit_date,
-            mr.visit_type,
-            mr.doctor_name,
-            mr.facility_name,
-            GROUP_CONCAT(DISTINCT d.diagnosis_name SEPARATOR ', ') as diagnoses,
-            GROUP_CONCAT(DISTINCT d.icd_code SEPARATOR ', ') as icd_codes,
-            GROUP_CONCAT(DISTINCT CONCAT(p.drug_name, ' (', COALESCE(p.dosage, ''), ', ', COALESCE(p.frequency, ''), ')') SEPARATOR '; ') as prescriptions,
-            GROUP_CONCAT(DISTINCT CONCAT(lr.test_name, ': ', lr.result_value, ' ', COALESCE(lr.result_unit, ''), 
-                         CASE WHEN lr.normal_range IS NOT NULL THEN CONCAT(' [Normal: ', lr.normal_range, ']') ELSE '' END) 
-                         SEPARATOR '; ') as lab_results
-        FROM medical_records mr
-        LEFT JOIN diagnoses d ON mr.record_id = d.record_id
-        LEFT JOIN prescriptions p ON mr.record_id = p.record_id
-        LEFT JOIN lab_results lr ON mr.record_id = lr.record_id
-        WHERE mr.patient_id = :patient_id
-        GROUP BY mr.record_id, mr.patient_id, mr.diagnosis_summary, mr.notes, 
-                 mr.visit_date, mr.visit_type, mr.doctor_name, mr.facility_name
-        ORDER BY mr.visit_date DESC
-        LIMIT :limit
-    """)
+    if units is None:
+        units, _ = load_record_units(patient_id, limit, db, intent)
     
-    result = db.execute(query_sql, {"patient_id": patient_id, "limit": limit * 3})
-    chunks = []
-    
-    for row in result:
-        visit_date_str = row.visit_date.strftime("%d %B %Y") if row.visit_date else "Tanggal tidak diketahui"
-        visit_type_str = row.visit_type or "kunjungan"
-        doctor_str = f"Dokter: {row.doctor_name}" if row.doctor_name else ""
-        facility_str = f"Fasilitas: {row.facility_name}" if row.facility_name else ""
-        
-        text_parts = []
-        text_parts.append(f"=== Rekam Medis - {visit_date_str} ({visit_type_str}) ===")
-        if doctor_str:
-            text_parts.append(doctor_str)
-        if facility_str:
-            text_parts.append(facility_str)
-        
-        if row.diagnoses:
-            icd_part = f" (ICD: {row.icd_codes})" if row.icd_codes else ""
-            text_parts.append(f"Diagnosis: {row.diagnoses}{icd_part}")
-        
-        if row.diagnosis_summary:
-            text_parts.append(f"Ringkasan: {row.diagnosis_summary}")
-        
-        if row.notes:
-            text_parts.append(f"Catatan: {row.notes}")
-        
-        if row.prescriptions:
-            text_parts.append(f"Resep Obat: {row.prescriptions}")
-        
-        if row.lab_results:
-            text_parts.append(f"Hasil Lab: {row.lab_results}")
-        
-        combined_text = "\n".join(text_parts)
-        combined_text_lower = combined_text.lower()
-        text_words = set(combined_text_lower.split())
-        
-        if query_words:
-            matches = len(query_words.intersection(text_words))
-            similarity = matches / len(query_words) if query_words else 0.5
-            
-            medical_keywords = ['diagnosis', 'diagnosa', 'obat', 'resep', 'lab', 'alergi', 'allergy', 
-                              'diabetes', 'hipertensi', 'tekanan', 'darah', 'gula', 'kolesterol']
-            query_medical_match = any(kw in query_lower for kw in medical_keywords)
-            text_medical_match = any(kw in combined_text_lower for kw in medical_keywords)
-            if query_medical_match and text_medical_match:
-                similarity = min(1.0, similarity + 0.2)
-        else:
-            similarity = 0.3
-        
-        if len(combined_text) > 3000:
-            important_parts = []
-            if row.diagnoses:
-                important_parts.append(f"Diagnosis: {row.diagnoses}")
-            if row.diagnosis_summary:
-                important_parts.append(f"Ringkasan: {row.diagnosis_summary[:500]}")
-            if row.prescriptions:
-                important_parts.append(f"Resep: {row.prescriptions}")
-            combined_text = "\n".join(important_parts)
-        
-        chunk = DocumentChunk(
-            doc_id=f"record_{row.record_id}",
-            patient_id=row.patient_id,
-            record_id=row.record_id,
-            chunk_text=combined_text,
-            similarity_score=similarity,
-            metadata={
-                "visit_date": str(row.visit_date),
-                "visit_type": row.visit_type,
-                "doctor_name": row.doctor_name,
-                "facility_name": row.facility_name,
-                "source": "medical_record"
-            }
-        )
-        chunks.append(chunk)
-    
-    chunks.sort(key=lambda x: x.similarity_score, reverse=True)
-    return chunks[:limit]
+    selections = select_record_units(query, units, limit, stop_words, intent)
+    return [_record_chunk_from_selection(selection) for selection in selections]
 
 def get_patient_allergies_context(patient_id: int, db: Session) -> Optional[str]:
     """Get patient allergies as context string"""
@@ -449,93 +424,35 @@ def remove_markdown_formatting(text: str) -> str:
     Remove markdown formatting and special characters from text to return plain text
     Optimized for TTS (Text-to-Speech) - removes characters that TTS would read aloud
     Removes: **bold**, *italic*, # headers, ```code blocks```, [links](url), /, (), etc.
-    """
-    if not text:
-        return text
-    
-    # Remove bold/italic: **text** or *text* or __text__ or _text_
-    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-    text = re.sub(r'\*(.*?)\*', r'\1', text)
-    text = re.sub(r'__(.*?)__', r'\1', text)
-    text = re.sub(r'_(.*?)_', r'\1', text)
-    
-    # Remove headers: # Header, ## Header, ### Header, etc.
-    text = re.sub(r'^#{1,6}\s+(.+)$', r'\1', text, flags=re.MULTILINE)
-    
-    # Remove code blocks: ```code``` or `code`
-    text = re.sub(r'```[\s\S]*?```', '', text)
-    text = re.sub(r'`([^`]+)`', r'\1', text)
-    
-    # Remove links: [text](url) -> text
-    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
-    
-    # Remove strikethrough: ~~text~~
-    text = re.sub(r'~~(.*?)~~', r'\1', text)
     
-    # Remove horizontal rules: --- or ***
-    text = re.sub(r'^[-*]{3,}$', '', text, flags=re.MULTILINE)
-    
-    # Remove special formatting characters that TTS would read aloud
-    # Remove forward slashes (/) - replace with space for better TTS pronunciation
-    # Handle patterns like "3x/hari" -> "3x hari" or "dan/lain" -> "dan lain"
-    text = re.sub(r'(\w+)/(\w+)', r'\1 \2', text)  # word/word -> word word
-    text = re.sub(r'(\d+)/(\d+)', r'\1 per \2', text)  # 3/4 -> 3 per 4 (for fractions/dosage)
-    text = re.sub(r'/(\w+)', r' \1', text)  # /word ->  word (standalone, add space)
-    text = re.sub(r'(\w+)/', r'\1 ', text)  # word/ -> word  (standalone, add space)
-    text = re.sub(r'\s+/', ' ', text)  # Remove standalone slashes with space before
-    text = re.sub(r'/\s+', ' ', text)  # Remove standalone slashes with space after
-    text = re.sub(r'/', ' ', text)  # Remove any remaining slashes (replace with space)
-    
-    # Remove formatting brackets like [text] but keep the content inside
-    # This removes brackets but keeps medical information
-    text = re.sub(r'\[([^\]]+)\]', r'\1', text)  # [text] -> text
-    
-    # Remove empty parentheses
-    text = re.sub(r'\(\s*\)', '', text)
-    
-    # Remove special formatting symbols that TTS might pronounce weirdly
-    # Keep friendly emojis (😊, 💊, 🏥, 💉, etc.) but remove formatting symbols
-    text = re.sub(r'✅|❌|⚠️|➡️|⬅️|⬆️|⬇️|💡|🔍|📌|📍|➤|►|◄|▪|▫|•', '', text)
-    # Note: Regular emojis like 😊, 💊, 🏥, 💉, 🙏, 💪 are kept for friendly tone
-    
-    # Remove multiple consecutive slashes or special chars
-    text = re.sub(r'/{2,}', '', text)  # Remove multiple slashes
-    text = re.sub(r'[-*]{2,}', '', text)  # Remove multiple dashes/asterisks
-    
-    # Replace newlines for TTS-friendly output
-    # Replace double newlines (paragraph breaks) with period and space for natural pause
-    text = re.sub(r'\n\n+', '. ', text)
-    # Replace single newlines with space
-    text = re.sub(r'\n', ' ', text)
-    
-    # Clean up extra spaces (but preserve single spaces)
-    text = re.sub(r' +', ' ', text)
-    
-    # Clean up multiple periods (more than 3 consecutive)
-    text = re.sub(r'\.{4,}', '...', text)
-    
-    # Clean up spaces around periods
-    text = re.sub(r'\. +\.', '.', text)  # Remove space between periods
-    text = re.sub(r' +\.', '.', text)  # Remove space before period
-    text = re.sub(r'\. +', '. ', text)  # Ensure single space after period
-    
-    # Remove trailing slashes and special chars
-    text = re.sub(r'[/\-*]+', ' ', text)
-    
-    # Final cleanup - remove any remaining isolated special characters
-    text = re.sub(r'\s+[/\-*]+\s+', ' ', text)  # Remove isolated slashes/dashes between words
-    
-    # Clean up multiple spaces again after all replacements
-    text = re.sub(r' +', ' ', text)
-    
-    return text.strip()
+    Single-pass state machine (see services/tts.py); use TTSSanitizer directly
+    for streamed output.
+    """
+    return sanitize_for_tts(text)
+
+def _no_context_response(query: str, suggestions: List[str]) -> Dict:
+    """Friendly answer when no medical record or health data is relevant to the question"""
+    return {
+        "query": query,
+        "answer": "Halo! Saya Nova 😊 Saya tidak menemukan informasi rekam medis atau data kesehatan yang relevan untuk menjawab pertanyaan Anda saat ini. "
+                 "Ini bisa terjadi karena: Belum ada dokumen medis yang diunggah. Belum ada riwayat kunjungan medis. "
+                 "Belum ada data perhitungan kesehatan (BMI, BMR, TDEE, dll). Pertanyaan Anda memerlukan informasi yang belum tersedia. "
+                 "Silakan coba dengan pertanyaan lain atau pastikan Anda telah: Mengunggah dokumen medis. Memiliki riwayat kunjungan medis. "
+                 "Menggunakan fitur kalkulator kesehatan untuk menghasilkan data. "
+                 "Jika Anda butuh bantuan, jangan ragu untuk menghubungi tim kesehatan kami! 💙",
+        "success": False,
+        "suggestions": suggestions
+    }
 
 def query_with_rag_mobile(
     query: str,
     patient_id: Optional[int] = None,
     max_documents: int = 5,
     similarity_threshold: float = 0.6,
-    db: Session = None
+    db: Session = None,
+    session: Optional[ChatSession] = None,
+    trace: Optional[RequestTrace] = None,
+    dossier: Optional[PatientDossier] = None
 ) -> Dict:
     """
     Enhanced Query with RAG for Mobile - Friendly, engaging, and longer responses
@@ -545,41 +462,125 @@ def query_with_rag_mobile(
     - Longer, more detailed responses
     - Better explanations and context
     - More engaging and supportive language
+    
+    With a chat session, follow-up questions ("kalau obatnya?") reuse the documents and
+    record units of the previous subject, fetch only the record unit types the new
+    question adds, and every context source is fetched at most once.
+    A prefetched dossier (POST /rag/chat/prepare) supplies candidate rows and side
+    sources, so only query scoring and the LLM call remain.
     """
     if patient_id is None:
         raise ValueError("patient_id is required for RAG queries")
     
-    # Step 1: Search relevant documents
-    relevant_docs = []
-    try:
-        relevant_docs = search_documents(
-            query=query,
-            patient_id=patient_id,
-            limit=max_documents,
-            threshold=similarity_threshold,
-            db=db
-        )
-    except Exception as e:
-        print(f"Error searching documents: {str(e)}")
+    # Per-stage timings and token counts (debug fields + /rag/metrics histograms)
+    trace = trace or RequestTrace("rag_service_mobile")
     
-    # Step 2: Search in medical records
-    medical_records_context = []
-    try:
-        medical_records_context = search_medical_records(
-            query=query,
-            patient_id=patient_id,
-            limit=max_documents,
-            db=db
-        )
-        existing_record_ids = {doc.record_id for doc in relevant_docs if doc.record_id}
-        for record in medical_records_context:
-            if record.record_id not in existing_record_ids:
-                relevant_docs.append(record)
-    except Exception as e:
-        print(f"Error searching medical records: {str(e)}")
+    # Retrieve more candidates than context slots, the MMR re-rank picks diverse ones
+    candidate_limit = candidate_limit_for(max_documents)
+    
+    # Warmed context from the prepare endpoint (rows are only valid for the same candidate limit)
+    if dossier is not None and (dossier.patient_id != patient_id or dossier.limit != candidate_limit):
+        dossier = None
+    if dossier is not None and session is not None:
+        dossier.seed_session(session)
+    
+    # Negative-result cache: data kinds this patient is known to have none of
+    with trace.stage("negative_cache"):
+        empty_kinds = known_empty_kinds(patient_id, db)
+    if empty_kinds == NO_DATA:
+        return _no_context_response(query, [])
+    
+    # Step 0: Follow-up questions inherit the subject of the previous turn
+    subject_session = session if session is not None and session.has_retrieval() and is_follow_up(query) else None
+    follow_up = subject_session is not None
+    subject_query = f"{subject_session.subject_query} {normalize_follow_up(query)}" if subject_session is not None else query
+    
+    # Step 0.5: Typo-tolerant query rewrite (SymSpell) for retrieval only
+    with trace.stage("spelling"):
+        retrieval_query = subject_query
+        try:
+            # Follow-ups reuse the vocabulary refreshed for the subject turn
+            retrieval_query = correct_query(
+                subject_query, patient_id=patient_id, db=None if follow_up else db
+            ) or subject_query
+        except Exception as e:
+            print(f"Error correcting query spelling: {str(e)}")
+    
+    document_docs = []
+    record_units = None
+    unit_types = frozenset()
+    if subject_session is not None:
+        # Reuse documents and record units of the session subject; the follow-up's own
+        # unit types ("kalau obatnya?" -> prescriptions) drive record selection
+        document_docs = list(subject_session.relevant_docs)
+        record_units = subject_session.record_units
+        unit_types = subject_session.unit_types
+        record_intent = detect_record_intent(normalize_follow_up(query))
+        if record_intent == ALL_UNIT_TYPES and subject_session.record_intent:
+            record_intent = subject_session.record_intent
+    else:
+        record_intent = detect_record_intent(retrieval_query)
+        if dossier is not None and dossier.record_units is not None:
+            record_units, unit_types = dossier.record_units, ALL_UNIT_TYPES
+        
+        # Step 1: Search relevant documents (skipped if the patient has none)
+        if not empty_kinds & NO_DOCUMENTS:
+            with trace.stage("search_documents"):
+                try:
+                    document_docs = search_documents(
+                        query=retrieval_query,
+                        patient_id=patient_id,
+                        limit=candidate_limit,
+                        threshold=similarity_threshold,
+                        db=db,
+                        rows=dossier.document_rows if dossier is not None else None
+                    )
+                except Exception as e:
+                    print(f"Error searching documents: {str(e)}")
+    
+    # Step 2: Search in medical records (skipped if the patient has none)
+    relevant_docs = list(document_docs)
+    if not empty_kinds & NO_MEDICAL_RECORDS:
+        with trace.stage("search_medical_records"):
+            try:
+                if record_units is None:
+                    record_units, unit_types = load_record_units(patient_id, candidate_limit, db, record_intent)
+                elif record_intent - unit_types:
+                    # Only the unit types not loaded for the subject yet
+                    missing = record_intent - unit_types
+                    record_units = record_units + fetch_record_units(patient_id, candidate_limit, db, missing)
+                    unit_types = unit_types | missing
+                medical_records_context = search_medical_records(
+                    query=retrieval_query,
+                    patient_id=patient_id,
+                    limit=candidate_limit,
+                    db=db,
+                    units=record_units,
+                    intent=record_intent
+                )
+                existing_record_ids = {doc.record_id for doc in relevant_docs if doc.record_id}
+                for record in medical_records_context:
+                    if record.record_id not in existing_record_ids:
+                        relevant_docs.append(record)
+            except Exception as e:
+                print(f"Error searching medical records: {str(e)}")
+    
+    if session is not None:
+        if follow_up:
+            session.set_record_units(record_units or [], unit_types, record_intent)
+        else:
+            session.set_retrieval(query, document_docs, record_units or [], unit_types, record_intent)
+    
+    # Side sources kept in the session are dropped once the patient's data changed
+    if session is not None:
+        try:
+            session.revalidate_sources(db)
+        except Exception as e:
+            print(f"Error revalidating session sources: {str(e)}")
+            session.sources.clear()
     
     # Step 2.5: Detect query context to determine which data sources are relevant
-    query_context = detect_query_context(query)
+    query_context = detect_query_context(subject_query)
     
     # Check if query is clearly about specific topic (not general)
     is_specific_query = any([
@@ -592,33 +593,72 @@ def query_with_rag_mobile(
     # Step 3: Get patient allergies
     # Only include if query is about allergies/medical records, or if query is general/unspecific
     allergies_context = None
-    if query_context['allergies'] or query_context['medical_records'] or not is_specific_query:
-        try:
-            allergies_context = get_patient_allergies_context(patient_id, db)
-        except Exception as e:
-            print(f"Error retrieving allergies: {str(e)}")
+    if empty_kinds & NO_ALLERGIES:
+        pass  # Known empty (negative-result cache)
+    elif query_context['allergies'] or query_context['medical_records'] or not is_specific_query:
+        with trace.stage("allergies"):
+            try:
+                allergies_context = load_session_source(
+                    session, "allergies", lambda: get_patient_allergies_context(patient_id, db)
+                )
+            except Exception as e:
+                print(f"Error retrieving allergies: {str(e)}")
     
     # Step 3.5: Get health calculations context
     # Only include if query is about health calculations/metrics, or if query is general/unspecific
     health_calculations_context = None
-    if query_context['health_calc'] or query_context['health_metrics'] or not is_specific_query:
-        try:
-            health_calculations_context = get_health_calculations_context(patient_id, db, limit=10)
-        except Exception as e:
-            print(f"Error retrieving health calculations: {str(e)}")
+    if empty_kinds & NO_HEALTH_CALCULATIONS:
+        pass  # Known empty (negative-result cache)
+    elif query_context['health_calc'] or query_context['health_metrics'] or not is_specific_query:
+        with trace.stage("health_calculations"):
+            try:
+                health_calculations_context = load_session_source(
+                    session, "health_calculations", lambda: get_health_calculations_context(patient_id, db, limit=10)
+                )
+            except Exception as e:
+                print(f"Error retrieving health calculations: {str(e)}")
     
     # Step 3.6: Get health metrics context
     # Only include if query is about health metrics/calculations, or if query is general/unspecific
     health_metrics_context = None
-    if query_context['health_metrics'] or query_context['health_calc'] or not is_specific_query:
+    if empty_kinds & NO_HEALTH_METRICS:
+        pass  # Known empty (negative-result cache)
+    elif query_context['health_metrics'] or query_context['health_calc'] or not is_specific_query:
+        with trace.stage("health_metrics"):
+            try:
+                health_metrics_context = load_session_source(
+                    session, "health_metrics", lambda: get_health_metrics_context(patient_id, db, limit=20)
+                )
+            except Exception as e:
+                print(f"Error retrieving health metrics: {str(e)}")
+    
+    # Step 3.7: Long-range history summaries (fixed budget), refreshed in background
+    history_context = None
+    if empty_kinds & NO_MEDICAL_RECORDS:
+        pass  # Summaries are built from medical records
+    elif query_context['medical_records'] or not is_specific_query:
+        with trace.stage("history_summary"):
+            try:
+                history_context = load_session_source(
+                    session, "history_summary", lambda: get_history_summary_context(patient_id, db)
+                )
+                schedule_summary_refresh(patient_id)
+            except Exception as e:
+                print(f"Error retrieving history summaries: {str(e)}")
+    
+    # Step 3.8: Follow-up suggestion candidates (precomputed per patient, backed by existing data)
+    suggestion_candidates = []
+    with trace.stage("suggestions"):
         try:
-            health_metrics_context = get_health_metrics_context(patient_id, db, limit=20)
+            # Not kept in the session: the cache revalidates against the patient's data version
+            suggestion_candidates = get_patient_suggestions(patient_id, db)
         except Exception as e:
-            print(f"Error retrieving health metrics: {str(e)}")
+            print(f"Error retrieving suggestions: {str(e)}")
     
-    # Step 4: Sort and limit documents
-    relevant_docs.sort(key=lambda x: x.similarity_score, reverse=True)
-    relevant_docs = relevant_docs[:max_documents]
+    # Step 4: Pick max_documents relevant but diverse chunks (MMR re-rank)
+    with trace.stage("diversity_rerank"):
+        relevant_docs = mmr_rerank(relevant_docs, max_documents)
+    context_started = time.perf_counter()
     
     # Step 5: Build structured context
     # For specific queries, only include relevant data
@@ -650,39 +690,26 @@ def query_with_rag_mobile(
             context_parts.append(health_metrics_context)
             sources.append("health_metrics")
     
-    for doc in relevant_docs:
-        metadata_info = ""
-        if doc.metadata:
-            if doc.metadata.get("visit_date"):
-                metadata_info = f"\n[Tanggal: {doc.metadata.get('visit_date')}]"
-            if doc.metadata.get("doctor_name"):
-                metadata_info += f" [Dokter: {doc.metadata.get('doctor_name')}]"
-            if doc.metadata.get("facility_name"):
-                metadata_info += f" [Fasilitas: {doc.metadata.get('facility_name')}]"
-        
-        context_parts.append(f"{doc.chunk_text}{metadata_info}")
-        sources.append(doc.doc_id)
+    # Add long-range history before the (recent) retrieved records
+    if history_context:
+        context_parts.append(history_context)
+        sources.append("patient_history_summary")
+    
+    # Add medical records and documents
+    # Compaction: repeated prescription/diagnosis facts collapse into date ranges,
+    # near-duplicate chunks are dropped (every doc_id stays listed in sources)
+    compacted = compact_context(relevant_docs)
+    context_parts.extend(compacted.parts)
+    trace.set_compaction(compacted.original_chars, compacted.compacted_chars,
+                         compacted.fact_sources, compacted.merged_chunks)
+    sources.extend(doc.doc_id for doc in relevant_docs)
     
     if not context_parts:
-        return {
-            "query": query,
-            "answer": "Halo! Saya Nova 😊 Saya tidak menemukan informasi rekam medis atau data kesehatan yang relevan untuk menjawab pertanyaan Anda saat ini. "
-                     "Ini bisa terjadi karena: Belum ada dokumen medis yang diunggah. Belum ada riwayat kunjungan medis. "
-                     "Belum ada data perhitungan kesehatan (BMI, BMR, TDEE, dll). Pertanyaan Anda memerlukan informasi yang belum tersedia. "
-                     "Silakan coba dengan pertanyaan lain atau pastikan Anda telah: Mengunggah dokumen medis. Memiliki riwayat kunjungan medis. "
-                     "Menggunakan fitur kalkulator kesehatan untuk menghasilkan data. "
-                     "Jika Anda butuh bantuan, jangan ragu untuk menghubungi tim kesehatan kami! 💙",
-            "success": False,
-            "suggestions": [
-                "Apa saja alergi saya?",
-                "Kapan terakhir kali saya berobat?",
-                "Apa diagnosis terakhir saya?",
-                "Obat apa yang sedang saya konsumsi?",
-                "Berapa BMI saya saat ini?",
-                "Berapa kebutuhan kalori harian saya?",
-                "Bagaimana tren berat badan saya?"
-            ]
-        }
+        trace.add_stage("context_build", time.perf_counter() - context_started)
+        # Remember which kinds of data this patient has none of (skipped next time)
+        with trace.stage("negative_cache"):
+            remember_empty_kinds(patient_id, db)
+        return _no_context_response(query, generate_suggestions(query, suggestion_candidates, query_context))
     
     context = "\n\n---\n\n".join(context_parts)
     
@@ -755,15 +782,20 @@ Instruksi sebagai Nova:
 - Jika informasi tersedia, jelaskan dengan jelas
 - Jika informasi tidak tersedia, katakan dengan sopan
 - Ingat: Anda adalah Nova, jadi perkenalkan diri sebagai Nova di awal jawaban"""
+    trace.add_stage("context_build", time.perf_counter() - context_started)
     
     # Step 7: Call LLM with mobile-optimized settings
     try:
         answer = call_llm_with_gemini_mobile(
             query=query,
             context=context,
-            system_prompt=system_prompt
+            system_prompt=system_prompt,
+            history=session.recent_turns() if session is not None else None,
+            trace=trace
         )
         success = True
+        if session is not None:
+            session.add_turn(query, answer)
     except Exception as e:
         error_msg = str(e)
         if "rate limit" in error_msg.lower() or "quota" in error_msg.lower():
@@ -785,7 +817,8 @@ Instruksi sebagai Nova:
         print(f"[RAG Mobile] LLM Error: {error_msg}")
     
     # Generate follow-up suggestions
-    suggestions = generate_suggestions(query, relevant_docs, allergies_context)
+    with trace.stage("post_processing"):
+        suggestions = generate_suggestions(query, suggestion_candidates, query_context)
     
     return {
         "query": query,
@@ -797,17 +830,22 @@ Instruksi sebagai Nova:
 def call_llm_with_gemini_mobile(
     query: str,
     context: str,
-    system_prompt: str
+    system_prompt: str,
+    history: Optional[List[tuple]] = None,
+    trace: Optional[RequestTrace] = None
 ) -> str:
     """
     Call LLM using Gemini API - Optimized for mobile with Gemini model
+    
+    Response di-stream dan setiap potongan langsung dibersihkan oleh TTSSanitizer,
+    sehingga time-to-first-token dan waktu generation bisa diukur.
+    Panggilan bisa direkam/diputar ulang lewat LLM cassette (LLM_CASSETTE_MODE).
     """
     try:
         import google.generativeai as genai
-        import time
         
-        # Configure Gemini API
-        genai.configure(api_key=LLM_API_KEY)
+        llm_started = time.perf_counter()
+        gemini_configured = False
         
         # Get model name - ensure it has 'models/' prefix if not already present
         model_name = LLM_MODEL_NAME or "gemini-2.0-flash"
@@ -831,12 +869,21 @@ def call_llm_with_gemini_mobile(
             if truncated_context:
                 context += "\n\n[Catatan: Beberapa informasi lama tidak ditampilkan untuk menghemat ruang]"
         
+        # Previous turns of the chat session (answers trimmed to keep prompt small)
+        history_block = ""
+        if history:
+            history_lines = []
+            for previous_query, previous_answer in history:
+                history_lines.append(f"Pasien: {previous_query}")
+                history_lines.append(f"Nova: {previous_answer[:500]}")
+            history_block = "Percakapan sebelumnya:\n" + "\n".join(history_lines) + "\n\n"
+        
         # Build user content with context and query
         user_content = f"""Berikut adalah data kesehatan pasien (beberapa data mungkin tidak relevan dengan pertanyaan):
 
 {context}
 
-Pertanyaan pasien: {query}
+{history_block}Pertanyaan pasien: {query}
 
 Instruksi sebagai Nova:
 - Jawablah pertanyaan dengan RAMAH dan MENYENANGKAN dalam bahasa Indonesia sebagai Nova
@@ -852,37 +899,82 @@ Instruksi sebagai Nova:
 - Jika informasi tidak tersedia, katakan dengan sopan
 - Ingat: Anda adalah Nova, jadi perkenalkan diri sebagai Nova di awal jawaban"""
         
+        # Gemini API accepts generation_config as dict
+        generation_config = {
+            "temperature": TEMPERATURE,
+            "top_p": 0.95,
+            "top_k": 40,
+            "max_output_tokens": MAX_RESPONSE_TOKENS,
+        }
+        
+        def live_stream(contents: str) -> LLMStream:
+            nonlocal gemini_configured
+            if not gemini_configured:
+                # Configure Gemini API
+                genai.configure(api_key=LLM_API_KEY)
+                gemini_configured = True
+            # Create model with system instruction
+            model = genai.GenerativeModel(
+                model_name=model_name,
+                system_instruction=system_prompt
+            )
+            response = model.generate_content(
+                contents,
+                generation_config=generation_config,
+                stream=True
+            )
+            llm_stream = LLMStream()
+            
+            def pieces():
+                for chunk in response:
+                    try:
+                        piece = chunk.text
+                    except ValueError:
+                        continue  # Chunk without text parts (e.g. safety metadata only)
+                    if piece:
+                        yield piece
+                usage = getattr(response, "usage_metadata", None)
+                if usage is not None and getattr(usage, "prompt_token_count", None) is not None:
+                    llm_stream.usage = TokenUsage(usage.prompt_token_count, usage.candidates_token_count)
+            
+            llm_stream.pieces = pieces()
+            return llm_stream
+        
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                # Generate content with Gemini
-                # Create model with system instruction
-                model = genai.GenerativeModel(
-                    model_name=model_name,
-                    system_instruction=system_prompt
-                )
-                
-                # Gemini API accepts generation_config as dict
-                generation_config = {
-                    "temperature": TEMPERATURE,
-                    "top_p": 0.95,
-                    "top_k": 40,
-                    "max_output_tokens": MAX_RESPONSE_TOKENS,
+                # Generate content with Gemini (user_content changes on simplified retries)
+                gemini_request = {
+                    "model": model_name,
+                    "system_instruction": system_prompt,
+                    "contents": user_content,
+                    "generation_config": generation_config
                 }
                 
-                response = model.generate_content(
-                    user_content,
-                    generation_config=generation_config
-                )
+                request_sent = time.perf_counter()
+                stream = open_llm_stream("gemini", gemini_request, lambda: live_stream(user_content))
+                
+                # Remove markdown formatting from answer while streaming
+                sanitizer = TTSSanitizer()
+                answer_parts = []
+                raw_chars = 0
+                first_token_at = None
+                sanitize_seconds = 0.0
+                for piece in stream:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    raw_chars += len(piece)
+                    sanitize_started = time.perf_counter()
+                    answer_parts.append(sanitizer.feed(piece))
+                    sanitize_seconds += time.perf_counter() - sanitize_started
+                answer_parts.append(sanitizer.finish())
+                finished_at = time.perf_counter()
                 
                 # Get answer from response
-                if not response or not response.text:
+                if not raw_chars:
                     raise Exception("Gemini returned empty response")
                 
-                answer = response.text.strip()
-                
-                # Remove markdown formatting from answer
-                answer = remove_markdown_formatting(answer)
+                answer = "".join(answer_parts).strip()
                 
                 # Log answer for debugging
                 print(f"[RAG Mobile] Gemini returned answer: {len(answer)} chars")
@@ -901,6 +993,19 @@ Instruksi sebagai Nova:
                 if len(answer) < 50:
                     print(f"[RAG Mobile] Warning: Short answer received ({len(answer)} chars), but accepting it")
                 
+                if trace is not None:
+                    # Queue wait: client setup, failed attempts and retry backoff before the final request
+                    first_token_at = first_token_at or finished_at
+                    trace.add_stage("llm_queue_wait", request_sent - llm_started)
+                    trace.add_stage("llm_first_token", first_token_at - request_sent)
+                    trace.add_stage("llm_generation", finished_at - first_token_at - sanitize_seconds)
+                    trace.add_stage("post_processing", sanitize_seconds)
+                    usage = stream.usage
+                    if usage is not None:
+                        trace.set_tokens(usage.prompt_tokens, usage.completion_tokens)
+                    else:
+                        trace.set_tokens(estimate_tokens(system_prompt, user_content), estimate_tokens(answer), estimated=True)
+                
                 return answer
                 
             except Exception as e:
@@ -941,67 +1046,14 @@ Jawablah pertanyaan dengan ramah dan jelas dalam bahasa Indonesia. Gunakan PLAIN
     except Exception as e:
         raise Exception(f"Error calling Gemini API: {str(e)}")
 
-def generate_suggestions(query: str, relevant_docs: List[DocumentChunk], allergies_context: Optional[str]) -> List[str]:
-    """Generate follow-up question suggestions based on context"""
-    suggestions = []
-    
-    query_lower = query.lower()
-    
-    # General suggestions
-    if "alergi" in query_lower or "allergy" in query_lower:
-        suggestions.extend([
-            "Bagaimana cara menghindari alergi ini?",
-            "Apa gejala alergi yang harus saya waspadai?",
-            "Apakah ada obat untuk alergi ini?"
-        ])
-    elif "obat" in query_lower or "resep" in query_lower:
-        suggestions.extend([
-            "Kapan saya harus minum obat ini?",
-            "Apa efek samping obat ini?",
-            "Bagaimana cara menyimpan obat ini?"
-        ])
-    elif "lab" in query_lower or "hasil" in query_lower:
-        suggestions.extend([
-            "Apa artinya hasil lab ini?",
-            "Apakah hasil lab saya normal?",
-            "Kapan saya harus cek lab lagi?"
-        ])
-    elif "diagnosis" in query_lower or "diagnosa" in query_lower:
-        suggestions.extend([
-            "Apa gejala dari diagnosis ini?",
-            "Bagaimana cara mengatasi kondisi ini?",
-            "Kapan saya harus kontrol lagi?"
-        ])
-    elif "bmi" in query_lower or "berat" in query_lower or "tinggi" in query_lower:
-        suggestions.extend([
-            "Berapa berat badan ideal saya?",
-            "Bagaimana cara mencapai berat badan ideal?",
-            "Berapa kebutuhan kalori harian saya?",
-            "Bagaimana tren berat badan saya?"
-        ])
-    elif "kalori" in query_lower or "bmr" in query_lower or "tdee" in query_lower:
-        suggestions.extend([
-            "Berapa kebutuhan protein harian saya?",
-            "Berapa kebutuhan karbohidrat harian saya?",
-            "Bagaimana cara mencapai target kalori?",
-            "Berapa kebutuhan air harian saya?"
-        ])
-    elif "jantung" in query_lower or "heart" in query_lower or "detak" in query_lower:
-        suggestions.extend([
-            "Berapa detak jantung maksimal saya?",
-            "Berapa zona target detak jantung untuk latihan?",
-            "Bagaimana cara menjaga kesehatan jantung?"
-        ])
-    else:
-        # Default suggestions
-        suggestions.extend([
-            "Apa saja alergi saya?",
-            "Obat apa yang sedang saya konsumsi?",
-            "Kapan terakhir kali saya berobat?",
-            "Bagaimana hasil lab terakhir saya?",
-            "Berapa BMI saya saat ini?",
-            "Berapa kebutuhan kalori harian saya?"
-        ])
-    
-    return suggestions[:4]  # Return max 4 suggestions
+def generate_suggestions(
+    query: str,
+    candidates: Optional[List[SuggestionCandidate]],
+    query_context: Optional[Dict[str, bool]] = None
+) -> List[str]:
+    """
+    Generate follow-up question suggestions from the patient's precomputed candidates
+    Only questions backed by existing patient data are suggested (max 4).
+    """
+    return select_suggestions(candidates, query, query_context)
 
@@ -0,0 +1,241 @@
+"""
+Conversation sessions for mobile chat - reusable retrieval context
+
+Setiap sesi menyimpan context hasil retrieval (rekam medis, alergi, data kalkulator,
+metrik, ringkasan riwayat) dan beberapa giliran percakapan terakhir. Pertanyaan
+lanjutan seperti "kalau obatnya?" memakai ulang context tersebut sehingga tidak
+perlu mengulang semua query ke database dan subjek percakapan tidak hilang.
+
+Store bersifat in-memory dan terbatas: LRU dengan TTL per sesi dan batas jumlah sesi.
+Context sumber samping (alergi, kalkulator, metrik, ringkasan) dicatat bersama versi
+data pasien (patient_data_versions) dan dibuang begitu versinya berubah, sama seperti
+negative cache dan suggestions.
+"""
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+from collections import deque
+import time
+import uuid
+import re
+import sys
+import os
+
+from ..core.config import (
+    CHAT_SESSION_TTL_SECONDS,
+    CHAT_SESSION_MAX_SESSIONS,
+    CHAT_SESSION_MAX_TURNS,
+    CHAT_SESSION_SOURCE_TRUST_SECONDS,
+    PREFETCH_DOSSIER_TRUST_SECONDS,
+    MMR_CANDIDATE_FACTOR
+)
+
+# LRUTTLCache is shared with rag_service (history summary scheduling)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from rag_service.services.ttl_cache import LRUTTLCache
+from rag_service.services.synonyms import expand_query_concepts
+from auth.core.data_versions import get_patient_data_version
+
+
+class ChatSession:
+    """Server-side chat session: retrieved context per source plus recent turns"""
+    __slots__ = (
+        "session_id", "patient_id", "subject_query", "relevant_docs",
+        "record_units", "unit_types", "record_intent", "sources", "sources_version",
+        "sources_checked_at", "turns"
+    )
+
+    def __init__(self, session_id: str, patient_id: int):
+        self.session_id = session_id
+        self.patient_id = patient_id
+        self.subject_query: Optional[str] = None
+        self.relevant_docs: List[Any] = []  # document chunks of the subject (before MMR)
+        self.record_units: List[Any] = []  # typed record units loaded so far
+        self.unit_types: FrozenSet[str] = frozenset()  # unit types record_units covers
+        self.record_intent: FrozenSet[str] = frozenset()  # unit types asked about last
+        self.sources: Dict[str, Any] = {}  # source key -> context (None means "fetched, empty")
+        self.sources_version: Optional[int] = None  # patient data version the sources were loaded at
+        self.sources_checked_at = 0.0
+        self.turns: deque = deque(maxlen=CHAT_SESSION_MAX_TURNS)
+
+    def has_retrieval(self) -> bool:
+        return self.subject_query is not None
+
+    def set_retrieval(
+        self,
+        subject_query: str,
+        relevant_docs: List[Any],
+        record_units: List[Any],
+        unit_types: FrozenSet[str],
+        record_intent: FrozenSet[str]
+    ) -> None:
+        self.subject_query = subject_query
+        self.relevant_docs = list(relevant_docs)
+        self.set_record_units(record_units, unit_types, record_intent)
+
+    def set_record_units(self, record_units: List[Any], unit_types: FrozenSet[str], record_intent: FrozenSet[str]) -> None:
+        """Units after a follow-up fetched the unit types its intent was missing"""
+        self.record_units = list(record_units)
+        self.unit_types = frozenset(unit_types)
+        self.record_intent = frozenset(record_intent)
+
+    def has_source(self, key: str) -> bool:
+        return key in self.sources
+
+    def get_source(self, key: str) -> Any:
+        return self.sources.get(key)
+
+    def set_source(self, key: str, value: Any) -> None:
+        self.sources[key] = value
+
+    def revalidate_sources(self, db) -> None:
+        """
+        Drop side sources loaded before the patient's data changed
+        Trusted without DB access for CHAT_SESSION_SOURCE_TRUST_SECONDS, then one
+        version lookup; without the version table sources are never reused.
+        """
+        now = time.monotonic()
+        if self.sources and now - self.sources_checked_at < CHAT_SESSION_SOURCE_TRUST_SECONDS:
+            return
+        version = get_patient_data_version(db, self.patient_id)
+        if version is None or version != self.sources_version:
+            self.sources.clear()
+        self.sources_version = version
+        self.sources_checked_at = now
+
+    def add_turn(self, query: str, answer: str) -> None:
+        self.turns.append((query, answer))
+
+    def recent_turns(self) -> List[Tuple[str, str]]:
+        return list(self.turns)
+
+
+def candidate_limit(max_documents: int) -> int:
+    """Candidates retrieved for max_documents context slots (the MMR re-rank picks from them)"""
+    return max_documents * max(1, MMR_CANDIDATE_FACTOR)
+
+
+class PatientDossier:
+    """Context warmed before the first question: candidate rows plus side sources"""
+    __slots__ = ("patient_id", "limit", "version", "document_rows", "record_units", "sources", "built_at")
+
+    def __init__(self, patient_id: int, limit: int):
+        self.patient_id = patient_id
+        self.limit = limit  # candidate limit the rows were fetched for (see candidate_limit)
+        self.version: Optional[int] = None  # patient data version read before building
+        self.document_rows: Optional[Sequence] = None
+        self.record_units: Optional[list] = None  # typed record units (all types)
+        self.sources: Dict[str, Any] = {}  # same keys as ChatSession.sources
+        self.built_at = time.monotonic()
+
+    def is_current(self, db) -> bool:
+        """
+        False if the patient's data changed since the build started
+        Trusted without DB access for PREFETCH_DOSSIER_TRUST_SECONDS after built_at; without
+        the version table only the dossier TTL applies.
+        """
+        if self.version is None or time.monotonic() - self.built_at < PREFETCH_DOSSIER_TRUST_SECONDS:
+            return True
+        return get_patient_data_version(db, self.patient_id) == self.version
+
+    def seed_session(self, session: ChatSession) -> None:
+        """Copy warmed side sources into a session without sources of another data version"""
+        if self.version is None or (session.sources and session.sources_version != self.version):
+            return
+        for key, value in self.sources.items():
+            if not session.has_source(key):
+                session.set_source(key, value)
+        session.sources_version = self.version
+        session.sources_checked_at = self.built_at  # revalidated once the trust window passes
+
+
+_sessions: LRUTTLCache[str, ChatSession] = LRUTTLCache(CHAT_SESSION_MAX_SESSIONS, CHAT_SESSION_TTL_SECONDS)
+
+
+def get_or_create_session(session_id: Optional[str], patient_id: int) -> ChatSession:
+    """
+    Get existing session for patient or start a new one
+    A session id belonging to another patient is never reused (security).
+    """
+    if session_id:
+        session = _sessions.get(session_id)
+        if session is not None and session.patient_id == patient_id:
+            return session
+
+    session = ChatSession(uuid.uuid4().hex, patient_id)
+    _sessions.put(session.session_id, session)
+    return session
+
+
+def end_session(session_id: str, patient_id: int) -> bool:
+    """Drop a session owned by patient"""
+    session = _sessions.get(session_id)
+    if session is None or session.patient_id != patient_id:
+        return False
+    _sessions.pop(session_id)
+    return True
+
+
+# ============================================================================
+# Follow-up detection
+# ============================================================================
+
+_FOLLOW_UP_PREFIXES = (
+    "kalau", "kalo", "klo", "terus", "lalu", "trus", "bagaimana dengan", "gimana dengan",
+    "dan ", "juga", "selain itu", "yang tadi", "itu", "tersebut", "how about", "what about"
+)
+_FOLLOW_UP_WORDS = {"itu", "tersebut", "tadi", "tadinya", "nya", "juga", "lagi"}
+# Words that do not make a query about a subject of its own
+_FOLLOW_UP_FILLER_WORDS = {
+    "yang", "dan", "atau", "dari", "di", "ke", "pada", "untuk", "dengan", "saya", "aku",
+    "apa", "apakah", "bagaimana", "gimana", "kenapa", "mengapa", "berapa", "kapan", "mana",
+    "bisa", "boleh", "tolong", "jelaskan", "lebih", "lanjut", "detail", "dong", "sih", "aja",
+    "saja", "kok", "terus", "lalu", "kalau", "kalo", "gitu", "begitu", "how", "what", "about",
+    "and", "that", "this", "the"
+}
+_WORD_RE = re.compile(r"[0-9a-zA-Z]+")
+
+
+def _is_anaphoric(word: str) -> bool:
+    return word in _FOLLOW_UP_WORDS or (word.endswith("nya") and len(word) > 5)
+
+
+def normalize_follow_up(query: str) -> str:
+    """Strip Indonesian "-nya" suffix so "obatnya" retrieves like "obat" """
+    words = []
+    for word in _WORD_RE.findall(query.lower()):
+        if word.endswith("nya") and len(word) > 5:
+            word = word[:-3]
+        words.append(word)
+    return " ".join(words)
+
+
+def has_own_subject(query: str) -> bool:
+    """True if the query names something itself (a concept that is not filler or anaphoric)"""
+    for concept in expand_query_concepts(query, _FOLLOW_UP_FILLER_WORDS):
+        if not all(len(alternative) == 1 and _is_anaphoric(alternative[0]) for alternative in concept):
+            return True
+    return False
+
+
+def is_follow_up(query: str) -> bool:
+    """
+    Heuristic: follow-up opener ("kalau ...", "terus ..."), or a short/anaphoric question
+    ("obatnya?", "yang itu gimana?") without a subject of its own. "alergi saya" or
+    "kapan jadwal kontrol berikutnya?" start a new retrieval.
+    """
+    query_lower = query.lower().strip()
+    if query_lower.startswith(_FOLLOW_UP_PREFIXES):
+        return True
+    words = _WORD_RE.findall(query_lower)
+    if len(words) > 2 and not any(_is_anaphoric(word) for word in words):
+        return False
+    return not has_own_subject(query_lower)
+
+
+def load_session_source(session: Optional[ChatSession], key: str, loader: Callable[[], Any]) -> Any:
+    """Return context for key from the session if already fetched, otherwise load and remember it"""
+    if session is not None and session.has_source(key):
+        return session.get_source(key)
+    value = loader()
+    if session is not None:
+        session.set_source(key, value)
+    return value
@@ -0,0 +1,251 @@
+"""
+Data-driven follow-up suggestions for mobile chat
+
+Sebelumnya saran pertanyaan adalah daftar tetap berdasarkan keyword, sehingga bisa
+menyarankan pertanyaan tentang data yang tidak dimiliki pasien (misalnya "Bagaimana
+hasil lab terakhir saya?" padahal belum pernah ada lab) dan berujung pada panggilan
+LLM tanpa context.
+
+Modul ini menyusun kandidat saran per pasien dari data yang benar-benar ada (hasil
+lab, obat, diagnosis, kunjungan, alergi, kalkulator, metrik), diurutkan dari data
+terbaru. Kandidat dihitung saat prefetch (/rag/chat/prepare) atau saat pertama
+dibutuhkan dan disimpan di cache per pasien bersama versi data pasien
+(patient_data_versions), sama seperti negative_cache: dalam SUGGESTION_TRUST_SECONDS
+dipakai tanpa DB, setelah itu divalidasi dengan satu lookup versi dan dibangun ulang
+jika data pasien berubah di service mana pun. Pada saat request hanya dilakukan
+pemilihan in-memory.
+"""
+from typing import Dict, List, Optional, Sequence
+from datetime import datetime
+import time
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+from ..core.config import (
+    SUGGESTION_CACHE_TTL_SECONDS,
+    SUGGESTION_TRUST_SECONDS,
+    SUGGESTION_MAX_PATIENTS,
+    SUGGESTION_MAX_PER_SOURCE
+)
+from .sessions import LRUTTLCache
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from auth.core.data_versions import get_patient_data_version
+
+# Topics follow detect_query_context keys so suggestions can follow the current question
+TOPIC_MEDICAL_RECORDS = "medical_records"
+TOPIC_ALLERGIES = "allergies"
+TOPIC_HEALTH_CALC = "health_calc"
+TOPIC_HEALTH_METRICS = "health_metrics"
+
+MAX_SUGGESTIONS = 4
+
+# Calculator result -> question (only asked when that calculation exists)
+_CALCULATION_QUESTIONS: Dict[str, str] = {
+    "BMI": "Berapa BMI saya saat ini?",
+    "BMR": "Berapa kebutuhan kalori harian saya?",
+    "TDEE": "Berapa kebutuhan kalori harian saya?",
+    "DailyCalories": "Berapa kebutuhan kalori harian saya?",
+    "Macronutrients": "Berapa kebutuhan protein harian saya?",
+    "WaterNeeds": "Berapa kebutuhan air harian saya?",
+    "IdealBodyWeight": "Berapa berat badan ideal saya?",
+    "BodyFat": "Berapa persentase lemak tubuh saya?",
+    "MaxHeartRate": "Berapa detak jantung maksimal saya?",
+    "VO2Max": "Bagaimana hasil VO2 Max saya?",
+    "MAP": "Bagaimana hasil tekanan arteri rata-rata (MAP) saya?",
+}
+
+# Metric history -> trend question (only when there are at least two values)
+_METRIC_TREND_QUESTIONS: Dict[str, str] = {
+    "BMI": "Bagaimana tren BMI saya?",
+    "BodyFat": "Bagaimana tren lemak tubuh saya?",
+    "MAP": "Bagaimana tren tekanan darah saya?",
+    "DailyCalories": "Bagaimana tren kebutuhan kalori saya?",
+}
+
+# Same topic = higher priority than recency alone when both are equally recent
+_TOPIC_ORDER = (TOPIC_MEDICAL_RECORDS, TOPIC_ALLERGIES, TOPIC_HEALTH_CALC, TOPIC_HEALTH_METRICS)
+
+
+class SuggestionCandidate:
+    """One follow-up question backed by existing patient data"""
+    __slots__ = ("question", "topic", "occurred_at")
+
+    def __init__(self, question: str, topic: str, occurred_at: Optional[datetime]):
+        self.question = question
+        self.topic = topic
+        self.occurred_at = occurred_at  # When the backing data was recorded (recency rank)
+
+    def __repr__(self) -> str:
+        return f"SuggestionCandidate({self.question!r}, {self.topic!r})"
+
+
+class _CachedSuggestions:
+    __slots__ = ("candidates", "version", "checked_at")
+
+    def __init__(self, candidates: List[SuggestionCandidate], version: int):
+        self.candidates = candidates
+        self.version = version
+        self.checked_at = time.monotonic()
+
+
+_suggestion_cache: LRUTTLCache[int, _CachedSuggestions] = LRUTTLCache(
+    SUGGESTION_MAX_PATIENTS, SUGGESTION_CACHE_TTL_SECONDS
+)
+
+
+def _recency_key(candidate: SuggestionCandidate):
+    occurred = candidate.occurred_at
+    if occurred is not None and not isinstance(occurred, datetime):
+        occurred = datetime.combine(occurred, datetime.min.time())
+    return (occurred or datetime.min, -_TOPIC_ORDER.index(candidate.topic))
+
+
+def build_patient_suggestions(patient_id: int, db: Session) -> List[SuggestionCandidate]:
+    """
+    Build suggestion candidates from the patient's data, newest first
+    A source that fails to load contributes no candidates (never a question without data).
+    """
+    per_source = SUGGESTION_MAX_PER_SOURCE
+    candidates: List[SuggestionCandidate] = []
+    params = {"patient_id": patient_id, "limit": per_source}
+
+    sources = (
+        ("lab_results", """
+            SELECT lr.test_name AS name, MAX(mr.visit_date) AS occurred_at
+            FROM lab_results lr
+            JOIN medical_records mr ON mr.record_id = lr.record_id
+            WHERE mr.patient_id = :patient_id
+            AND lr.test_name IS NOT NULL AND lr.test_name != ''
+            GROUP BY lr.test_name
+            ORDER BY occurred_at DESC
+            LIMIT :limit
+        """, lambda row: SuggestionCandidate(
+            f"Bagaimana hasil {row.name} terakhir saya?", TOPIC_MEDICAL_RECORDS, row.occurred_at)),
+        ("prescriptions", """
+            SELECT p.drug_name AS name, MAX(mr.visit_date) AS occurred_at
+            FROM prescriptions p
+            JOIN medical_records mr ON mr.record_id = p.record_id
+            WHERE mr.patient_id = :patient_id
+            AND p.drug_name IS NOT NULL AND p.drug_name != ''
+            GROUP BY p.drug_name
+            ORDER BY occurred_at DESC
+            LIMIT :limit
+        """, lambda row: SuggestionCandidate(
+            f"Bagaimana aturan minum obat {row.name}?", TOPIC_MEDICAL_RECORDS, row.occurred_at)),
+        ("diagnoses", """
+            SELECT d.diagnosis_name AS name, MAX(mr.visit_date) AS occurred_at
+            FROM diagnoses d
+            JOIN medical_records mr ON mr.record_id = d.record_id
+            WHERE mr.patient_id = :patient_id
+            AND d.diagnosis_name IS NOT NULL AND d.diagnosis_name != ''
+            GROUP BY d.diagnosis_name
+            ORDER BY occurred_at DESC
+            LIMIT :limit
+        """, lambda row: SuggestionCandidate(
+            f"Apa arti diagnosis {row.name} saya?", TOPIC_MEDICAL_RECORDS, row.occurred_at)),
+        ("medical_records", """
+            SELECT COUNT(*) AS total, MAX(visit_date) AS occurred_at
+            FROM medical_records
+            WHERE patient_id = :patient_id
+            HAVING COUNT(*) > 0
+        """, lambda row: SuggestionCandidate(
+            "Kapan terakhir kali saya berobat?", TOPIC_MEDICAL_RECORDS, row.occurred_at)),
+        ("allergies", """
+            SELECT COUNT(*) AS total, MAX(created_at) AS occurred_at
+            FROM allergies
+            WHERE patient_id = :patient_id
+            HAVING COUNT(*) > 0
+        """, lambda row: SuggestionCandidate(
+            "Apa saja alergi saya?", TOPIC_ALLERGIES, row.occurred_at)),
+        ("health_calculations", """
+            SELECT calculation_type AS name, MAX(calculated_at) AS occurred_at
+            FROM health_calculations
+            WHERE user_id = :patient_id
+            GROUP BY calculation_type
+            ORDER BY occurred_at DESC
+        """, lambda row: SuggestionCandidate(
+            _CALCULATION_QUESTIONS[row.name], TOPIC_HEALTH_CALC, row.occurred_at)
+            if row.name in _CALCULATION_QUESTIONS else None),
+        ("health_metrics_history", """
+            SELECT metric_type AS name, MAX(recorded_at) AS occurred_at
+            FROM health_metrics_history
+            WHERE user_id = :patient_id
+            GROUP BY metric_type
+            HAVING COUNT(*) > 1
+            ORDER BY occurred_at DESC
+        """, lambda row: SuggestionCandidate(
+            _METRIC_TREND_QUESTIONS[row.name], TOPIC_HEALTH_METRICS, row.occurred_at)
+            if row.name in _METRIC_TREND_QUESTIONS else None),
+    )
+
+    for name, query_sql, to_candidate in sources:
+        try:
+            for row in db.execute(text(query_sql), params):
+                candidate = to_candidate(row)
+                if candidate is not None:
+                    candidates.append(candidate)
+        except Exception as e:
+            print(f"[Suggestions] Patient {patient_id}: error loading {name}: {str(e)}")
+            db.rollback()
+
+    # Newest data first, one candidate per distinct question
+    candidates.sort(key=_recency_key, reverse=True)
+    unique: List[SuggestionCandidate] = []
+    seen = set()
+    for candidate in candidates:
+        if candidate.question not in seen:
+            seen.add(candidate.question)
+            unique.append(candidate)
+    return unique
+
+
+def get_patient_suggestions(patient_id: int, db: Session) -> List[SuggestionCandidate]:
+    """
+    Cached suggestion candidates for a patient (built on first use)
+    Trusted without DB access for SUGGESTION_TRUST_SECONDS, then revalidated against
+    the patient's data version and rebuilt if it changed.
+    """
+    entry = _suggestion_cache.peek(patient_id)
+    if entry is not None:
+        if time.monotonic() - entry.checked_at < SUGGESTION_TRUST_SECONDS:
+            return entry.candidates
+        version = get_patient_data_version(db, patient_id)
+        if version is not None and version == entry.version:
+            entry.checked_at = time.monotonic()
+            return entry.candidates
+
+    # Version read before the build: a write racing with it is seen on the next check
+    version = get_patient_data_version(db, patient_id)
+    candidates = build_patient_suggestions(patient_id, db)
+    if version is not None:
+        _suggestion_cache.put(patient_id, _CachedSuggestions(candidates, version))
+    return candidates
+
+
+def select_suggestions(
+    candidates: Optional[Sequence[SuggestionCandidate]],
+    query: str,
+    query_context: Optional[Dict[str, bool]] = None,
+    limit: int = MAX_SUGGESTIONS
+) -> List[str]:
+    """
+    Pick follow-up questions for this answer (no I/O)
+    Candidates on the topic of the current question come first, then the most
+    recent data; the question just asked is never suggested again.
+    """
+    if not candidates:
+        return []
+    asked = query.strip().lower()
+    topics = {topic for topic, active in (query_context or {}).items() if active}
+
+    on_topic: List[str] = []
+    other: List[str] = []
+    for candidate in candidates:
+        if candidate.question.lower() == asked:
+            continue
+        (on_topic if candidate.topic in topics else other).append(candidate.question)
+    return (on_topic + other)[:limit]
@@ -0,0 +1,388 @@
+"""
+TTS sanitizer - single-pass streaming replacement for remove_markdown_formatting
+
+Jawaban Nova dipakai untuk Text-to-Speech, jadi markdown dan simbol yang akan
+"dibaca" oleh TTS harus dibuang. Sanitizer ini adalah state machine satu kali jalan
+yang bisa menerima potongan token secara bertahap (streaming) dan menghasilkan teks
+yang aman untuk TTS, dengan output yang sama apapun cara teks dipotong.
+
+Kontrak output:
+- **bold**, *italic*, __underline__, ~~strike~~, `code`, # header -> teks saja
+- ```code block``` dibuang, [teks](url) -> teks, [teks] -> teks, () kosong dibuang
+- Garis miring jadi spasi ("3x/hari" -> "3x hari"), angka/angka jadi "per"
+  ("120/80" -> "120 per 80"), kecuali tanggal ("12/05/2025" -> "12 05 2025")
+- Simbol formatting (✅ ❌ ⚠️ ➡️ 💡 📌 • dll) dibuang, emoji ramah (😊 💊 🏥) tetap
+- Baris baru jadi spasi, paragraf jadi ". " (atau spasi jika kalimat sudah berakhir)
+- Spasi ganda, spasi sebelum titik, dan titik berlebih dirapikan
+"""
+from typing import List, Optional
+import re
+
+# Formatting symbols TTS would read aloud (friendly emoji are kept)
+_DROP_SYMBOLS = frozenset("✅❌⚠➡⬅⬆⬇💡🔍📌📍➤►◄▪▫•")
+_VARIATION_SELECTOR = "\ufe0f"
+_WHITESPACE = frozenset(" \t\f\v")
+_SENTENCE_END = frozenset(".!?,;:")
+
+# Characters that need the state machine; anything else is plain text that can be
+# copied in bulk (words joined by single spaces) when no markup state is pending
+_SPECIAL_CHARS = "`*-~/_[]().\n\r\t\f\v " + "".join(sorted(_DROP_SYMBOLS)) + _VARIATION_SELECTOR
+_PLAIN_WORD = "[^{0}](?:[^{0}]|\\.(?=[^{0}]))*".format(re.escape(_SPECIAL_CHARS))  # "7.2" ok, "a." / "a ." not
+_PLAIN_RUN = re.compile("{0}(?: {0})*".format(_PLAIN_WORD))
+
+
+class TTSSanitizer:
+    """
+    Incremental TTS sanitizer
+
+    Usage:
+        sanitizer = TTSSanitizer()
+        for chunk in stream:
+            speak(sanitizer.feed(chunk))
+        speak(sanitizer.finish())
+
+    Only a few characters of lookahead are ever held back (pending markup runs,
+    digits after a slash, whitespace before punctuation), except for an unclosed
+    code fence whose content is buffered until it closes.
+    """
+
+    def __init__(self):
+        self._out: List[str] = []
+        # Output normalizer state
+        self._started = False
+        self._last_emitted = ""
+        self._pending_space = False
+        self._pending_newlines = 0
+        self._period_run = 0
+        # Markdown state
+        self._line_start = True
+        self._hash_run = 0
+        self._backtick_run = 0
+        self._in_code = False
+        self._code_buffer: List[str] = []
+        self._in_url = False
+        self._after_bracket = False
+        self._star_run = 0
+        self._dash_run = 0
+        self._tilde_run = 0
+        self._slash = False
+        self._slash_after_digit = False
+        self._slash_digits: Optional[List[str]] = None
+        self._slash_date = False
+        self._paren_buffer: Optional[List[str]] = None
+        self._drop_variation_selector = False
+        self._prev = ""
+        self._finished = False
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk of model output, return text that is safe to speak now"""
+        if self._finished:
+            raise ValueError("TTSSanitizer already finished")
+        position = 0
+        length = len(chunk)
+        while position < length:
+            if self._in_code and not self._backtick_run:
+                # Inside a code fence only a backtick can change state
+                fence = chunk.find("`", position)
+                if fence < 0:
+                    self._code_buffer.append(chunk[position:])
+                    break
+                if fence > position:
+                    self._code_buffer.append(chunk[position:fence])
+                    position = fence
+            elif self._is_idle():
+                match = _PLAIN_RUN.match(chunk, position)
+                if match:
+                    self._emit_plain(match.group())
+                    position = match.end()
+                    continue
+            self._process(chunk[position])
+            position += 1
+        return self._drain()
+
+    def finish(self) -> str:
+        """Flush pending state at end of stream"""
+        if self._finished:
+            return ""
+        if self._backtick_run:
+            run, self._backtick_run = self._backtick_run, 0
+            if run >= 3:
+                self._in_code = not self._in_code
+                self._code_buffer = []
+            elif self._in_code:
+                self._code_buffer.append("`" * run)
+        if self._in_code:
+            # Unclosed fence: nothing to strip, speak the content
+            self._in_code = False
+            buffered, self._code_buffer = self._code_buffer, []
+            for piece in buffered:
+                for ch in piece:
+                    self._process(ch)
+        if self._hash_run:
+            run, self._hash_run = self._hash_run, 0
+            for _ in range(run):
+                self._text("#")
+        self._end_runs(None)
+        self._end_slash(None)
+        if self._paren_buffer is not None:
+            buffered, self._paren_buffer = self._paren_buffer, None
+            for ch in buffered:
+                self._normalize(ch)
+        if self._period_run:
+            self._out.append("." * min(self._period_run, 3))
+            self._period_run = 0
+        self._finished = True
+        return self._drain()
+
+    def _is_idle(self) -> bool:
+        """No markup decision pending, so plain text can bypass the state machine"""
+        return not (
+            self._line_start or self._backtick_run or self._in_code or self._in_url
+            or self._after_bracket or self._star_run or self._dash_run or self._tilde_run
+            or self._slash or self._slash_digits is not None or self._paren_buffer is not None
+            or self._drop_variation_selector
+        )
+
+    def _emit_plain(self, run: str) -> None:
+        # First char settles pending separators/periods, the rest is copied as is
+        self._normalize(run[0])
+        if len(run) > 1:
+            self._out.append(run[1:])
+        self._last_emitted = run[-1]
+        self._prev = run[-1]
+
+    # ------------------------------------------------------------------
+    # Markdown layer
+    # ------------------------------------------------------------------
+
+    def _process(self, ch: str) -> None:
+        # Code fences (```) and inline code (`)
+        if ch == "`":
+            self._backtick_run += 1
+            return
+        if self._backtick_run:
+            run, self._backtick_run = self._backtick_run, 0
+            if run >= 3:
+                if not self._in_code:
+                    self._end_runs(None)
+                    self._end_slash(None)
+                self._in_code = not self._in_code
+                self._code_buffer = []
+            elif self._in_code:
+                self._code_buffer.append("`" * run)
+        if self._in_code:
+            self._code_buffer.append(ch)
+            return
+
+        # Links: [text](url) -> text
+        if self._in_url:
+            if ch == ")":
+                self._in_url = False
+            return
+        if self._after_bracket:
+            self._after_bracket = False
+            if ch == "(":
+                self._in_url = True
+                return
+
+        if self._drop_variation_selector:
+            self._drop_variation_selector = False
+            if ch == _VARIATION_SELECTOR:
+                return
+
+        # Headers: "## Title" at line start
+        if self._line_start:
+            if ch == "#":
+                self._hash_run += 1
+                return
+            if self._hash_run:
+                run, self._hash_run = self._hash_run, 0
+                if not (run <= 6 and ch in _WHITESPACE):
+                    for _ in range(run):
+                        self._text("#")
+            self._line_start = False
+
+        # Emphasis / rule / strike runs resolve on the first different char
+        if self._star_run and ch != "*":
+            self._end_star(ch)
+        if self._dash_run and ch != "-":
+            self._end_dash()
+        if self._tilde_run and ch != "~":
+            self._end_tilde()
+
+        if ch == "*":
+            self._end_slash(ch)
+            self._star_run += 1
+            return
+        if ch == "-":
+            self._end_slash(ch)
+            self._dash_run += 1
+            return
+        if ch == "~":
+            self._end_slash(ch)
+            self._tilde_run += 1
+            return
+
+        # Slashes: word/word -> "word word", 120/80 -> "120 per 80", dates -> spaces
+        if self._slash_digits is not None:
+            if ch.isdigit():
+                self._slash_digits.append(ch)
+                return
+            digits, self._slash_digits = self._slash_digits, None
+            if ch == "/":
+                self._slash_date = True
+                self._text(" ")
+            else:
+                self._text_all(" " if self._slash_date else " per ")
+                self._slash_date = False
+            for digit in digits:
+                self._text(digit)
+        if ch == "/":
+            if not self._slash:
+                self._slash = True
+                self._slash_after_digit = self._prev.isdigit()
+            else:
+                self._slash_after_digit = False  # "//" is never a fraction
+            return
+        if self._slash:
+            self._slash = False
+            if self._slash_after_digit and ch.isdigit():
+                self._slash_digits = [ch]
+                return
+            self._slash_date = False
+            self._text(" ")
+
+        if ch in _DROP_SYMBOLS:
+            self._drop_variation_selector = True
+            return
+        if ch == "_" or ch == "[" or ch == "\r":
+            return
+        if ch == "]":
+            self._after_bracket = True
+            return
+
+        self._text(ch)
+        if ch == "\n":
+            self._line_start = True
+
+    def _end_star(self, next_ch: Optional[str]) -> None:
+        # Emphasis markers vanish; a lone "*" between words separates them ("2*3" -> "2 3")
+        run, self._star_run = self._star_run, 0
+        if run == 1 and self._prev.isalnum() and next_ch is not None and next_ch.isalnum():
+            self._text(" ")
+
+    def _end_dash(self) -> None:
+        # "--"/"---" (rules, separators) vanish, a single dash becomes a space
+        run, self._dash_run = self._dash_run, 0
+        if run == 1:
+            self._text(" ")
+
+    def _end_tilde(self) -> None:
+        # "~~" strike markers vanish, a single "~" (approximately) is kept
+        run, self._tilde_run = self._tilde_run, 0
+        if run == 1:
+            self._text("~")
+
+    def _end_runs(self, next_ch: Optional[str]) -> None:
+        if self._star_run:
+            self._end_star(next_ch)
+        if self._dash_run:
+            self._end_dash()
+        if self._tilde_run:
+            self._end_tilde()
+
+    def _end_slash(self, next_ch: Optional[str]) -> None:
+        """Resolve a pending slash (and digits after it) before a non-digit char"""
+        if self._slash_digits is not None:
+            digits, self._slash_digits = self._slash_digits, None
+            if next_ch == "/":
+                self._text(" ")
+            else:
+                self._text_all(" " if self._slash_date else " per ")
+                self._slash_date = False
+            for digit in digits:
+                self._text(digit)
+        if self._slash:
+            self._slash = False
+            self._slash_date = False
+            self._text(" ")
+
+    # ------------------------------------------------------------------
+    # Text layer: empty parentheses, then whitespace/punctuation normalizer
+    # ------------------------------------------------------------------
+
+    def _text_all(self, value: str) -> None:
+        for ch in value:
+            self._text(ch)
+
+    def _text(self, ch: str) -> None:
+        self._prev = ch
+        if self._paren_buffer is not None:
+            if ch in _WHITESPACE or ch == "\n":
+                self._paren_buffer.append(ch)
+                return
+            buffered, self._paren_buffer = self._paren_buffer, None
+            if ch == ")":
+                return
+            for buffered_ch in buffered:
+                self._normalize(buffered_ch)
+        if ch == "(":
+            self._paren_buffer = ["("]
+            return
+        self._normalize(ch)
+
+    def _normalize(self, ch: str) -> None:
+        if ch == "\n":
+            self._pending_newlines += 1
+            return
+        if ch in _WHITESPACE:
+            self._pending_space = True
+            return
+        if ch == ".":
+            if self._period_run and (self._pending_space or self._pending_newlines):
+                # ". ." -> "."
+                self._pending_space = False
+                self._pending_newlines = 0
+                return
+            if not self._period_run:
+                # " ." -> "." and a paragraph break right before a period adds nothing
+                self._pending_space = False
+                self._pending_newlines = 0
+            self._period_run += 1
+            return
+
+        if self._period_run:
+            self._out.append("." * min(self._period_run, 3))
+            self._last_emitted = "."
+            self._started = True
+            self._period_run = 0
+        if self._started:
+            if self._pending_newlines >= 2:
+                self._out.append(" " if self._last_emitted in _SENTENCE_END else ". ")
+            elif self._pending_newlines or self._pending_space:
+                self._out.append(" ")
+        self._pending_space = False
+        self._pending_newlines = 0
+
+        self._out.append(ch)
+        self._last_emitted = ch
+        self._started = True
+
+    def _drain(self) -> str:
+        if not self._out:
+            return ""
+        text = "".join(self._out)
+        self._out = []
+        return text
+
+
+def sanitize_for_tts(text: str) -> str:
+    """Sanitize a complete answer for TTS (same output as streaming it chunk by chunk)"""
+    if not text:
+        return text
+    sanitizer = TTSSanitizer()
+    return sanitizer.feed(text) + sanitizer.finish()
@@ -5,19 +5,21 @@ import uuid
 import sys
 import os
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_petugas_for_rm
 from ...schemas.allergy import AllergyCreate, AllergyResponse, AllergySeverityEnum
-from ...services.crud import (
+from ...services.crud_async import (
     create_allergy,
     get_allergy_by_id,
-    get_patient_allergies,
+    list_patient_allergies,
     update_allergy,
     delete_allergy,
 )
+# sys.path to backend/ is set up by ..core.database
+from auth.core.responses import FastJSONResponse
 
 router = APIRouter(prefix="/allergies", tags=["Allergies"])
 
@@ -26,7 +28,7 @@ router = APIRouter(prefix="/allergies", tags=["Allergies"])
 async def create_allergy_route(
     allergy: AllergyCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new allergy for a patient (Backoffice - Petugas only)"""
     allergy_data = allergy.model_dump()
@@ -34,25 +36,25 @@ async def create_allergy_route(
     # patient_id harus diisi di request body
     if "patient_id" not in allergy_data or not allergy_data["patient_id"]:
         raise HTTPException(status_code=400, detail="patient_id is required")
-    return create_allergy(db, allergy_data)
+    return await create_allergy(db, allergy_data)
 
 @router.get("/patient/{patient_id}", response_model=List[AllergyResponse])
 async def get_patient_allergies_route(
     patient_id: int,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all allergies for a patient by ID (Backoffice - Petugas only)"""
-    return get_patient_allergies(db, patient_id)
+    return FastJSONResponse(await list_patient_allergies(db, patient_id))
 
 @router.get("/{allergy_id}", response_model=AllergyResponse)
 async def get_allergy_route(
     allergy_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get allergy by ID (Backoffice - Petugas only)"""
-    allergy = get_allergy_by_id(db, allergy_id)
+    allergy = await get_allergy_by_id(db, allergy_id)
     if not allergy:
         raise HTTPException(status_code=404, detail="Allergy not found")
     return AllergyResponse.model_validate(allergy)
@@ -62,15 +64,15 @@ async def update_allergy_route(
     allergy_id: str,
     allergy: AllergyCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an allergy (Backoffice - Petugas only)"""
-    existing_allergy = get_allergy_by_id(db, allergy_id)
+    existing_allergy = await get_allergy_by_id(db, allergy_id)
     if not existing_allergy:
         raise HTTPException(status_code=404, detail="Allergy not found")
     
     allergy_data = allergy.model_dump()
-    updated_allergy = update_allergy(db, allergy_id, allergy_data)
+    updated_allergy = await update_allergy(db, allergy_id, allergy_data)
     if not updated_allergy:
         raise HTTPException(status_code=404, detail="Allergy not found")
     return AllergyResponse.model_validate(updated_allergy)
@@ -79,14 +81,14 @@ async def update_allergy_route(
 async def delete_allergy_route(
     allergy_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an allergy (Backoffice - Petugas only)"""
-    existing_allergy = get_allergy_by_id(db, allergy_id)
+    existing_allergy = await get_allergy_by_id(db, allergy_id)
     if not existing_allergy:
         raise HTTPException(status_code=404, detail="Allergy not found")
     
-    success = delete_allergy(db, allergy_id)
+    success = await delete_allergy(db, allergy_id)
     if not success:
         raise HTTPException(status_code=404, detail="Allergy not found")
     return None
@@ -5,20 +5,22 @@ import uuid
 import sys
 import os
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_petugas_for_rm
 from ...schemas.medical_document import MedicalDocumentCreate, MedicalDocumentResponse
-from ...services.crud import (
+from ...services.crud_async import (
     create_medical_document,
     get_medical_document_by_id,
-    get_patient_documents,
+    list_patient_documents,
     get_record_documents,
     update_medical_document,
     delete_medical_document,
 )
+# sys.path to backend/ is set up by ..core.database
+from auth.core.responses import FastJSONResponse
 
 router = APIRouter(prefix="/medical-documents", tags=["Medical Documents"])
 
@@ -27,7 +29,7 @@ router = APIRouter(prefix="/medical-documents", tags=["Medical Documents"])
 async def create_medical_document_route(
     document: MedicalDocumentCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new medical document for a patient (Backoffice - Petugas only)"""
     doc_data = document.model_dump()
@@ -35,36 +37,35 @@ async def create_medical_document_route(
     # patient_id harus diisi di request body
     if "patient_id" not in doc_data or not doc_data["patient_id"]:
         raise HTTPException(status_code=400, detail="patient_id is required")
-    return create_medical_document(db, doc_data)
+    return await create_medical_document(db, doc_data)
 
 @router.get("/patient/{patient_id}", response_model=List[MedicalDocumentResponse])
 async def get_patient_documents_route(
     patient_id: int,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all medical documents for a patient by ID (Backoffice - Petugas only)"""
-    documents = get_patient_documents(db, patient_id)
-    return [MedicalDocumentResponse.model_validate(d) for d in documents]
+    return FastJSONResponse(await list_patient_documents(db, patient_id))
 
 @router.get("/record/{record_id}", response_model=List[MedicalDocumentResponse])
 async def get_record_documents_route(
     record_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all medical documents for a medical record (Backoffice - Petugas only)"""
-    documents = get_record_documents(db, record_id)
+    documents = await get_record_documents(db, record_id)
     return [MedicalDocumentResponse.model_validate(d) for d in documents]
 
 @router.get("/{doc_id}", response_model=MedicalDocumentResponse)
 async def get_medical_document_route(
     doc_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get medical document by ID (Backoffice - Petugas only)"""
-    document = get_medical_document_by_id(db, doc_id)
+    document = await get_medical_document_by_id(db, doc_id)
     if not document:
         raise HTTPException(status_code=404, detail="Medical document not found")
     
@@ -75,15 +76,15 @@ async def update_medical_document_route(
     doc_id: str,
     document: MedicalDocumentCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a medical document (Backoffice - Petugas only)"""
-    existing_document = get_medical_document_by_id(db, doc_id)
+    existing_document = await get_medical_document_by_id(db, doc_id)
     if not existing_document:
         raise HTTPException(status_code=404, detail="Medical document not found")
     
     doc_data = document.model_dump()
-    updated_document = update_medical_document(db, doc_id, doc_data)
+    updated_document = await update_medical_document(db, doc_id, doc_data)
     if not updated_document:
         raise HTTPException(status_code=404, detail="Medical document not found")
     return MedicalDocumentResponse.model_validate(updated_document)
@@ -92,14 +93,14 @@ async def update_medical_document_route(
 async def delete_medical_document_route(
     doc_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a medical document (Backoffice - Petugas only)"""
-    existing_document = get_medical_document_by_id(db, doc_id)
+    existing_document = await get_medical_document_by_id(db, doc_id)
     if not existing_document:
         raise HTTPException(status_code=404, detail="Medical document not found")
     
-    success = delete_medical_document(db, doc_id)
+    success = await delete_medical_document(db, doc_id)
     if not success:
         raise HTTPException(status_code=404, detail="Medical document not found")
     return None
@@ -5,22 +5,23 @@ import uuid
 import sys
 import os
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_petugas_for_rm
-from ...schemas.medical_record import MedicalRecordCreate, MedicalRecordResponse, MedicalRecordFull
+from ...schemas.medical_record import MedicalRecordCreate, MedicalRecordResponse, MedicalRecordFull, MedicalVisitCreate
 from ...schemas.diagnosis import DiagnosisCreate, DiagnosisResponse
 from ...schemas.prescription import PrescriptionCreate, PrescriptionResponse
 from ...schemas.lab_result import LabResultCreate, LabResultResponse
 from ...schemas.allergy import AllergyCreate, AllergyResponse
 from ...schemas.medical_document import MedicalDocumentCreate, MedicalDocumentResponse
 from ...schemas.patient import PatientDetailResponse, PatientInfo
-from ...services.crud import (
+from ...services.crud_async import (
     create_medical_record,
+    create_medical_visit,
     get_medical_record,
-    get_patient_records,
+    list_patient_records,
     update_medical_record,
     delete_medical_record,
     create_diagnosis,
@@ -37,6 +38,8 @@ from ...services.crud import (
     get_record_documents,
     get_complete_patient_data,
 )
+from auth.core.pagination import next_cursor
+from auth.core.responses import FastJSONResponse
 
 router = APIRouter(prefix="/medical-records", tags=["Medical Records"])
 
@@ -45,7 +48,7 @@ router = APIRouter(prefix="/medical-records", tags=["Medical Records"])
 async def create_record(
     record: MedicalRecordCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new medical record (Backoffice - Petugas only)
@@ -96,7 +99,7 @@ async def create_record(
             )
         
         # Create the medical record
-        created_record = create_medical_record(db, record_data)
+        created_record = await create_medical_record(db, record_data)
         
         # Return response
         return MedicalRecordResponse.model_validate(created_record)
@@ -114,25 +117,62 @@ async def create_record(
             detail=f"Error creating medical record: {str(e)}"
         )
 
+@router.post("/visits", response_model=MedicalRecordFull, status_code=status.HTTP_201_CREATED)
+async def create_visit(
+    visit: MedicalVisitCreate,
+    current_petugas = Depends(get_current_active_petugas_for_rm),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create a complete visit in one request (Backoffice - Petugas only)
+    
+    Record, diagnoses, prescriptions and lab results are written in a single
+    transaction (bulk insert per table, one commit) instead of one POST + commit
+    per item. Either everything is stored or nothing is.
+    
+    **Request Body:** the fields of `POST /medical-records/` plus
+    - `diagnoses`: list of {icd_code, diagnosis_name, primary_flag}
+    - `prescriptions`: list of {drug_name, drug_code, dosage, frequency, duration_days, notes}
+    - `lab_results`: list of {test_name, result_value, result_unit, normal_range, interpretation, attachment_url}
+    
+    **Response:** the created record with all related data (same shape as `GET /medical-records/{record_id}`)
+    """
+    try:
+        created = await create_medical_visit(db, visit.model_dump())
+    except Exception as e:
+        import traceback
+        print(f"[RM] Error creating medical visit: {str(e)}")
+        print(f"[RM] Traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error creating medical visit: {str(e)}"
+        )
+    
+    record_dict = MedicalRecordResponse.model_validate(created["record"]).model_dump()
+    record_dict["diagnoses"] = [DiagnosisResponse.model_validate(d).model_dump() for d in created["diagnoses"]]
+    record_dict["prescriptions"] = [PrescriptionResponse.model_validate(p).model_dump() for p in created["prescriptions"]]
+    record_dict["lab_results"] = [LabResultResponse.model_validate(l).model_dump() for l in created["lab_results"]]
+    return record_dict
+
 @router.get("/{record_id}", response_model=MedicalRecordFull)
 async def get_record(
     record_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get medical record by ID with all related data (Backoffice - Petugas only)"""
     from ...schemas.diagnosis import DiagnosisResponse
     from ...schemas.prescription import PrescriptionResponse
     from ...schemas.lab_result import LabResultResponse
     
-    record = get_medical_record(db, record_id)
+    record = await get_medical_record(db, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     
     # Get related data
-    diagnoses = [DiagnosisResponse.model_validate(d) for d in get_record_diagnoses(db, record_id)]
-    prescriptions = [PrescriptionResponse.model_validate(p) for p in get_record_prescriptions(db, record_id)]
-    lab_results = [LabResultResponse.model_validate(l) for l in get_record_lab_results(db, record_id)]
+    diagnoses = [DiagnosisResponse.model_validate(d) for d in await get_record_diagnoses(db, record_id)]
+    prescriptions = [PrescriptionResponse.model_validate(p) for p in await get_record_prescriptions(db, record_id)]
+    lab_results = [LabResultResponse.model_validate(l) for l in await get_record_lab_results(db, record_id)]
     
     record_dict = MedicalRecordResponse.model_validate(record).model_dump()
     record_dict["diagnoses"] = [d.model_dump() for d in diagnoses]
@@ -147,29 +187,39 @@ async def get_patient_records_route(
     current_petugas = Depends(get_current_active_petugas_for_rm),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all medical records for a patient by ID (Backoffice - Petugas only)
     **Requires petugas authentication** - Petugas can view records for any patient
+    
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page.
     """
-    return get_patient_records(db, patient_id, skip, limit)
+    try:
+        records = await list_patient_records(db, patient_id, skip, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_cursor = next_cursor(records, limit, "visit_date", "record_id")
+    headers = {"X-Next-Cursor": page_cursor} if page_cursor else None
+    # Mapper dicts already match MedicalRecordResponse - skip re-validation
+    return FastJSONResponse(records, headers=headers)
 
 @router.put("/{record_id}", response_model=MedicalRecordResponse)
 async def update_record(
     record_id: str,
     record: MedicalRecordCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a medical record (Backoffice - Petugas only)"""
     # Check if record exists - petugas can update any record
-    existing_record = get_medical_record(db, record_id)
+    existing_record = await get_medical_record(db, record_id)
     if not existing_record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     
     record_data = record.model_dump()
-    updated_record = update_medical_record(db, record_id, record_data)
+    updated_record = await update_medical_record(db, record_id, record_data)
     if not updated_record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     return MedicalRecordResponse.model_validate(updated_record)
@@ -178,15 +228,15 @@ async def update_record(
 async def delete_record(
     record_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a medical record (Backoffice - Petugas only)"""
     # Check if record exists - petugas can delete any record
-    existing_record = get_medical_record(db, record_id)
+    existing_record = await get_medical_record(db, record_id)
     if not existing_record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     
-    success = delete_medical_record(db, record_id)
+    success = await delete_medical_record(db, record_id)
     if not success:
         raise HTTPException(status_code=404, detail="Medical record not found")
     return None
@@ -197,26 +247,26 @@ async def add_diagnosis(
     record_id: str,
     diagnosis: DiagnosisCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add diagnosis to a medical record (Backoffice - Petugas only)"""
     # Verify record exists
-    if not get_medical_record(db, record_id):
+    if not await get_medical_record(db, record_id):
         raise HTTPException(status_code=404, detail="Medical record not found")
     
     diagnosis_data = diagnosis.model_dump()
     diagnosis_data["diagnosis_id"] = str(uuid.uuid4())
     diagnosis_data["record_id"] = record_id
-    return create_diagnosis(db, diagnosis_data)
+    return await create_diagnosis(db, diagnosis_data)
 
 @router.get("/{record_id}/diagnoses", response_model=List[DiagnosisResponse])
 async def get_diagnoses(
     record_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all diagnoses for a medical record (Backoffice - Petugas only)"""
-    return get_record_diagnoses(db, record_id)
+    return await get_record_diagnoses(db, record_id)
 
 # Prescriptions Routes (Backoffice - Petugas only)
 @router.post("/{record_id}/prescriptions", response_model=PrescriptionResponse, status_code=status.HTTP_201_CREATED)
@@ -224,25 +274,25 @@ async def add_prescription(
     record_id: str,
     prescription: PrescriptionCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add prescription to a medical record (Backoffice - Petugas only)"""
-    if not get_medical_record(db, record_id):
+    if not await get_medical_record(db, record_id):
         raise HTTPException(status_code=404, detail="Medical record not found")
     
     prescription_data = prescription.model_dump()
     prescription_data["prescription_id"] = str(uuid.uuid4())
     prescription_data["record_id"] = record_id
-    return create_prescription(db, prescription_data)
+    return await create_prescription(db, prescription_data)
 
 @router.get("/{record_id}/prescriptions", response_model=List[PrescriptionResponse])
 async def get_prescriptions(
     record_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all prescriptions for a medical record (Backoffice - Petugas only)"""
-    return get_record_prescriptions(db, record_id)
+    return await get_record_prescriptions(db, record_id)
 
 # Lab Results Routes (Backoffice - Petugas only)
 @router.post("/{record_id}/lab-results", response_model=LabResultResponse, status_code=status.HTTP_201_CREATED)
@@ -250,25 +300,25 @@ async def add_lab_result(
     record_id: str,
     lab_result: LabResultCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add lab result to a medical record (Backoffice - Petugas only)"""
-    if not get_medical_record(db, record_id):
+    if not await get_medical_record(db, record_id):
         raise HTTPException(status_code=404, detail="Medical record not found")
     
     lab_data = lab_result.model_dump()
     lab_data["lab_id"] = str(uuid.uuid4())
     lab_data["record_id"] = record_id
-    return create_lab_result(db, lab_data)
+    return await create_lab_result(db, lab_data)
 
 @router.get("/{record_id}/lab-results", response_model=List[LabResultResponse])
 async def get_lab_results(
     record_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all lab results for a medical record (Backoffice - Petugas only)"""
-    return get_record_lab_results(db, record_id)
+    return await get_record_lab_results(db, record_id)
 
 
 # Patient Detail Routes (Backoffice - Petugas only)
@@ -276,7 +326,7 @@ async def get_lab_results(
 async def get_patient_detail(
     patient_id: int,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get complete patient detail with all medical data
@@ -301,7 +351,7 @@ async def get_patient_detail(
     
     try:
         # Get complete patient data
-        patient_data = get_complete_patient_data(db, patient_id)
+        patient_data = await get_complete_patient_data(db, patient_id)
         
         if not patient_data:
             raise HTTPException(
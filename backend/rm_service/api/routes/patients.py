@@ -2,16 +2,16 @@
 Patient Management API Routes (Admin Only)
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_petugas_for_rm
 from ...schemas.patient import PatientInfo, PatientUpdate, PatientDetailResponse, PatientListResponse
 from ...schemas.diagnosis import DiagnosisResponse
 from ...schemas.prescription import PrescriptionResponse
 from ...schemas.lab_result import LabResultResponse
-from ...services.crud import (
+from ...services.crud_async import (
     get_patient_by_id,
     search_patients,
     get_all_patients,
@@ -19,16 +19,29 @@ from ...services.crud import (
     delete_patient,
     get_complete_patient_data,
 )
+from auth.core.pagination import next_cursor
 
 router = APIRouter(prefix="/patients", tags=["Patient Management (Admin)"])
 
+async def _list_patients_page(db, search, skip, limit, cursor, include_total):
+    """One page of patients; the total is counted on the first page unless asked otherwise"""
+    if include_total is None:
+        include_total = cursor is None
+    if search:
+        return await search_patients(
+            db, search_query=search, skip=skip, limit=limit, cursor=cursor, include_total=include_total
+        )
+    return await get_all_patients(db, skip=skip, limit=limit, cursor=cursor, include_total=include_total)
+
 @router.get("/", response_model=PatientListResponse, status_code=status.HTTP_200_OK)
 async def list_patients(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     search: Optional[str] = Query(None, description="Search query (name, email, KTP, phone)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces skip)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: only without cursor)"),
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get list of all patients with pagination and optional search
@@ -38,12 +51,11 @@ async def list_patients(
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Maximum number of records to return (1-1000)
     - **search**: Optional search query to filter by name, email, KTP number, or phone number
+    - **cursor**: Keyset cursor from `next_cursor`; every page costs the same as the first
+    - **include_total**: Run the COUNT(*) for `total` (default only on the first page)
     """
     try:
-        if search:
-            patients, total = search_patients(db, search_query=search, skip=skip, limit=limit)
-        else:
-            patients, total = get_all_patients(db, skip=skip, limit=limit)
+        patients, total = await _list_patients_page(db, search, skip, limit, cursor, include_total)
         
         # Convert to PatientInfo schema
         patient_list = [PatientInfo.model_validate(patient) for patient in patients]
@@ -52,8 +64,11 @@ async def list_patients(
             patients=patient_list,
             total=total,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor(patients, limit, "created_at")
         )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -65,8 +80,10 @@ async def search_patients_endpoint(
     q: str = Query(..., description="Search query (name, email, KTP, phone)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces skip)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: only without cursor)"),
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search patients by name, email, KTP number, or phone number
@@ -76,9 +93,11 @@ async def search_patients_endpoint(
     - **q**: Search query string
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Maximum number of records to return (1-1000)
+    - **cursor**: Keyset cursor from `next_cursor`; every page costs the same as the first
+    - **include_total**: Run the COUNT(*) for `total` (default only on the first page)
     """
     try:
-        patients, total = search_patients(db, search_query=q, skip=skip, limit=limit)
+        patients, total = await _list_patients_page(db, q, skip, limit, cursor, include_total)
         
         # Convert to PatientInfo schema
         patient_list = [PatientInfo.model_validate(patient) for patient in patients]
@@ -87,8 +106,11 @@ async def search_patients_endpoint(
             patients=patient_list,
             total=total,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor(patients, limit, "created_at")
         )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -99,7 +121,7 @@ async def search_patients_endpoint(
 async def get_patient(
     patient_id: int,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get patient information by ID
@@ -109,7 +131,7 @@ async def get_patient(
     - **patient_id**: Patient ID
     """
     try:
-        patient = get_patient_by_id(db, patient_id)
+        patient = await get_patient_by_id(db, patient_id)
         if not patient:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -129,7 +151,7 @@ async def get_patient(
 async def get_patient_detail(
     patient_id: int,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get complete patient detail including all medical records, allergies, and documents
@@ -139,7 +161,7 @@ async def get_patient_detail(
     - **patient_id**: Patient ID
     """
     try:
-        patient_data = get_complete_patient_data(db, patient_id)
+        patient_data = await get_complete_patient_data(db, patient_id)
         if not patient_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -201,7 +223,7 @@ async def update_patient_info(
     patient_id: int,
     patient_update: PatientUpdate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update patient information
@@ -213,7 +235,7 @@ async def update_patient_info(
     """
     try:
         # Check if patient exists
-        patient = get_patient_by_id(db, patient_id)
+        patient = await get_patient_by_id(db, patient_id)
         if not patient:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -224,7 +246,7 @@ async def update_patient_info(
         update_data = patient_update.model_dump(exclude_unset=True)
         
         # Update patient
-        updated_patient = update_patient(db, patient_id, update_data)
+        updated_patient = await update_patient(db, patient_id, update_data)
         if not updated_patient:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -245,7 +267,7 @@ async def delete_patient_endpoint(
     patient_id: int,
     hard_delete: bool = Query(False, description="Permanently delete patient (default: soft delete)"),
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete patient (soft delete by default)
@@ -257,7 +279,7 @@ async def delete_patient_endpoint(
     """
     try:
         # Check if patient exists
-        patient = get_patient_by_id(db, patient_id)
+        patient = await get_patient_by_id(db, patient_id)
         if not patient:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -265,7 +287,7 @@ async def delete_patient_endpoint(
             )
         
         # Delete patient
-        success = delete_patient(db, patient_id, soft_delete=not hard_delete)
+        success = await delete_patient(db, patient_id, soft_delete=not hard_delete)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
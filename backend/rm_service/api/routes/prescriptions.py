@@ -5,13 +5,13 @@ import uuid
 import sys
 import os
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_petugas_for_rm
 from ...schemas.prescription import PrescriptionCreate, PrescriptionResponse
-from ...services.crud import (
+from ...services.crud_async import (
     create_prescription,
     get_prescription_by_id,
     get_record_prescriptions,
@@ -27,40 +27,40 @@ router = APIRouter(prefix="/prescriptions", tags=["Prescriptions"])
 async def create_prescription_route(
     prescription: PrescriptionCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new prescription (Backoffice - Petugas only)"""
     # Verify that the medical record exists
-    record = get_medical_record(db, prescription.record_id)
+    record = await get_medical_record(db, prescription.record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     
     prescription_data = prescription.model_dump()
     prescription_data["prescription_id"] = str(uuid.uuid4())
-    return create_prescription(db, prescription_data)
+    return await create_prescription(db, prescription_data)
 
 @router.get("/record/{record_id}", response_model=List[PrescriptionResponse])
 async def get_record_prescriptions_route(
     record_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all prescriptions for a medical record (Backoffice - Petugas only)"""
-    record = get_medical_record(db, record_id)
+    record = await get_medical_record(db, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     
-    prescriptions = get_record_prescriptions(db, record_id)
+    prescriptions = await get_record_prescriptions(db, record_id)
     return [PrescriptionResponse.model_validate(p) for p in prescriptions]
 
 @router.get("/{prescription_id}", response_model=PrescriptionResponse)
 async def get_prescription_route(
     prescription_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get prescription by ID (Backoffice - Petugas only)"""
-    prescription = get_prescription_by_id(db, prescription_id)
+    prescription = await get_prescription_by_id(db, prescription_id)
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     
@@ -71,15 +71,15 @@ async def update_prescription_route(
     prescription_id: str,
     prescription: PrescriptionCreate,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a prescription (Backoffice - Petugas only)"""
-    existing_prescription = get_prescription_by_id(db, prescription_id)
+    existing_prescription = await get_prescription_by_id(db, prescription_id)
     if not existing_prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     
     prescription_data = prescription.model_dump()
-    updated_prescription = update_prescription(db, prescription_id, prescription_data)
+    updated_prescription = await update_prescription(db, prescription_id, prescription_data)
     if not updated_prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     return PrescriptionResponse.model_validate(updated_prescription)
@@ -88,14 +88,14 @@ async def update_prescription_route(
 async def delete_prescription_route(
     prescription_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a prescription (Backoffice - Petugas only)"""
-    existing_prescription = get_prescription_by_id(db, prescription_id)
+    existing_prescription = await get_prescription_by_id(db, prescription_id)
     if not existing_prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     
-    success = delete_prescription(db, prescription_id)
+    success = await delete_prescription(db, prescription_id)
     if not success:
         raise HTTPException(status_code=404, detail="Prescription not found")
     return None
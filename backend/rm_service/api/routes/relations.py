@@ -2,14 +2,15 @@
 API Routes untuk cek relasi data
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import Dict, List
 import sys
 import os
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_petugas_for_rm
+from ...services.crud_async import get_patient_data_summary as load_patient_data_summary
 
 router = APIRouter(prefix="/relations", tags=["Data Relations"])
 
@@ -17,60 +18,26 @@ router = APIRouter(prefix="/relations", tags=["Data Relations"])
 async def get_patient_data_summary(
     patient_id: int,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get summary data untuk patient tertentu (Backoffice - Petugas only)
     **Requires petugas authentication**
     """
     
-    # Query untuk mendapatkan summary
-    query = text("""
-        SELECT 
-            u.id,
-            u.name,
-            u.email,
-            COUNT(DISTINCT mr.record_id) AS total_medical_records,
-            COUNT(DISTINCT d.diagnosis_id) AS total_diagnoses,
-            COUNT(DISTINCT p.prescription_id) AS total_prescriptions,
-            COUNT(DISTINCT lr.lab_id) AS total_lab_results,
-            COUNT(DISTINCT a.allergy_id) AS total_allergies,
-            COUNT(DISTINCT md.doc_id) AS total_documents
-        FROM users u
-        LEFT JOIN medical_records mr ON u.id = mr.patient_id
-        LEFT JOIN diagnoses d ON mr.record_id = d.record_id
-        LEFT JOIN prescriptions p ON mr.record_id = p.record_id
-        LEFT JOIN lab_results lr ON mr.record_id = lr.record_id
-        LEFT JOIN allergies a ON u.id = a.patient_id
-        LEFT JOIN medical_documents md ON u.id = md.patient_id
-        WHERE u.id = :patient_id
-        GROUP BY u.id, u.name, u.email
-    """)
-    
-    result = db.execute(query, {"patient_id": patient_id}).fetchone()
+    # Counters cached per data version (patient_stats) - no six-way JOIN
+    summary = await load_patient_data_summary(db, patient_id)
     
-    if not result:
+    if not summary:
         raise HTTPException(status_code=404, detail="Patient not found")
     
-    return {
-        "patient_id": result[0],
-        "patient_name": result[1],
-        "patient_email": result[2],
-        "summary": {
-            "total_medical_records": result[3] or 0,
-            "total_diagnoses": result[4] or 0,
-            "total_prescriptions": result[5] or 0,
-            "total_lab_results": result[6] or 0,
-            "total_allergies": result[7] or 0,
-            "total_documents": result[8] or 0
-        }
-    }
+    return summary
 
 @router.get("/record/{record_id}/full-relation")
 async def get_record_full_relation(
     record_id: str,
     current_petugas = Depends(get_current_active_petugas_for_rm),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get full relation data untuk satu medical record (Backoffice - Petugas only)
@@ -94,7 +61,7 @@ async def get_record_full_relation(
         WHERE mr.record_id = :record_id
     """)
     
-    record = db.execute(record_query, {"record_id": record_id}).fetchone()
+    record = (await db.execute(record_query, {"record_id": record_id})).fetchone()
     
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
@@ -105,7 +72,7 @@ async def get_record_full_relation(
         FROM diagnoses
         WHERE record_id = :record_id
     """)
-    diagnoses = db.execute(diagnoses_query, {"record_id": record_id}).fetchall()
+    diagnoses = (await db.execute(diagnoses_query, {"record_id": record_id})).fetchall()
     
     # Get prescriptions
     prescriptions_query = text("""
@@ -113,7 +80,7 @@ async def get_record_full_relation(
         FROM prescriptions
         WHERE record_id = :record_id
     """)
-    prescriptions = db.execute(prescriptions_query, {"record_id": record_id}).fetchall()
+    prescriptions = (await db.execute(prescriptions_query, {"record_id": record_id})).fetchall()
     
     # Get lab results
     lab_query = text("""
@@ -121,7 +88,7 @@ async def get_record_full_relation(
         FROM lab_results
         WHERE record_id = :record_id
     """)
-    lab_results = db.execute(lab_query, {"record_id": record_id}).fetchall()
+    lab_results = (await db.execute(lab_query, {"record_id": record_id})).fetchall()
     
     return {
         "record_id": record[0],
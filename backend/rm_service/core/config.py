@@ -13,3 +13,6 @@ from auth.core.config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
 SERVICE_NAME = "Medical Records Service"
 SERVICE_VERSION = "1.0.0"
 
+# Patient search (staff search box) - see services/patient_search.py
+PATIENT_SEARCH_FULLTEXT = os.getenv("PATIENT_SEARCH_FULLTEXT", "true").lower() == "true"  # Needs DB/add_patient_search_indexes.sql
+PATIENT_SEARCH_FUZZY_MIN_LENGTH = int(os.getenv("PATIENT_SEARCH_FUZZY_MIN_LENGTH", "4"))  # Typo-tolerant name matching from this query length
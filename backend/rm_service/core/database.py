@@ -6,7 +6,8 @@ import os
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from auth.core.database import engine, Base, get_db
+from auth.core.database import engine, Base, get_db, get_pool_stats, primary_session, ReadYourWritesMiddleware
+from auth.core.async_database import get_async_db
 
-__all__ = ["engine", "Base", "get_db"]
+__all__ = ["engine", "Base", "get_db", "get_async_db", "get_pool_stats", "primary_session", "ReadYourWritesMiddleware"]
 
@@ -13,8 +13,11 @@ from .api.routes import (
     patients
 )
 from .core.config import SERVICE_NAME, SERVICE_VERSION
+from .core.database import get_pool_stats, ReadYourWritesMiddleware
 
 app = FastAPI(title=SERVICE_NAME, version=SERVICE_VERSION)
+# Reads after a client's own write stay on the primary (no-op without a read replica)
+app.add_middleware(ReadYourWritesMiddleware)
 
 # Include routers
 app.include_router(medical_records.router)
@@ -34,3 +37,7 @@ async def root():
         "version": SERVICE_VERSION
     }
 
+@app.get("/health/db/pool")
+async def db_pool_stats():
+    """Connection pool statistics of this process (checked out, overflow, wait time)"""
+    return get_pool_stats()
@@ -11,10 +11,14 @@ __all__ = [
     "MedicalRecordCreate",
     "MedicalRecordResponse",
     "MedicalRecordFull",
+    "MedicalVisitCreate",
+    "DiagnosisItem",
     "DiagnosisCreate",
     "DiagnosisResponse",
+    "PrescriptionItem",
     "PrescriptionCreate",
     "PrescriptionResponse",
+    "LabResultItem",
     "LabResultCreate",
     "LabResultResponse",
     "AllergyCreate",
@@ -5,13 +5,16 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
 
-class DiagnosisCreate(BaseModel):
-    """Schema for creating diagnosis"""
-    record_id: str
+class DiagnosisItem(BaseModel):
+    """Diagnosis fields without record_id (nested in a visit payload)"""
     icd_code: Optional[str] = None
     diagnosis_name: str
     primary_flag: bool = False
 
+class DiagnosisCreate(DiagnosisItem):
+    """Schema for creating diagnosis"""
+    record_id: str
+
 class DiagnosisResponse(BaseModel):
     """Schema for diagnosis response"""
     diagnosis_id: str
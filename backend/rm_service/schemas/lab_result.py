@@ -5,9 +5,8 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
 
-class LabResultCreate(BaseModel):
-    """Schema for creating lab result"""
-    record_id: str
+class LabResultItem(BaseModel):
+    """Lab result fields without record_id (nested in a visit payload)"""
     test_name: str
     result_value: Optional[str] = None
     result_unit: Optional[str] = None
@@ -15,6 +14,10 @@ class LabResultCreate(BaseModel):
     interpretation: Optional[str] = None
     attachment_url: Optional[str] = None
 
+class LabResultCreate(LabResultItem):
+    """Schema for creating lab result"""
+    record_id: str
+
 class LabResultResponse(BaseModel):
     """Schema for lab result response"""
     lab_id: str
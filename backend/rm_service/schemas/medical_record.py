@@ -6,6 +6,10 @@ from datetime import datetime
 from typing import Optional, List
 from enum import Enum
 
+from .diagnosis import DiagnosisItem
+from .prescription import PrescriptionItem
+from .lab_result import LabResultItem
+
 class VisitTypeEnum(str, Enum):
     OUTPATIENT = "outpatient"
     INPATIENT = "inpatient"
@@ -21,6 +25,12 @@ class MedicalRecordCreate(BaseModel):
     doctor_name: Optional[str] = None
     facility_name: Optional[str] = None
 
+class MedicalVisitCreate(MedicalRecordCreate):
+    """Complete visit (record + diagnoses, prescriptions, lab results) written in one transaction"""
+    diagnoses: List[DiagnosisItem] = []
+    prescriptions: List[PrescriptionItem] = []
+    lab_results: List[LabResultItem] = []
+
 class MedicalRecordResponse(BaseModel):
     """Schema for medical record response"""
     record_id: str
@@ -49,9 +49,10 @@ class PatientDetailResponse(BaseModel):
 class PatientListResponse(BaseModel):
     """Response for patient list with pagination"""
     patients: List[PatientInfo]
-    total: int
+    total: Optional[int] = None  # Only computed when include_total (default: first page only)
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page
     
     class Config:
         from_attributes = True
@@ -5,9 +5,8 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
 
-class PrescriptionCreate(BaseModel):
-    """Schema for creating prescription"""
-    record_id: str
+class PrescriptionItem(BaseModel):
+    """Prescription fields without record_id (nested in a visit payload)"""
     drug_name: str
     drug_code: Optional[str] = None
     dosage: Optional[str] = None
@@ -15,6 +14,10 @@ class PrescriptionCreate(BaseModel):
     duration_days: Optional[int] = None
     notes: Optional[str] = None
 
+class PrescriptionCreate(PrescriptionItem):
+    """Schema for creating prescription"""
+    record_id: str
+
 class PrescriptionResponse(BaseModel):
     """Schema for prescription response"""
     prescription_id: str
@@ -2,7 +2,7 @@
 CRUD operations for Medical Records
 """
 from sqlalchemy.orm import Session
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import uuid
 
 from ..models.medical_record import MedicalRecord
@@ -11,15 +11,33 @@ from ..models.prescription import Prescription
 from ..models.lab_result import LabResult
 from ..models.allergy import Allergy
 from ..models.medical_document import MedicalDocument
+# sys.path to backend/ is set up by ..core.database (imported by the models)
+from auth.core.data_versions import (
+    bump_patient_data_version,
+    bump_patient_data_versions,
+    RECORDS,
+    DIAGNOSES,
+    PRESCRIPTIONS,
+    LAB_RESULTS,
+    ALLERGIES,
+    DOCUMENTS,
+    RECORD_COLLECTIONS
+)
+from auth.core.database import primary_session
+from auth.core.pagination import decode_cursor, keyset_before
+from .patient_search import patient_search_query, fuzzy_name_matches, fulltext_index_missing
+from .mappers import (
+    RECORD_COLUMNS, ALLERGY_COLUMNS, DOCUMENT_COLUMNS,
+    visit_type_from_db, severity_from_db, file_type_from_db,
+    medical_record_rows, allergy_rows, document_rows,
+)
 
 # Medical Records CRUD
-def create_medical_record(db: Session, record_data: dict) -> MedicalRecord:
-    """Create a new medical record"""
-    from sqlalchemy import text
+def _visit_type_db_value(visit_type_value) -> str:
+    """visit_type from a schema/enum/string as the UPPERCASE value stored in MySQL"""
     from ..models.medical_record import VisitType
     
     # Convert visit_type to UPPERCASE for database (MySQL enum uses UPPERCASE: OUTPATIENT, INPATIENT, EMERGENCY)
-    visit_type_value = record_data.get("visit_type")
     if visit_type_value:
         # Handle if it's an enum object (from Pydantic schema - value is lowercase)
         if hasattr(visit_type_value, 'value'):
@@ -40,125 +58,146 @@ def create_medical_record(db: Session, record_data: dict) -> MedicalRecord:
     valid_types = ["OUTPATIENT", "INPATIENT", "EMERGENCY"]
     if visit_type_str not in valid_types:
         raise ValueError(f"Invalid visit_type: {visit_type_str}. Must be one of {valid_types}")
-    
-    # Use raw SQL to insert with proper enum value (UPPERCASE for MySQL enum)
-    query = text("""
-        INSERT INTO medical_records 
-        (record_id, patient_id, visit_date, visit_type, diagnosis_summary, notes, doctor_name, facility_name)
-        VALUES 
-        (:record_id, :patient_id, :visit_date, :visit_type, :diagnosis_summary, :notes, :doctor_name, :facility_name)
-    """)
-    
-    db.execute(query, {
+    return visit_type_str
+
+_INSERT_MEDICAL_RECORD = """
+    INSERT INTO medical_records 
+    (record_id, patient_id, visit_date, visit_type, diagnosis_summary, notes, doctor_name, facility_name)
+    VALUES 
+    (:record_id, :patient_id, :visit_date, :visit_type, :diagnosis_summary, :notes, :doctor_name, :facility_name)
+"""
+
+def _medical_record_params(record_data: dict) -> dict:
+    return {
         "record_id": record_data.get("record_id"),
         "patient_id": record_data.get("patient_id"),
         "visit_date": record_data.get("visit_date"),
-        "visit_type": visit_type_str,  # UPPERCASE for MySQL enum
+        "visit_type": _visit_type_db_value(record_data.get("visit_type")),  # UPPERCASE for MySQL enum
         "diagnosis_summary": record_data.get("diagnosis_summary"),
         "notes": record_data.get("notes"),
         "doctor_name": record_data.get("doctor_name"),
         "facility_name": record_data.get("facility_name"),
-    })
+    }
+
+def create_medical_record(db: Session, record_data: dict) -> MedicalRecord:
+    """Create a new medical record"""
+    from sqlalchemy import text
+    
+    # Use raw SQL to insert with proper enum value (UPPERCASE for MySQL enum)
+    db.execute(text(_INSERT_MEDICAL_RECORD), _medical_record_params(record_data))
+    bump_patient_data_version(db, patient_id=record_data.get("patient_id"), collections=(RECORDS,))
     db.commit()
     
     # Get the created record using get_medical_record
     return get_medical_record(db, record_data.get("record_id"))
 
+_INSERT_DIAGNOSIS = """
+    INSERT INTO diagnoses (diagnosis_id, record_id, icd_code, diagnosis_name, primary_flag)
+    VALUES (:diagnosis_id, :record_id, :icd_code, :diagnosis_name, :primary_flag)
+"""
+
+_INSERT_PRESCRIPTION = """
+    INSERT INTO prescriptions
+    (prescription_id, record_id, drug_name, drug_code, dosage, frequency, duration_days, notes)
+    VALUES
+    (:prescription_id, :record_id, :drug_name, :drug_code, :dosage, :frequency, :duration_days, :notes)
+"""
+
+_INSERT_LAB_RESULT = """
+    INSERT INTO lab_results
+    (lab_id, record_id, test_name, result_value, result_unit, normal_range, interpretation, attachment_url)
+    VALUES
+    (:lab_id, :record_id, :test_name, :result_value, :result_unit, :normal_range, :interpretation, :attachment_url)
+"""
+
+def create_medical_visit(db: Session, visit_data: dict) -> dict:
+    """
+    Create a medical record with its diagnoses, prescriptions and lab results in one transaction
+    Children are written with one executemany INSERT per table and a single commit;
+    nothing is stored if any insert fails.
+    Returns {"record", "diagnoses", "prescriptions", "lab_results"} as read back from the DB.
+    """
+    from sqlalchemy import text
+    
+    record_id = visit_data.get("record_id") or str(uuid.uuid4())
+    record_params = _medical_record_params({**visit_data, "record_id": record_id})
+    children = (
+        (_INSERT_DIAGNOSIS, "diagnosis_id", visit_data.get("diagnoses") or []),
+        (_INSERT_PRESCRIPTION, "prescription_id", visit_data.get("prescriptions") or []),
+        (_INSERT_LAB_RESULT, "lab_id", visit_data.get("lab_results") or []),
+    )
+    
+    try:
+        db.execute(text(_INSERT_MEDICAL_RECORD), record_params)
+        for insert_sql, id_column, items in children:
+            if items:
+                db.execute(text(insert_sql), [
+                    {**item, id_column: str(uuid.uuid4()), "record_id": record_id} for item in items
+                ])
+        bump_patient_data_version(db, patient_id=record_params["patient_id"], collections=(RECORDS, DIAGNOSES, PRESCRIPTIONS, LAB_RESULTS))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    return {
+        "record": get_medical_record(db, record_id),
+        "diagnoses": get_children_by_record(db, Diagnosis, [record_id]).get(record_id, []),
+        "prescriptions": get_children_by_record(db, Prescription, [record_id]).get(record_id, []),
+        "lab_results": get_children_by_record(db, LabResult, [record_id]).get(record_id, []),
+    }
+
 def get_medical_record(db: Session, record_id: str) -> Optional[MedicalRecord]:
     """Get medical record by ID"""
     from sqlalchemy import text
-    from ..models.medical_record import VisitType
     
     # Query with raw SQL to handle enum properly
-    query = text("""
-        SELECT record_id, patient_id, visit_date, visit_type, diagnosis_summary, 
-               notes, doctor_name, facility_name, created_at
+    row = db.execute(text(f"""
+        SELECT {RECORD_COLUMNS}
         FROM medical_records
         WHERE record_id = :record_id
-    """)
-    
-    result = db.execute(query, {"record_id": record_id}).first()
+    """), {"record_id": record_id}).mappings().first()
     
-    if not result:
+    if not row:
         return None
-    
-    # Convert visit_type string to enum
-    # Database stores UPPERCASE (OUTPATIENT, INPATIENT, EMERGENCY)
-    # Python enum uses lowercase values
-    visit_type_str = result.visit_type
-    if visit_type_str:
-        visit_type_str = visit_type_str.lower()  # Convert UPPERCASE to lowercase
-    
-    visit_type_enum = None
-    for vt in VisitType:
-        if vt.value == visit_type_str:
-            visit_type_enum = vt
-            break
-    
-    if not visit_type_enum:
-        visit_type_enum = VisitType.OUTPATIENT  # default
-    
-    return MedicalRecord(
-        record_id=result.record_id,
-        patient_id=result.patient_id,
-        visit_date=result.visit_date,
-        visit_type=visit_type_enum,
-        diagnosis_summary=result.diagnosis_summary,
-        notes=result.notes,
-        doctor_name=result.doctor_name,
-        facility_name=result.facility_name,
-        created_at=result.created_at
-    )
+    return MedicalRecord(**{**row, "visit_type": visit_type_from_db(row["visit_type"])})
 
-def get_patient_records(db: Session, patient_id: int, skip: int = 0, limit: int = 100) -> List[MedicalRecord]:
-    """Get all medical records for a patient"""
+def _select_patient_records(db: Session, patient_id: int, skip: int, limit: int, cursor: Optional[str]):
+    """Execute the patient records page query (RECORD_COLUMNS, newest visit first)"""
     from sqlalchemy import text
     
+    params: Dict[str, Any] = {"patient_id": patient_id, "limit": limit, "skip": skip}
+    keyset_filter = ""
+    if cursor:
+        params["cursor_visit_date"], params["cursor_record_id"] = decode_cursor(cursor)
+        params["skip"] = 0
+        keyset_filter = """
+          AND (visit_date < :cursor_visit_date
+               OR (visit_date = :cursor_visit_date AND record_id < :cursor_record_id))"""
+    
     # Query with raw SQL to handle enum properly
-    query = text("""
-        SELECT record_id, patient_id, visit_date, visit_type, diagnosis_summary, 
-               notes, doctor_name, facility_name, created_at
+    return db.execute(text(f"""
+        SELECT {RECORD_COLUMNS}
         FROM medical_records
-        WHERE patient_id = :patient_id
-        ORDER BY visit_date DESC
+        WHERE patient_id = :patient_id{keyset_filter}
+        ORDER BY visit_date DESC, record_id DESC
         LIMIT :limit OFFSET :skip
-    """)
-    
-    result = db.execute(query, {"patient_id": patient_id, "limit": limit, "skip": skip})
-    records = []
-    
-    for row in result:
-        # Convert visit_type string to enum
-        # Database stores UPPERCASE (OUTPATIENT, INPATIENT, EMERGENCY)
-        # Python enum uses lowercase values
-        visit_type_str = row.visit_type
-        if visit_type_str:
-            visit_type_str = visit_type_str.lower()  # Convert UPPERCASE to lowercase
-        
-        from ..models.medical_record import VisitType
-        visit_type_enum = None
-        for vt in VisitType:
-            if vt.value == visit_type_str:
-                visit_type_enum = vt
-                break
-        
-        if not visit_type_enum:
-            visit_type_enum = VisitType.OUTPATIENT  # default
-        
-        record = MedicalRecord(
-            record_id=row.record_id,
-            patient_id=row.patient_id,
-            visit_date=row.visit_date,
-            visit_type=visit_type_enum,
-            diagnosis_summary=row.diagnosis_summary,
-            notes=row.notes,
-            doctor_name=row.doctor_name,
-            facility_name=row.facility_name,
-            created_at=row.created_at
-        )
-        records.append(record)
-    
-    return records
+    """), params)
+
+def get_patient_records(db: Session, patient_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[MedicalRecord]:
+    """
+    Get all medical records for a patient (newest visit first)
+    With a cursor (see auth.core.pagination) the page starts after the cursor's
+    (visit_date, record_id) and skip is ignored, so deep pages cost the same as page 1.
+    """
+    return [
+        MedicalRecord(**{**row, "visit_type": visit_type_from_db(row["visit_type"])})
+        for row in _select_patient_records(db, patient_id, skip, limit, cursor).mappings()
+    ]
+
+def list_patient_records(db: Session, patient_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[dict]:
+    """get_patient_records as MedicalRecordResponse-shaped dicts (no ORM instances) for list endpoints"""
+    return medical_record_rows(_select_patient_records(db, patient_id, skip, limit, cursor))
 
 def update_medical_record(db: Session, record_id: str, record_data: dict) -> Optional[MedicalRecord]:
     """Update a medical record"""
@@ -213,6 +252,10 @@ def update_medical_record(db: Session, record_id: str, record_data: dict) -> Opt
     """)
     
     db.execute(query, update_values)
+    # Moving the record to another patient moves everything attached to it
+    moved = "patient_id" in update_values
+    bump_patient_data_versions(db, [record.patient_id, update_values.get("patient_id")],
+                               collections=RECORD_COLLECTIONS if moved else (RECORDS,))
     db.commit()
     
     return get_medical_record(db, record_id)
@@ -226,6 +269,7 @@ def delete_medical_record(db: Session, record_id: str) -> bool:
     from sqlalchemy import text
     query = text("DELETE FROM medical_records WHERE record_id = :record_id")
     db.execute(query, {"record_id": record_id})
+    bump_patient_data_version(db, patient_id=record.patient_id, collections=RECORD_COLLECTIONS)
     db.commit()
     return True
 
@@ -234,6 +278,7 @@ def create_diagnosis(db: Session, diagnosis_data: dict) -> Diagnosis:
     """Create a new diagnosis"""
     diagnosis = Diagnosis(**diagnosis_data)
     db.add(diagnosis)
+    bump_patient_data_version(db, record_id=diagnosis_data.get("record_id"), collections=(DIAGNOSES,))
     db.commit()
     db.refresh(diagnosis)
     return diagnosis
@@ -256,6 +301,7 @@ def update_diagnosis(db: Session, diagnosis_id: str, diagnosis_data: dict) -> Op
         if hasattr(diagnosis, key):
             setattr(diagnosis, key, value)
     
+    bump_patient_data_version(db, record_id=diagnosis.record_id, collections=(DIAGNOSES,))
     db.commit()
     db.refresh(diagnosis)
     return diagnosis
@@ -266,6 +312,7 @@ def delete_diagnosis(db: Session, diagnosis_id: str) -> bool:
     if not diagnosis:
         return False
     
+    bump_patient_data_version(db, record_id=diagnosis.record_id, collections=(DIAGNOSES,))
     db.delete(diagnosis)
     db.commit()
     return True
@@ -275,6 +322,7 @@ def create_prescription(db: Session, prescription_data: dict) -> Prescription:
     """Create a new prescription"""
     prescription = Prescription(**prescription_data)
     db.add(prescription)
+    bump_patient_data_version(db, record_id=prescription_data.get("record_id"), collections=(PRESCRIPTIONS,))
     db.commit()
     db.refresh(prescription)
     return prescription
@@ -330,6 +378,7 @@ def update_prescription(db: Session, prescription_id: str, prescription_data: di
         if hasattr(prescription, key):
             setattr(prescription, key, value)
     
+    bump_patient_data_version(db, record_id=prescription.record_id, collections=(PRESCRIPTIONS,))
     db.commit()
     db.refresh(prescription)
     return prescription
@@ -340,6 +389,7 @@ def delete_prescription(db: Session, prescription_id: str) -> bool:
     if not prescription:
         return False
     
+    bump_patient_data_version(db, record_id=prescription.record_id, collections=(PRESCRIPTIONS,))
     db.delete(prescription)
     db.commit()
     return True
@@ -349,6 +399,7 @@ def create_lab_result(db: Session, lab_data: dict) -> LabResult:
     """Create a new lab result"""
     lab_result = LabResult(**lab_data)
     db.add(lab_result)
+    bump_patient_data_version(db, record_id=lab_data.get("record_id"), collections=(LAB_RESULTS,))
     db.commit()
     db.refresh(lab_result)
     return lab_result
@@ -357,6 +408,19 @@ def get_record_lab_results(db: Session, record_id: str) -> List[LabResult]:
     """Get all lab results for a medical record"""
     return db.query(LabResult).filter(LabResult.record_id == record_id).all()
 
+def get_children_by_record(db: Session, model, record_ids: list) -> Dict[Any, list]:
+    """
+    Load diagnoses/prescriptions/lab results of many records with one IN query
+    record_ids are MedicalRecord.record_id values; returns record_id -> rows
+    (records without children are missing from the dict).
+    """
+    grouped: Dict[Any, list] = {}
+    if not record_ids:
+        return grouped
+    for row in db.query(model).filter(model.record_id.in_(record_ids)).all():
+        grouped.setdefault(row.record_id, []).append(row)
+    return grouped
+
 def get_lab_result_by_id(db: Session, lab_id: str) -> Optional[LabResult]:
     """Get lab result by ID"""
     return db.query(LabResult).filter(LabResult.lab_id == lab_id).first()
@@ -371,6 +435,7 @@ def update_lab_result(db: Session, lab_id: str, lab_data: dict) -> Optional[LabR
         if hasattr(lab_result, key):
             setattr(lab_result, key, value)
     
+    bump_patient_data_version(db, record_id=lab_result.record_id, collections=(LAB_RESULTS,))
     db.commit()
     db.refresh(lab_result)
     return lab_result
@@ -381,6 +446,7 @@ def delete_lab_result(db: Session, lab_id: str) -> bool:
     if not lab_result:
         return False
     
+    bump_patient_data_version(db, record_id=lab_result.record_id, collections=(LAB_RESULTS,))
     db.delete(lab_result)
     db.commit()
     return True
@@ -390,87 +456,46 @@ def create_allergy(db: Session, allergy_data: dict) -> Allergy:
     """Create a new allergy"""
     allergy = Allergy(**allergy_data)
     db.add(allergy)
+    bump_patient_data_version(db, patient_id=allergy_data.get("patient_id"), collections=(ALLERGIES,))
     db.commit()
     db.refresh(allergy)
     return allergy
 
-def get_patient_allergies(db: Session, patient_id: int) -> List[Allergy]:
-    """Get all allergies for a patient"""
+def _select_patient_allergies(db: Session, patient_id: int):
     from sqlalchemy import text
     
     # Query with raw SQL to handle enum properly
-    query = text("""
-        SELECT allergy_id, patient_id, allergy_name, severity, notes, created_at, updated_at
+    return db.execute(text(f"""
+        SELECT {ALLERGY_COLUMNS}
         FROM allergies
         WHERE patient_id = :patient_id
         ORDER BY created_at DESC
-    """)
-    
-    result = db.execute(query, {"patient_id": patient_id})
-    allergies = []
-    
-    for row in result:
-        # Convert severity string to enum
-        severity_str = row.severity.lower() if row.severity else "moderate"
-        from ..models.allergy import AllergySeverity
-        severity_enum = None
-        for sev in AllergySeverity:
-            if sev.value == severity_str:
-                severity_enum = sev
-                break
-        
-        if not severity_enum:
-            severity_enum = AllergySeverity.MODERATE  # default
-        
-        allergy = Allergy(
-            allergy_id=row.allergy_id,
-            patient_id=row.patient_id,
-            allergy_name=row.allergy_name,
-            severity=severity_enum,
-            notes=row.notes,
-            created_at=row.created_at,
-            updated_at=row.updated_at
-        )
-        allergies.append(allergy)
-    
-    return allergies
+    """), {"patient_id": patient_id})
+
+def get_patient_allergies(db: Session, patient_id: int) -> List[Allergy]:
+    """Get all allergies for a patient"""
+    return [
+        Allergy(**{**row, "severity": severity_from_db(row["severity"])})
+        for row in _select_patient_allergies(db, patient_id).mappings()
+    ]
+
+def list_patient_allergies(db: Session, patient_id: int) -> List[dict]:
+    """get_patient_allergies as AllergyResponse-shaped dicts (no ORM instances) for list endpoints"""
+    return allergy_rows(_select_patient_allergies(db, patient_id))
 
 def get_allergy_by_id(db: Session, allergy_id: str) -> Optional[Allergy]:
     """Get allergy by ID"""
     from sqlalchemy import text
-    from ..models.allergy import AllergySeverity
     
-    query = text("""
-        SELECT allergy_id, patient_id, allergy_name, severity, notes, created_at, updated_at
+    row = db.execute(text(f"""
+        SELECT {ALLERGY_COLUMNS}
         FROM allergies
         WHERE allergy_id = :allergy_id
-    """)
-    
-    result = db.execute(query, {"allergy_id": allergy_id}).first()
+    """), {"allergy_id": allergy_id}).mappings().first()
     
-    if not result:
+    if not row:
         return None
-    
-    # Convert severity string to enum
-    severity_str = result.severity.lower() if result.severity else "moderate"
-    severity_enum = None
-    for sev in AllergySeverity:
-        if sev.value == severity_str:
-            severity_enum = sev
-            break
-    
-    if not severity_enum:
-        severity_enum = AllergySeverity.MODERATE  # default
-    
-    return Allergy(
-        allergy_id=result.allergy_id,
-        patient_id=result.patient_id,
-        allergy_name=result.allergy_name,
-        severity=severity_enum,
-        notes=result.notes,
-        created_at=result.created_at,
-        updated_at=result.updated_at
-    )
+    return Allergy(**{**row, "severity": severity_from_db(row["severity"])})
 
 def update_allergy(db: Session, allergy_id: str, allergy_data: dict) -> Optional[Allergy]:
     """Update an allergy"""
@@ -509,6 +534,7 @@ def update_allergy(db: Session, allergy_id: str, allergy_data: dict) -> Optional
     """)
     
     db.execute(query, update_values)
+    bump_patient_data_versions(db, [allergy.patient_id, update_values.get("patient_id")], collections=(ALLERGIES,))
     db.commit()
     
     return get_allergy_by_id(db, allergy_id)
@@ -517,6 +543,7 @@ def delete_allergy(db: Session, allergy_id: str) -> bool:
     """Delete an allergy"""
     allergy = db.query(Allergy).filter(Allergy.allergy_id == allergy_id).first()
     if allergy:
+        bump_patient_data_version(db, patient_id=allergy.patient_id, collections=(ALLERGIES,))
         db.delete(allergy)
         db.commit()
         return True
@@ -527,128 +554,63 @@ def create_medical_document(db: Session, doc_data: dict) -> MedicalDocument:
     """Create a new medical document"""
     document = MedicalDocument(**doc_data)
     db.add(document)
+    bump_patient_data_version(db, patient_id=doc_data.get("patient_id"), collections=(DOCUMENTS,))
     db.commit()
     db.refresh(document)
     return document
 
-def get_patient_documents(db: Session, patient_id: int) -> List[MedicalDocument]:
-    """Get all documents for a patient"""
+def _select_patient_documents(db: Session, patient_id: int):
     from sqlalchemy import text
     
     # Query with raw SQL to handle enum properly
-    query = text("""
-        SELECT doc_id, patient_id, record_id, file_type, file_url, extract_text, created_at
+    return db.execute(text(f"""
+        SELECT {DOCUMENT_COLUMNS}
         FROM medical_documents
         WHERE patient_id = :patient_id
         ORDER BY created_at DESC
-    """)
-    
-    result = db.execute(query, {"patient_id": patient_id})
-    documents = []
-    
-    for row in result:
-        # Convert file_type string to enum
-        file_type_str = row.file_type.lower() if row.file_type else "pdf"
-        from ..models.medical_document import FileType
-        file_type_enum = None
-        for ft in FileType:
-            if ft.value == file_type_str:
-                file_type_enum = ft
-                break
-        
-        if not file_type_enum:
-            file_type_enum = FileType.PDF  # default
-        
-        document = MedicalDocument(
-            doc_id=row.doc_id,
-            patient_id=row.patient_id,
-            record_id=row.record_id,
-            file_type=file_type_enum,
-            file_url=row.file_url,
-            extract_text=row.extract_text,
-            created_at=row.created_at
-        )
-        documents.append(document)
-    
-    return documents
+    """), {"patient_id": patient_id})
+
+def get_patient_documents(db: Session, patient_id: int) -> List[MedicalDocument]:
+    """Get all documents for a patient"""
+    return [
+        MedicalDocument(**{**row, "file_type": file_type_from_db(row["file_type"])})
+        for row in _select_patient_documents(db, patient_id).mappings()
+    ]
+
+def list_patient_documents(db: Session, patient_id: int) -> List[dict]:
+    """get_patient_documents as MedicalDocumentResponse-shaped dicts (no ORM instances) for list endpoints"""
+    return document_rows(_select_patient_documents(db, patient_id))
 
 def get_record_documents(db: Session, record_id: str) -> List[MedicalDocument]:
     """Get all documents for a medical record"""
     from sqlalchemy import text
     
     # Query with raw SQL to handle enum properly
-    query = text("""
-        SELECT doc_id, patient_id, record_id, file_type, file_url, extract_text, created_at
+    result = db.execute(text(f"""
+        SELECT {DOCUMENT_COLUMNS}
         FROM medical_documents
         WHERE record_id = :record_id
         ORDER BY created_at DESC
-    """)
-    
-    result = db.execute(query, {"record_id": record_id})
-    documents = []
-    
-    for row in result:
-        # Convert file_type string to enum
-        file_type_str = row.file_type.lower() if row.file_type else "pdf"
-        from ..models.medical_document import FileType
-        file_type_enum = None
-        for ft in FileType:
-            if ft.value == file_type_str:
-                file_type_enum = ft
-                break
-        
-        if not file_type_enum:
-            file_type_enum = FileType.PDF  # default
-        
-        document = MedicalDocument(
-            doc_id=row.doc_id,
-            patient_id=row.patient_id,
-            record_id=row.record_id,
-            file_type=file_type_enum,
-            file_url=row.file_url,
-            extract_text=row.extract_text,
-            created_at=row.created_at
-        )
-        documents.append(document)
+    """), {"record_id": record_id})
     
-    return documents
+    return [
+        MedicalDocument(**{**row, "file_type": file_type_from_db(row["file_type"])})
+        for row in result.mappings()
+    ]
 
 def get_medical_document_by_id(db: Session, doc_id: str) -> Optional[MedicalDocument]:
     """Get medical document by ID"""
     from sqlalchemy import text
-    from ..models.medical_document import FileType
     
-    query = text("""
-        SELECT doc_id, patient_id, record_id, file_type, file_url, extract_text, created_at
+    row = db.execute(text(f"""
+        SELECT {DOCUMENT_COLUMNS}
         FROM medical_documents
         WHERE doc_id = :doc_id
-    """)
+    """), {"doc_id": doc_id}).mappings().first()
     
-    result = db.execute(query, {"doc_id": doc_id}).first()
-    
-    if not result:
+    if not row:
         return None
-    
-    # Convert file_type string to enum
-    file_type_str = result.file_type.lower() if result.file_type else "pdf"
-    file_type_enum = None
-    for ft in FileType:
-        if ft.value == file_type_str:
-            file_type_enum = ft
-            break
-    
-    if not file_type_enum:
-        file_type_enum = FileType.PDF  # default
-    
-    return MedicalDocument(
-        doc_id=result.doc_id,
-        patient_id=result.patient_id,
-        record_id=result.record_id,
-        file_type=file_type_enum,
-        file_url=result.file_url,
-        extract_text=result.extract_text,
-        created_at=result.created_at
-    )
+    return MedicalDocument(**{**row, "file_type": file_type_from_db(row["file_type"])})
 
 def update_medical_document(db: Session, doc_id: str, doc_data: dict) -> Optional[MedicalDocument]:
     """Update a medical document"""
@@ -688,6 +650,7 @@ def update_medical_document(db: Session, doc_id: str, doc_data: dict) -> Optiona
     """)
     
     db.execute(query, update_values)
+    bump_patient_data_versions(db, [document.patient_id, update_values.get("patient_id")], collections=(DOCUMENTS,))
     db.commit()
     
     return get_medical_document_by_id(db, doc_id)
@@ -695,8 +658,13 @@ def update_medical_document(db: Session, doc_id: str, doc_data: dict) -> Optiona
 def delete_medical_document(db: Session, doc_id: str) -> bool:
     """Delete a medical document"""
     from sqlalchemy import text
+    owner = db.execute(
+        text("SELECT patient_id FROM medical_documents WHERE doc_id = :doc_id"), {"doc_id": doc_id}
+    ).first()
     query = text("DELETE FROM medical_documents WHERE doc_id = :doc_id")
     result = db.execute(query, {"doc_id": doc_id})
+    if owner:
+        bump_patient_data_version(db, patient_id=owner.patient_id, collections=(DOCUMENTS,))
     db.commit()
     return result.rowcount > 0
 
@@ -710,6 +678,113 @@ def get_patient_by_id(db: Session, patient_id: int):
     
     return db.query(User).filter(User.id == patient_id).first()
 
+_SUMMARY_COUNTERS = (
+    "total_medical_records",
+    "total_diagnoses",
+    "total_prescriptions",
+    "total_lab_results",
+    "total_allergies",
+    "total_documents",
+)
+
+def _count_patient_data(db: Session, patient_id: int) -> Dict[str, int]:
+    """Independent per-table counts (index range per table, no cross-table row explosion)"""
+    from sqlalchemy import text
+    
+    row = db.execute(text("""
+        SELECT
+            (SELECT COUNT(*) FROM medical_records WHERE patient_id = :patient_id) AS total_medical_records,
+            (SELECT COUNT(*) FROM diagnoses d JOIN medical_records mr ON mr.record_id = d.record_id
+              WHERE mr.patient_id = :patient_id) AS total_diagnoses,
+            (SELECT COUNT(*) FROM prescriptions p JOIN medical_records mr ON mr.record_id = p.record_id
+              WHERE mr.patient_id = :patient_id) AS total_prescriptions,
+            (SELECT COUNT(*) FROM lab_results lr JOIN medical_records mr ON mr.record_id = lr.record_id
+              WHERE mr.patient_id = :patient_id) AS total_lab_results,
+            (SELECT COUNT(*) FROM allergies WHERE patient_id = :patient_id) AS total_allergies,
+            (SELECT COUNT(*) FROM medical_documents WHERE patient_id = :patient_id) AS total_documents
+    """), {"patient_id": patient_id}).mappings().one()  # Scalar subqueries only: always exactly one row
+    return {name: int(row[name] or 0) for name in _SUMMARY_COUNTERS}
+
+def get_patient_data_summary(db: Session, patient_id: int) -> Optional[dict]:
+    """
+    Patient info + number of records, diagnoses, prescriptions, lab results, allergies, documents
+    
+    Counters are cached in patient_stats together with the patient_data_versions version
+    they were computed at. Every writer already bumps that version in its own transaction,
+    so a matching version means the counters are exact and the summary is one primary-key
+    lookup; after a write they are recounted once per table. Without the tables
+    (DB/create_patient_stats_table.sql) the counts are computed on every call.
+    """
+    from sqlalchemy import text
+    
+    try:
+        row = db.execute(text("""
+            SELECT u.id, u.name, u.email,
+                   COALESCE(v.version, 0) AS data_version,
+                   s.data_version AS stats_version,
+                   s.total_medical_records, s.total_diagnoses, s.total_prescriptions,
+                   s.total_lab_results, s.total_allergies, s.total_documents
+            FROM users u
+            LEFT JOIN patient_data_versions v ON v.patient_id = u.id
+            LEFT JOIN patient_stats s ON s.patient_id = u.id
+            WHERE u.id = :patient_id
+        """), {"patient_id": patient_id}).mappings().first()
+        stats_table = True
+    except Exception as e:
+        print(f"[Patient Stats] Counter table unavailable, counting directly: {str(e)}")
+        db.rollback()
+        row = db.execute(
+            text("SELECT id, name, email FROM users WHERE id = :patient_id"),
+            {"patient_id": patient_id}
+        ).mappings().first()
+        stats_table = False
+    
+    if not row:
+        return None
+    
+    if stats_table and row["stats_version"] is not None and row["stats_version"] == row["data_version"]:
+        counters = {name: int(row[name]) for name in _SUMMARY_COUNTERS}
+    else:
+        counters = _count_patient_data(db, patient_id)
+        if stats_table:
+            # Served from a replica session: the upsert goes to the primary
+            with primary_session(db) as writer:
+                _store_patient_stats(writer, patient_id, row["data_version"], counters)
+    
+    return {
+        "patient_id": row["id"],
+        "patient_name": row["name"],
+        "patient_email": row["email"],
+        "summary": counters
+    }
+
+def _store_patient_stats(db: Session, patient_id: int, data_version: int, counters: Dict[str, int]) -> None:
+    """Upsert recounted counters; a write racing the recount leaves an older version -> recounted next time"""
+    from sqlalchemy import text
+    
+    try:
+        db.execute(text("""
+            INSERT INTO patient_stats (
+                patient_id, data_version, total_medical_records, total_diagnoses,
+                total_prescriptions, total_lab_results, total_allergies, total_documents
+            ) VALUES (
+                :patient_id, :data_version, :total_medical_records, :total_diagnoses,
+                :total_prescriptions, :total_lab_results, :total_allergies, :total_documents
+            )
+            ON DUPLICATE KEY UPDATE
+                data_version = VALUES(data_version),
+                total_medical_records = VALUES(total_medical_records),
+                total_diagnoses = VALUES(total_diagnoses),
+                total_prescriptions = VALUES(total_prescriptions),
+                total_lab_results = VALUES(total_lab_results),
+                total_allergies = VALUES(total_allergies),
+                total_documents = VALUES(total_documents)
+        """), {"patient_id": patient_id, "data_version": data_version, **counters})
+        db.commit()
+    except Exception as e:
+        print(f"[Patient Stats] Error storing counters for patient {patient_id}: {str(e)}")
+        db.rollback()
+
 def get_complete_patient_data(db: Session, patient_id: int) -> Optional[dict]:
     """
     Get complete patient data including:
@@ -727,6 +802,12 @@ def get_complete_patient_data(db: Session, patient_id: int) -> Optional[dict]:
     # Get all medical records for this patient
     records = get_patient_records(db, patient_id, skip=0, limit=1000)
     
+    # Children of all records: one query per table instead of three per record
+    record_ids = [record.record_id for record in records]
+    diagnoses_by_record = get_children_by_record(db, Diagnosis, record_ids)
+    prescriptions_by_record = get_children_by_record(db, Prescription, record_ids)
+    lab_results_by_record = get_children_by_record(db, LabResult, record_ids)
+    
     # Build complete records with all related data
     complete_records = []
     for record in records:
@@ -749,9 +830,9 @@ def get_complete_patient_data(db: Session, patient_id: int) -> Optional[dict]:
             "doctor_name": record.doctor_name,
             "facility_name": record.facility_name,
             "created_at": record.created_at,
-            "diagnoses": get_record_diagnoses(db, record.record_id),
-            "prescriptions": get_record_prescriptions(db, record.record_id),
-            "lab_results": get_record_lab_results(db, record.record_id),
+            "diagnoses": diagnoses_by_record.get(record.record_id, []),
+            "prescriptions": prescriptions_by_record.get(record.record_id, []),
+            "lab_results": lab_results_by_record.get(record.record_id, []),
         }
         complete_records.append(record_dict)
     
@@ -778,48 +859,71 @@ def get_complete_patient_data(db: Session, patient_id: int) -> Optional[dict]:
     }
 
 # Patient Management CRUD Operations (Admin)
-def search_patients(db: Session, search_query: Optional[str] = None, skip: int = 0, limit: int = 100) -> Tuple[List, int]:
+def _paginate_patients(query, User, skip: int, limit: int, cursor: Optional[str]) -> List:
+    """Newest patients first; keyset on (created_at, id) when a cursor is given, else OFFSET"""
+    query = query.order_by(User.created_at.desc(), User.id.desc())
+    if cursor:
+        return query.filter(keyset_before(User.created_at, User.id, cursor)).limit(limit).all()
+    return query.offset(skip).limit(limit).all()
+
+def search_patients(
+    db: Session,
+    search_query: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = True
+) -> Tuple[List, Optional[int]]:
     """
     Search patients by name, email, KTP number, or phone number
-    Returns: (list of patients, total count)
+    Returns: (list of patients, total count or None when include_total=False)
     Note: MySQL LIKE is case-insensitive with utf8mb4_unicode_ci collation
+    With a cursor the page starts after the cursor's (created_at, id) and skip is ignored.
     """
     # Import here to avoid circular dependency
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
     from auth.models.user import User
-    from sqlalchemy import or_, func
     
-    query = db.query(User)
+    if not search_query or not search_query.strip():
+        return get_all_patients(db, skip=skip, limit=limit, cursor=cursor, include_total=include_total)
     
-    # Apply search filter
-    if search_query:
-        search_term = f"%{search_query}%"
-        # Use LIKE for MySQL (case-insensitive with utf8mb4_unicode_ci collation)
-        # Using LOWER() for better compatibility
-        query = query.filter(
-            or_(
-                func.lower(User.name).like(func.lower(search_term)),
-                func.lower(User.email).like(func.lower(search_term)),
-                User.phoneNumber.like(search_term),
-                User.ktpNumber.like(search_term),
-                User.kkNumber.like(search_term)
-            )
-        )
+    try:
+        return _search_patients_page(db, User, search_query, skip, limit, cursor, include_total)
+    except Exception as e:
+        if not fulltext_index_missing(e):
+            raise
+        db.rollback()
+        return _search_patients_page(db, User, search_query, skip, limit, cursor, include_total)
+
+def _search_patients_page(db: Session, User, search_query: str, skip: int, limit: int,
+                          cursor: Optional[str], include_total: bool) -> Tuple[List, Optional[int]]:
+    """Indexed search (services/patient_search.py); typo-tolerant matches when nothing matches exactly"""
+    # Indexed lookups UNION-ed on id, so COUNT(*) uses the same indexes as the page
+    query = patient_search_query(db, User, search_query)
     
-    # Get total count
-    total = query.count()
+    # Full COUNT(*) is the expensive part of deep listings - only when asked for
+    total = query.count() if include_total else None
+    patients = _paginate_patients(query, User, skip, limit, cursor)
     
-    # Apply pagination and order
-    patients = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+    if not patients and not cursor and skip == 0:
+        patients = fuzzy_name_matches(db, User, search_query, limit)
+        if total is not None:
+            total = len(patients)
     
     return patients, total
 
-def get_all_patients(db: Session, skip: int = 0, limit: int = 100) -> Tuple[List, int]:
+def get_all_patients(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = True
+) -> Tuple[List, Optional[int]]:
     """
     Get all patients with pagination
-    Returns: (list of patients, total count)
+    Returns: (list of patients, total count or None when include_total=False)
     """
     # Import here to avoid circular dependency
     import sys
@@ -829,15 +933,12 @@ def get_all_patients(db: Session, skip: int = 0, limit: int = 100) -> Tuple[List
     
     query = db.query(User)
     
-    # Get total count
-    total = query.count()
+    # Full COUNT(*) is the expensive part of deep listings - only when asked for
+    total = query.count() if include_total else None
     
-    # Apply pagination and order
-    patients = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
-    
-    return patients, total
+    return _paginate_patients(query, User, skip, limit, cursor), total
 
-def update_patient(db: Session, patient_id: int, patient_data: dict) -> Optional:
+def update_patient(db: Session, patient_id: int, patient_data: dict):
     """
     Update patient information
     """
@@ -0,0 +1,53 @@
+"""
+Async CRUD operations for Medical Records routes
+
+Same functions and signatures as crud, awaited with a get_async_db session
+(AsyncSession.run_sync or the threadpool), so DB round trips do not block the event loop.
+"""
+from . import crud
+# sys.path to backend/ is set up by ..core.database (imported by the models)
+from auth.core.async_database import async_crud
+
+create_medical_record = async_crud(crud.create_medical_record)
+create_medical_visit = async_crud(crud.create_medical_visit)
+get_medical_record = async_crud(crud.get_medical_record)
+get_patient_records = async_crud(crud.get_patient_records)
+list_patient_records = async_crud(crud.list_patient_records)
+update_medical_record = async_crud(crud.update_medical_record)
+delete_medical_record = async_crud(crud.delete_medical_record)
+create_diagnosis = async_crud(crud.create_diagnosis)
+get_record_diagnoses = async_crud(crud.get_record_diagnoses)
+get_diagnosis_by_id = async_crud(crud.get_diagnosis_by_id)
+update_diagnosis = async_crud(crud.update_diagnosis)
+delete_diagnosis = async_crud(crud.delete_diagnosis)
+create_prescription = async_crud(crud.create_prescription)
+get_record_prescriptions = async_crud(crud.get_record_prescriptions)
+get_patient_prescriptions = async_crud(crud.get_patient_prescriptions)
+get_prescription_by_id = async_crud(crud.get_prescription_by_id)
+update_prescription = async_crud(crud.update_prescription)
+delete_prescription = async_crud(crud.delete_prescription)
+create_lab_result = async_crud(crud.create_lab_result)
+get_record_lab_results = async_crud(crud.get_record_lab_results)
+get_lab_result_by_id = async_crud(crud.get_lab_result_by_id)
+update_lab_result = async_crud(crud.update_lab_result)
+delete_lab_result = async_crud(crud.delete_lab_result)
+create_allergy = async_crud(crud.create_allergy)
+get_patient_allergies = async_crud(crud.get_patient_allergies)
+list_patient_allergies = async_crud(crud.list_patient_allergies)
+get_allergy_by_id = async_crud(crud.get_allergy_by_id)
+update_allergy = async_crud(crud.update_allergy)
+delete_allergy = async_crud(crud.delete_allergy)
+create_medical_document = async_crud(crud.create_medical_document)
+get_patient_documents = async_crud(crud.get_patient_documents)
+list_patient_documents = async_crud(crud.list_patient_documents)
+get_record_documents = async_crud(crud.get_record_documents)
+get_medical_document_by_id = async_crud(crud.get_medical_document_by_id)
+update_medical_document = async_crud(crud.update_medical_document)
+delete_medical_document = async_crud(crud.delete_medical_document)
+get_patient_by_id = async_crud(crud.get_patient_by_id)
+get_complete_patient_data = async_crud(crud.get_complete_patient_data)
+get_patient_data_summary = async_crud(crud.get_patient_data_summary)
+search_patients = async_crud(crud.search_patients)
+get_all_patients = async_crud(crud.get_all_patients)
+update_patient = async_crud(crud.update_patient)
+delete_patient = async_crud(crud.delete_patient)
@@ -0,0 +1,118 @@
+"""
+Read-path mappers: raw SQL rows -> response dicts
+
+List endpoint sebelumnya membangun instance ORM per baris (dengan loop atas semua
+anggota enum untuk konversi string), lalu route memvalidasi ulang setiap instance
+dengan model_validate. Di sini setiap baris langsung dipetakan ke dict berbentuk
+response schema (MedicalRecordResponse, AllergyResponse, MedicalDocumentResponse)
+memakai lookup dict enum yang dihitung sekali saat import.
+
+Kolom SELECT didefinisikan di sini (*_COLUMNS) agar urutan unpacking tuple selalu
+sama dengan query di crud.py.
+"""
+from typing import Dict, List
+
+from ..models.medical_record import VisitType
+from ..models.allergy import AllergySeverity
+from ..models.medical_document import FileType
+
+# DB stores UPPERCASE (OUTPATIENT) or lowercase values; both map to the same member
+_VISIT_TYPES: Dict[str, VisitType] = {}
+for _member in VisitType:
+    _VISIT_TYPES[_member.value] = _member
+    _VISIT_TYPES[_member.value.upper()] = _member
+
+_SEVERITIES: Dict[str, AllergySeverity] = {}
+for _member in AllergySeverity:
+    _SEVERITIES[_member.value] = _member
+    _SEVERITIES[_member.value.upper()] = _member
+
+_FILE_TYPES: Dict[str, FileType] = {}
+for _member in FileType:
+    _FILE_TYPES[_member.value] = _member
+    _FILE_TYPES[_member.value.upper()] = _member
+
+RECORD_COLUMNS = (
+    "record_id, patient_id, visit_date, visit_type, diagnosis_summary, "
+    "notes, doctor_name, facility_name, created_at"
+)
+ALLERGY_COLUMNS = "allergy_id, patient_id, allergy_name, severity, notes, created_at, updated_at"
+DOCUMENT_COLUMNS = "doc_id, patient_id, record_id, file_type, file_url, extract_text, created_at"
+
+
+def visit_type_from_db(value) -> VisitType:
+    """VisitType for a stored value (default OUTPATIENT)"""
+    member = _VISIT_TYPES.get(value)
+    if member is None and value:
+        member = _VISIT_TYPES.get(str(value).lower())
+    return member or VisitType.OUTPATIENT
+
+
+def severity_from_db(value) -> AllergySeverity:
+    """AllergySeverity for a stored value (default MODERATE)"""
+    member = _SEVERITIES.get(value)
+    if member is None and value:
+        member = _SEVERITIES.get(str(value).lower())
+    return member or AllergySeverity.MODERATE
+
+
+def file_type_from_db(value) -> FileType:
+    """FileType for a stored value (default PDF)"""
+    member = _FILE_TYPES.get(value)
+    if member is None and value:
+        member = _FILE_TYPES.get(str(value).lower())
+    return member or FileType.PDF
+
+
+def medical_record_rows(rows) -> List[dict]:
+    """Rows selected with RECORD_COLUMNS -> MedicalRecordResponse-shaped dicts"""
+    visit_types = _VISIT_TYPES
+    return [
+        {
+            "record_id": record_id,
+            "patient_id": patient_id,
+            "visit_date": visit_date,
+            "visit_type": (visit_types.get(visit_type) or visit_type_from_db(visit_type)).value,
+            "diagnosis_summary": diagnosis_summary,
+            "notes": notes,
+            "doctor_name": doctor_name,
+            "facility_name": facility_name,
+            "created_at": created_at,
+        }
+        for (record_id, patient_id, visit_date, visit_type, diagnosis_summary,
+             notes, doctor_name, facility_name, created_at) in rows
+    ]
+
+
+def allergy_rows(rows) -> List[dict]:
+    """Rows selected with ALLERGY_COLUMNS -> AllergyResponse-shaped dicts"""
+    severities = _SEVERITIES
+    return [
+        {
+            "allergy_id": allergy_id,
+            "patient_id": patient_id,
+            "allergy_name": allergy_name,
+            "severity": (severities.get(severity) or severity_from_db(severity)).value,
+            "notes": notes,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+        for (allergy_id, patient_id, allergy_name, severity, notes, created_at, updated_at) in rows
+    ]
+
+
+def document_rows(rows) -> List[dict]:
+    """Rows selected with DOCUMENT_COLUMNS -> MedicalDocumentResponse-shaped dicts"""
+    file_types = _FILE_TYPES
+    return [
+        {
+            "doc_id": doc_id,
+            "patient_id": patient_id,
+            "record_id": record_id,
+            "file_type": (file_types.get(file_type) or file_type_from_db(file_type)).value,
+            "file_url": file_url,
+            "extract_text": extract_text,
+            "created_at": created_at,
+        }
+        for (doc_id, patient_id, record_id, file_type, file_url, extract_text, created_at) in rows
+    ]
@@ -0,0 +1,147 @@
+"""
+Indexed patient search for the staff search box (/patients?search=, /patients/search)
+
+LOWER(kolom) LIKE '%q%' atas lima kolom tidak bisa memakai index apa pun, sehingga
+setiap ketikan memindai seluruh tabel users. Query sekarang diklasifikasi dulu:
+
+- Angka (KTP/KK/telepon): prefix LIKE 'q%' lewat B-tree index ktpNumber, kkNumber, phoneNumber
+- Mengandung '@': prefix LIKE pada email (unique index)
+- Selain itu nama: phrase match MySQL ngram FULLTEXT (semantik substring seperti LIKE
+  lama) ditambah prefix email
+- Setiap kondisi dijalankan sebagai lookup terpisah yang digabung dengan UNION id:
+  MATCH di dalam OR membuat MySQL tidak bisa memakai FULLTEXT index sama sekali
+  (cek dengan benchmarks/check_patient_search_plan.py)
+- Toleran typo: jika nama tidak ditemukan sama sekali, hasil diisi NATURAL LANGUAGE MODE
+  yang diurutkan berdasarkan jumlah bigram yang sama ("raihna" tetap menemukan "Raihan")
+
+Collation utf8mb4_unicode_ci sudah membuat LIKE dan MATCH case-insensitive.
+Tanpa FULLTEXT index (DB/add_patient_search_indexes.sql belum dijalankan) search
+kembali ke LIKE scan lama agar tetap berfungsi.
+"""
+import re
+from typing import List
+
+from sqlalchemy import func, or_, select, text, union
+from sqlalchemy.orm import Query, Session
+
+from ..core.config import PATIENT_SEARCH_FULLTEXT, PATIENT_SEARCH_FUZZY_MIN_LENGTH
+
+_IDENTIFIER_RE = re.compile(r"^\+?[\d\s.-]+$")
+_IDENTIFIER_SEPARATORS_RE = re.compile(r"[\s.-]+")
+_BOOLEAN_OPERATORS_RE = re.compile(r'[+\-<>()~*"@]+')
+# innodb ngram_token_size default: shorter terms never match the FULLTEXT index
+_NGRAM_TOKEN_SIZE = 2
+
+_NATURAL_MATCH = "MATCH (users.name) AGAINST (:fuzzy_name IN NATURAL LANGUAGE MODE)"
+
+_fulltext_available = PATIENT_SEARCH_FULLTEXT
+
+
+def _prefix(value: str) -> str:
+    """LIKE pattern 'value%' with wildcards in the value escaped"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def is_identifier_query(search_query: str) -> bool:
+    """KTP, KK or phone number (digits with optional +, spaces, dots, dashes)"""
+    query = search_query.strip()
+    return bool(_IDENTIFIER_RE.match(query)) and any(ch.isdigit() for ch in query)
+
+
+def _name_terms(search_query: str) -> List[str]:
+    return _BOOLEAN_OPERATORS_RE.sub(" ", search_query).split()
+
+
+def patient_search_conditions(User, search_query: str) -> List:
+    """
+    Conditions of a staff search query, each served by one index when installed
+    A user matches if any condition matches (see patient_search_query).
+    """
+    query = search_query.strip()
+    if not _fulltext_available:
+        return [legacy_search_filter(User, query)]
+
+    if is_identifier_query(query):
+        pattern = _prefix(_IDENTIFIER_SEPARATORS_RE.sub("", query))
+        return [
+            User.ktpNumber.like(pattern, escape="\\"),
+            User.kkNumber.like(pattern, escape="\\"),
+            User.phoneNumber.like(pattern, escape="\\")
+        ]
+
+    email_prefix = User.email.like(_prefix(query), escape="\\")
+    if "@" in query:
+        return [email_prefix]
+
+    terms = _name_terms(query)
+    if not terms or min(len(term) for term in terms) < _NGRAM_TOKEN_SIZE:
+        return [User.name.like(_prefix(query), escape="\\"), email_prefix]
+    # MySQL renders .match() as MATCH ... AGAINST (... IN BOOLEAN MODE); quoted = phrase
+    return [User.name.match('"' + " ".join(terms) + '"'), email_prefix]
+
+
+def patient_search_query(db: Session, User, search_query: str) -> Query:
+    """
+    Users matching a staff search query
+    Several conditions are not OR-ed in one WHERE (a MATCH inside OR disables the
+    FULLTEXT index): each runs as its own indexed id lookup, the UNION of ids is
+    materialized as a derived table and joined back on the primary key.
+    """
+    conditions = patient_search_conditions(User, search_query)
+    if len(conditions) == 1:
+        return db.query(User).filter(conditions[0])
+    matched_ids = union(*[select(User.id).where(condition) for condition in conditions]).subquery("matched_ids")
+    return db.query(User).join(matched_ids, User.id == matched_ids.c.id)
+
+
+def legacy_search_filter(User, search_query: str):
+    """Original substring scan over name, email, phone, KTP and KK (no index usable)"""
+    search_term = f"%{search_query}%"
+    return or_(
+        func.lower(User.name).like(func.lower(search_term)),
+        func.lower(User.email).like(func.lower(search_term)),
+        User.phoneNumber.like(search_term),
+        User.ktpNumber.like(search_term),
+        User.kkNumber.like(search_term)
+    )
+
+
+def fuzzy_name_matches(db: Session, User, search_query: str, limit: int) -> List:
+    """
+    Typo-tolerant name matches ranked by shared ngrams (best first)
+    Only for name queries of at least PATIENT_SEARCH_FUZZY_MIN_LENGTH characters.
+    """
+    query = search_query.strip()
+    if (
+        not _fulltext_available
+        or limit <= 0
+        or len(query) < PATIENT_SEARCH_FUZZY_MIN_LENGTH
+        or "@" in query
+        or is_identifier_query(query)
+    ):
+        return []
+    terms = " ".join(_name_terms(query))
+    if not terms:
+        return []
+
+    return (
+        db.query(User)
+        .filter(text(_NATURAL_MATCH))
+        .order_by(text(_NATURAL_MATCH + " DESC"), User.id.desc())
+        .params(fuzzy_name=terms)
+        .limit(limit)
+        .all()
+    )
+
+
+def fulltext_index_missing(error: Exception) -> bool:
+    """
+    True (and switch this process to the LIKE fallback) when MySQL reports the
+    FULLTEXT index on users.name is not installed
+    """
+    global _fulltext_available
+    if not _fulltext_available or "fulltext" not in str(error).lower():
+        return False
+    _fulltext_available = False
+    print(f"[Patient Search] FULLTEXT index unavailable, falling back to LIKE scan: {error}")
+    return True
@@ -1,11 +1,11 @@
 """
 Allergies API Routes (Mobile - Read Only for Users)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_user_for_rm_mobile
 import sys
 import os
@@ -15,35 +15,44 @@ _parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os
 sys.path.append(_parent_dir)
 
 from rm_service.schemas.allergy import AllergyResponse
-from rm_service.services.crud import (
+from rm_service.services.crud_async import (
     get_allergy_by_id,
-    get_patient_allergies,
+    list_patient_allergies,
 )
+from auth.core.responses import FastJSONResponse
+from auth.core.conditional import load_collection_stamp, not_modified_response, stamp_headers
+from auth.core.data_versions import ALLERGIES
 
 router = APIRouter(prefix="/allergies", tags=["Allergies (Mobile)"])
 
 @router.get("/my-allergies", response_model=List[AllergyResponse])
 async def get_my_allergies(
+    request: Request,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all allergies for current user
     **Requires user authentication** - User can only view their own allergies
+    Send the `ETag` back as `If-None-Match`: 304 while the allergies are unchanged.
     """
-    return get_patient_allergies(db, current_user.id)
+    stamp = await db.run_sync(load_collection_stamp, current_user.id, ALLERGIES)
+    cached = not_modified_response(request, stamp)
+    if cached is not None:
+        return cached
+    return FastJSONResponse(await list_patient_allergies(db, current_user.id), headers=stamp_headers(stamp))
 
 @router.get("/{allergy_id}", response_model=AllergyResponse)
 async def get_allergy_route(
     allergy_id: str,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get allergy by ID
     **Requires user authentication** - User can only view their own allergies
     """
-    allergy = get_allergy_by_id(db, allergy_id)
+    allergy = await get_allergy_by_id(db, allergy_id)
     if not allergy:
         raise HTTPException(status_code=404, detail="Allergy not found")
     
@@ -2,10 +2,10 @@
 Diagnoses API Routes (Mobile - Read Only for Users)
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_user_for_rm_mobile
 import sys
 import os
@@ -15,7 +15,7 @@ _parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os
 sys.path.append(_parent_dir)
 
 from rm_service.schemas.diagnosis import DiagnosisResponse
-from rm_service.services.crud import (
+from rm_service.services.crud_async import (
     get_diagnosis_by_id,
     get_record_diagnoses,
     get_medical_record,
@@ -27,14 +27,14 @@ router = APIRouter(prefix="/diagnoses", tags=["Diagnoses (Mobile)"])
 async def get_record_diagnoses_route(
     record_id: str,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all diagnoses for a medical record
     **Requires user authentication** - User can only view diagnoses for their own records
     """
     # Verify that the medical record exists and belongs to current user
-    record = get_medical_record(db, record_id)
+    record = await get_medical_record(db, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     if record.patient_id != current_user.id:
@@ -43,25 +43,25 @@ async def get_record_diagnoses_route(
             detail="Not authorized to view this record"
         )
     
-    diagnoses = get_record_diagnoses(db, record_id)
+    diagnoses = await get_record_diagnoses(db, record_id)
     return [DiagnosisResponse.model_validate(d) for d in diagnoses]
 
 @router.get("/{diagnosis_id}", response_model=DiagnosisResponse)
 async def get_diagnosis_route(
     diagnosis_id: str,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get diagnosis by ID
     **Requires user authentication** - User can only view diagnoses for their own records
     """
-    diagnosis = get_diagnosis_by_id(db, diagnosis_id)
+    diagnosis = await get_diagnosis_by_id(db, diagnosis_id)
     if not diagnosis:
         raise HTTPException(status_code=404, detail="Diagnosis not found")
     
     # Verify that the medical record belongs to current user
-    record = get_medical_record(db, diagnosis.record_id)
+    record = await get_medical_record(db, diagnosis.record_id)
     if not record or record.patient_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1,11 +1,11 @@
 """
 Medical Documents API Routes (Mobile - Read Only for Users)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_user_for_rm_mobile
 import sys
 import os
@@ -15,39 +15,47 @@ _parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os
 sys.path.append(_parent_dir)
 
 from rm_service.schemas.medical_document import MedicalDocumentResponse
-from rm_service.services.crud import (
+from rm_service.services.crud_async import (
     get_medical_document_by_id,
-    get_patient_documents,
+    list_patient_documents,
     get_record_documents,
     get_medical_record,
 )
+from auth.core.responses import FastJSONResponse
+from auth.core.conditional import load_collection_stamp, not_modified_response, stamp_headers
+from auth.core.data_versions import DOCUMENTS
 
 router = APIRouter(prefix="/medical-documents", tags=["Medical Documents (Mobile)"])
 
 @router.get("/my-documents", response_model=List[MedicalDocumentResponse])
 async def get_my_documents(
+    request: Request,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all medical documents for current user
     **Requires user authentication** - User can only view their own documents
+    Send the `ETag` back as `If-None-Match`: 304 while the documents are unchanged.
     """
-    documents = get_patient_documents(db, current_user.id)
-    return [MedicalDocumentResponse.model_validate(d) for d in documents]
+    stamp = await db.run_sync(load_collection_stamp, current_user.id, DOCUMENTS)
+    cached = not_modified_response(request, stamp)
+    if cached is not None:
+        return cached
+    return FastJSONResponse(await list_patient_documents(db, current_user.id), headers=stamp_headers(stamp))
 
 @router.get("/record/{record_id}", response_model=List[MedicalDocumentResponse])
 async def get_record_documents_route(
     record_id: str,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all medical documents for a medical record
     **Requires user authentication** - User can only view documents for their own records
     """
     # Verify that the medical record exists and belongs to current user
-    record = get_medical_record(db, record_id)
+    record = await get_medical_record(db, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     if record.patient_id != current_user.id:
@@ -56,20 +64,20 @@ async def get_record_documents_route(
             detail="Not authorized to view this record"
         )
     
-    documents = get_record_documents(db, record_id)
+    documents = await get_record_documents(db, record_id)
     return [MedicalDocumentResponse.model_validate(d) for d in documents]
 
 @router.get("/{doc_id}", response_model=MedicalDocumentResponse)
 async def get_medical_document_route(
     doc_id: str,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get medical document by ID
     **Requires user authentication** - User can only view their own documents
     """
-    document = get_medical_document_by_id(db, doc_id)
+    document = await get_medical_document_by_id(db, doc_id)
     if not document:
         raise HTTPException(status_code=404, detail="Medical document not found")
     
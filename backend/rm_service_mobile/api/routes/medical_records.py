@@ -1,11 +1,11 @@
 """
 Medical Records API Routes (Mobile - Read Only for Users)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_user_for_rm_mobile
 import sys
 import os
@@ -15,34 +15,56 @@ _parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os
 sys.path.append(_parent_dir)
 
 from rm_service.schemas.medical_record import MedicalRecordResponse, MedicalRecordFull
-from rm_service.services.crud import (
+from rm_service.services.crud_async import (
     get_medical_record,
-    get_patient_records,
+    list_patient_records,
     get_record_diagnoses,
     get_record_prescriptions,
     get_record_lab_results,
 )
+from auth.core.pagination import next_cursor
+from auth.core.responses import FastJSONResponse
+from auth.core.conditional import load_collection_stamp, not_modified_response, stamp_headers
+from auth.core.data_versions import RECORDS
 
 router = APIRouter(prefix="/medical-records", tags=["Medical Records (Mobile)"])
 
 @router.get("/my-records", response_model=List[MedicalRecordResponse])
 async def get_my_records(
+    request: Request,
     current_user = Depends(get_current_active_user_for_rm_mobile),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get my medical records (current logged in user)
     **Requires user authentication** - User can only view their own records
+    
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page.
+    Send the `ETag` back as `If-None-Match`: 304 while the records are unchanged.
     """
-    return get_patient_records(db, current_user.id, skip, limit)
+    stamp = await db.run_sync(load_collection_stamp, current_user.id, RECORDS)
+    cached = not_modified_response(request, stamp)
+    if cached is not None:
+        return cached
+    try:
+        records = await list_patient_records(db, current_user.id, skip, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_cursor = next_cursor(records, limit, "visit_date", "record_id")
+    headers = stamp_headers(stamp)
+    if page_cursor:
+        headers["X-Next-Cursor"] = page_cursor
+    # Mapper dicts already match MedicalRecordResponse - skip re-validation
+    return FastJSONResponse(records, headers=headers)
 
 @router.get("/{record_id}", response_model=MedicalRecordFull)
 async def get_record(
     record_id: str,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get medical record by ID with all related data
@@ -52,7 +74,7 @@ async def get_record(
     from rm_service.schemas.prescription import PrescriptionResponse
     from rm_service.schemas.lab_result import LabResultResponse
     
-    record = get_medical_record(db, record_id)
+    record = await get_medical_record(db, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     
@@ -64,9 +86,9 @@ async def get_record(
         )
     
     # Get related data
-    diagnoses = [DiagnosisResponse.model_validate(d) for d in get_record_diagnoses(db, record_id)]
-    prescriptions = [PrescriptionResponse.model_validate(p) for p in get_record_prescriptions(db, record_id)]
-    lab_results = [LabResultResponse.model_validate(l) for l in get_record_lab_results(db, record_id)]
+    diagnoses = [DiagnosisResponse.model_validate(d) for d in await get_record_diagnoses(db, record_id)]
+    prescriptions = [PrescriptionResponse.model_validate(p) for p in await get_record_prescriptions(db, record_id)]
+    lab_results = [LabResultResponse.model_validate(l) for l in await get_record_lab_results(db, record_id)]
     
     record_dict = MedicalRecordResponse.model_validate(record).model_dump()
     record_dict["diagnoses"] = [d.model_dump() for d in diagnoses]
@@ -1,11 +1,11 @@
 """
 Prescriptions API Routes (Mobile - Read Only for Users)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.dependencies import get_current_active_user_for_rm_mobile
 import sys
 import os
@@ -15,39 +15,49 @@ _parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os
 sys.path.append(_parent_dir)
 
 from rm_service.schemas.prescription import PrescriptionResponse
-from rm_service.services.crud import (
+from rm_service.services.crud_async import (
     get_prescription_by_id,
     get_record_prescriptions,
     get_medical_record,
     get_patient_prescriptions,
 )
+from auth.core.conditional import load_collection_stamp, not_modified_response, stamp_headers
+from auth.core.data_versions import PRESCRIPTIONS
 
 router = APIRouter(prefix="/prescriptions", tags=["Prescriptions (Mobile)"])
 
 @router.get("/my-medications", response_model=List[PrescriptionResponse])
 async def get_my_medications_route(
+    request: Request,
+    response: Response,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all medications (prescriptions) consumed by the current patient
     **Requires user authentication** - Returns all prescriptions across all medical records for the authenticated user
+    Send the `ETag` back as `If-None-Match`: 304 while the prescriptions are unchanged.
     """
-    prescriptions = get_patient_prescriptions(db, current_user.id)
+    stamp = await db.run_sync(load_collection_stamp, current_user.id, PRESCRIPTIONS)
+    cached = not_modified_response(request, stamp)
+    if cached is not None:
+        return cached
+    response.headers.update(stamp_headers(stamp))
+    prescriptions = await get_patient_prescriptions(db, current_user.id)
     return [PrescriptionResponse.model_validate(p) for p in prescriptions]
 
 @router.get("/record/{record_id}", response_model=List[PrescriptionResponse])
 async def get_record_prescriptions_route(
     record_id: str,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all prescriptions for a medical record
     **Requires user authentication** - User can only view prescriptions for their own records
     """
     # Verify that the medical record exists and belongs to current user
-    record = get_medical_record(db, record_id)
+    record = await get_medical_record(db, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     if record.patient_id != current_user.id:
@@ -56,25 +66,25 @@ async def get_record_prescriptions_route(
             detail="Not authorized to view this record"
         )
     
-    prescriptions = get_record_prescriptions(db, record_id)
+    prescriptions = await get_record_prescriptions(db, record_id)
     return [PrescriptionResponse.model_validate(p) for p in prescriptions]
 
 @router.get("/{prescription_id}", response_model=PrescriptionResponse)
 async def get_prescription_route(
     prescription_id: str,
     current_user = Depends(get_current_active_user_for_rm_mobile),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get prescription by ID
     **Requires user authentication** - User can only view prescriptions for their own records
     """
-    prescription = get_prescription_by_id(db, prescription_id)
+    prescription = await get_prescription_by_id(db, prescription_id)
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     
     # Verify that the medical record belongs to current user
-    record = get_medical_record(db, prescription.record_id)
+    record = await get_medical_record(db, prescription.record_id)
     if not record or record.patient_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -6,7 +6,10 @@ import os
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from rm_service.core.database import engine, Base, get_db
+from rm_service.core.database import engine, Base, get_pool_stats
+# Read-only service: every route reads from the replica pool when DB_REPLICA_HOST is set
+from auth.core.database import get_read_db as get_db
+from auth.core.async_database import get_async_read_db as get_async_db
 
-__all__ = ["engine", "Base", "get_db"]
+__all__ = ["engine", "Base", "get_db", "get_async_db", "get_pool_stats"]
 
@@ -5,6 +5,7 @@ import sys
 import os
 from typing import TYPE_CHECKING
 from fastapi import Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 # Add parent directory to import auth dependencies
@@ -19,50 +20,10 @@ if TYPE_CHECKING:
 # HTTPBearer untuk Swagger UI - bisa langsung paste token
 security = HTTPBearer(auto_error=False)
 
-# Lazy-initialized database engine and session (singleton pattern)
-_auth_engine = None
-_auth_session_local = None
-
 def _get_auth_db_session():
-    """Get auth database session - lazy initialization to avoid circular import"""
-    global _auth_engine, _auth_session_local
-    
-    if _auth_engine is None:
-        # Lazy import config - import directly from config module
-        import os
-        from dotenv import load_dotenv
-        load_dotenv()
-        
-        # Get DB config from environment or use defaults
-        DB_USER = os.getenv("DB_USER", "root")
-        DB_PASSWORD = os.getenv("DB_PASSWORD", "")
-        DB_HOST = os.getenv("DB_HOST", "localhost")
-        DB_PORT = int(os.getenv("DB_PORT", "3306"))
-        DB_NAME = os.getenv("DB_NAME", "healthkon")
-        
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        from sqlalchemy.pool import QueuePool
-        
-        # Create database connection
-        DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-        _auth_engine = create_engine(
-            DATABASE_URL,
-            poolclass=QueuePool,
-            pool_pre_ping=True,
-            pool_recycle=300,
-            pool_size=5,
-            max_overflow=10,
-            connect_args={
-                "connect_timeout": 10,
-                "read_timeout": 10,
-                "write_timeout": 10,
-                "charset": "utf8mb4",
-            }
-        )
-        _auth_session_local = sessionmaker(autocommit=False, autoflush=False, bind=_auth_engine)
-    
-    return _auth_session_local()
+    """Session from the process-wide pool (auth.core.database) - lazy import to avoid circular import"""
+    from auth.core.database import SessionLocal
+    return SessionLocal()
 
 async def get_current_user_from_token(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -105,7 +66,7 @@ async def get_current_user_from_token(
         db = _get_auth_db_session()
         
         # Query user by email - RM Mobile hanya untuk user biasa
-        user = db.query(User).filter(User.email == token_data.email).first()
+        user = await run_in_threadpool(lambda: db.query(User).filter(User.email == token_data.email).first())
         
         if user is None:
             print(f"[RM Mobile] User not found for email: {token_data.email}")
@@ -117,7 +78,8 @@ async def get_current_user_from_token(
                 detail="Access denied. This service is only accessible by regular users. Please login as user (not petugas)."
             )
         
-        # Return user (db will be closed after request)
+        # Loaded columns stay readable; return the connection to the shared pool now
+        db.close()
         return user
         
     except HTTPException:
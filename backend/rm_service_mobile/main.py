@@ -3,6 +3,7 @@ Main FastAPI application for RM Service Mobile (User - Read Only)
 """
 from fastapi import FastAPI
 from .api.routes import medical_records, allergies, diagnoses, prescriptions, lab_results, medical_documents, relations
+from .core.database import get_pool_stats
 
 app = FastAPI(
     title="RM Service Mobile",
@@ -29,3 +30,7 @@ async def root():
         "description": "Read-only service for users to view their medical records"
     }
 
+@app.get("/health/db/pool")
+async def db_pool_stats():
+    """Connection pool statistics of this process (checked out, overflow, wait time)"""
+    return get_pool_stats()